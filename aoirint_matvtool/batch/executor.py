@@ -0,0 +1,189 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+from logging import getLogger
+from time import perf_counter
+
+from pydantic import BaseModel
+
+from ..utility.ffmpeg_benchmark import record_ffmpeg_cpu_time
+from ..video_utility.audio_selector import AudioSelector, AudioSelectorProgress
+from ..video_utility.crop_scaler import CropScaler, CropScalerProgress
+from ..video_utility.video_slicer import VideoSlicer, VideoSlicerProgress
+from .job import (
+    BatchCropScaleJob,
+    BatchJob,
+    BatchJobResourceType,
+    BatchSelectAudioJob,
+    BatchSliceJob,
+)
+
+logger = getLogger(__name__)
+
+
+class BatchProgress(BaseModel):
+    finished_jobs: int
+    total_jobs: int
+    # 全てのジョブで出力したフレーム数・時間の合計
+    frame: int
+    time: timedelta
+
+
+class BatchJobResult(BaseModel):
+    job_index: int
+    job: BatchJob
+    wall_time: timedelta
+    # FFmpeg の -benchmark で計測した、ユーザー時間とシステム時間の合計
+    cpu_time: timedelta
+    error: str | None = None
+
+
+class BatchExecutor:
+    """
+    スライス・音声選択・クロップ/スケールのジョブを、同時実行数を制限して並行実行する
+
+    エンコードするジョブ（CPU）とストリームコピーするジョブ（I/O）で、
+    別々の同時実行数の上限を設ける
+    """
+
+    def __init__(
+        self,
+        video_slicer: VideoSlicer,
+        audio_selector: AudioSelector,
+        crop_scaler: CropScaler,
+        max_cpu_jobs: int,
+        max_io_jobs: int,
+    ) -> None:
+        if max_cpu_jobs < 1:
+            raise ValueError(
+                f"Invalid max_cpu_jobs: {max_cpu_jobs}. Specify 1 or more."
+            )
+        if max_io_jobs < 1:
+            raise ValueError(f"Invalid max_io_jobs: {max_io_jobs}. Specify 1 or more.")
+
+        self._video_slicer = video_slicer
+        self._audio_selector = audio_selector
+        self._crop_scaler = crop_scaler
+        self._semaphores: dict[BatchJobResourceType, asyncio.Semaphore] = {
+            "cpu": asyncio.Semaphore(max_cpu_jobs),
+            "io": asyncio.Semaphore(max_io_jobs),
+        }
+
+    async def execute(
+        self,
+        jobs: list[BatchJob],
+        progress_handler: Callable[[BatchProgress], Awaitable[None]] | None = None,
+        job_finished_handler: (
+            Callable[[BatchJobResult], Awaitable[None]] | None
+        ) = None,
+    ) -> list[BatchJobResult]:
+        """
+        全てのジョブを実行し、ジョブの順に結果を返す
+
+        失敗したジョブがあっても、他のジョブの実行は続ける
+        """
+        job_progresses: dict[int, tuple[int, timedelta]] = {}
+        finished_jobs = 0
+
+        async def _report_progress() -> None:
+            if progress_handler is None:
+                return
+
+            await progress_handler(
+                BatchProgress(
+                    finished_jobs=finished_jobs,
+                    total_jobs=len(jobs),
+                    frame=sum(frame for frame, _ in job_progresses.values()),
+                    time=sum(
+                        (job_time for _, job_time in job_progresses.values()),
+                        start=timedelta(),
+                    ),
+                ),
+            )
+
+        async def _run(job_index: int, job: BatchJob) -> BatchJobResult:
+            nonlocal finished_jobs
+
+            async def _handle_job_progress(frame: int, time: timedelta) -> None:
+                job_progresses[job_index] = (frame, time)
+                await _report_progress()
+
+            async with self._semaphores[job.resource_type]:
+                error: str | None = None
+                start_time = perf_counter()
+                with record_ffmpeg_cpu_time() as cpu_time:
+                    try:
+                        await self._run_job(
+                            job=job,
+                            progress_handler=_handle_job_progress,
+                        )
+                    except Exception as job_error:
+                        logger.exception("Batch job %d failed.", job_index)
+                        error = str(job_error)
+
+                wall_seconds = perf_counter() - start_time
+
+            result = BatchJobResult(
+                job_index=job_index,
+                job=job,
+                wall_time=timedelta(seconds=wall_seconds),
+                cpu_time=timedelta(seconds=cpu_time.total_seconds),
+                error=error,
+            )
+
+            finished_jobs += 1
+            await _report_progress()
+            if job_finished_handler is not None:
+                await job_finished_handler(result)
+
+            return result
+
+        return await asyncio.gather(
+            *(_run(job_index, job) for job_index, job in enumerate(jobs)),
+        )
+
+    async def _run_job(
+        self,
+        job: BatchJob,
+        progress_handler: Callable[[int, timedelta], Awaitable[None]],
+    ) -> None:
+        if isinstance(job, BatchSliceJob):
+
+            async def _handle_slice_progress(progress: VideoSlicerProgress) -> None:
+                await progress_handler(progress.internal_frame, progress.internal_time)
+
+            await self._video_slicer.slice_video(
+                ss=job.ss,
+                to=job.to,
+                input_path=job.input_path,
+                output_path=job.output_path,
+                progress_handler=_handle_slice_progress,
+            )
+        elif isinstance(job, BatchSelectAudioJob):
+
+            async def _handle_select_audio_progress(
+                progress: AudioSelectorProgress,
+            ) -> None:
+                await progress_handler(progress.internal_frame, progress.internal_time)
+
+            await self._audio_selector.select_audio(
+                input_path=job.input_path,
+                audio_indexes=job.audio_indexes,
+                output_path=job.output_path,
+                progress_handler=_handle_select_audio_progress,
+            )
+        elif isinstance(job, BatchCropScaleJob):
+
+            async def _handle_crop_scale_progress(progress: CropScalerProgress) -> None:
+                await progress_handler(progress.internal_frame, progress.internal_time)
+
+            await self._crop_scaler.crop_scale(
+                input_path=job.input_path,
+                crop=job.crop,
+                scale=job.scale,
+                video_codec=job.video_codec,
+                output_path=job.output_path,
+                progress_handler=_handle_crop_scale_progress,
+            )
+        else:
+            raise ValueError(f"Unsupported job: {job}")
@@ -0,0 +1,75 @@
+from pathlib import Path
+from typing import Annotated, ClassVar, Literal
+
+from pydantic import BaseModel, Field, TypeAdapter
+
+# CPU を使うジョブ（エンコード）と、I/O が中心のジョブ（ストリームコピー）の区別
+BatchJobResourceType = Literal["cpu", "io"]
+
+
+class BatchSliceJob(BaseModel):
+    resource_type: ClassVar[BatchJobResourceType] = "io"
+
+    type: Literal["slice"]
+    input_path: Path
+    output_path: Path
+    ss: str
+    to: str
+
+
+class BatchSelectAudioJob(BaseModel):
+    resource_type: ClassVar[BatchJobResourceType] = "io"
+
+    type: Literal["select_audio"]
+    input_path: Path
+    output_path: Path
+    audio_indexes: list[int]
+
+
+class BatchCropScaleJob(BaseModel):
+    resource_type: ClassVar[BatchJobResourceType] = "cpu"
+
+    type: Literal["crop_scale"]
+    input_path: Path
+    output_path: Path
+    crop: str | None = None
+    scale: str | None = None
+    video_codec: str | None = None
+
+
+BatchJob = Annotated[
+    BatchSliceJob | BatchSelectAudioJob | BatchCropScaleJob,
+    Field(discriminator="type"),
+]
+
+_batch_job_adapter: TypeAdapter[BatchJob] = TypeAdapter(BatchJob)
+
+
+def read_batch_jobs_file(jobs_path: Path) -> list[BatchJob]:
+    """
+    1行に1つの JSON（NDJSON）でジョブを記述したファイルを読み込む
+
+    相対パスは、ジョブファイルのディレクトリからのパスとして解決する
+    空行と # で始まる行は無視する
+    """
+    base_dir = jobs_path.parent
+
+    jobs: list[BatchJob] = []
+    with jobs_path.open("r", encoding="utf-8") as fp:
+        for line_number, line in enumerate(fp, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            try:
+                job = _batch_job_adapter.validate_json(line)
+            except ValueError as error:
+                raise ValueError(
+                    f"Invalid job at line {line_number} of {jobs_path}: {error}",
+                ) from error
+
+            job.input_path = base_dir / job.input_path
+            job.output_path = base_dir / job.output_path
+            jobs.append(job)
+
+    return jobs
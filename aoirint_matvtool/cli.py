@@ -1,17 +1,35 @@
 import asyncio
+import importlib
 import logging
+import sys
 from argparse import ArgumentParser, Namespace
 from asyncio import iscoroutinefunction
+from collections.abc import Collection
+from pathlib import Path
 
 from . import __version__ as APP_VERSION
 from . import config
-from .command.audio import add_arguments_audio_cli
-from .command.crop_scale import add_arguments_crop_scale_cli
-from .command.find_image import add_arguments_find_image_cli
-from .command.fps import add_arguments_fps_cli
-from .command.key_frames import add_arguments_key_frames_cli
-from .command.select_audio import add_arguments_select_audio_cli
-from .command.slice import add_arguments_slice_cli
+
+# サブコマンド名（aoirint_matvtool.command 以下のモジュール名）
+# NOTE: 起動を速くするため、モジュールは選ばれたサブコマンドの分だけ読み込む
+SUBCOMMAND_NAMES = (
+    "fps",
+    "key_frames",
+    "slice",
+    "split",
+    "crop_scale",
+    "detect_crop",
+    "find_image",
+    "find_audio",
+    "index",
+    "audio",
+    "select_audio",
+    "extract_audio",
+    "batch",
+    "worker",
+    "serve",
+    "client",
+)
 
 
 async def execute_main_cli(
@@ -20,6 +38,7 @@ async def execute_main_cli(
     log_level: int,
     ffmpeg_path: str,
     ffprobe_path: str,
+    cache_dir: Path | None,
 ) -> None:
     logging.basicConfig(
         level=log_level,
@@ -28,6 +47,7 @@ async def execute_main_cli(
 
     config.FFMPEG_PATH = ffmpeg_path
     config.FFPROBE_PATH = ffprobe_path
+    config.CACHE_DIR = cache_dir
 
     if hasattr(args, "handler"):
         if iscoroutinefunction(args.handler):
@@ -47,6 +67,10 @@ async def handle_main_cli(
     log_level: int = args.log_level
     ffmpeg_path: str = args.ffmpeg_path
     ffprobe_path: str = args.ffprobe_path
+    cache_dir_string: str = args.cache_dir
+    no_cache: bool = args.no_cache
+
+    cache_dir = Path(cache_dir_string) if not no_cache else None
 
     await execute_main_cli(
         parser=parser,
@@ -54,44 +78,71 @@ async def handle_main_cli(
         log_level=log_level,
         ffmpeg_path=ffmpeg_path,
         ffprobe_path=ffprobe_path,
+        cache_dir=cache_dir,
     )
 
 
-async def add_arguments_main_cli(parser: ArgumentParser) -> None:
+async def add_arguments_main_cli(
+    parser: ArgumentParser,
+    subcommand_names: Collection[str] | None = None,
+) -> None:
+    """
+    subcommand_names を指定すると、そのサブコマンドの引数のみ定義する（None なら全て）
+    """
     parser.add_argument("-l", "--log_level", type=int, default=logging.INFO)
     parser.add_argument("-v", "--version", action="version", version=APP_VERSION)
     parser.add_argument("--ffmpeg_path", type=str, default=config.FFMPEG_PATH)
     parser.add_argument("--ffprobe_path", type=str, default=config.FFPROBE_PATH)
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        default=str(config.CACHE_DIR),
+        help="Cache directory (default: $XDG_CACHE_HOME/aoirint_matvtool)",
+    )
+    parser.add_argument("--no_cache", action="store_true", help="Disable cache")
 
     subparsers = parser.add_subparsers()
 
-    parser_fps = subparsers.add_parser("fps")
-    await add_arguments_fps_cli(parser=parser_fps)
+    for subcommand_name in SUBCOMMAND_NAMES:
+        if subcommand_names is not None and subcommand_name not in subcommand_names:
+            # 引数を定義しないサブコマンドは、名前を選択肢として登録するだけにする
+            bare_subparser = subparsers.add_parser(subcommand_name, add_help=False)
+            bare_subparser.set_defaults(subcommand_name=subcommand_name)
+            continue
 
-    parser_key_frames = subparsers.add_parser("key_frames")
-    await add_arguments_key_frames_cli(parser=parser_key_frames)
+        command_module = importlib.import_module(
+            f".command.{subcommand_name}",
+            package=__package__,
+        )
+        add_arguments = getattr(command_module, f"add_arguments_{subcommand_name}_cli")
 
-    parser_slice = subparsers.add_parser("slice")
-    await add_arguments_slice_cli(parser=parser_slice)
+        subparser = subparsers.add_parser(subcommand_name)
+        await add_arguments(parser=subparser)
 
-    parser_crop_scale = subparsers.add_parser("crop_scale")
-    await add_arguments_crop_scale_cli(parser=parser_crop_scale)
 
-    parser_find_image = subparsers.add_parser("find_image")
-    await add_arguments_find_image_cli(parser=parser_find_image)
-
-    parser_audio = subparsers.add_parser("audio")
-    await add_arguments_audio_cli(parser=parser_audio)
+async def parse_subcommand_name(argv: list[str]) -> str | None:
+    """
+    サブコマンドのモジュールを読み込まずに、コマンドライン引数からサブコマンド名を取得する
+    """
+    parser = ArgumentParser()
+    await add_arguments_main_cli(parser=parser, subcommand_names=())
 
-    parser_select_audio = subparsers.add_parser("select_audio")
-    await add_arguments_select_audio_cli(parser=parser_select_audio)
+    args, _ = parser.parse_known_args(argv)
+    subcommand_name: str | None = getattr(args, "subcommand_name", None)
+    return subcommand_name
 
 
 async def main_async() -> None:
+    argv = sys.argv[1:]
+    subcommand_name = await parse_subcommand_name(argv)
+
     parser = ArgumentParser()
-    await add_arguments_main_cli(parser=parser)
+    await add_arguments_main_cli(
+        parser=parser,
+        subcommand_names=[subcommand_name] if subcommand_name is not None else [],
+    )
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     await handle_main_cli(
         parser=parser,
         args=args,
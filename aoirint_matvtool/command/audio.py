@@ -2,14 +2,22 @@ from argparse import ArgumentParser, Namespace
 from pathlib import Path
 
 from ..video_utility.audio_track_title_parser import AudioTrackTitleParser
+from ..video_utility.media_probe import get_shared_media_probe
 
 
 async def execute_audio_cli(
     input_path: Path,
     ffprobe_path: str,
+    cache_dir: Path | None,
 ) -> None:
+    media_probe = get_shared_media_probe(
+        ffprobe_path=ffprobe_path,
+        cache_dir=cache_dir,
+    )
+
     title_parser = AudioTrackTitleParser(
         ffprobe_path=ffprobe_path,
+        media_probe=media_probe,
     )
 
     titles = await title_parser.parse_titles(
@@ -24,12 +32,15 @@ async def execute_audio_cli(
 async def handle_audio_cli(args: Namespace) -> None:
     input_path_string: str = args.input_path
     ffprobe_path: str = args.ffprobe_path
+    cache_dir_string: str = args.cache_dir
+    no_cache: bool = args.no_cache
 
     input_path = Path(input_path_string)
 
     await execute_audio_cli(
         input_path=input_path,
         ffprobe_path=ffprobe_path,
+        cache_dir=Path(cache_dir_string) if not no_cache else None,
     )
 
 
@@ -0,0 +1,184 @@
+import sys
+from argparse import ArgumentParser, Namespace
+from contextlib import AsyncExitStack
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Literal, TypeGuard
+
+from ..batch.executor import BatchExecutor, BatchJobResult, BatchProgress
+from ..batch.job import read_batch_jobs_file
+from ..progress_handler.base import ProgressHandler
+from ..progress_handler.plain import ProgressHandlerPlain
+from ..progress_handler.tqdm import ProgressHandlerTqdm
+from ..video_utility.audio_selector import AudioSelector
+from ..video_utility.crop_scaler import CropScaler
+from ..video_utility.fps_parser import FpsParser
+from ..video_utility.media_probe import get_shared_media_probe
+from ..video_utility.video_slicer import VideoSlicer
+
+
+def validate_progress_type(value: Any) -> TypeGuard[Literal["tqdm", "plain", "none"]]:
+    return value in ("tqdm", "plain", "none")
+
+
+async def execute_batch_cli(
+    jobs_path: Path,
+    max_cpu_jobs: int,
+    max_io_jobs: int,
+    progress_type: Literal["tqdm", "plain", "none"],
+    ffmpeg_path: str,
+    ffprobe_path: str,
+    cache_dir: Path | None,
+) -> None:
+    jobs = read_batch_jobs_file(jobs_path=jobs_path)
+
+    media_probe = get_shared_media_probe(
+        ffprobe_path=ffprobe_path,
+        cache_dir=cache_dir,
+    )
+
+    fps_parser = FpsParser(
+        ffprobe_path=ffprobe_path,
+        media_probe=media_probe,
+    )
+
+    batch_executor = BatchExecutor(
+        video_slicer=VideoSlicer(
+            fps_parser=fps_parser,
+            ffmpeg_path=ffmpeg_path,
+            ffprobe_path=ffprobe_path,
+            media_probe=media_probe,
+        ),
+        audio_selector=AudioSelector(
+            fps_parser=fps_parser,
+            ffmpeg_path=ffmpeg_path,
+        ),
+        crop_scaler=CropScaler(
+            fps_parser=fps_parser,
+            ffmpeg_path=ffmpeg_path,
+        ),
+        max_cpu_jobs=max_cpu_jobs,
+        max_io_jobs=max_io_jobs,
+    )
+
+    async with AsyncExitStack() as stack:
+        progress_handler: ProgressHandler | None = None
+        if progress_type == "tqdm":
+            progress_handler = await stack.enter_async_context(
+                ProgressHandlerTqdm(name="batch"),
+            )
+        elif progress_type == "plain":
+            progress_handler = await stack.enter_async_context(
+                ProgressHandlerPlain(name="batch"),
+            )
+
+        async def _handle_progress(progress: BatchProgress) -> None:
+            if progress_handler is not None:
+                await progress_handler.handle_progress(
+                    frame=progress.frame,
+                    time=progress.time,
+                    internal_frame=progress.frame,
+                    internal_time=progress.time,
+                )
+
+        async def _handle_job_finished(result: BatchJobResult) -> None:
+            status = "done" if result.error is None else "FAILED"
+            print(
+                f"[{result.job_index}] {status}: {result.job.type} "
+                f"{result.job.output_path.name}",
+                file=sys.stderr,
+                flush=True,
+            )
+
+        results = await batch_executor.execute(
+            jobs=jobs,
+            progress_handler=_handle_progress,
+            job_finished_handler=_handle_job_finished,
+        )
+
+    print_batch_summary(results=results)
+
+    failed_results = [result for result in results if result.error is not None]
+    if len(failed_results) != 0:
+        raise Exception(
+            f"{len(failed_results)} of {len(results)} batch jobs failed: "
+            + ", ".join(str(result.job_index) for result in failed_results),
+        )
+
+
+def print_batch_summary(results: list[BatchJobResult]) -> None:
+    """
+    ジョブごとの経過時間（wall）と FFmpeg の CPU 時間を出力する
+    """
+    for result in results:
+        status = "ok" if result.error is None else f"failed ({result.error})"
+        print(
+            f"{result.job_index}\t{result.job.type}\t{result.job.resource_type}\t"
+            f"wall={result.wall_time.total_seconds():.3f}s\t"
+            f"cpu={result.cpu_time.total_seconds():.3f}s\t"
+            f"{result.job.output_path}\t{status}",
+            flush=True,
+        )
+
+    total_wall_time = sum((result.wall_time for result in results), start=timedelta())
+    total_cpu_time = sum((result.cpu_time for result in results), start=timedelta())
+    print(
+        f"total\t{len(results)} jobs\t\t"
+        f"wall={total_wall_time.total_seconds():.3f}s\t"
+        f"cpu={total_cpu_time.total_seconds():.3f}s",
+        flush=True,
+    )
+
+
+async def handle_batch_cli(args: Namespace) -> None:
+    jobs_path_string: str = args.jobs_path
+    max_cpu_jobs: int = args.max_cpu_jobs
+    max_io_jobs: int = args.max_io_jobs
+    progress_type: str = args.progress_type
+    ffmpeg_path: str = args.ffmpeg_path
+    ffprobe_path: str = args.ffprobe_path
+    cache_dir_string: str = args.cache_dir
+    no_cache: bool = args.no_cache
+
+    if not validate_progress_type(progress_type):
+        raise ValueError(f"Invalid progress_type: {progress_type}")
+
+    await execute_batch_cli(
+        jobs_path=Path(jobs_path_string),
+        max_cpu_jobs=max_cpu_jobs,
+        max_io_jobs=max_io_jobs,
+        progress_type=progress_type,
+        ffmpeg_path=ffmpeg_path,
+        ffprobe_path=ffprobe_path,
+        cache_dir=Path(cache_dir_string) if not no_cache else None,
+    )
+
+
+async def add_arguments_batch_cli(parser: ArgumentParser) -> None:
+    parser.add_argument(
+        "--max_cpu_jobs",
+        type=int,
+        default=1,
+        help="Maximum number of concurrent encoding jobs (crop_scale)",
+    )
+    parser.add_argument(
+        "--max_io_jobs",
+        type=int,
+        default=2,
+        help="Maximum number of concurrent stream copy jobs (slice, select_audio)",
+    )
+    parser.add_argument(
+        "-p",
+        "--progress_type",
+        type=str,
+        choices=("tqdm", "plain", "none"),
+        default="tqdm",
+        help="Progress display type",
+    )
+    parser.add_argument(
+        "jobs_path",
+        type=str,
+        help="Job list file path (one JSON object per line)",
+    )
+
+    parser.set_defaults(handler=handle_batch_cli)
@@ -0,0 +1,113 @@
+import os
+from argparse import REMAINDER, ArgumentParser, Namespace
+from pathlib import Path
+
+from .. import config
+from ..daemon.client import forward_command
+from ..daemon.server import DAEMON_COMMANDS
+
+
+async def _execute_locally(
+    command_args: list[str],
+    log_level: int,
+    ffmpeg_path: str,
+    ffprobe_path: str,
+    cache_dir: Path | None,
+) -> None:
+    # NOTE: cli モジュールがこのモジュールを読み込むため、実行時に読み込む
+    from ..cli import add_arguments_main_cli, handle_main_cli, parse_subcommand_name
+
+    global_args = [
+        "--log_level",
+        str(log_level),
+        "--ffmpeg_path",
+        ffmpeg_path,
+        "--ffprobe_path",
+        ffprobe_path,
+        *(["--cache_dir", str(cache_dir)] if cache_dir is not None else ["--no_cache"]),
+    ]
+
+    argv = [*global_args, *command_args]
+    subcommand_name = await parse_subcommand_name(argv)
+
+    parser = ArgumentParser(prog="matvtool")
+    await add_arguments_main_cli(
+        parser=parser,
+        subcommand_names=[subcommand_name] if subcommand_name is not None else [],
+    )
+
+    args = parser.parse_args(argv)
+    await handle_main_cli(
+        parser=parser,
+        args=args,
+    )
+
+
+async def execute_client_cli(
+    socket_path: Path,
+    command_args: list[str],
+    log_level: int,
+    ffmpeg_path: str,
+    ffprobe_path: str,
+    cache_dir: Path | None,
+) -> None:
+    if len(command_args) == 0:
+        raise ValueError("Specify a subcommand to run.")
+
+    command = command_args[0]
+    if command in DAEMON_COMMANDS:
+        exit_code = await forward_command(
+            socket_path=socket_path,
+            command=command,
+            argv=command_args[1:],
+            cwd=Path(os.getcwd()),
+        )
+        if exit_code is not None:
+            if exit_code != 0:
+                raise SystemExit(exit_code)
+            return
+
+    # デーモンが起動していない、またはデーモンで実行できないサブコマンドは、
+    # このプロセスで実行する
+    await _execute_locally(
+        command_args=command_args,
+        log_level=log_level,
+        ffmpeg_path=ffmpeg_path,
+        ffprobe_path=ffprobe_path,
+        cache_dir=cache_dir,
+    )
+
+
+async def handle_client_cli(args: Namespace) -> None:
+    socket_path_string: str = args.socket
+    command_args: list[str] = args.command_args
+    log_level: int = args.log_level
+    ffmpeg_path: str = args.ffmpeg_path
+    ffprobe_path: str = args.ffprobe_path
+    cache_dir_string: str = args.cache_dir
+    no_cache: bool = args.no_cache
+
+    await execute_client_cli(
+        socket_path=Path(socket_path_string),
+        command_args=command_args,
+        log_level=log_level,
+        ffmpeg_path=ffmpeg_path,
+        ffprobe_path=ffprobe_path,
+        cache_dir=Path(cache_dir_string) if not no_cache else None,
+    )
+
+
+async def add_arguments_client_cli(parser: ArgumentParser) -> None:
+    parser.add_argument(
+        "--socket",
+        type=str,
+        default=str(config.get_default_socket_path()),
+        help="Unix domain socket path of the daemon",
+    )
+    parser.add_argument(
+        "command_args",
+        nargs=REMAINDER,
+        help="Subcommand and its arguments to run on the daemon",
+    )
+
+    parser.set_defaults(handler=handle_client_cli)
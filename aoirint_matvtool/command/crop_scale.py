@@ -1,34 +1,208 @@
+import re
 from argparse import ArgumentParser, Namespace
 from contextlib import AsyncExitStack
+from itertools import product
+from logging import getLogger
 from pathlib import Path
 from typing import Any, Literal, TypeGuard
 
 from ..progress_handler.base import ProgressHandler
 from ..progress_handler.plain import ProgressHandlerPlain
 from ..progress_handler.tqdm import ProgressHandlerTqdm
+from ..util import parse_bitrate_string, parse_size_string
+from ..utility.key_frame_cache import get_shared_key_frame_cache
+from ..video_utility.chunk_work_queue import ChunkWorkQueue
+from ..video_utility.crop_detector import CropDetector
 from ..video_utility.crop_scaler import (
     CropScaler,
+    CropScaleRendition,
     CropScalerProgress,
+    CropScalerRenditionProgress,
+)
+from ..video_utility.encoder_tuner import (
+    EncoderTuneCandidate,
+    EncoderTuner,
+    calculate_target_video_bitrate,
+    get_audio_bitrate,
 )
 from ..video_utility.fps_parser import FpsParser
+from ..video_utility.key_frame_parser import KeyFrameParser
+from ..video_utility.media_probe import MediaProbe, get_shared_media_probe
+from ..video_utility.parallel_crop_scaler import ParallelCropScaler
+
+logger = getLogger(__name__)
+
+# --auto_tune_presets を省略したときの、エンコーダーごとのプリセットの候補
+DEFAULT_AUTO_TUNE_PRESETS: dict[str, list[str]] = {
+    "libx264": ["veryfast", "fast", "medium", "slow"],
+    "libx265": ["veryfast", "fast", "medium", "slow"],
+}
+DEFAULT_AUTO_TUNE_CRFS = [20, 23, 26]
+
+RENDITION_SPEC_KEYS = ("crop", "scale", "video_codec")
+_RENDITION_SPEC_SEPARATOR_PATTERN = re.compile(
+    rf",\s*(?=(?:{'|'.join(RENDITION_SPEC_KEYS)})=)",
+)
+
+# --crop に指定すると、detect_crop と同じく黒帯を検出して切り取る
+AUTO_CROP = "auto"
 
 
 def validate_progress_type(value: Any) -> TypeGuard[Literal["tqdm", "plain", "none"]]:
     return value in ("tqdm", "plain", "none")
 
 
+def parse_rendition_spec(spec: str) -> dict[str, str]:
+    """
+    --rendition の "scale=1280:720,video_codec=libx264" のような指定を解析する
+
+    crop・scale の値は "scale=min(1280\\,iw):-2" のように "," を含むことがあるため、
+    後ろに既知の "key=" が続く "," だけで区切る
+    """
+    values: dict[str, str] = {}
+    for item in _RENDITION_SPEC_SEPARATOR_PATTERN.split(spec):
+        item = item.strip()
+        if not item:
+            continue
+
+        key, separator, value = item.partition("=")
+        if not separator or key not in RENDITION_SPEC_KEYS:
+            raise ValueError(
+                f"Invalid rendition: {spec}. "
+                f"Specify key=value pairs of {', '.join(RENDITION_SPEC_KEYS)}.",
+            )
+        if key in values:
+            raise ValueError(f"Invalid rendition: {spec}. Duplicate key: {key}")
+
+        values[key] = value
+
+    return values
+
+
+async def detect_auto_crop(
+    input_path: Path,
+    key_frame_parser: KeyFrameParser,
+    media_probe: MediaProbe,
+    ffmpeg_path: str,
+) -> str:
+    crop_detector = CropDetector(
+        key_frame_parser=key_frame_parser,
+        media_probe=media_probe,
+        ffmpeg_path=ffmpeg_path,
+    )
+    detected_crop = await crop_detector.detect_crop(input_path=input_path)
+
+    crop = detected_crop.to_crop_string()
+    logger.info("Auto crop detected: %s", crop)
+    return crop
+
+
+async def execute_crop_scale_renditions_cli(
+    input_path: Path,
+    renditions: list[CropScaleRendition],
+    progress_type: Literal["tqdm", "plain", "none"],
+    ffmpeg_path: str,
+    ffprobe_path: str,
+    cache_dir: Path | None,
+) -> None:
+    media_probe = get_shared_media_probe(
+        ffprobe_path=ffprobe_path,
+        cache_dir=cache_dir,
+    )
+
+    fps_parser = FpsParser(
+        ffprobe_path=ffprobe_path,
+        media_probe=media_probe,
+    )
+
+    crop_scaler = CropScaler(
+        fps_parser=fps_parser,
+        ffmpeg_path=ffmpeg_path,
+    )
+
+    if any(rendition.crop == AUTO_CROP for rendition in renditions):
+        auto_crop = await detect_auto_crop(
+            input_path=input_path,
+            key_frame_parser=KeyFrameParser(
+                fps_parser=fps_parser,
+                ffprobe_path=ffprobe_path,
+                key_frame_cache=(
+                    get_shared_key_frame_cache(cache_dir)
+                    if cache_dir is not None
+                    else None
+                ),
+            ),
+            media_probe=media_probe,
+            ffmpeg_path=ffmpeg_path,
+        )
+        renditions = [
+            rendition.model_copy(update={"crop": auto_crop})
+            if rendition.crop == AUTO_CROP
+            else rendition
+            for rendition in renditions
+        ]
+
+    async with AsyncExitStack() as stack:
+        # 出力ごとに進捗を表示する
+        progress_handlers: list[ProgressHandler] = []
+        for rendition in renditions:
+            name = rendition.output_path.name
+            if progress_type == "tqdm":
+                progress_handlers.append(
+                    await stack.enter_async_context(ProgressHandlerTqdm(name=name)),
+                )
+            elif progress_type == "plain":
+                progress_handlers.append(
+                    await stack.enter_async_context(ProgressHandlerPlain(name=name)),
+                )
+
+        async def _handle_progress(progress: CropScalerRenditionProgress) -> None:
+            if len(progress_handlers) != 0:
+                await progress_handlers[progress.rendition_index].handle_progress(
+                    frame=progress.frame,
+                    time=progress.time,
+                    internal_frame=progress.internal_frame,
+                    internal_time=progress.internal_time,
+                )
+
+        await crop_scaler.crop_scale_renditions(
+            input_path=input_path,
+            renditions=renditions,
+            progress_handler=_handle_progress,
+        )
+
+
 async def execute_crop_scale_cli(
     input_path: Path,
     output_path: Path,
     crop: str | None,
     scale: str | None,
     video_codec: str | None,
+    jobs: int,
+    spool_dir: Path | None,
+    lease_seconds: float,
+    poll_interval_seconds: float,
+    auto_tune: bool,
+    target_bitrate: int | None,
+    target_size: int | None,
+    auto_tune_presets: list[str] | None,
+    auto_tune_crfs: list[int],
+    auto_tune_samples: int,
+    auto_tune_sample_seconds: float,
+    auto_tune_report_path: Path | None,
     progress_type: Literal["tqdm", "plain", "none"],
     ffmpeg_path: str,
     ffprobe_path: str,
+    cache_dir: Path | None,
 ) -> None:
+    media_probe = get_shared_media_probe(
+        ffprobe_path=ffprobe_path,
+        cache_dir=cache_dir,
+    )
+
     fps_parser = FpsParser(
         ffprobe_path=ffprobe_path,
+        media_probe=media_probe,
     )
 
     crop_scaler = CropScaler(
@@ -36,6 +210,105 @@ async def execute_crop_scale_cli(
         ffmpeg_path=ffmpeg_path,
     )
 
+    key_frame_parser = KeyFrameParser(
+        fps_parser=fps_parser,
+        ffprobe_path=ffprobe_path,
+        key_frame_cache=(
+            get_shared_key_frame_cache(cache_dir) if cache_dir is not None else None
+        ),
+    )
+
+    parallel_crop_scaler = ParallelCropScaler(
+        key_frame_parser=key_frame_parser,
+        media_probe=media_probe,
+        ffmpeg_path=ffmpeg_path,
+    )
+
+    if crop == AUTO_CROP:
+        crop = await detect_auto_crop(
+            input_path=input_path,
+            key_frame_parser=key_frame_parser,
+            media_probe=media_probe,
+            ffmpeg_path=ffmpeg_path,
+        )
+
+    video_codec_options: list[str] | None = None
+    if auto_tune:
+        if video_codec is None:
+            raise ValueError("Specify --video_codec to use --auto_tune.")
+
+        audio_bitrate: int | None = None
+        if target_bitrate is None:
+            if target_size is None:
+                raise ValueError("Specify --target_bitrate or --target_size.")
+
+            # サンプルは映像のみエンコードするため、
+            # 出力ファイルの大きさから音声の分を差し引いた映像の目標と比較する
+            media_info = await media_probe.probe(input_path=input_path)
+            if media_info.duration is None:
+                raise Exception(f"Duration not found: {input_path}")
+
+            audio_bitrate = get_audio_bitrate(media_info)
+            target_bitrate = calculate_target_video_bitrate(
+                target_size=target_size,
+                duration_seconds=media_info.duration.total_seconds(),
+                audio_bitrate=audio_bitrate,
+            )
+
+        if auto_tune_presets is None:
+            auto_tune_presets = DEFAULT_AUTO_TUNE_PRESETS.get(video_codec)
+
+        # 候補を省略したオプションは、エンコーダーの既定値を使う
+        candidate_presets: list[str | None] = [None]
+        if auto_tune_presets:
+            candidate_presets = [*auto_tune_presets]
+        candidate_crfs: list[int | None] = [None]
+        if auto_tune_crfs:
+            candidate_crfs = [*auto_tune_crfs]
+
+        encoder_tuner = EncoderTuner(
+            key_frame_parser=key_frame_parser,
+            media_probe=media_probe,
+            parallel_crop_scaler=parallel_crop_scaler,
+        )
+        tune_result = await encoder_tuner.tune(
+            input_path=input_path,
+            crop=crop,
+            scale=scale,
+            video_codec=video_codec,
+            candidates=[
+                EncoderTuneCandidate(preset=preset, crf=crf)
+                for preset, crf in product(candidate_presets, candidate_crfs)
+            ],
+            target_bitrate=target_bitrate,
+            num_samples=auto_tune_samples,
+            sample_seconds=auto_tune_sample_seconds,
+            work_dir=output_path.parent,
+        )
+        if target_size is not None and audio_bitrate is not None:
+            tune_result = tune_result.model_copy(
+                update={
+                    "target_size": target_size,
+                    "audio_bitrate": audio_bitrate,
+                },
+            )
+
+        if auto_tune_report_path is None:
+            auto_tune_report_path = output_path.with_name(
+                f"{output_path.stem}_auto_tune.json",
+            )
+        auto_tune_report_path.write_text(
+            tune_result.model_dump_json(indent=2),
+            encoding="utf-8",
+        )
+
+        video_codec_options = tune_result.selected.get_video_codec_options()
+        logger.info(
+            "Auto tune selected: %s (report: %s)",
+            " ".join(video_codec_options),
+            auto_tune_report_path,
+        )
+
     async with AsyncExitStack() as stack:
         progress_handler: ProgressHandler | None = None
         if progress_type == "tqdm":
@@ -56,41 +329,176 @@ async def execute_crop_scale_cli(
                     internal_time=progress.internal_time,
                 )
 
-        await crop_scaler.crop_scale(
-            input_path=input_path,
-            crop=crop,
-            scale=scale,
-            video_codec=video_codec,
-            output_path=output_path,
-            progress_handler=_handle_progress,
-        )
+        if spool_dir is None and jobs == 1:
+            await crop_scaler.crop_scale(
+                input_path=input_path,
+                crop=crop,
+                scale=scale,
+                video_codec=video_codec,
+                output_path=output_path,
+                video_codec_options=video_codec_options,
+                progress_handler=_handle_progress,
+            )
+            return
+
+        if spool_dir is not None:
+            await parallel_crop_scaler.crop_scale_distributed(
+                input_path=input_path,
+                crop=crop,
+                scale=scale,
+                video_codec=video_codec,
+                output_path=output_path,
+                num_chunks=jobs,
+                work_queue=ChunkWorkQueue(spool_dir=spool_dir),
+                lease_seconds=lease_seconds,
+                poll_interval_seconds=poll_interval_seconds,
+                video_codec_options=video_codec_options,
+                progress_handler=_handle_progress,
+            )
+        else:
+            await parallel_crop_scaler.crop_scale_parallel(
+                input_path=input_path,
+                crop=crop,
+                scale=scale,
+                video_codec=video_codec,
+                output_path=output_path,
+                jobs=jobs,
+                video_codec_options=video_codec_options,
+                progress_handler=_handle_progress,
+            )
 
 
 async def handle_crop_scale_cli(args: Namespace) -> None:
     input_path_string: str = args.input_path
-    output_path_string: str = args.output_path
+    output_path_strings: list[str] = args.output_path
+    rendition_specs: list[str] | None = args.rendition
     crop: str | None = args.crop
     scale: str | None = args.scale
     video_codec: str | None = args.video_codec
+    jobs: int = args.jobs
+    spool_dir_string: str | None = args.spool_dir
+    lease_seconds: float = args.lease_seconds
+    poll_interval: float = args.poll_interval
+    auto_tune: bool = args.auto_tune
+    target_bitrate_string: str | None = args.target_bitrate
+    target_size_string: str | None = args.target_size
+    auto_tune_presets_string: str | None = args.auto_tune_presets
+    auto_tune_crfs_string: str = args.auto_tune_crfs
+    auto_tune_samples: int = args.auto_tune_samples
+    auto_tune_sample_seconds: float = args.auto_tune_sample_seconds
+    auto_tune_report_string: str | None = args.auto_tune_report
     progress_type: str = args.progress_type
     ffmpeg_path: str = args.ffmpeg_path
     ffprobe_path: str = args.ffprobe_path
+    cache_dir_string: str = args.cache_dir
+    no_cache: bool = args.no_cache
 
     input_path = Path(input_path_string)
-    output_path = Path(output_path_string)
 
     if not validate_progress_type(progress_type):
         raise ValueError(f"Invalid progress type: {progress_type}")
 
+    if rendition_specs is None:
+        if len(output_path_strings) != 1:
+            raise ValueError("Specify --rendition for each output path.")
+
+        rendition_specs = [""]
+
+    if len(rendition_specs) != len(output_path_strings):
+        raise ValueError(
+            f"Number of --rendition ({len(rendition_specs)}) does not match "
+            f"number of output paths ({len(output_path_strings)}).",
+        )
+
+    # --crop・--scale・--video_codec は、各出力の既定値とする
+    renditions: list[CropScaleRendition] = []
+    for rendition_spec, output_path_string in zip(
+        rendition_specs,
+        output_path_strings,
+        strict=True,
+    ):
+        rendition_values = parse_rendition_spec(rendition_spec)
+        renditions.append(
+            CropScaleRendition(
+                crop=rendition_values.get("crop", crop),
+                scale=rendition_values.get("scale", scale),
+                video_codec=rendition_values.get("video_codec", video_codec),
+                output_path=Path(output_path_string),
+            ),
+        )
+
+    if len(renditions) != 1:
+        if jobs != 1 or spool_dir_string is not None or auto_tune:
+            raise ValueError(
+                "--jobs, --spool_dir and --auto_tune are not supported "
+                "with multiple output paths.",
+            )
+
+        await execute_crop_scale_renditions_cli(
+            input_path=input_path,
+            renditions=renditions,
+            progress_type=progress_type,
+            ffmpeg_path=ffmpeg_path,
+            ffprobe_path=ffprobe_path,
+            cache_dir=Path(cache_dir_string) if not no_cache else None,
+        )
+        return
+
+    rendition = renditions[0]
+
+    if jobs < 1:
+        raise ValueError(f"Invalid jobs: {jobs}. Specify 1 or more.")
+
+    if lease_seconds <= 0:
+        raise ValueError(f"Invalid lease_seconds: {lease_seconds}")
+
+    if poll_interval <= 0:
+        raise ValueError(f"Invalid poll_interval: {poll_interval}")
+
+    if auto_tune and target_bitrate_string is None and target_size_string is None:
+        raise ValueError("Specify --target_bitrate or --target_size with --auto_tune.")
+
+    auto_tune_presets = (
+        [preset.strip() for preset in auto_tune_presets_string.split(",")]
+        if auto_tune_presets_string is not None
+        else None
+    )
+    auto_tune_crfs = [int(crf) for crf in auto_tune_crfs_string.split(",") if crf]
+
     await execute_crop_scale_cli(
         input_path=input_path,
-        output_path=output_path,
-        crop=crop,
-        scale=scale,
-        video_codec=video_codec,
+        output_path=rendition.output_path,
+        crop=rendition.crop,
+        scale=rendition.scale,
+        video_codec=rendition.video_codec,
+        jobs=jobs,
+        spool_dir=Path(spool_dir_string) if spool_dir_string is not None else None,
+        lease_seconds=lease_seconds,
+        poll_interval_seconds=poll_interval,
+        auto_tune=auto_tune,
+        target_bitrate=(
+            parse_bitrate_string(target_bitrate_string)
+            if target_bitrate_string is not None
+            else None
+        ),
+        target_size=(
+            parse_size_string(target_size_string)
+            if target_size_string is not None
+            else None
+        ),
+        auto_tune_presets=auto_tune_presets,
+        auto_tune_crfs=auto_tune_crfs,
+        auto_tune_samples=auto_tune_samples,
+        auto_tune_sample_seconds=auto_tune_sample_seconds,
+        auto_tune_report_path=(
+            Path(auto_tune_report_string)
+            if auto_tune_report_string is not None
+            else None
+        ),
         progress_type=progress_type,
         ffmpeg_path=ffmpeg_path,
         ffprobe_path=ffprobe_path,
+        cache_dir=Path(cache_dir_string) if not no_cache else None,
     )
 
 
@@ -106,7 +514,7 @@ async def add_arguments_crop_scale_cli(parser: ArgumentParser) -> None:
         "--crop",
         type=str,
         required=False,
-        help="Crop parameter",
+        help="Crop parameter ('auto' to detect black borders as detect_crop does)",
     )
     parser.add_argument(
         "--scale",
@@ -120,6 +528,93 @@ async def add_arguments_crop_scale_cli(parser: ArgumentParser) -> None:
         required=False,
         help="Output video codec",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help=(
+            "Number of chunks split at key frames and encoded in parallel "
+            "(only the first video stream is output when 2 or more)"
+        ),
+    )
+    parser.add_argument(
+        "--spool_dir",
+        type=str,
+        required=False,
+        help=(
+            "Spool directory on a shared filesystem. "
+            "Chunks are queued there and encoded by 'matvtool worker' processes"
+        ),
+    )
+    parser.add_argument(
+        "--lease_seconds",
+        type=float,
+        default=300.0,
+        help="Seconds without a worker heartbeat before a chunk task is requeued",
+    )
+    parser.add_argument(
+        "--poll_interval",
+        type=float,
+        default=5.0,
+        help="Interval in seconds to check the progress of queued chunk tasks",
+    )
+    parser.add_argument(
+        "--auto_tune",
+        action="store_true",
+        help=(
+            "Encode short samples with candidate presets/CRFs, "
+            "and use the fastest one that meets the target bitrate or size"
+        ),
+    )
+    target_group = parser.add_mutually_exclusive_group()
+    target_group.add_argument(
+        "--target_bitrate",
+        type=str,
+        required=False,
+        help="Target video bitrate for --auto_tune (e.g. 4M, 800k)",
+    )
+    target_group.add_argument(
+        "--target_size",
+        type=str,
+        required=False,
+        help=(
+            "Target output file size including audio for --auto_tune (e.g. 500M, 2G)"
+        ),
+    )
+    parser.add_argument(
+        "--auto_tune_presets",
+        type=str,
+        required=False,
+        help=(
+            "Comma-separated candidate presets "
+            "(default: veryfast,fast,medium,slow for libx264/libx265)"
+        ),
+    )
+    parser.add_argument(
+        "--auto_tune_crfs",
+        type=str,
+        default=",".join(str(crf) for crf in DEFAULT_AUTO_TUNE_CRFS),
+        help="Comma-separated candidate CRFs (empty to omit -crf)",
+    )
+    parser.add_argument(
+        "--auto_tune_samples",
+        type=int,
+        default=3,
+        help="Number of key-frame-aligned samples taken across the input",
+    )
+    parser.add_argument(
+        "--auto_tune_sample_seconds",
+        type=float,
+        default=5.0,
+        help="Duration in seconds of each sample",
+    )
+    parser.add_argument(
+        "--auto_tune_report",
+        type=str,
+        required=False,
+        help="Output path of the measurements JSON (default: {output}_auto_tune.json)",
+    )
     parser.add_argument(
         "-p",
         "--progress_type",
@@ -128,9 +623,20 @@ async def add_arguments_crop_scale_cli(parser: ArgumentParser) -> None:
         default="tqdm",
         help="Progress display type",
     )
+    parser.add_argument(
+        "--rendition",
+        type=str,
+        action="append",
+        help=(
+            "Crop/scale/codec of each output path in order "
+            "(e.g. 'scale=1280:720,video_codec=libx264'). "
+            "Multiple outputs are encoded from a single decode"
+        ),
+    )
     parser.add_argument(
         "output_path",
         type=str,
+        nargs="+",
         help="Output video file path",
     )
 
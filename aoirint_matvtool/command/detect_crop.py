@@ -0,0 +1,114 @@
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+
+from ..utility.key_frame_cache import get_shared_key_frame_cache
+from ..video_utility.crop_detector import CropDetector
+from ..video_utility.fps_parser import FpsParser
+from ..video_utility.key_frame_parser import KeyFrameParser
+from ..video_utility.media_probe import get_shared_media_probe
+
+
+async def execute_detect_crop_cli(
+    input_path: Path,
+    num_samples: int,
+    frames_per_sample: int,
+    limit: float,
+    ffmpeg_path: str,
+    ffprobe_path: str,
+    cache_dir: Path | None,
+) -> None:
+    media_probe = get_shared_media_probe(
+        ffprobe_path=ffprobe_path,
+        cache_dir=cache_dir,
+    )
+
+    fps_parser = FpsParser(
+        ffprobe_path=ffprobe_path,
+        media_probe=media_probe,
+    )
+
+    crop_detector = CropDetector(
+        key_frame_parser=KeyFrameParser(
+            fps_parser=fps_parser,
+            ffprobe_path=ffprobe_path,
+            key_frame_cache=(
+                get_shared_key_frame_cache(cache_dir) if cache_dir is not None else None
+            ),
+        ),
+        media_probe=media_probe,
+        ffmpeg_path=ffmpeg_path,
+    )
+
+    detected_crop = await crop_detector.detect_crop(
+        input_path=input_path,
+        num_samples=num_samples,
+        frames_per_sample=frames_per_sample,
+        limit=limit,
+    )
+
+    print(detected_crop.to_crop_string(), flush=True)
+
+
+async def handle_detect_crop_cli(args: Namespace) -> None:
+    input_path_string: str = args.input_path
+    num_samples: int = args.num_samples
+    frames_per_sample: int = args.frames_per_sample
+    limit: float = args.limit
+    ffmpeg_path: str = args.ffmpeg_path
+    ffprobe_path: str = args.ffprobe_path
+    cache_dir_string: str = args.cache_dir
+    no_cache: bool = args.no_cache
+
+    input_path = Path(input_path_string)
+
+    if num_samples < 1:
+        raise ValueError(f"Invalid num_samples: {num_samples}. Specify 1 or more.")
+
+    if frames_per_sample < 1:
+        raise ValueError(
+            f"Invalid frames_per_sample: {frames_per_sample}. Specify 1 or more."
+        )
+
+    if not 0 <= limit <= 1:
+        raise ValueError(f"Invalid limit: {limit}. Specify 0 to 1.")
+
+    await execute_detect_crop_cli(
+        input_path=input_path,
+        num_samples=num_samples,
+        frames_per_sample=frames_per_sample,
+        limit=limit,
+        ffmpeg_path=ffmpeg_path,
+        ffprobe_path=ffprobe_path,
+        cache_dir=Path(cache_dir_string) if not no_cache else None,
+    )
+
+
+async def add_arguments_detect_crop_cli(parser: ArgumentParser) -> None:
+    parser.add_argument(
+        "-i",
+        "--input_path",
+        type=str,
+        required=True,
+        help="Input video file path",
+    )
+    parser.add_argument(
+        "-k",
+        "--num_samples",
+        type=int,
+        default=10,
+        help="Number of evenly spaced key frames to sample",
+    )
+    parser.add_argument(
+        "--frames_per_sample",
+        type=int,
+        default=5,
+        help="Number of frames passed to cropdetect from each sampled key frame",
+    )
+    parser.add_argument(
+        "--limit",
+        type=float,
+        default=24 / 255,
+        help="Brightness threshold (0 to 1) below which pixels are treated as black",
+    )
+
+    parser.set_defaults(handler=handle_detect_crop_cli)
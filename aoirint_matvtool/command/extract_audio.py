@@ -0,0 +1,127 @@
+from argparse import ArgumentParser, Namespace
+from contextlib import AsyncExitStack
+from pathlib import Path
+
+from ..progress_handler.base import ProgressHandler
+from ..progress_handler.plain import ProgressHandlerPlain
+from ..progress_handler.tqdm import ProgressHandlerTqdm
+from ..video_utility.audio_extractor import AudioExtractor, AudioExtractorProgress
+from ..video_utility.audio_track_title_parser import AudioTrackTitleParser
+from ..video_utility.media_probe import get_shared_media_probe
+
+
+async def execute_extract_audio_cli(
+    input_path: Path,
+    output_dir: Path,
+    audio_codec: str | None,
+    output_extension: str | None,
+    progress_type: str,
+    ffmpeg_path: str,
+    ffprobe_path: str,
+    cache_dir: Path | None,
+) -> None:
+    media_probe = get_shared_media_probe(
+        ffprobe_path=ffprobe_path,
+        cache_dir=cache_dir,
+    )
+
+    audio_extractor = AudioExtractor(
+        audio_track_title_parser=AudioTrackTitleParser(
+            ffprobe_path=ffprobe_path,
+            media_probe=media_probe,
+        ),
+        media_probe=media_probe,
+        ffmpeg_path=ffmpeg_path,
+    )
+
+    async with AsyncExitStack() as stack:
+        progress_handler: ProgressHandler | None = None
+        if progress_type == "tqdm":
+            progress_handler = await stack.enter_async_context(ProgressHandlerTqdm())
+        elif progress_type == "plain":
+            progress_handler = await stack.enter_async_context(ProgressHandlerPlain())
+
+        async def _handle_progress(progress: AudioExtractorProgress) -> None:
+            if progress_handler is not None:
+                await progress_handler.handle_progress(
+                    frame=progress.frame,
+                    time=progress.time,
+                    internal_frame=progress.internal_frame,
+                    internal_time=progress.internal_time,
+                )
+
+        output_paths = await audio_extractor.extract_audio(
+            input_path=input_path,
+            output_dir=output_dir,
+            audio_codec=audio_codec,
+            output_extension=output_extension,
+            progress_handler=_handle_progress,
+        )
+
+    for output_path in output_paths:
+        print(output_path, flush=True)
+
+
+async def handle_extract_audio_cli(args: Namespace) -> None:
+    input_path_string: str = args.input_path
+    output_dir_string: str = args.output_dir
+    audio_codec: str | None = args.audio_codec
+    output_extension: str | None = args.extension
+    progress_type: str = args.progress_type
+    ffmpeg_path: str = args.ffmpeg_path
+    ffprobe_path: str = args.ffprobe_path
+    cache_dir_string: str = args.cache_dir
+    no_cache: bool = args.no_cache
+
+    input_path = Path(input_path_string)
+    output_dir = Path(output_dir_string)
+
+    if output_extension is not None and not output_extension.startswith("."):
+        output_extension = f".{output_extension}"
+
+    await execute_extract_audio_cli(
+        input_path=input_path,
+        output_dir=output_dir,
+        audio_codec=audio_codec,
+        output_extension=output_extension,
+        progress_type=progress_type,
+        ffmpeg_path=ffmpeg_path,
+        ffprobe_path=ffprobe_path,
+        cache_dir=Path(cache_dir_string) if not no_cache else None,
+    )
+
+
+async def add_arguments_extract_audio_cli(parser: ArgumentParser) -> None:
+    parser.add_argument(
+        "-i",
+        "--input_path",
+        type=str,
+        required=True,
+        help="Input video file path",
+    )
+    parser.add_argument(
+        "--audio_codec",
+        type=str,
+        required=False,
+        help="Output audio codec (stream copy if omitted)",
+    )
+    parser.add_argument(
+        "--extension",
+        type=str,
+        required=False,
+        help="Output file extension (chosen from the output codec if omitted)",
+    )
+    parser.add_argument(
+        "-p",
+        "--progress_type",
+        type=str,
+        choices=("tqdm", "plain", "none"),
+        default="tqdm",
+        help="Progress display type",
+    )
+    parser.add_argument(
+        "output_dir",
+        type=str,
+        help="Output directory of the audio track files",
+    )
+    parser.set_defaults(handler=handle_extract_audio_cli)
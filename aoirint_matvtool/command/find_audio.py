@@ -0,0 +1,190 @@
+from argparse import ArgumentParser, Namespace
+from contextlib import AsyncExitStack
+from pathlib import Path
+
+from ..progress_handler.base import ProgressHandler
+from ..progress_handler.plain import ProgressHandlerPlain
+from ..progress_handler.tqdm import ProgressHandlerTqdm
+from ..util import format_timedelta_as_time_unit_syntax_string
+from ..video_utility.audio_finder import (
+    AudioFinder,
+    AudioFinderProgress,
+    AudioFinderResult,
+)
+from ..video_utility.media_probe import get_shared_media_probe
+
+
+async def execute_find_audio_cli(
+    ss: str | None,
+    to: str | None,
+    input_path: Path,
+    audio_index: int,
+    reference_audio_path: Path,
+    sample_rate: int,
+    threshold: float,
+    output_interval: float,
+    progress_type: str,
+    ffmpeg_path: str,
+    ffprobe_path: str,
+    cache_dir: Path | None,
+) -> None:
+    media_probe = get_shared_media_probe(
+        ffprobe_path=ffprobe_path,
+        cache_dir=cache_dir,
+    )
+
+    audio_finder = AudioFinder(
+        media_probe=media_probe,
+        ffmpeg_path=ffmpeg_path,
+    )
+
+    async with AsyncExitStack() as stack:
+        progress_handler: ProgressHandler | None = None
+        if progress_type == "tqdm":
+            progress_handler = await stack.enter_async_context(ProgressHandlerTqdm())
+        elif progress_type == "plain":
+            progress_handler = await stack.enter_async_context(ProgressHandlerPlain())
+
+        async def _handle_progress(progress: AudioFinderProgress) -> None:
+            if progress_handler is not None:
+                await progress_handler.handle_progress(
+                    frame=progress.frame,
+                    time=progress.time,
+                    internal_frame=progress.internal_frame,
+                    internal_time=progress.internal_time,
+                )
+
+        async def _handle_result(result: AudioFinderResult) -> None:
+            internal_time_string = format_timedelta_as_time_unit_syntax_string(
+                td=result.internal_time,
+            )
+            input_time_string = format_timedelta_as_time_unit_syntax_string(
+                td=result.time,
+            )
+
+            if progress_handler is not None:
+                await progress_handler.clear()
+
+            print(
+                (
+                    "Output | "
+                    f"Time {input_time_string}, "
+                    f"frame {result.frame} "
+                    f"(Internal time {internal_time_string}, "
+                    f"frame {result.internal_frame}), "
+                    f"score {result.score:.3f}"
+                ),
+                flush=True,
+            )
+
+        await audio_finder.find_audio(
+            input_ss=ss,
+            input_to=to,
+            input_path=input_path,
+            reference_audio_path=reference_audio_path,
+            audio_index=audio_index,
+            sample_rate=sample_rate,
+            threshold=threshold,
+            output_interval=output_interval,
+            progress_handler=_handle_progress,
+            result_handler=_handle_result,
+        )
+
+
+async def handle_find_audio_cli(args: Namespace) -> None:
+    ss: str | None = args.ss
+    to: str | None = args.to
+    input_path_string: str = args.input_path
+    audio_index: int = args.audio_index
+    reference_audio_path_string: str = args.reference_audio_path
+    sample_rate: int = args.sample_rate
+    threshold: float = args.threshold
+    output_interval: float = args.output_interval
+    progress_type: str = args.progress_type
+    ffmpeg_path: str = args.ffmpeg_path
+    ffprobe_path: str = args.ffprobe_path
+    cache_dir_string: str = args.cache_dir
+    no_cache: bool = args.no_cache
+
+    await execute_find_audio_cli(
+        ss=ss,
+        to=to,
+        input_path=Path(input_path_string),
+        audio_index=audio_index,
+        reference_audio_path=Path(reference_audio_path_string),
+        sample_rate=sample_rate,
+        threshold=threshold,
+        output_interval=output_interval,
+        progress_type=progress_type,
+        ffmpeg_path=ffmpeg_path,
+        ffprobe_path=ffprobe_path,
+        cache_dir=Path(cache_dir_string) if not no_cache else None,
+    )
+
+
+async def add_arguments_find_audio_cli(parser: ArgumentParser) -> None:
+    parser.add_argument(
+        "-ss",
+        type=str,
+        required=False,
+        help="Start time",
+    )
+    parser.add_argument(
+        "-to",
+        type=str,
+        required=False,
+        help="End time",
+    )
+    parser.add_argument(
+        "-i",
+        "--input_path",
+        type=str,
+        required=True,
+        help="Input video or audio file path",
+    )
+    parser.add_argument(
+        "--audio_index",
+        type=int,
+        default=0,
+        required=False,
+        help="Index of the audio track to search (0:a:N)",
+    )
+    parser.add_argument(
+        "-ref",
+        "--reference_audio_path",
+        type=str,
+        required=True,
+        help="Reference audio file path (the first audio track is used)",
+    )
+    parser.add_argument(
+        "--sample_rate",
+        type=int,
+        default=8000,
+        required=False,
+        help="Sample rate to decode the input and the reference at",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.7,
+        required=False,
+        help="Minimum normalized cross-correlation to match (-1.0 to 1.0)",
+    )
+    parser.add_argument(
+        "-it",
+        "--output_interval",
+        type=float,
+        default=0,
+        required=False,
+        help="Minimum interval between outputs in seconds",
+    )
+    parser.add_argument(
+        "-p",
+        "--progress_type",
+        type=str,
+        choices=("tqdm", "plain", "none"),
+        default="tqdm",
+        help="Progress display type",
+    )
+
+    parser.set_defaults(handler=handle_find_audio_cli)
@@ -1,47 +1,104 @@
 from argparse import ArgumentParser, Namespace
+from collections.abc import Sequence
 from contextlib import AsyncExitStack
 from pathlib import Path
-from typing import Any, Literal, TypeGuard
+from typing import Any, Literal, TypeGuard, TypeVar
 
 from ..progress_handler.base import ProgressHandler
 from ..progress_handler.plain import ProgressHandlerPlain
 from ..progress_handler.tqdm import ProgressHandlerTqdm
 from ..util import format_timedelta_as_time_unit_syntax_string
+from ..utility.key_frame_cache import get_shared_key_frame_cache
 from ..video_utility.fps_parser import FpsParser
+from ..video_utility.frame_hash_indexer import (
+    FrameHashIndexer,
+    get_default_frame_hash_index_path,
+)
 from ..video_utility.image_finder import (
     ImageFinder,
     ImageFinderProgress,
+    ImageFinderReference,
     ImageFinderResult,
 )
 from ..video_utility.key_frame_parser import KeyFrameParser
+from ..video_utility.media_probe import get_shared_media_probe
+
+T = TypeVar("T")
 
 
 def validate_progress_type(value: Any) -> TypeGuard[Literal["tqdm", "plain", "none"]]:
     return value in ("tqdm", "plain", "none")
 
 
+def validate_coarse_search(value: Any) -> TypeGuard[Literal["key_frame", "fps"]]:
+    return value in ("key_frame", "fps")
+
+
+def validate_backend(value: Any) -> TypeGuard[Literal["blackframe", "numpy"]]:
+    return value in ("blackframe", "numpy")
+
+
+def broadcast_reference_option(
+    name: str,
+    values: Sequence[T] | None,
+    num_references: int,
+) -> list[T | None]:
+    """
+    参照画像ごとのオプションを、参照画像の数に揃える
+
+    未指定なら全て None、1つだけ指定されたら全ての参照画像に適用する
+    """
+    if values is None:
+        return [None for _ in range(num_references)]
+
+    if len(values) == 1:
+        return [values[0] for _ in range(num_references)]
+
+    if len(values) != num_references:
+        raise ValueError(
+            f"Invalid number of {name}: {len(values)}. "
+            f"Specify once or the same number of times as reference images "
+            f"({num_references})."
+        )
+
+    return list(values)
+
+
 async def execute_find_image_cli(
     ss: str | None,
     to: str | None,
     input_video_path: Path,
-    input_video_crop: str | None,
-    reference_image_path: Path,
-    reference_image_crop: str | None,
+    references: list[ImageFinderReference],
     fps: int | None,
-    blackframe_amount: int,
-    blackframe_threshold: int,
     output_interval: float,
+    jobs: int,
+    coarse_search: Literal["key_frame", "fps"] | None,
+    coarse_fps: int,
+    backend: Literal["blackframe", "numpy"],
+    use_index: bool,
+    index_path: Path | None,
+    max_distance: int,
     progress_type: Literal["tqdm", "plain", "none"],
     ffmpeg_path: str,
     ffprobe_path: str,
+    cache_dir: Path | None,
 ) -> None:
+    media_probe = get_shared_media_probe(
+        ffprobe_path=ffprobe_path,
+        cache_dir=cache_dir,
+    )
+
     fps_parser = FpsParser(
         ffprobe_path=ffprobe_path,
+        media_probe=media_probe,
     )
 
     key_frame_parser = KeyFrameParser(
         fps_parser=fps_parser,
         ffprobe_path=ffprobe_path,
+        key_frame_cache=(
+            get_shared_key_frame_cache(cache_dir) if cache_dir is not None else None
+        ),
     )
 
     image_finder = ImageFinder(
@@ -77,9 +134,15 @@ async def execute_find_image_cli(
         if progress_handler is not None:
             await progress_handler.clear()
 
+        # 参照画像が複数のときのみ、どの参照画像に一致したかを出力する
+        reference_string = (
+            f"Reference {result.reference_index} | " if len(references) != 1 else ""
+        )
+
         print(
             (
                 "Output | "
+                f"{reference_string}"
                 f"Time {input_time_string}, "
                 f"frame {result.frame} "
                 f"(Internal time {internal_time_string}, "
@@ -87,17 +150,41 @@ async def execute_find_image_cli(
             ),
         )
 
-    await image_finder.find_image(
+    if use_index:
+        frame_hash_indexer = FrameHashIndexer(
+            fps_parser=fps_parser,
+            key_frame_parser=key_frame_parser,
+            media_probe=media_probe,
+            ffmpeg_path=ffmpeg_path,
+        )
+
+        await frame_hash_indexer.find_images(
+            index_path=(
+                index_path
+                if index_path is not None
+                else get_default_frame_hash_index_path(input_video_path)
+            ),
+            input_video_path=input_video_path,
+            input_video_ss=ss,
+            input_video_to=to,
+            references=references,
+            max_distance=max_distance,
+            output_interval=output_interval,
+            result_handler=_handle_result,
+        )
+        return
+
+    await image_finder.find_images(
         input_video_ss=ss,
         input_video_to=to,
         input_video_path=input_video_path,
-        input_video_crop=input_video_crop,
-        reference_image_path=reference_image_path,
-        reference_image_crop=reference_image_crop,
+        references=references,
         fps=fps,
-        blackframe_amount=blackframe_amount,
-        blackframe_threshold=blackframe_threshold,
         output_interval=output_interval,
+        jobs=jobs,
+        coarse_search=coarse_search,
+        coarse_fps=coarse_fps,
+        backend=backend,
         progress_handler=_handle_progress,
         result_handler=_handle_result,
     )
@@ -107,37 +194,118 @@ async def handle_find_image_cli(args: Namespace) -> None:
     ss: str | None = args.ss
     to: str | None = args.to
     input_video_path_string: str = args.input_video_path
-    input_video_crop: str | None = args.input_video_crop
-    reference_image_path_string: str = args.reference_image_path
-    reference_image_crop: str | None = args.reference_image_crop
+    input_video_crops: list[str] | None = args.input_video_crop
+    reference_image_path_strings: list[str] = args.reference_image_path
+    reference_image_crops: list[str] | None = args.reference_image_crop
     fps: int | None = args.fps
-    blackframe_amount: int = args.blackframe_amount
-    blackframe_threshold: int = args.blackframe_threshold
+    blackframe_amounts: list[int] | None = args.blackframe_amount
+    blackframe_thresholds: list[int] | None = args.blackframe_threshold
     output_interval: float = args.output_interval
+    jobs: int = args.jobs
+    coarse_search: str | None = args.coarse_search
+    coarse_fps: int = args.coarse_fps
+    backend: str = args.backend
+    use_index: bool = args.use_index
+    index_path_string: str | None = args.index_path
+    max_distance: int = args.max_distance
     progress_type: str = args.progress_type
     ffmpeg_path: str = args.ffmpeg_path
     ffprobe_path: str = args.ffprobe_path
+    cache_dir_string: str = args.cache_dir
+    no_cache: bool = args.no_cache
 
     input_video_path = Path(input_video_path_string)
-    reference_image_path = Path(reference_image_path_string)
+    index_path = Path(index_path_string) if index_path_string is not None else None
 
     if not validate_progress_type(progress_type):
         raise ValueError(f"Invalid progress type: {progress_type}")
 
+    if coarse_search is not None and not validate_coarse_search(coarse_search):
+        raise ValueError(f"Invalid coarse search: {coarse_search}")
+
+    if not validate_backend(backend):
+        raise ValueError(f"Invalid backend: {backend}")
+
+    if use_index:
+        # NOTE: インデックスを使う検索では入力動画をデコードしないため、
+        # デコード・比較に関するオプションは使われない
+        unsupported_options = [
+            option
+            for option, specified in (
+                ("--fps", fps is not None),
+                ("--jobs", jobs != 1),
+                ("--backend", backend != "blackframe"),
+                ("--coarse_search", coarse_search is not None),
+                ("--blackframe_amount", blackframe_amounts is not None),
+                ("--blackframe_threshold", blackframe_thresholds is not None),
+            )
+            if specified
+        ]
+        if len(unsupported_options) != 0:
+            raise ValueError(
+                f"{', '.join(unsupported_options)} cannot be used with --use_index."
+            )
+
+    num_references = len(reference_image_path_strings)
+    references: list[ImageFinderReference] = []
+    for (
+        reference_image_path_string,
+        reference_image_crop,
+        input_video_crop,
+        blackframe_amount,
+        blackframe_threshold,
+    ) in zip(
+        reference_image_path_strings,
+        broadcast_reference_option(
+            name="reference_image_crop",
+            values=reference_image_crops,
+            num_references=num_references,
+        ),
+        broadcast_reference_option(
+            name="input_video_crop",
+            values=input_video_crops,
+            num_references=num_references,
+        ),
+        broadcast_reference_option(
+            name="blackframe_amount",
+            values=blackframe_amounts,
+            num_references=num_references,
+        ),
+        broadcast_reference_option(
+            name="blackframe_threshold",
+            values=blackframe_thresholds,
+            num_references=num_references,
+        ),
+        strict=True,
+    ):
+        references.append(
+            ImageFinderReference(
+                image_path=Path(reference_image_path_string),
+                image_crop=reference_image_crop,
+                input_video_crop=input_video_crop,
+                blackframe_amount=blackframe_amount,
+                blackframe_threshold=blackframe_threshold,
+            ),
+        )
+
     await execute_find_image_cli(
         ss=ss,
         to=to,
         input_video_path=input_video_path,
-        input_video_crop=input_video_crop,
-        reference_image_path=reference_image_path,
-        reference_image_crop=reference_image_crop,
+        references=references,
         fps=fps,
-        blackframe_amount=blackframe_amount,
-        blackframe_threshold=blackframe_threshold,
         output_interval=output_interval,
+        jobs=jobs,
+        coarse_search=coarse_search,
+        coarse_fps=coarse_fps,
+        backend=backend,
+        use_index=use_index,
+        index_path=index_path,
+        max_distance=max_distance,
         progress_type=progress_type,
         ffmpeg_path=ffmpeg_path,
         ffprobe_path=ffprobe_path,
+        cache_dir=Path(cache_dir_string) if not no_cache else None,
     )
 
 
@@ -165,22 +333,27 @@ async def add_arguments_find_image_cli(parser: ArgumentParser) -> None:
         "-icrop",
         "--input_video_crop",
         type=str,
+        action="append",
         required=False,
-        help="Input video crop parameter",
+        help=("Input video crop parameter. Specify once or once per reference image"),
     )
     parser.add_argument(
         "-ref",
         "--reference_image_path",
         type=str,
+        action="append",
         required=True,
-        help="Reference image file path",
+        help="Reference image file path. Specify multiple times to search at once",
     )
     parser.add_argument(
         "-refcrop",
         "--reference_image_crop",
         type=str,
+        action="append",
         required=False,
-        help="Reference image crop parameter",
+        help=(
+            "Reference image crop parameter. Specify once or once per reference image"
+        ),
     )
     parser.add_argument(
         "--fps",
@@ -192,17 +365,22 @@ async def add_arguments_find_image_cli(parser: ArgumentParser) -> None:
         "-ba",
         "--blackframe_amount",
         type=int,
-        default=98,
+        action="append",
         required=False,
-        help="Blackframe amount",
+        help=(
+            "Blackframe amount (default: 98). Specify once or once per reference image"
+        ),
     )
     parser.add_argument(
         "-bt",
         "--blackframe_threshold",
         type=int,
-        default=32,
+        action="append",
         required=False,
-        help="Blackframe threshold",
+        help=(
+            "Blackframe threshold (default: 32). "
+            "Specify once or once per reference image"
+        ),
     )
     parser.add_argument(
         "-it",
@@ -212,6 +390,62 @@ async def add_arguments_find_image_cli(parser: ArgumentParser) -> None:
         required=False,
         help="Minimum interval between outputs in seconds",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        required=False,
+        help="Number of FFmpeg processes to run in parallel, split at key frames",
+    )
+    parser.add_argument(
+        "--coarse_search",
+        type=str,
+        choices=("key_frame", "fps"),
+        required=False,
+        help=(
+            "Scan key frames only or at a low FPS with looser thresholds first, "
+            "then search all frames only around the candidates"
+        ),
+    )
+    parser.add_argument(
+        "--coarse_fps",
+        type=int,
+        default=1,
+        required=False,
+        help="FPS of the coarse scan when --coarse_search fps",
+    )
+    parser.add_argument(
+        "--backend",
+        type=str,
+        choices=("blackframe", "numpy"),
+        default="blackframe",
+        help=(
+            "Frame matching backend. "
+            "numpy compares downscaled gray frames piped from FFmpeg (requires numpy)"
+        ),
+    )
+    parser.add_argument(
+        "--use_index",
+        action="store_true",
+        help=(
+            "Search the perceptual hash index created by the index command "
+            "instead of decoding the input video"
+        ),
+    )
+    parser.add_argument(
+        "--index_path",
+        type=str,
+        required=False,
+        help="Index file path (default: <input_video_path>.frame_hash.npz)",
+    )
+    parser.add_argument(
+        "--max_distance",
+        type=int,
+        default=10,
+        required=False,
+        help="Maximum Hamming distance of hashes to match when --use_index",
+    )
     parser.add_argument(
         "-p",
         "--progress_type",
@@ -2,14 +2,22 @@ from argparse import ArgumentParser, Namespace
 from pathlib import Path
 
 from ..video_utility.fps_parser import FpsParser
+from ..video_utility.media_probe import get_shared_media_probe
 
 
 async def execute_fps_cli(
     input_path: Path,
     ffprobe_path: str,
+    cache_dir: Path | None,
 ) -> None:
+    media_probe = get_shared_media_probe(
+        ffprobe_path=ffprobe_path,
+        cache_dir=cache_dir,
+    )
+
     fps_parser = FpsParser(
         ffprobe_path=ffprobe_path,
+        media_probe=media_probe,
     )
 
     fps = await fps_parser.parse_fps(
@@ -21,12 +29,15 @@ async def execute_fps_cli(
 async def handle_fps_cli(args: Namespace) -> None:
     input_path_string: str = args.input_path
     ffprobe_path: str = args.ffprobe_path
+    cache_dir_string: str = args.cache_dir
+    no_cache: bool = args.no_cache
 
     input_path = Path(input_path_string)
 
     await execute_fps_cli(
         input_path=input_path,
         ffprobe_path=ffprobe_path,
+        cache_dir=Path(cache_dir_string) if not no_cache else None,
     )
 
 
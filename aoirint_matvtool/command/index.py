@@ -0,0 +1,176 @@
+from argparse import ArgumentParser, Namespace
+from contextlib import AsyncExitStack
+from pathlib import Path
+from typing import Any, Literal, TypeGuard
+
+from ..progress_handler.base import ProgressHandler
+from ..progress_handler.plain import ProgressHandlerPlain
+from ..progress_handler.tqdm import ProgressHandlerTqdm
+from ..utility.key_frame_cache import get_shared_key_frame_cache
+from ..video_utility.fps_parser import FpsParser
+from ..video_utility.frame_hash_indexer import (
+    FrameHashIndexer,
+    FrameHashIndexerProgress,
+    get_default_frame_hash_index_path,
+)
+from ..video_utility.key_frame_parser import KeyFrameParser
+from ..video_utility.media_probe import get_shared_media_probe
+
+
+def validate_progress_type(value: Any) -> TypeGuard[Literal["tqdm", "plain", "none"]]:
+    return value in ("tqdm", "plain", "none")
+
+
+def validate_hash_type(value: Any) -> TypeGuard[Literal["dhash", "phash"]]:
+    return value in ("dhash", "phash")
+
+
+async def execute_index_cli(
+    input_video_path: Path,
+    input_video_crop: str | None,
+    fps: int | None,
+    hash_type: Literal["dhash", "phash"],
+    index_path: Path,
+    progress_type: Literal["tqdm", "plain", "none"],
+    ffmpeg_path: str,
+    ffprobe_path: str,
+    cache_dir: Path | None,
+) -> None:
+    media_probe = get_shared_media_probe(
+        ffprobe_path=ffprobe_path,
+        cache_dir=cache_dir,
+    )
+
+    fps_parser = FpsParser(
+        ffprobe_path=ffprobe_path,
+        media_probe=media_probe,
+    )
+
+    key_frame_parser = KeyFrameParser(
+        fps_parser=fps_parser,
+        ffprobe_path=ffprobe_path,
+        key_frame_cache=(
+            get_shared_key_frame_cache(cache_dir) if cache_dir is not None else None
+        ),
+    )
+
+    frame_hash_indexer = FrameHashIndexer(
+        fps_parser=fps_parser,
+        key_frame_parser=key_frame_parser,
+        media_probe=media_probe,
+        ffmpeg_path=ffmpeg_path,
+    )
+
+    async with AsyncExitStack() as stack:
+        progress_handler: ProgressHandler | None = None
+        if progress_type == "tqdm":
+            progress_handler = await stack.enter_async_context(
+                ProgressHandlerTqdm(),
+            )
+        elif progress_type == "plain":
+            progress_handler = await stack.enter_async_context(
+                ProgressHandlerPlain(),
+            )
+
+        async def _handle_progress(progress: FrameHashIndexerProgress) -> None:
+            if progress_handler is not None:
+                await progress_handler.handle_progress(
+                    frame=progress.frame,
+                    time=progress.time,
+                    internal_frame=progress.internal_frame,
+                    internal_time=progress.internal_time,
+                )
+
+        await frame_hash_indexer.create_index(
+            input_video_path=input_video_path,
+            input_video_crop=input_video_crop,
+            fps=fps,
+            hash_type=hash_type,
+            index_path=index_path,
+            progress_handler=_handle_progress,
+        )
+
+
+async def handle_index_cli(args: Namespace) -> None:
+    input_video_path_string: str = args.input_video_path
+    input_video_crop: str | None = args.input_video_crop
+    fps: int | None = args.fps
+    hash_type: str = args.hash_type
+    index_path_string: str | None = args.index_path
+    progress_type: str = args.progress_type
+    ffmpeg_path: str = args.ffmpeg_path
+    ffprobe_path: str = args.ffprobe_path
+    cache_dir_string: str = args.cache_dir
+    no_cache: bool = args.no_cache
+
+    input_video_path = Path(input_video_path_string)
+    index_path = (
+        Path(index_path_string)
+        if index_path_string is not None
+        else get_default_frame_hash_index_path(input_video_path)
+    )
+
+    if not validate_hash_type(hash_type):
+        raise ValueError(f"Invalid hash type: {hash_type}")
+
+    if not validate_progress_type(progress_type):
+        raise ValueError(f"Invalid progress type: {progress_type}")
+
+    await execute_index_cli(
+        input_video_path=input_video_path,
+        input_video_crop=input_video_crop,
+        fps=fps,
+        hash_type=hash_type,
+        index_path=index_path,
+        progress_type=progress_type,
+        ffmpeg_path=ffmpeg_path,
+        ffprobe_path=ffprobe_path,
+        cache_dir=Path(cache_dir_string) if not no_cache else None,
+    )
+
+
+async def add_arguments_index_cli(parser: ArgumentParser) -> None:
+    parser.add_argument(
+        "-i",
+        "--input_video_path",
+        type=str,
+        required=True,
+        help="Input video file path",
+    )
+    parser.add_argument(
+        "-icrop",
+        "--input_video_crop",
+        type=str,
+        required=False,
+        help="Input video crop parameter",
+    )
+    parser.add_argument(
+        "--fps",
+        type=int,
+        required=False,
+        help="FPS",
+    )
+    parser.add_argument(
+        "--hash_type",
+        type=str,
+        choices=("dhash", "phash"),
+        default="phash",
+        help="Perceptual hash type",
+    )
+    parser.add_argument(
+        "-o",
+        "--index_path",
+        type=str,
+        required=False,
+        help="Output index file path (default: <input_video_path>.frame_hash.npz)",
+    )
+    parser.add_argument(
+        "-p",
+        "--progress_type",
+        type=str,
+        choices=("tqdm", "plain", "none"),
+        default="tqdm",
+        help="Progress display type",
+    )
+
+    parser.set_defaults(handler=handle_index_cli)
@@ -1,41 +1,68 @@
 from argparse import ArgumentParser, Namespace
 from pathlib import Path
+from typing import Any, Literal, TypeGuard
 
+from ..utility.key_frame_cache import get_shared_key_frame_cache
 from ..video_utility.fps_parser import FpsParser
 from ..video_utility.key_frame_parser import (
     KeyFrameParser,
 )
+from ..video_utility.media_probe import get_shared_media_probe
+
+
+def validate_method(value: Any) -> TypeGuard[Literal["auto", "packet", "frame"]]:
+    return value in ("auto", "packet", "frame")
 
 
 async def execute_key_frames_cli(
     input_path: Path,
+    method: Literal["auto", "packet", "frame"],
     ffprobe_path: str,
+    cache_dir: Path | None,
 ) -> None:
+    media_probe = get_shared_media_probe(
+        ffprobe_path=ffprobe_path,
+        cache_dir=cache_dir,
+    )
+
     fps_parser = FpsParser(
         ffprobe_path=ffprobe_path,
+        media_probe=media_probe,
     )
 
     key_frame_parser = KeyFrameParser(
         fps_parser=fps_parser,
         ffprobe_path=ffprobe_path,
+        key_frame_cache=(
+            get_shared_key_frame_cache(cache_dir) if cache_dir is not None else None
+        ),
     )
 
-    key_frames = await key_frame_parser.parse_key_frames(
+    # FFprobe の実行中に、取得できたキーフレームから出力する
+    async for key_frame in key_frame_parser.iterate_key_frames(
         input_path=input_path,
-    )
-    for key_frame in key_frames:
-        print(f"{key_frame.total_seconds():.06f}")
+        method=method,
+    ):
+        print(f"{key_frame.total_seconds():.06f}", flush=True)
 
 
 async def handle_key_frames_cli(args: Namespace) -> None:
     input_path_string: str = args.input_path
+    method: str = args.method
     ffprobe_path: str = args.ffprobe_path
+    cache_dir_string: str = args.cache_dir
+    no_cache: bool = args.no_cache
 
     input_path = Path(input_path_string)
 
+    if not validate_method(method):
+        raise ValueError(f"Invalid method: {method}")
+
     await execute_key_frames_cli(
         input_path=input_path,
+        method=method,
         ffprobe_path=ffprobe_path,
+        cache_dir=Path(cache_dir_string) if not no_cache else None,
     )
 
 
@@ -47,5 +74,16 @@ async def add_arguments_key_frames_cli(parser: ArgumentParser) -> None:
         required=True,
         help="Input video file path",
     )
+    parser.add_argument(
+        "--method",
+        type=str,
+        choices=("auto", "packet", "frame"),
+        default="auto",
+        help=(
+            "Key frame detection method. "
+            "packet reads packet key flags without decoding, "
+            "auto falls back to frame if packet fails"
+        ),
+    )
 
     parser.set_defaults(handler=handle_key_frames_cli)
@@ -7,6 +7,7 @@ from ..progress_handler.plain import ProgressHandlerPlain
 from ..progress_handler.tqdm import ProgressHandlerTqdm
 from ..video_utility.audio_selector import AudioSelector, AudioSelectorProgress
 from ..video_utility.fps_parser import FpsParser
+from ..video_utility.media_probe import get_shared_media_probe
 
 
 async def execute_select_audio_cli(
@@ -16,9 +17,16 @@ async def execute_select_audio_cli(
     progress_type: str,
     ffmpeg_path: str,
     ffprobe_path: str,
+    cache_dir: Path | None,
 ) -> None:
+    media_probe = get_shared_media_probe(
+        ffprobe_path=ffprobe_path,
+        cache_dir=cache_dir,
+    )
+
     fps_parser = FpsParser(
         ffprobe_path=ffprobe_path,
+        media_probe=media_probe,
     )
 
     audio_selector = AudioSelector(
@@ -57,6 +65,8 @@ async def handle_select_audio_cli(args: Namespace) -> None:
     progress_type: str = args.progress_type
     ffmpeg_path: str = args.ffmpeg_path
     ffprobe_path: str = args.ffprobe_path
+    cache_dir_string: str = args.cache_dir
+    no_cache: bool = args.no_cache
 
     input_path = Path(input_path_string)
     output_path = Path(output_path_string)
@@ -68,6 +78,7 @@ async def handle_select_audio_cli(args: Namespace) -> None:
         progress_type=progress_type,
         ffmpeg_path=ffmpeg_path,
         ffprobe_path=ffprobe_path,
+        cache_dir=Path(cache_dir_string) if not no_cache else None,
     )
 
 
@@ -0,0 +1,57 @@
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+
+from .. import config
+from ..daemon.server import DaemonServer
+
+
+async def execute_serve_cli(
+    socket_path: Path,
+    max_jobs: int,
+    ffmpeg_path: str,
+    ffprobe_path: str,
+    cache_dir: Path | None,
+) -> None:
+    daemon_server = DaemonServer(
+        socket_path=socket_path,
+        max_jobs=max_jobs,
+        ffmpeg_path=ffmpeg_path,
+        ffprobe_path=ffprobe_path,
+        cache_dir=cache_dir,
+    )
+
+    await daemon_server.serve_forever()
+
+
+async def handle_serve_cli(args: Namespace) -> None:
+    socket_path_string: str = args.socket
+    max_jobs: int = args.max_jobs
+    ffmpeg_path: str = args.ffmpeg_path
+    ffprobe_path: str = args.ffprobe_path
+    cache_dir_string: str = args.cache_dir
+    no_cache: bool = args.no_cache
+
+    await execute_serve_cli(
+        socket_path=Path(socket_path_string),
+        max_jobs=max_jobs,
+        ffmpeg_path=ffmpeg_path,
+        ffprobe_path=ffprobe_path,
+        cache_dir=Path(cache_dir_string) if not no_cache else None,
+    )
+
+
+async def add_arguments_serve_cli(parser: ArgumentParser) -> None:
+    parser.add_argument(
+        "--socket",
+        type=str,
+        default=str(config.get_default_socket_path()),
+        help="Unix domain socket path to listen on",
+    )
+    parser.add_argument(
+        "--max_jobs",
+        type=int,
+        default=2,
+        help="Maximum number of jobs to run at once",
+    )
+
+    parser.set_defaults(handler=handle_serve_cli)
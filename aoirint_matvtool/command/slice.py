@@ -1,3 +1,4 @@
+import csv
 from argparse import ArgumentParser, Namespace
 from contextlib import AsyncExitStack
 from pathlib import Path
@@ -6,8 +7,17 @@ from typing import Any, Literal, TypeGuard
 from ..progress_handler.base import ProgressHandler
 from ..progress_handler.plain import ProgressHandlerPlain
 from ..progress_handler.tqdm import ProgressHandlerTqdm
+from ..utility.key_frame_cache import get_shared_key_frame_cache
 from ..video_utility.fps_parser import FpsParser
-from ..video_utility.video_slicer import VideoSlicer, VideoSlicerProgress
+from ..video_utility.key_frame_parser import KeyFrameParser
+from ..video_utility.media_probe import get_shared_media_probe
+from ..video_utility.video_slicer import (
+    VideoSlicer,
+    VideoSlicerCut,
+    VideoSlicerCutProgress,
+    VideoSlicerProgress,
+)
+from ..video_utility.video_smart_slicer import VideoSmartSlicer
 
 
 def validate_progress_type(value: Any) -> TypeGuard[Literal["tqdm", "plain", "none"]]:
@@ -19,17 +29,28 @@ async def execute_slice_cli(
     to: str,
     input_path: Path,
     output_path: Path,
+    accurate: bool,
+    video_codec: str | None,
     progress_type: Literal["tqdm", "plain", "none"],
     ffmpeg_path: str,
     ffprobe_path: str,
+    cache_dir: Path | None,
 ) -> None:
+    media_probe = get_shared_media_probe(
+        ffprobe_path=ffprobe_path,
+        cache_dir=cache_dir,
+    )
+
     fps_parser = FpsParser(
         ffprobe_path=ffprobe_path,
+        media_probe=media_probe,
     )
 
     video_slicer = VideoSlicer(
         fps_parser=fps_parser,
         ffmpeg_path=ffmpeg_path,
+        ffprobe_path=ffprobe_path,
+        media_probe=media_probe,
     )
 
     async with AsyncExitStack() as stack:
@@ -48,38 +69,195 @@ async def execute_slice_cli(
                     internal_time=progress.internal_time,
                 )
 
-        await video_slicer.slice_video(
+        if not accurate:
+            await video_slicer.slice_video(
+                ss=ss,
+                to=to,
+                input_path=input_path,
+                output_path=output_path,
+                progress_handler=_handle_progress,
+            )
+            return
+
+        video_smart_slicer = VideoSmartSlicer(
+            fps_parser=fps_parser,
+            key_frame_parser=KeyFrameParser(
+                fps_parser=fps_parser,
+                ffprobe_path=ffprobe_path,
+                key_frame_cache=(
+                    get_shared_key_frame_cache(cache_dir)
+                    if cache_dir is not None
+                    else None
+                ),
+            ),
+            media_probe=media_probe,
+            video_slicer=video_slicer,
+            ffmpeg_path=ffmpeg_path,
+        )
+
+        await video_smart_slicer.slice_video_accurate(
             ss=ss,
             to=to,
             input_path=input_path,
             output_path=output_path,
+            video_codec=video_codec,
+            progress_handler=_handle_progress,
+        )
+
+
+def read_cuts_file(cuts_path: Path) -> list[VideoSlicerCut]:
+    """
+    1行に開始時間・終了時間・出力先（ss,to,output）を書いた CSV ファイルを読み込む
+
+    1行目が ss,to,output ならヘッダーとして読み飛ばす
+    出力先の相対パスは、CSV ファイルのディレクトリを基準とする
+    """
+    cuts: list[VideoSlicerCut] = []
+    with cuts_path.open("r", encoding="utf-8", newline="") as fp:
+        for row_index, row in enumerate(csv.reader(fp)):
+            row = [value.strip() for value in row]
+            if len(row) == 0 or all(value == "" for value in row):
+                continue
+
+            if row_index == 0 and row == ["ss", "to", "output"]:
+                continue
+
+            if len(row) != 3:
+                raise ValueError(
+                    f"Invalid cut at line {row_index + 1}: {row}. Specify ss,to,output."
+                )
+
+            ss, to, output_path_string = row
+            cuts.append(
+                VideoSlicerCut(
+                    ss=ss,
+                    to=to,
+                    output_path=cuts_path.parent / output_path_string,
+                ),
+            )
+
+    return cuts
+
+
+async def execute_slice_cuts_cli(
+    cuts_path: Path,
+    input_path: Path,
+    progress_type: Literal["tqdm", "plain", "none"],
+    ffmpeg_path: str,
+    ffprobe_path: str,
+    cache_dir: Path | None,
+) -> None:
+    cuts = read_cuts_file(cuts_path)
+
+    media_probe = get_shared_media_probe(
+        ffprobe_path=ffprobe_path,
+        cache_dir=cache_dir,
+    )
+
+    fps_parser = FpsParser(
+        ffprobe_path=ffprobe_path,
+        media_probe=media_probe,
+    )
+
+    video_slicer = VideoSlicer(
+        fps_parser=fps_parser,
+        ffmpeg_path=ffmpeg_path,
+        ffprobe_path=ffprobe_path,
+        media_probe=media_probe,
+        key_frame_parser=KeyFrameParser(
+            fps_parser=fps_parser,
+            ffprobe_path=ffprobe_path,
+            key_frame_cache=(
+                get_shared_key_frame_cache(cache_dir) if cache_dir is not None else None
+            ),
+        ),
+    )
+
+    async with AsyncExitStack() as stack:
+        # 範囲ごとに、最初の進捗を受け取ったときに進捗表示を作成する
+        progress_handlers: dict[int, ProgressHandler] = {}
+
+        async def _handle_progress(progress: VideoSlicerCutProgress) -> None:
+            progress_handler = progress_handlers.get(progress.cut_index)
+            if progress_handler is None:
+                name = cuts[progress.cut_index].output_path.name
+                if progress_type == "tqdm":
+                    progress_handler = await stack.enter_async_context(
+                        ProgressHandlerTqdm(name=name),
+                    )
+                elif progress_type == "plain":
+                    progress_handler = await stack.enter_async_context(
+                        ProgressHandlerPlain(name=name),
+                    )
+                else:
+                    return
+
+                progress_handlers[progress.cut_index] = progress_handler
+
+            await progress_handler.handle_progress(
+                frame=progress.frame,
+                time=progress.time,
+                internal_frame=progress.internal_frame,
+                internal_time=progress.internal_time,
+            )
+
+        await video_slicer.slice_video_cuts(
+            input_path=input_path,
+            cuts=cuts,
             progress_handler=_handle_progress,
         )
 
 
 async def handle_slice_cli(args: Namespace) -> None:
-    ss: str = args.ss
-    to: str = args.to
+    ss: str | None = args.ss
+    to: str | None = args.to
+    cuts_path_string: str | None = args.cuts_path
     input_path_string: str = args.input_path
-    output_path_string: str = args.output_path
+    output_path_string: str | None = args.output_path
+    accurate: bool = args.accurate
+    video_codec: str | None = args.video_codec
     progress_type: str = args.progress_type
     ffmpeg_path: str = args.ffmpeg_path
     ffprobe_path: str = args.ffprobe_path
+    cache_dir_string: str = args.cache_dir
+    no_cache: bool = args.no_cache
 
     input_path = Path(input_path_string)
-    output_path = Path(output_path_string)
 
     if not validate_progress_type(progress_type):
         raise ValueError(f"Invalid progress_type: {progress_type}")
 
+    if cuts_path_string is not None:
+        if ss is not None or to is not None or output_path_string is not None:
+            raise ValueError("Do not specify -ss, -to and output_path with --cuts.")
+
+        if accurate:
+            raise ValueError("Do not specify --accurate with --cuts.")
+
+        await execute_slice_cuts_cli(
+            cuts_path=Path(cuts_path_string),
+            input_path=input_path,
+            progress_type=progress_type,
+            ffmpeg_path=ffmpeg_path,
+            ffprobe_path=ffprobe_path,
+            cache_dir=Path(cache_dir_string) if not no_cache else None,
+        )
+        return
+
+    if ss is None or to is None or output_path_string is None:
+        raise ValueError("Specify -ss, -to and output_path, or --cuts.")
+
     await execute_slice_cli(
         ss=ss,
         to=to,
         input_path=input_path,
-        output_path=output_path,
+        output_path=Path(output_path_string),
+        accurate=accurate,
+        video_codec=video_codec,
         progress_type=progress_type,
         ffmpeg_path=ffmpeg_path,
         ffprobe_path=ffprobe_path,
+        cache_dir=Path(cache_dir_string) if not no_cache else None,
     )
 
 
@@ -87,15 +265,25 @@ async def add_arguments_slice_cli(parser: ArgumentParser) -> None:
     parser.add_argument(
         "-ss",
         type=str,
-        required=True,
+        required=False,
         help="Start time",
     )
     parser.add_argument(
         "-to",
         type=str,
-        required=True,
+        required=False,
         help="End time",
     )
+    parser.add_argument(
+        "--cuts",
+        dest="cuts_path",
+        type=str,
+        required=False,
+        help=(
+            "CSV file with ss,to,output rows to cut multiple clips "
+            "in a single read of the input"
+        ),
+    )
     parser.add_argument(
         "-i",
         "--input_path",
@@ -103,6 +291,20 @@ async def add_arguments_slice_cli(parser: ArgumentParser) -> None:
         required=True,
         help="Input video file path",
     )
+    parser.add_argument(
+        "--accurate",
+        action="store_true",
+        help=(
+            "Cut at the exact frames by re-encoding only the partial GOPs "
+            "at both ends (H.264 only)"
+        ),
+    )
+    parser.add_argument(
+        "--video_codec",
+        type=str,
+        required=False,
+        help="Video encoder for --accurate (default: libx264)",
+    )
     parser.add_argument(
         "-p",
         "--progress_type",
@@ -114,6 +316,7 @@ async def add_arguments_slice_cli(parser: ArgumentParser) -> None:
     parser.add_argument(
         "output_path",
         type=str,
+        nargs="?",
         help="Output video file path",
     )
 
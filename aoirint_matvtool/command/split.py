@@ -0,0 +1,198 @@
+from argparse import ArgumentParser, Namespace
+from contextlib import AsyncExitStack
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Literal, TypeGuard
+
+from ..progress_handler.base import ProgressHandler
+from ..progress_handler.plain import ProgressHandlerPlain
+from ..progress_handler.tqdm import ProgressHandlerTqdm
+from ..util import parse_ffmpeg_time_unit_syntax, parse_size_string
+from ..utility.key_frame_cache import get_shared_key_frame_cache
+from ..video_utility.fps_parser import FpsParser
+from ..video_utility.key_frame_parser import KeyFrameParser
+from ..video_utility.media_probe import get_shared_media_probe
+from ..video_utility.video_slicer import VideoSlicer, VideoSlicerCutProgress
+from ..video_utility.video_splitter import VideoSplitter
+
+
+def validate_progress_type(value: Any) -> TypeGuard[Literal["tqdm", "plain", "none"]]:
+    return value in ("tqdm", "plain", "none")
+
+
+async def execute_split_cli(
+    input_path: Path,
+    output_dir: Path,
+    chunk_duration: timedelta | None,
+    chunk_size_bytes: int | None,
+    manifest_path: Path,
+    progress_type: Literal["tqdm", "plain", "none"],
+    ffmpeg_path: str,
+    ffprobe_path: str,
+    cache_dir: Path | None,
+) -> None:
+    media_probe = get_shared_media_probe(
+        ffprobe_path=ffprobe_path,
+        cache_dir=cache_dir,
+    )
+
+    fps_parser = FpsParser(
+        ffprobe_path=ffprobe_path,
+        media_probe=media_probe,
+    )
+
+    key_frame_parser = KeyFrameParser(
+        fps_parser=fps_parser,
+        ffprobe_path=ffprobe_path,
+        key_frame_cache=(
+            get_shared_key_frame_cache(cache_dir) if cache_dir is not None else None
+        ),
+    )
+
+    video_splitter = VideoSplitter(
+        fps_parser=fps_parser,
+        key_frame_parser=key_frame_parser,
+        media_probe=media_probe,
+        video_slicer=VideoSlicer(
+            fps_parser=fps_parser,
+            ffmpeg_path=ffmpeg_path,
+            ffprobe_path=ffprobe_path,
+            media_probe=media_probe,
+            key_frame_parser=key_frame_parser,
+        ),
+    )
+
+    async with AsyncExitStack() as stack:
+        progress_handler: ProgressHandler | None = None
+        if progress_type == "tqdm":
+            progress_handler = await stack.enter_async_context(ProgressHandlerTqdm())
+        elif progress_type == "plain":
+            progress_handler = await stack.enter_async_context(ProgressHandlerPlain())
+
+        # チャンクは重ならないため、元の動画での時刻が最も進んだ進捗を全体の進捗とする
+        last_progress: VideoSlicerCutProgress | None = None
+
+        async def _handle_progress(progress: VideoSlicerCutProgress) -> None:
+            nonlocal last_progress
+            if last_progress is not None and progress.time < last_progress.time:
+                return
+
+            last_progress = progress
+
+            if progress_handler is not None:
+                await progress_handler.handle_progress(
+                    frame=progress.frame,
+                    time=progress.time,
+                    internal_frame=progress.internal_frame,
+                    internal_time=progress.internal_time,
+                )
+
+        chunks = await video_splitter.split_video(
+            input_path=input_path,
+            output_dir=output_dir,
+            chunk_duration=chunk_duration,
+            chunk_size_bytes=chunk_size_bytes,
+            manifest_path=manifest_path,
+            progress_handler=_handle_progress,
+        )
+
+    for chunk in chunks:
+        print(
+            f"{chunk.output_path.name}: "
+            f"{chunk.start_time.total_seconds():.06f} - "
+            f"{chunk.end_time.total_seconds():.06f}",
+            flush=True,
+        )
+
+
+async def handle_split_cli(args: Namespace) -> None:
+    input_path_string: str = args.input_path
+    output_dir_string: str = args.output_dir
+    chunk_duration_string: str | None = args.chunk_duration
+    chunk_size_string: str | None = args.chunk_size
+    manifest_path_string: str | None = args.manifest_path
+    progress_type: str = args.progress_type
+    ffmpeg_path: str = args.ffmpeg_path
+    ffprobe_path: str = args.ffprobe_path
+    cache_dir_string: str = args.cache_dir
+    no_cache: bool = args.no_cache
+
+    input_path = Path(input_path_string)
+    output_dir = Path(output_dir_string)
+
+    if not validate_progress_type(progress_type):
+        raise ValueError(f"Invalid progress_type: {progress_type}")
+
+    chunk_duration = (
+        parse_ffmpeg_time_unit_syntax(chunk_duration_string).to_timedelta()
+        if chunk_duration_string is not None
+        else None
+    )
+    chunk_size_bytes = (
+        parse_size_string(chunk_size_string) if chunk_size_string is not None else None
+    )
+
+    manifest_path = (
+        Path(manifest_path_string)
+        if manifest_path_string is not None
+        else output_dir / f"{input_path.stem}_manifest.csv"
+    )
+
+    await execute_split_cli(
+        input_path=input_path,
+        output_dir=output_dir,
+        chunk_duration=chunk_duration,
+        chunk_size_bytes=chunk_size_bytes,
+        manifest_path=manifest_path,
+        progress_type=progress_type,
+        ffmpeg_path=ffmpeg_path,
+        ffprobe_path=ffprobe_path,
+        cache_dir=Path(cache_dir_string) if not no_cache else None,
+    )
+
+
+async def add_arguments_split_cli(parser: ArgumentParser) -> None:
+    parser.add_argument(
+        "-i",
+        "--input_path",
+        type=str,
+        required=True,
+        help="Input video file path",
+    )
+
+    chunk_group = parser.add_mutually_exclusive_group(required=True)
+    chunk_group.add_argument(
+        "--chunk_duration",
+        type=str,
+        help="Target chunk duration (e.g. 00:30:00 or 1800)",
+    )
+    chunk_group.add_argument(
+        "--chunk_size",
+        type=str,
+        help="Target chunk size estimated from the average bitrate (e.g. 500M, 2G)",
+    )
+
+    parser.add_argument(
+        "--manifest_path",
+        type=str,
+        required=False,
+        help=(
+            "Output CSV file path with the original start time of each chunk "
+            "(default: output_dir/{input_stem}_manifest.csv)"
+        ),
+    )
+    parser.add_argument(
+        "-p",
+        "--progress_type",
+        type=str,
+        choices=("tqdm", "plain", "none"),
+        default="tqdm",
+        help="Progress display type",
+    )
+    parser.add_argument(
+        "output_dir",
+        type=str,
+        help="Output directory path",
+    )
+
+    parser.set_defaults(handler=handle_split_cli)
@@ -0,0 +1,101 @@
+from argparse import ArgumentParser, Namespace
+from logging import getLogger
+from pathlib import Path
+
+from ..utility.key_frame_cache import get_shared_key_frame_cache
+from ..video_utility.chunk_work_queue import ChunkWorkQueue, create_worker_id
+from ..video_utility.chunk_worker import ChunkWorker
+from ..video_utility.fps_parser import FpsParser
+from ..video_utility.key_frame_parser import KeyFrameParser
+from ..video_utility.media_probe import get_shared_media_probe
+from ..video_utility.parallel_crop_scaler import ParallelCropScaler
+
+logger = getLogger(__name__)
+
+
+async def execute_worker_cli(
+    spool_dir: Path,
+    poll_interval_seconds: float,
+    exit_when_idle: bool,
+    ffmpeg_path: str,
+    ffprobe_path: str,
+    cache_dir: Path | None,
+) -> None:
+    media_probe = get_shared_media_probe(
+        ffprobe_path=ffprobe_path,
+        cache_dir=cache_dir,
+    )
+
+    fps_parser = FpsParser(
+        ffprobe_path=ffprobe_path,
+        media_probe=media_probe,
+    )
+
+    worker_id = create_worker_id()
+    chunk_worker = ChunkWorker(
+        work_queue=ChunkWorkQueue(spool_dir=spool_dir),
+        parallel_crop_scaler=ParallelCropScaler(
+            key_frame_parser=KeyFrameParser(
+                fps_parser=fps_parser,
+                ffprobe_path=ffprobe_path,
+                key_frame_cache=(
+                    get_shared_key_frame_cache(cache_dir)
+                    if cache_dir is not None
+                    else None
+                ),
+            ),
+            media_probe=media_probe,
+            ffmpeg_path=ffmpeg_path,
+        ),
+        worker_id=worker_id,
+        poll_interval_seconds=poll_interval_seconds,
+    )
+
+    logger.info("Worker %s started: %s", worker_id, spool_dir)
+
+    num_completed_tasks = await chunk_worker.run(exit_when_idle=exit_when_idle)
+
+    logger.info("Worker %s completed %d tasks.", worker_id, num_completed_tasks)
+
+
+async def handle_worker_cli(args: Namespace) -> None:
+    spool_dir_string: str = args.spool_dir
+    poll_interval: float = args.poll_interval
+    exit_when_idle: bool = args.exit_when_idle
+    ffmpeg_path: str = args.ffmpeg_path
+    ffprobe_path: str = args.ffprobe_path
+    cache_dir_string: str = args.cache_dir
+    no_cache: bool = args.no_cache
+
+    if poll_interval <= 0:
+        raise ValueError(f"Invalid poll_interval: {poll_interval}")
+
+    await execute_worker_cli(
+        spool_dir=Path(spool_dir_string),
+        poll_interval_seconds=poll_interval,
+        exit_when_idle=exit_when_idle,
+        ffmpeg_path=ffmpeg_path,
+        ffprobe_path=ffprobe_path,
+        cache_dir=Path(cache_dir_string) if not no_cache else None,
+    )
+
+
+async def add_arguments_worker_cli(parser: ArgumentParser) -> None:
+    parser.add_argument(
+        "--poll_interval",
+        type=float,
+        default=5.0,
+        help="Interval in seconds to check the spool directory for new tasks",
+    )
+    parser.add_argument(
+        "--exit_when_idle",
+        action="store_true",
+        help="Exit when no pending task is left instead of waiting for new tasks",
+    )
+    parser.add_argument(
+        "spool_dir",
+        type=str,
+        help="Spool directory on the shared filesystem (crop_scale --spool_dir)",
+    )
+
+    parser.set_defaults(handler=handle_worker_cli)
@@ -1,6 +1,26 @@
+import getpass
 import logging
+import os
+import tempfile
+from pathlib import Path
+
+
+def get_default_cache_dir() -> Path:
+    xdg_cache_home = os.environ.get("XDG_CACHE_HOME")
+    cache_home = Path(xdg_cache_home) if xdg_cache_home else Path.home() / ".cache"
+    return cache_home / "aoirint_matvtool"
+
+
+def get_default_socket_path() -> Path:
+    xdg_runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if xdg_runtime_dir:
+        return Path(xdg_runtime_dir) / "aoirint_matvtool.sock"
+
+    return Path(tempfile.gettempdir()) / f"aoirint_matvtool-{getpass.getuser()}.sock"
+
 
 FFMPEG_PATH = "ffmpeg"
 FFPROBE_PATH = "ffprobe"
+CACHE_DIR: Path | None = get_default_cache_dir()
 
 logger = logging.getLogger("matvtool")
@@ -0,0 +1,67 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+
+async def forward_command(
+    socket_path: Path,
+    command: str,
+    argv: list[str],
+    cwd: Path,
+) -> int | None:
+    """
+    起動しているデーモンにサブコマンドの実行を依頼し、終了コードを返す
+
+    ジョブの出力は、受信するたびにこのプロセスの標準出力・標準エラー出力に書き込む
+    デーモンに接続できないときは None を返す
+    """
+    try:
+        reader, writer = await asyncio.open_unix_connection(str(socket_path))
+    except OSError:
+        return None
+
+    try:
+        request_id = 1
+        request = {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": command,
+            "params": {
+                "argv": argv,
+                "cwd": str(cwd),
+            },
+        }
+        writer.write((json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8"))
+        await writer.drain()
+
+        while True:
+            line_bytes = await reader.readline()
+            if not line_bytes:
+                raise Exception("Daemon closed the connection.")
+
+            message: dict[str, Any] = json.loads(line_bytes)
+
+            if message.get("method") == "output":
+                params = message["params"]
+                stream = sys.stderr if params["stream"] == "stderr" else sys.stdout
+                stream.write(params["data"])
+                stream.flush()
+                continue
+
+            if message.get("id") != request_id:
+                continue
+
+            error = message.get("error")
+            if error is not None:
+                raise Exception(f"Daemon errored. {error['message']}")
+
+            exit_code: int = message["result"]["exit_code"]
+            return exit_code
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
@@ -0,0 +1,85 @@
+import io
+import sys
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Literal, TextIO
+
+JobOutputStreamName = Literal["stdout", "stderr"]
+JobOutputWriter = Callable[[JobOutputStreamName, str], None]
+
+_current_job_output_writer: ContextVar[JobOutputWriter | None] = ContextVar(
+    "current_job_output_writer",
+    default=None,
+)
+
+
+class _JobOutputStream(io.TextIOBase):
+    """
+    実行中のジョブの出力を、ジョブごとの送信先に振り分ける標準出力・標準エラー出力
+
+    ジョブの外からの書き込みは、元のストリームに書き込む
+    """
+
+    def __init__(
+        self,
+        stream_name: JobOutputStreamName,
+        original_stream: TextIO,
+    ) -> None:
+        super().__init__()
+        self._stream_name: JobOutputStreamName = stream_name
+        self._original_stream = original_stream
+
+    @property
+    def encoding(self) -> str:  # type: ignore[override]
+        return self._original_stream.encoding
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        writer = _current_job_output_writer.get()
+        if writer is None:
+            return self._original_stream.write(text)
+
+        writer(self._stream_name, text)
+        return len(text)
+
+    def flush(self) -> None:
+        if _current_job_output_writer.get() is None:
+            self._original_stream.flush()
+
+    def isatty(self) -> bool:
+        if _current_job_output_writer.get() is not None:
+            return False
+
+        return self._original_stream.isatty()
+
+
+@contextmanager
+def redirect_job_output() -> Iterator[None]:
+    """
+    sys.stdout と sys.stderr を、ジョブごとに振り分けるストリームに置き換える
+    """
+    original_stdout = sys.stdout
+    original_stderr = sys.stderr
+
+    sys.stdout = _JobOutputStream("stdout", original_stdout)
+    sys.stderr = _JobOutputStream("stderr", original_stderr)
+    try:
+        yield
+    finally:
+        sys.stdout = original_stdout
+        sys.stderr = original_stderr
+
+
+@contextmanager
+def job_output_writer(writer: JobOutputWriter) -> Iterator[None]:
+    """
+    現在のタスク（とそこから作られたタスク）の出力の送信先を設定する
+    """
+    token = _current_job_output_writer.set(writer)
+    try:
+        yield
+    finally:
+        _current_job_output_writer.reset(token)
@@ -0,0 +1,319 @@
+import asyncio
+import importlib
+import json
+from argparse import ArgumentParser
+from collections.abc import Callable
+from logging import getLogger
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel, ValidationError
+
+from .. import __version__ as APP_VERSION
+from .job_output import JobOutputStreamName, job_output_writer, redirect_job_output
+
+logger = getLogger(__name__)
+
+# デーモンで実行できるサブコマンド
+DAEMON_COMMANDS = (
+    "slice",
+    "split",
+    "find_image",
+    "find_audio",
+    "select_audio",
+    "extract_audio",
+    "crop_scale",
+    "batch",
+)
+
+# クライアントの作業ディレクトリからの相対パスとして解決する引数
+_PATH_ARGUMENT_DESTS = (
+    "input_path",
+    "input_video_path",
+    "output_path",
+    "reference_image_path",
+    "reference_audio_path",
+    "index_path",
+    "cuts_path",
+    "output_dir",
+    "manifest_path",
+    "jobs_path",
+    "spool_dir",
+    "auto_tune_report",
+)
+
+# JSON-RPC 2.0 のエラーコード
+JSON_RPC_PARSE_ERROR = -32700
+JSON_RPC_INVALID_REQUEST = -32600
+JSON_RPC_METHOD_NOT_FOUND = -32601
+JSON_RPC_INVALID_PARAMS = -32602
+JSON_RPC_SERVER_ERROR = -32000
+
+
+_SendMessage = Callable[[dict[str, Any]], None]
+
+
+class DaemonCommandParams(BaseModel):
+    argv: list[str]
+    cwd: str
+
+
+class _JsonRpcError(Exception):
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def _resolve_path_argument(value: Any, cwd: Path) -> Any:
+    if isinstance(value, str):
+        return str(cwd / value)
+    if isinstance(value, list):
+        return [_resolve_path_argument(item, cwd) for item in value]
+
+    return value
+
+
+class DaemonServer:
+    """
+    Unix ドメインソケットで JSON-RPC 2.0 のリクエストを受け付け、
+    サブコマンドを同じプロセスで実行する常駐サーバー
+
+    メッセージは1行に1つの JSON（NDJSON）で送受信する
+    ジョブの標準出力・標準エラー出力（進捗・検出結果）は、
+    output 通知として実行中に逐次送信し、終了後に終了コードを応答する
+    プロセス内で共有する MediaProbe・KeyFrameCache により、同じ動画の情報を再利用する
+    """
+
+    def __init__(
+        self,
+        socket_path: Path,
+        max_jobs: int,
+        ffmpeg_path: str,
+        ffprobe_path: str,
+        cache_dir: Path | None,
+    ) -> None:
+        if max_jobs < 1:
+            raise ValueError(f"Invalid max_jobs: {max_jobs}. Specify 1 or more.")
+
+        self._socket_path = socket_path
+        self._ffmpeg_path = ffmpeg_path
+        self._ffprobe_path = ffprobe_path
+        self._cache_dir = cache_dir
+        self._job_semaphore = asyncio.Semaphore(max_jobs)
+
+    async def serve_forever(
+        self,
+        started: asyncio.Event | None = None,
+    ) -> None:
+        await self._remove_stale_socket()
+
+        server = await asyncio.start_unix_server(
+            self._handle_connection,
+            path=str(self._socket_path),
+        )
+        try:
+            with redirect_job_output():
+                async with server:
+                    logger.info("Listening on %s", self._socket_path)
+                    if started is not None:
+                        started.set()
+
+                    await server.serve_forever()
+        finally:
+            self._socket_path.unlink(missing_ok=True)
+
+    async def _remove_stale_socket(self) -> None:
+        if not self._socket_path.exists():
+            return
+
+        try:
+            _, writer = await asyncio.open_unix_connection(str(self._socket_path))
+        except OSError:
+            # 接続できなければ、前回異常終了したサーバーのソケットとみなす
+            self._socket_path.unlink()
+            return
+
+        writer.close()
+        await writer.wait_closed()
+        raise Exception(f"Daemon is already running: {self._socket_path}")
+
+    async def _handle_connection(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        # ジョブの出力は同期的に送信されるため、キューに積んで送信用のタスクで書き込む
+        # 書き込むたびに drain し、クライアントの受信が遅いときは
+        # 送信バッファが空くのを待つ
+        send_queue: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue()
+
+        def _send(message: dict[str, Any]) -> None:
+            send_queue.put_nowait(message)
+
+        async def _write_messages() -> None:
+            while True:
+                message = await send_queue.get()
+                if message is None or writer.is_closing():
+                    return
+
+                writer.write(
+                    (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"),
+                )
+                await writer.drain()
+
+        write_task = asyncio.create_task(_write_messages())
+
+        tasks: set[asyncio.Task[None]] = set()
+        try:
+            while True:
+                line_bytes = await reader.readline()
+                if not line_bytes:
+                    break
+
+                line = line_bytes.decode("utf-8").strip()
+                if not line:
+                    continue
+
+                task = asyncio.create_task(self._handle_request(line, _send))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            # クライアントが切断したら、実行中のジョブを中止する
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+            # キューに残った応答を送信してから切断する
+            send_queue.put_nowait(None)
+            try:
+                await write_task
+            except OSError:
+                pass
+
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def _handle_request(
+        self,
+        line: str,
+        send: _SendMessage,
+    ) -> None:
+        request_id: Any = None
+        try:
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as error:
+                raise _JsonRpcError(JSON_RPC_PARSE_ERROR, str(error)) from error
+
+            if not isinstance(request, dict) or request.get("jsonrpc") != "2.0":
+                raise _JsonRpcError(JSON_RPC_INVALID_REQUEST, "Invalid request")
+
+            request_id = request.get("id")
+            method = request.get("method")
+            params = request.get("params", {})
+
+            result = await self._call_method(
+                request_id=request_id,
+                method=method,
+                params=params,
+                send=send,
+            )
+            send({"jsonrpc": "2.0", "id": request_id, "result": result})
+        except _JsonRpcError as error:
+            send(
+                {
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "error": {"code": error.code, "message": error.message},
+                },
+            )
+        except Exception as error:
+            logger.exception("Daemon job failed.")
+            send(
+                {
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "error": {"code": JSON_RPC_SERVER_ERROR, "message": str(error)},
+                },
+            )
+
+    async def _call_method(
+        self,
+        request_id: Any,
+        method: Any,
+        params: Any,
+        send: _SendMessage,
+    ) -> dict[str, Any]:
+        if method == "ping":
+            return {"version": APP_VERSION}
+
+        if method not in DAEMON_COMMANDS:
+            raise _JsonRpcError(
+                JSON_RPC_METHOD_NOT_FOUND,
+                f"Method not found: {method}",
+            )
+
+        try:
+            command_params = DaemonCommandParams.model_validate(params)
+        except ValidationError as error:
+            raise _JsonRpcError(JSON_RPC_INVALID_PARAMS, str(error)) from error
+
+        def _write_output(stream_name: JobOutputStreamName, text: str) -> None:
+            send(
+                {
+                    "jsonrpc": "2.0",
+                    "method": "output",
+                    "params": {
+                        "id": request_id,
+                        "stream": stream_name,
+                        "data": text,
+                    },
+                },
+            )
+
+        async with self._job_semaphore:
+            with job_output_writer(_write_output):
+                exit_code = await self._run_command(
+                    command=method,
+                    argv=command_params.argv,
+                    cwd=Path(command_params.cwd),
+                )
+
+        return {"exit_code": exit_code}
+
+    async def _run_command(
+        self,
+        command: str,
+        argv: list[str],
+        cwd: Path,
+    ) -> int:
+        command_module = importlib.import_module(
+            f"..command.{command}",
+            package=__package__,
+        )
+        add_arguments = getattr(command_module, f"add_arguments_{command}_cli")
+
+        parser = ArgumentParser(prog=f"matvtool {command}")
+        await add_arguments(parser=parser)
+
+        try:
+            args = parser.parse_args(argv)
+        except SystemExit as error:
+            # 引数の誤りは、CLI と同様に使い方を出力して終了コードを返す
+            return error.code if isinstance(error.code, int) else 1
+
+        args.ffmpeg_path = self._ffmpeg_path
+        args.ffprobe_path = self._ffprobe_path
+        args.cache_dir = str(self._cache_dir) if self._cache_dir is not None else ""
+        args.no_cache = self._cache_dir is None
+
+        for dest in _PATH_ARGUMENT_DESTS:
+            if hasattr(args, dest):
+                setattr(args, dest, _resolve_path_argument(getattr(args, dest), cwd))
+
+        await args.handler(args)
+        return 0
@@ -6,6 +6,9 @@ from .base import ProgressHandler
 
 
 class ProgressHandlerPlain(ProgressHandler):
+    def __init__(self, name: str | None = None) -> None:
+        self._name = name
+
     async def handle_progress(
         self,
         frame: int,
@@ -21,9 +24,11 @@ class ProgressHandlerPlain(ProgressHandler):
             td=time,
         )
 
+        name_string = f"{self._name} | " if self._name is not None else ""
+
         print(
             (
-                f"Progress | "
+                f"Progress | {name_string}"
                 f"Time {time_string}, "
                 f"frame {frame} "
                 f"(Internal time {internal_time_string}, "
@@ -17,11 +17,12 @@ else:
 class ProgressHandlerTqdm(ProgressHandler):
     _tqdm_pbar: TqdmNoReturn | None
 
-    def __init__(self) -> None:
+    def __init__(self, name: str | None = None) -> None:
+        self._name = name
         self._tqdm_pbar = None
 
     async def __aenter__(self) -> Self:
-        self._tqdm_pbar = tqdm()
+        self._tqdm_pbar = tqdm(desc=self._name)
         return self
 
     async def __aexit__(
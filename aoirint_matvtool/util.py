@@ -56,7 +56,9 @@ def parse_ffmpeg_time_unit_syntax(string: str) -> FfmpegTimeUnitSyntax:
         minutes = int(match.group(2))
         seconds = int(match.group(3))
         microseconds = (
-            int(match.group(4)[1:]) if match.group(4) is not None else 0
+            round(float(match.group(4)) * 1_000_000)
+            if match.group(4) is not None
+            else 0
         )  # maybe None
 
         return FfmpegTimeUnitSyntax(
@@ -68,16 +70,8 @@ def parse_ffmpeg_time_unit_syntax(string: str) -> FfmpegTimeUnitSyntax:
 
     match = re.match(r"^(\d+)(\.\d+)?$", string)  # SECONDS
     if match:
-        time_seconds_integer_part = int(match.group(1))
-        time_seconds_decimal_part = int(match.group(2)) if match.group(2) is None else 0
-
-        time_seconds = integer_part_and_decimal_part_to_float(
-            integer_part=time_seconds_integer_part,
-            decimal_part=time_seconds_decimal_part,
-        )
-
-        td = timedelta(seconds=time_seconds)
-        hours, remainder = divmod(td.seconds, 3600)
+        td = timedelta(seconds=float(string))
+        hours, remainder = divmod(td.days * 86400 + td.seconds, 3600)
         minutes, seconds = divmod(remainder, 60)
         microseconds = td.microseconds
 
@@ -92,8 +86,49 @@ def parse_ffmpeg_time_unit_syntax(string: str) -> FfmpegTimeUnitSyntax:
 
 
 def format_timedelta_as_time_unit_syntax_string(td: timedelta) -> str:
-    hours, remainder = divmod(td.seconds, 3600)
+    # 24 時間以上は日数を時間に含める
+    hours, remainder = divmod(td.days * 86400 + td.seconds, 3600)
     minutes, seconds = divmod(remainder, 60)
     microseconds = td.microseconds
 
     return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{microseconds:06d}"
+
+
+_SIZE_UNIT_SCALES = {
+    "": 1,
+    "K": 1024,
+    "M": 1024**2,
+    "G": 1024**3,
+    "T": 1024**4,
+}
+
+
+def parse_size_string(string: str) -> int:
+    """
+    500M・2G のような単位付きのサイズ（1024 倍単位）をバイト数に変換する
+    """
+    match = re.match(r"^(\d+(?:\.\d+)?)([KMGT]?)(?:i?B)?$", string.strip(), re.I)
+    if not match:
+        raise ValueError(f"Unsupported size syntax: {string}")
+
+    return round(float(match.group(1)) * _SIZE_UNIT_SCALES[match.group(2).upper()])
+
+
+_BITRATE_UNIT_SCALES = {
+    "": 1,
+    "K": 1000,
+    "M": 1000**2,
+    "G": 1000**3,
+}
+
+
+def parse_bitrate_string(string: str) -> int:
+    """
+    FFmpeg の -b:v と同じく、4M・800k のような単位付きのビットレート（1000 倍単位）を
+    bit/s に変換する
+    """
+    match = re.match(r"^(\d+(?:\.\d+)?)([KMG]?)(?:bps|b/s)?$", string.strip(), re.I)
+    if not match:
+        raise ValueError(f"Unsupported bitrate syntax: {string}")
+
+    return round(float(match.group(1)) * _BITRATE_UNIT_SCALES[match.group(2).upper()])
@@ -1,7 +1,74 @@
 import asyncio
-from collections.abc import Awaitable, Callable
+import codecs
+import re
+from collections.abc import AsyncIterator, Awaitable, Callable
 from typing import Any
 
+# ストリームから一度に読み込むバイト数
+_STREAM_CHUNK_SIZE = 64 * 1024
+
+_LINE_SEPARATOR_PATTERN = re.compile(r"[\r\n]")
+
+
+async def iterate_stream_lines(
+    stream: asyncio.StreamReader,
+) -> AsyncIterator[str]:
+    """
+    ストリームを1行ずつ読み込み、前後の空白を除いた空でない行を返す
+
+    FFmpeg の進捗表示は \\r で上書きされるため、\\r も行の区切りとして扱う
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    while True:
+        chunk = await stream.read(_STREAM_CHUNK_SIZE)
+        buffer += decoder.decode(chunk, final=not chunk)
+
+        *lines, buffer = _LINE_SEPARATOR_PATTERN.split(buffer)
+        if not chunk:
+            lines.append(buffer)
+
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+
+            yield line
+
+        if not chunk:
+            break
+
+
+async def iterate_process_lines(
+    command: list[str],
+    program_name: str,
+) -> AsyncIterator[str]:
+    """
+    コマンドを実行し、標準出力を1行ずつ返す
+
+    出力全体をメモリに読み込まず、プロセスの実行中に逐次返す
+    終了コードが 0 でなければ、最後まで読み込んだ後に例外を送出する
+    途中で読み込みをやめたときは、プロセスを終了させる
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    try:
+        if proc.stdout is not None:
+            async for line in iterate_stream_lines(proc.stdout):
+                yield line
+
+        returncode = await proc.wait()
+    finally:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+
+    if returncode != 0:
+        raise Exception(f"{program_name} errored. code: {returncode}")
+
 
 async def _consume_stream(
     stream: asyncio.StreamReader | None,
@@ -10,15 +77,7 @@ async def _consume_stream(
     if stream is None:
         return
 
-    while True:
-        line_bytes = await stream.readline()
-        if not line_bytes:
-            break
-
-        line = line_bytes.decode().strip()
-        if not line:
-            break
-
+    async for line in iterate_stream_lines(stream):
         if asyncio.iscoroutinefunction(handler):
             await handler(line)
         elif callable(handler):
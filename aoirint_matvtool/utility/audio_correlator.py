@@ -0,0 +1,135 @@
+import numpy as np
+from numpy.typing import NDArray
+
+# 無音の区間で、正規化相互相関の分母が 0 になるのを避けるための下限
+_MIN_WINDOW_ENERGY = 1e-12
+
+
+class AudioCorrelator:
+    """
+    逐次入力されるモノラルの PCM と参照音声の正規化相互相関を、
+    FFT の overlap-save 法で計算する
+
+    保持するのは FFT サイズ分のバッファだけで、入力の長さによらずメモリ使用量は一定
+    相関は -1 から 1 で、参照音声と音量が違っても波形が一致すれば 1 に近づく
+    """
+
+    def __init__(
+        self,
+        reference_samples: NDArray[np.float32],
+        fft_size: int | None = None,
+    ) -> None:
+        if reference_samples.ndim != 1:
+            raise ValueError("Invalid reference_samples. Specify a 1-D array.")
+
+        reference_length = len(reference_samples)
+        if reference_length < 2:
+            raise ValueError(
+                f"Too short reference: {reference_length} samples. "
+                "Specify 2 or more samples."
+            )
+
+        if fft_size is None:
+            # 1回の FFT で、参照音声の 3 倍程度以上の新しいサンプルを処理する
+            fft_size = 1 << max(16, (4 * reference_length - 1).bit_length())
+
+        if fft_size < reference_length:
+            raise ValueError(
+                f"Invalid fft_size: {fft_size}. "
+                f"Specify the reference length ({reference_length}) or more."
+            )
+
+        reference = reference_samples.astype(np.float64)
+        reference -= reference.mean()
+        reference_norm = float(np.linalg.norm(reference))
+        if reference_norm == 0:
+            raise ValueError("Silent reference. The reference has no variation.")
+
+        self._reference_length = reference_length
+        self._reference_norm = reference_norm
+        self._fft_size = fft_size
+        self._reference_spectrum_conj = np.conj(np.fft.rfft(reference, n=fft_size))
+
+        # 前回の末尾 reference_length - 1 サンプルと、新しいサンプルを並べるバッファ
+        self._window = np.zeros(fft_size, dtype=np.float64)
+        self._window_length = 0
+        # バッファの先頭のサンプルの、入力の先頭からの位置
+        self._window_position = 0
+
+    @property
+    def reference_length(self) -> int:
+        return self._reference_length
+
+    @property
+    def hop_size(self) -> int:
+        """
+        1回の correlate で入力できる、新しいサンプル数の上限
+        """
+        return self._fft_size - self._reference_length + 1
+
+    def create_sample_buffer(self) -> NDArray[np.float32]:
+        """
+        FFmpeg の出力を直接読み込むための、hop_size サンプル分のバッファを作成する
+        """
+        return np.empty(self.hop_size, dtype=np.float32)
+
+    def correlate(
+        self,
+        samples: NDArray[np.float32],
+    ) -> tuple[int, NDArray[np.float64]]:
+        """
+        新しいサンプルを追加し、参照音声の全体が収まるようになった位置の相関を返す
+
+        (最初の位置, 位置ごとの相関) を返す
+        位置は、参照音声の先頭を合わせた入力のサンプルの、入力の先頭からの番号
+        """
+        num_samples = len(samples)
+        if self.hop_size < num_samples:
+            raise ValueError(
+                f"Too many samples: {num_samples}. "
+                f"Specify at most hop_size ({self.hop_size}) samples."
+            )
+
+        reference_length = self._reference_length
+        window = self._window
+
+        window_length = self._window_length + num_samples
+        window[self._window_length : window_length] = samples
+        window[window_length:] = 0.0
+
+        first_position = self._window_position
+        num_positions = window_length - reference_length + 1
+        if num_positions <= 0:
+            self._window_length = window_length
+            return first_position, np.empty(0, dtype=np.float64)
+
+        # NOTE: 参照音声が末尾からはみ出さない位置は、循環相関でも折り返さない
+        correlations = np.fft.irfft(
+            np.fft.rfft(window) * self._reference_spectrum_conj,
+            n=self._fft_size,
+        )[:num_positions]
+
+        # 位置ごとの窓の、平均を除いたエネルギーを累積和から求める
+        valid_window = window[:window_length]
+        sum_cumsum = np.concatenate(([0.0], np.cumsum(valid_window)))
+        square_cumsum = np.concatenate(([0.0], np.cumsum(valid_window**2)))
+        window_sums = sum_cumsum[reference_length:] - sum_cumsum[:num_positions]
+        window_energies = (
+            square_cumsum[reference_length:]
+            - square_cumsum[:num_positions]
+            - window_sums**2 / reference_length
+        )
+
+        scores = np.zeros(num_positions, dtype=np.float64)
+        voiced = _MIN_WINDOW_ENERGY < window_energies
+        scores[voiced] = correlations[voiced] / (
+            self._reference_norm * np.sqrt(window_energies[voiced])
+        )
+
+        # 次の位置の計算に必要な、末尾 reference_length - 1 サンプルを先頭に移す
+        history_length = reference_length - 1
+        window[:history_length] = window[num_positions:window_length]
+        self._window_length = history_length
+        self._window_position = first_position + num_positions
+
+        return first_position, scores
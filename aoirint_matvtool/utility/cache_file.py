@@ -0,0 +1,60 @@
+import os
+import tempfile
+from pathlib import Path
+
+
+def write_cache_file(path: Path, text: str) -> None:
+    """
+    キャッシュファイルを書き込む
+
+    並行して実行されたコマンドが書きかけのファイルを読まないよう置き換える
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with tempfile.NamedTemporaryFile(
+        mode="w",
+        encoding="utf-8",
+        dir=path.parent,
+        suffix=".tmp",
+        delete=False,
+    ) as fp:
+        fp.write(text)
+    os.replace(fp.name, path)
+
+
+def touch_cache_file(path: Path) -> None:
+    """
+    LRU のため、最後に使われた日時として更新日時を更新する
+    """
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def evict_cache_files(cache_file_dir: Path, max_size_bytes: int) -> None:
+    """
+    合計サイズが max_size_bytes を超えたら、最後に使われたのが古い順に削除する
+    """
+    entries: list[tuple[int, int, Path]] = []
+    for cache_file_path in cache_file_dir.glob("*.json"):
+        try:
+            cache_file_stat = cache_file_path.stat()
+        except OSError:
+            continue
+
+        entries.append(
+            (cache_file_stat.st_mtime_ns, cache_file_stat.st_size, cache_file_path)
+        )
+
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, cache_file_path in sorted(entries):
+        if total_size <= max_size_bytes:
+            break
+
+        try:
+            cache_file_path.unlink()
+        except OSError:
+            continue
+
+        total_size -= size
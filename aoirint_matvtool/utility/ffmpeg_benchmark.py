@@ -0,0 +1,59 @@
+import re
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from pydantic import BaseModel
+
+_BENCHMARK_LINE_PATTERN = re.compile(
+    r"^bench:\ utime=([\d.]+)s\ stime=([\d.]+)s\ rtime=([\d.]+)s$",
+)
+
+
+class FfmpegCpuTime(BaseModel):
+    user_seconds: float = 0.0
+    system_seconds: float = 0.0
+
+    @property
+    def total_seconds(self) -> float:
+        return self.user_seconds + self.system_seconds
+
+
+_current_ffmpeg_cpu_time: ContextVar[FfmpegCpuTime | None] = ContextVar(
+    "current_ffmpeg_cpu_time",
+    default=None,
+)
+
+
+@contextmanager
+def record_ffmpeg_cpu_time() -> Iterator[FfmpegCpuTime]:
+    """
+    このコンテキスト（asyncio のタスク）で実行した FFmpeg の CPU 時間を集計する
+
+    集計中は get_ffmpeg_benchmark_opts が -benchmark を返し、
+    FFmpeg が終了時に出力する CPU 時間を handle_ffmpeg_benchmark_line で加算する
+    """
+    cpu_time = FfmpegCpuTime()
+    token = _current_ffmpeg_cpu_time.set(cpu_time)
+    try:
+        yield cpu_time
+    finally:
+        _current_ffmpeg_cpu_time.reset(token)
+
+
+def get_ffmpeg_benchmark_opts() -> list[str]:
+    if _current_ffmpeg_cpu_time.get() is None:
+        return []
+
+    return ["-benchmark"]
+
+
+def handle_ffmpeg_benchmark_line(line: str) -> None:
+    cpu_time = _current_ffmpeg_cpu_time.get()
+    if cpu_time is None:
+        return
+
+    match = _BENCHMARK_LINE_PATTERN.match(line)
+    if match:
+        cpu_time.user_seconds += float(match.group(1))
+        cpu_time.system_seconds += float(match.group(2))
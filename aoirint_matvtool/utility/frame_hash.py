@@ -0,0 +1,158 @@
+import math
+from pathlib import Path
+from typing import Any, Literal, TypeGuard
+
+import numpy as np
+from numpy.typing import NDArray
+
+FrameHashType = Literal["dhash", "phash"]
+
+# インデックスファイルの形式を変更したときに更新する
+FRAME_HASH_INDEX_VERSION = 2
+
+_PHASH_INPUT_SIZE = 32
+_PHASH_LOW_FREQUENCY_SIZE = 8
+
+
+def validate_frame_hash_type(value: Any) -> TypeGuard[FrameHashType]:
+    return value in ("dhash", "phash")
+
+
+def get_frame_hash_input_size(hash_type: FrameHashType) -> tuple[int, int]:
+    """
+    ハッシュの計算に使うグレースケール画像の大きさ（幅, 高さ）を返す
+    """
+    if hash_type == "dhash":
+        # 隣り合う画素の大小を比較するため、横に 1 画素多く使う
+        return (9, 8)
+
+    return (_PHASH_INPUT_SIZE, _PHASH_INPUT_SIZE)
+
+
+def _create_dct_matrix(size: int) -> NDArray[np.float32]:
+    indices = np.arange(size)
+    matrix = np.cos(np.pi * (2 * indices[None, :] + 1) * indices[:, None] / (2 * size))
+    matrix[0] *= 1 / math.sqrt(2)
+    return (matrix * math.sqrt(2 / size)).astype(np.float32)
+
+
+_PHASH_DCT_MATRIX = _create_dct_matrix(_PHASH_INPUT_SIZE)
+
+
+def _pack_hash_bits(bits: NDArray[np.bool_]) -> NDArray[np.uint64]:
+    num_frames = len(bits)
+    packed_bits = np.packbits(bits.reshape((num_frames, 64)), axis=1)
+    hashes: NDArray[np.uint64] = (
+        packed_bits.view(">u8").reshape(num_frames).astype(np.uint64)
+    )
+    return hashes
+
+
+def compute_frame_hashes(
+    frames: NDArray[np.uint8],
+    hash_type: FrameHashType,
+) -> NDArray[np.uint64]:
+    """
+    形状 (フレーム数, 高さ, 幅) のグレースケール画像から、64 bit のハッシュを計算する
+    """
+    if hash_type == "dhash":
+        return _pack_hash_bits(frames[:, :, 1:] > frames[:, :, :-1])
+
+    # 2次元 DCT の低周波成分を、直流成分を除いた中央値と比較する
+    coefficients = _PHASH_DCT_MATRIX @ frames.astype(np.float32) @ _PHASH_DCT_MATRIX.T
+    low_frequency_coefficients = coefficients[
+        :, :_PHASH_LOW_FREQUENCY_SIZE, :_PHASH_LOW_FREQUENCY_SIZE
+    ].reshape((len(frames), -1))
+    medians = np.median(low_frequency_coefficients[:, 1:], axis=1)
+
+    return _pack_hash_bits(low_frequency_coefficients > medians[:, None])
+
+
+class FrameHashIndex:
+    """
+    フレームごとのハッシュの配列と、フレーム番号を時刻に変換するための情報
+    """
+
+    def __init__(
+        self,
+        hashes: NDArray[np.uint64],
+        hash_type: FrameHashType,
+        input_video_crop: str | None,
+        fps: int | None,
+        input_fps: float,
+        internal_fps: float,
+        first_frame_seconds: float,
+        key_frame_seconds: NDArray[np.float64],
+        input_video_size: int,
+        input_video_mtime_ns: int,
+    ) -> None:
+        self.hashes = hashes
+        self.hash_type: FrameHashType = hash_type
+        self.input_video_crop = input_video_crop
+        self.fps = fps
+        self.input_fps = input_fps
+        self.internal_fps = internal_fps
+        self.first_frame_seconds = first_frame_seconds
+        # 入力の開始時刻からのキーフレームの時刻（--ss をキーフレームに合わせるため）
+        self.key_frame_seconds = key_frame_seconds
+        self.input_video_size = input_video_size
+        self.input_video_mtime_ns = input_video_mtime_ns
+
+    def save(self, path: Path) -> None:
+        # np.savez は拡張子 .npz を補うため、ファイルオブジェクトに書き込む
+        with path.open("wb") as fp:
+            np.savez(
+                fp,
+                version=np.int64(FRAME_HASH_INDEX_VERSION),
+                hashes=self.hashes,
+                hash_type=np.str_(self.hash_type),
+                input_video_crop=np.str_(self.input_video_crop or ""),
+                fps=np.int64(self.fps or 0),
+                input_fps=np.float64(self.input_fps),
+                internal_fps=np.float64(self.internal_fps),
+                first_frame_seconds=np.float64(self.first_frame_seconds),
+                key_frame_seconds=self.key_frame_seconds,
+                input_video_size=np.int64(self.input_video_size),
+                input_video_mtime_ns=np.int64(self.input_video_mtime_ns),
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> "FrameHashIndex":
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data["version"])
+            if version != FRAME_HASH_INDEX_VERSION:
+                raise ValueError(
+                    f"Unsupported index version: {version}. Recreate the index."
+                )
+
+            hash_type = str(data["hash_type"])
+            if not validate_frame_hash_type(hash_type):
+                raise ValueError(f"Invalid hash type in index: {hash_type}")
+
+            input_video_crop = str(data["input_video_crop"])
+            fps = int(data["fps"])
+
+            return cls(
+                hashes=data["hashes"].astype(np.uint64),
+                hash_type=hash_type,
+                input_video_crop=input_video_crop if input_video_crop != "" else None,
+                fps=fps if fps != 0 else None,
+                input_fps=float(data["input_fps"]),
+                internal_fps=float(data["internal_fps"]),
+                first_frame_seconds=float(data["first_frame_seconds"]),
+                key_frame_seconds=data["key_frame_seconds"].astype(np.float64),
+                input_video_size=int(data["input_video_size"]),
+                input_video_mtime_ns=int(data["input_video_mtime_ns"]),
+            )
+
+    def find(
+        self,
+        reference_hash: int,
+        max_distance: int,
+    ) -> NDArray[np.intp]:
+        """
+        参照画像のハッシュとのハミング距離が max_distance 以下のフレーム番号を返す
+        """
+        distances = np.bitwise_count(self.hashes ^ np.uint64(reference_hash))
+        frame_indices: NDArray[np.intp] = np.flatnonzero(distances <= max_distance)
+        return frame_indices
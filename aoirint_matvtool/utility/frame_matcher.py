@@ -0,0 +1,120 @@
+from collections.abc import Sequence
+from io import BufferedIOBase, RawIOBase
+
+import numpy as np
+from numpy.typing import NDArray
+
+
+class FrameMatcher:
+    """
+    グレースケールのフレームと参照画像の一致度を、NumPy でまとめて計算する
+
+    一致度は FFmpeg の blend=difference,blackframe と同じく、
+    差分が閾値未満の画素の割合（0-100 の整数、pblack）で表す
+    """
+
+    def __init__(
+        self,
+        reference_frames: NDArray[np.uint8],
+        thresholds: Sequence[int],
+        batch_size: int,
+    ) -> None:
+        if reference_frames.ndim != 3:
+            raise ValueError(
+                "Invalid reference_frames. "
+                "Specify an array of shape (references, height, width)."
+            )
+
+        num_references, height, width = reference_frames.shape
+        if len(thresholds) != num_references:
+            raise ValueError(
+                f"Invalid number of thresholds: {len(thresholds)}. "
+                f"Specify the same number as reference frames ({num_references})."
+            )
+
+        if batch_size < 1:
+            raise ValueError(f"Invalid batch_size: {batch_size}.")
+
+        self._reference_frames = reference_frames
+        self._thresholds = np.asarray(thresholds, dtype=np.uint8).reshape(
+            (1, num_references, 1, 1)
+        )
+        self._batch_size = batch_size
+
+        # 計算途中の配列は、バッチごとに確保し直さないよう使い回す
+        buffer_shape = (batch_size, num_references, height, width)
+        self._max_buffer = np.empty(buffer_shape, dtype=np.uint8)
+        self._diff_buffer = np.empty(buffer_shape, dtype=np.uint8)
+        self._mask_buffer = np.empty(buffer_shape, dtype=np.bool_)
+
+    @property
+    def batch_size(self) -> int:
+        return self._batch_size
+
+    @property
+    def frame_shape(self) -> tuple[int, int, int]:
+        """
+        1フレーム分の配列の形状（参照画像の数, 高さ, 幅）
+        """
+        num_references, height, width = self._reference_frames.shape
+        return (num_references, height, width)
+
+    def create_frame_buffer(self) -> NDArray[np.uint8]:
+        """
+        FFmpeg の出力を直接読み込むための、1バッチ分のフレームバッファを作成する
+        """
+        return np.empty((self._batch_size, *self.frame_shape), dtype=np.uint8)
+
+    def score(
+        self,
+        frames: NDArray[np.uint8],
+    ) -> NDArray[np.int64]:
+        """
+        フレームごと・参照画像ごとの一致度を、形状 (フレーム数, 参照画像の数) で返す
+        """
+        num_frames = len(frames)
+        if self._batch_size < num_frames:
+            raise ValueError(
+                f"Too many frames: {num_frames}. "
+                f"Specify at most batch_size ({self._batch_size}) frames."
+            )
+
+        max_buffer = self._max_buffer[:num_frames]
+        diff_buffer = self._diff_buffer[:num_frames]
+        mask_buffer = self._mask_buffer[:num_frames]
+
+        # uint8 のまま差の絶対値を計算する（max(a, b) - min(a, b)）
+        np.maximum(frames, self._reference_frames, out=max_buffer)
+        np.minimum(frames, self._reference_frames, out=diff_buffer)
+        np.subtract(max_buffer, diff_buffer, out=diff_buffer)
+
+        np.less(diff_buffer, self._thresholds, out=mask_buffer)
+        counts = np.count_nonzero(mask_buffer, axis=(2, 3)).astype(np.int64)
+
+        _, height, width = self._reference_frames.shape
+        scores: NDArray[np.int64] = (counts * 100) // (height * width)
+        return scores
+
+
+def read_frames_into(
+    stream: RawIOBase | BufferedIOBase,
+    frame_buffer: NDArray[np.generic],
+) -> int:
+    """
+    ストリームから、フレームバッファが埋まるか EOF になるまで読み込む
+
+    読み込んだ完全なフレームの数を返す
+    1次元のバッファ（PCM のサンプルなど）では、要素1つを1フレームとして数える
+    """
+    buffer_view = frame_buffer.data.cast("B")
+    frame_size = int(frame_buffer[0].nbytes)
+
+    num_bytes = 0
+    while num_bytes < len(buffer_view):
+        num_read_bytes = stream.readinto(buffer_view[num_bytes:])
+        if not num_read_bytes:
+            break
+
+        num_bytes += num_read_bytes
+
+    return num_bytes // frame_size
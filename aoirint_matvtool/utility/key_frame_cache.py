@@ -0,0 +1,168 @@
+import hashlib
+import os
+from collections import OrderedDict
+from datetime import timedelta
+from functools import cache
+from logging import getLogger
+from pathlib import Path
+
+from pydantic import BaseModel, ValidationError
+
+from .cache_file import evict_cache_files, touch_cache_file, write_cache_file
+
+logger = getLogger(__name__)
+
+# 先頭・末尾から読み込んで部分ハッシュを計算するバイト数
+_PARTIAL_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class _KeyFrameCacheEntry(BaseModel):
+    input_path: str
+    size: int
+    mtime_ns: int
+    partial_hash: str
+    method: str
+    key_frame_seconds_list: list[float]
+
+
+def compute_partial_file_hash(path: Path) -> str:
+    """
+    ファイルの先頭と末尾の一部だけを読み込んで、内容のハッシュを計算する
+    """
+    file_hash = hashlib.sha256()
+    with path.open("rb") as fp:
+        size = os.fstat(fp.fileno()).st_size
+        file_hash.update(str(size).encode("utf-8"))
+        file_hash.update(fp.read(_PARTIAL_HASH_CHUNK_SIZE))
+
+        if _PARTIAL_HASH_CHUNK_SIZE < size:
+            fp.seek(max(_PARTIAL_HASH_CHUNK_SIZE, size - _PARTIAL_HASH_CHUNK_SIZE))
+            file_hash.update(fp.read(_PARTIAL_HASH_CHUNK_SIZE))
+
+    return file_hash.hexdigest()
+
+
+class KeyFrameCache:
+    """
+    動画ごとのキーフレームの時刻を、ディレクトリに保存するキャッシュ
+
+    パス・サイズ・更新日時・部分ハッシュが一致するときのみ使用する
+    合計サイズが max_size_bytes を超えたら、最後に使われたのが古い順に削除する
+
+    常駐するプロセスで繰り返し使うときのため、最近使われた max_memory_entries 件を
+    メモリにも保持する（メモリ上のエントリはパス・サイズ・更新日時のみ確認する）
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        max_size_bytes: int = 64 * 1024 * 1024,
+        max_memory_entries: int = 256,
+    ) -> None:
+        self._cache_dir = cache_dir
+        self._max_size_bytes = max_size_bytes
+        self._max_memory_entries = max_memory_entries
+        self._memory_cache: OrderedDict[tuple[Path, int, int], list[timedelta]] = (
+            OrderedDict()
+        )
+
+    @property
+    def _entry_dir(self) -> Path:
+        return self._cache_dir / "key_frames"
+
+    def _get_entry_path(self, input_path: Path, method: str) -> Path:
+        key_string = f"{input_path.resolve()}\0{method}"
+        key = hashlib.sha256(key_string.encode("utf-8")).hexdigest()
+        return self._entry_dir / f"{key}.json"
+
+    def get(
+        self,
+        input_path: Path,
+        method: str,
+    ) -> list[timedelta] | None:
+        entry_path = self._get_entry_path(input_path=input_path, method=method)
+
+        input_stat = input_path.stat()
+        memory_key = (entry_path, input_stat.st_size, input_stat.st_mtime_ns)
+        memory_key_frames = self._memory_cache.get(memory_key)
+        if memory_key_frames is not None:
+            self._memory_cache.move_to_end(memory_key)
+            touch_cache_file(entry_path)
+            return list(memory_key_frames)
+
+        if not entry_path.exists():
+            return None
+
+        try:
+            entry = _KeyFrameCacheEntry.model_validate_json(
+                entry_path.read_text(encoding="utf-8"),
+            )
+        except (OSError, ValidationError):
+            logger.warning("Ignored broken key frame cache: %s", entry_path)
+            return None
+
+        if (
+            entry.size != input_stat.st_size
+            or entry.mtime_ns != input_stat.st_mtime_ns
+            or entry.partial_hash != compute_partial_file_hash(input_path)
+        ):
+            return None
+
+        touch_cache_file(entry_path)
+
+        key_frames = [
+            timedelta(seconds=seconds) for seconds in entry.key_frame_seconds_list
+        ]
+        self._set_memory_cache(memory_key, key_frames)
+
+        return list(key_frames)
+
+    def set(
+        self,
+        input_path: Path,
+        method: str,
+        key_frames: list[timedelta],
+    ) -> None:
+        input_stat = input_path.stat()
+        entry = _KeyFrameCacheEntry(
+            input_path=str(input_path.resolve()),
+            size=input_stat.st_size,
+            mtime_ns=input_stat.st_mtime_ns,
+            partial_hash=compute_partial_file_hash(input_path),
+            method=method,
+            key_frame_seconds_list=[
+                key_frame.total_seconds() for key_frame in key_frames
+            ],
+        )
+
+        entry_path = self._get_entry_path(input_path=input_path, method=method)
+        self._set_memory_cache(
+            (entry_path, input_stat.st_size, input_stat.st_mtime_ns),
+            list(key_frames),
+        )
+
+        write_cache_file(entry_path, entry.model_dump_json())
+
+        evict_cache_files(
+            cache_file_dir=self._entry_dir,
+            max_size_bytes=self._max_size_bytes,
+        )
+
+    def _set_memory_cache(
+        self,
+        memory_key: tuple[Path, int, int],
+        key_frames: list[timedelta],
+    ) -> None:
+        self._memory_cache[memory_key] = key_frames
+        self._memory_cache.move_to_end(memory_key)
+
+        while self._max_memory_entries < len(self._memory_cache):
+            self._memory_cache.popitem(last=False)
+
+
+@cache
+def get_shared_key_frame_cache(cache_dir: Path) -> KeyFrameCache:
+    """
+    同じプロセスで、キャッシュディレクトリごとに共有する KeyFrameCache を返す
+    """
+    return KeyFrameCache(cache_dir=cache_dir)
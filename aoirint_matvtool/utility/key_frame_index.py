@@ -0,0 +1,224 @@
+import bisect
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
+from datetime import timedelta
+
+
+class KeyFrameIndex:
+    """
+    キーフレームの時刻（秒）を、時刻順の float64 の配列として保持する
+
+    長い動画でも timedelta のリストより省メモリで、二分探索で検索できる
+    キーフレームのデコード時刻（秒）を、同じ順の配列として一緒に保持できる
+    """
+
+    def __init__(
+        self,
+        key_frame_seconds_list: Iterable[float],
+        decode_seconds_list: Iterable[float] | None = None,
+    ) -> None:
+        if decode_seconds_list is None:
+            self._seconds = array("d", sorted(key_frame_seconds_list))
+            self._decode_seconds: array[float] | None = None
+            return
+
+        key_frame_pairs = sorted(
+            zip(key_frame_seconds_list, decode_seconds_list, strict=True),
+        )
+        self._seconds = array("d", (pair[0] for pair in key_frame_pairs))
+        self._decode_seconds = array("d", (pair[1] for pair in key_frame_pairs))
+
+    @classmethod
+    def from_timedeltas(cls, key_frames: Iterable[timedelta]) -> "KeyFrameIndex":
+        return cls(key_frame.total_seconds() for key_frame in key_frames)
+
+    def to_timedeltas(self) -> list[timedelta]:
+        return [timedelta(seconds=seconds) for seconds in self._seconds]
+
+    @property
+    def has_decode_seconds(self) -> bool:
+        return self._decode_seconds is not None
+
+    def get_decode_seconds(self, index: int) -> float | None:
+        """
+        index 番目のキーフレームのデコード時刻を返す（保持していなければ None）
+        """
+        if self._decode_seconds is None:
+            return None
+
+        return self._decode_seconds[index]
+
+    def shift(self, offset_seconds: float) -> "KeyFrameIndex":
+        """
+        表示時刻とデコード時刻に offset_seconds を足したインデックスを返す
+        """
+        return KeyFrameIndex(
+            (seconds + offset_seconds for seconds in self._seconds),
+            (
+                (seconds + offset_seconds for seconds in self._decode_seconds)
+                if self._decode_seconds is not None
+                else None
+            ),
+        )
+
+    def __len__(self) -> int:
+        return len(self._seconds)
+
+    def __getitem__(self, index: int) -> float:
+        return self._seconds[index]
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self._seconds)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, KeyFrameIndex):
+            return NotImplemented
+
+        return (
+            self._seconds == other._seconds
+            and self._decode_seconds == other._decode_seconds
+        )
+
+    def __repr__(self) -> str:
+        return f"KeyFrameIndex({list(self._seconds)!r})"
+
+    def find_before(
+        self,
+        seconds: float,
+        inclusive: bool = False,
+    ) -> float | None:
+        """
+        seconds より前（inclusive なら seconds 以前）にある、最も近いキーフレームを返す
+        """
+        if inclusive:
+            index = bisect.bisect_right(self._seconds, seconds)
+        else:
+            index = bisect.bisect_left(self._seconds, seconds)
+
+        if index == 0:
+            return None
+
+        return self._seconds[index - 1]
+
+    def find_after(
+        self,
+        seconds: float,
+        inclusive: bool = False,
+    ) -> float | None:
+        """
+        seconds より後（inclusive なら seconds 以降）にある、最も近いキーフレームを返す
+        """
+        if inclusive:
+            index = bisect.bisect_left(self._seconds, seconds)
+        else:
+            index = bisect.bisect_right(self._seconds, seconds)
+
+        if index == len(self._seconds):
+            return None
+
+        return self._seconds[index]
+
+    def find_nearest(self, seconds: float) -> float | None:
+        """
+        seconds に最も近いキーフレームを返す（等距離なら前のキーフレーム）
+        """
+        before = self.find_before(seconds, inclusive=True)
+        after = self.find_after(seconds)
+
+        if before is None:
+            return after
+        if after is None or seconds - before <= after - seconds:
+            return before
+
+        return after
+
+    def find_enclosing_gop(self, seconds: float) -> tuple[float | None, float | None]:
+        """
+        seconds を含む GOP の（先頭のキーフレーム, 次の GOP の先頭のキーフレーム）を返す
+
+        最初のキーフレームより前なら先頭は None、最後の GOP なら次の先頭は None
+        """
+        return (
+            self.find_before(seconds, inclusive=True),
+            self.find_after(seconds),
+        )
+
+    def select_evenly_spaced(
+        self,
+        duration_seconds: float,
+        num_samples: int,
+    ) -> list[float]:
+        """
+        0 から duration_seconds までを num_samples 個の区間に分け、
+        各区間の中央に最も近いキーフレームを、重複を除いて時刻順に返す
+        """
+        selected_seconds_set: set[float] = set()
+        for sample_index in range(num_samples):
+            center_seconds = (sample_index + 0.5) * duration_seconds / num_samples
+            selected_seconds = self.find_nearest(center_seconds)
+            if selected_seconds is not None:
+                selected_seconds_set.add(selected_seconds)
+
+        return sorted(selected_seconds_set)
+
+    def slice(
+        self,
+        start_seconds: float | None,
+        end_seconds: float | None,
+    ) -> "KeyFrameIndex":
+        """
+        start_seconds より後、end_seconds より前のキーフレームを返す
+        """
+        start_index = (
+            bisect.bisect_right(self._seconds, start_seconds)
+            if start_seconds is not None
+            else 0
+        )
+        end_index = (
+            bisect.bisect_left(self._seconds, end_seconds)
+            if end_seconds is not None
+            else len(self._seconds)
+        )
+
+        return KeyFrameIndex(
+            self._seconds[start_index:end_index],
+            (
+                self._decode_seconds[start_index:end_index]
+                if self._decode_seconds is not None
+                else None
+            ),
+        )
+
+    def fit_indexes(self, seconds_list: Sequence[float]) -> list[int]:
+        """
+        FFmpeg の -ss オプションの挙動に合わせて、複数の時刻それぞれについて、
+        より前にある最も近いキーフレームのインデックス（なければ -1）を返す
+
+        NumPy があれば、キーフレームの配列をコピーせずに searchsorted でまとめて計算する
+        """
+        try:
+            import numpy as np
+        except ImportError:
+            return [
+                bisect.bisect_left(self._seconds, seconds) - 1
+                for seconds in seconds_list
+            ]
+
+        key_frame_seconds = np.frombuffer(self._seconds, dtype=np.float64)
+        indexes = np.searchsorted(
+            key_frame_seconds,
+            np.asarray(seconds_list, dtype=np.float64),
+            side="left",
+        )
+        fitted_indexes: list[int] = (indexes - 1).tolist()
+        return fitted_indexes
+
+    def fit_times(self, seconds_list: Sequence[float]) -> list[float]:
+        """
+        FFmpeg の -ss オプションの挙動に合わせて、複数の時刻それぞれについて、
+        より前にある最も近いキーフレームの時刻（なければ 0）を返す
+        """
+        return [
+            self._seconds[index] if index != -1 else 0.0
+            for index in self.fit_indexes(seconds_list)
+        ]
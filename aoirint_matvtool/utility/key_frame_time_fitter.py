@@ -21,16 +21,13 @@ class KeyFrameTimeFitter:
         指定した時間に最も近く、指定した時間より前にあるキーフレームの時間を返す
         """
 
-        key_frames = await self._key_frame_parser.parse_key_frames(
+        key_frame = await self._key_frame_parser.parse_key_frame_before(
             input_path=video_path,
+            time=time,
         )
 
-        # キーフレーム情報をもとに time を補正
-        output_time = timedelta(seconds=0)
-        for key_frame in key_frames:
-            # time より前のキーフレームを選択（-ss オプションの挙動）
-            if time <= key_frame:
-                break
-            output_time = key_frame
+        # time より前にキーフレームがなければ、先頭から読み込む
+        if key_frame is None:
+            return timedelta(seconds=0)
 
-        return output_time
+        return key_frame
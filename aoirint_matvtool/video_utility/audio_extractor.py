@@ -0,0 +1,209 @@
+import asyncio
+import re
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+from logging import getLogger
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from ..util import parse_ffmpeg_time_unit_syntax
+from ..utility.async_subprocess_helper import wait_process
+from ..utility.ffmpeg_benchmark import (
+    get_ffmpeg_benchmark_opts,
+    handle_ffmpeg_benchmark_line,
+)
+from .audio_track_title_parser import AudioTrackTitleParser
+from .media_probe import MediaProbe
+
+logger = getLogger(__name__)
+
+# コーデック名（ストリームコピー時）・エンコーダー名ごとの、出力ファイルの拡張子
+# NOTE: 一覧にないものは、ほとんどのコーデックを格納できる Matroska にする
+_AUDIO_CODEC_EXTENSIONS = {
+    "aac": ".m4a",
+    "libfdk_aac": ".m4a",
+    "alac": ".m4a",
+    "mp3": ".mp3",
+    "libmp3lame": ".mp3",
+    "opus": ".opus",
+    "libopus": ".opus",
+    "vorbis": ".ogg",
+    "libvorbis": ".ogg",
+    "flac": ".flac",
+    "ac3": ".ac3",
+    "eac3": ".eac3",
+}
+_DEFAULT_AUDIO_EXTENSION = ".mka"
+
+
+class AudioExtractorProgress(BaseModel):
+    time: timedelta
+    frame: int
+    internal_time: timedelta
+    internal_frame: int
+
+
+def get_audio_codec_extension(codec_name: str | None) -> str:
+    if codec_name is None:
+        return _DEFAULT_AUDIO_EXTENSION
+
+    if codec_name.startswith("pcm_"):
+        return ".wav"
+
+    return _AUDIO_CODEC_EXTENSIONS.get(codec_name, _DEFAULT_AUDIO_EXTENSION)
+
+
+def sanitize_file_name(name: str) -> str:
+    """
+    オーディオトラックのタイトルを、ファイル名に使えるように置き換える
+    """
+    return re.sub(r'[\\/:*?"<>|\x00-\x1f]', "_", name).strip(" .")
+
+
+class AudioExtractor:
+    """
+    入力を1回だけ読み込み、全てのオーディオトラックをそれぞれ別のファイルに出力する
+    """
+
+    def __init__(
+        self,
+        audio_track_title_parser: AudioTrackTitleParser,
+        media_probe: MediaProbe,
+        ffmpeg_path: str,
+    ) -> None:
+        self._audio_track_title_parser = audio_track_title_parser
+        self._media_probe = media_probe
+        self._ffmpeg_path = ffmpeg_path
+
+    async def get_output_paths(
+        self,
+        input_path: Path,
+        output_dir: Path,
+        audio_codec: str | None,
+        output_extension: str | None,
+    ) -> list[Path]:
+        """
+        オーディオトラックごとの出力ファイルのパス
+
+        {入力ファイル名}_{トラック番号}_{タイトル}{拡張子}（タイトルがなければ省略）
+        拡張子を指定しなければ、出力のコーデックから決める
+        """
+        media_info = await self._media_probe.probe(input_path=input_path)
+        titles = await self._audio_track_title_parser.parse_titles(
+            input_path=input_path,
+        )
+
+        output_paths: list[Path] = []
+        for audio_index, (audio_stream, title) in enumerate(
+            zip(media_info.audio_streams, titles, strict=True),
+        ):
+            extension = output_extension
+            if extension is None:
+                extension = get_audio_codec_extension(
+                    audio_codec if audio_codec is not None else audio_stream.codec_name,
+                )
+
+            name = f"{input_path.stem}_{audio_index}"
+            if title is not None and sanitize_file_name(title):
+                name += f"_{sanitize_file_name(title)}"
+
+            output_paths.append(output_dir / f"{name}{extension}")
+
+        return output_paths
+
+    async def extract_audio(
+        self,
+        input_path: Path,
+        output_dir: Path,
+        audio_codec: str | None = None,
+        output_extension: str | None = None,
+        progress_handler: (
+            Callable[[AudioExtractorProgress], Awaitable[None]] | None
+        ) = None,
+    ) -> list[Path]:
+        """
+        全てのオーディオトラック 0:a:i を、1つの FFmpeg プロセスで
+        それぞれのファイルに出力する
+
+        audio_codec を指定しなければ、ストリームコピーする
+        出力したファイルのパスを、トラックの順に返す
+        """
+        output_paths = await self.get_output_paths(
+            input_path=input_path,
+            output_dir=output_dir,
+            audio_codec=audio_codec,
+            output_extension=output_extension,
+        )
+        if len(output_paths) == 0:
+            raise Exception(f"No audio stream found: {input_path}")
+
+        media_info = await self._media_probe.probe(input_path=input_path)
+        # NOTE: 他のコマンドと同じく、映像のフレーム数に換算して進捗を表示する
+        input_video_fps = media_info.fps if len(media_info.video_streams) != 0 else None
+
+        output_opts: list[str] = []
+        for audio_index, output_path in enumerate(output_paths):
+            output_opts += [
+                "-map",
+                f"0:a:{audio_index}",
+                "-map_metadata",
+                "0",
+                "-c:a",
+                audio_codec if audio_codec is not None else "copy",
+                str(output_path),
+            ]
+
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        # Command Argument List
+        command = [
+            self._ffmpeg_path,
+            "-hide_banner",
+            "-n",  # fail if already exists
+            *get_ffmpeg_benchmark_opts(),
+            "-i",
+            str(input_path),
+            *output_opts,
+        ]
+        proc = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+
+        async def _handle_stderr(line: str) -> None:
+            handle_ffmpeg_benchmark_line(line)
+
+            # NOTE: 映像を出力しないため、進捗の行に frame= は含まれない
+            match = re.match(r"^size=.+time=(\d.*?)\ bitrate.+$", line)
+            if match:
+                _time_string = match.group(1).strip()
+
+                _time_struct = parse_ffmpeg_time_unit_syntax(_time_string)
+                _time = _time_struct.to_timedelta()
+
+                _frame = (
+                    int(_time.total_seconds() * input_video_fps)
+                    if input_video_fps is not None
+                    else 0
+                )
+
+                if progress_handler:
+                    await progress_handler(
+                        AudioExtractorProgress(
+                            frame=_frame,
+                            time=_time,
+                            internal_frame=_frame,
+                            internal_time=_time,
+                        ),
+                    )
+
+        returncode = await wait_process(
+            process=proc,
+            stderr_handler=_handle_stderr,
+        )
+        if returncode != 0:
+            raise Exception(f"FFmpeg errored. code: {returncode}")
+
+        return output_paths
@@ -0,0 +1,341 @@
+import asyncio
+import os
+import re
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+from logging import getLogger
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from pydantic import BaseModel
+
+from ..util import parse_ffmpeg_time_unit_syntax
+from ..utility.async_subprocess_helper import wait_process
+from .media_probe import MediaProbe
+
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import NDArray
+
+logger = getLogger(__name__)
+
+
+class AudioFinderProgress(BaseModel):
+    time: timedelta
+    frame: int
+    internal_time: timedelta
+    internal_frame: int
+
+
+class AudioFinderResult(BaseModel):
+    time: timedelta
+    frame: int
+    internal_time: timedelta
+    internal_frame: int
+    # 参照音声との正規化相互相関（-1 から 1）
+    score: float
+
+
+class _AudioFinderHit(BaseModel):
+    # 入力の PCM の先頭からのサンプル番号
+    position: int
+    score: float
+
+
+class AudioFinder:
+    """
+    入力のオーディオトラックから、参照音声と一致する位置を検索する
+
+    FFmpeg から低いサンプリングレートのモノラルの PCM をパイプで受け取り、
+    NumPy の FFT（overlap-save 法）で参照音声との相互相関を計算する
+    （numpy パッケージが必要）
+    """
+
+    def __init__(
+        self,
+        media_probe: MediaProbe,
+        ffmpeg_path: str,
+    ) -> None:
+        self._media_probe = media_probe
+        self._ffmpeg_path = ffmpeg_path
+
+    async def _load_reference_samples(
+        self,
+        reference_audio_path: Path,
+        sample_rate: int,
+    ) -> "NDArray[np.float32]":
+        """
+        参照音声の最初のオーディオトラックを、入力と同じ形式の PCM に変換して読み込む
+        """
+        import numpy as np
+
+        # Command Argument List
+        command = [
+            self._ffmpeg_path,
+            "-hide_banner",
+            "-i",
+            str(reference_audio_path),
+            "-map",
+            "0:a:0",
+            "-ac",
+            "1",
+            "-ar",
+            str(sample_rate),
+            "-f",
+            "f32le",
+            "-",
+        ]
+        proc = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stdout, _ = await proc.communicate()
+
+        if proc.returncode != 0:
+            raise Exception(f"FFmpeg errored. code: {proc.returncode}")
+
+        return np.frombuffer(stdout, dtype=np.float32).copy()
+
+    async def find_audio(
+        self,
+        input_ss: str | None,
+        input_to: str | None,
+        input_path: Path,
+        reference_audio_path: Path,
+        audio_index: int = 0,
+        sample_rate: int = 8000,
+        threshold: float = 0.7,
+        output_interval: float = 0.0,
+        progress_handler: (
+            Callable[[AudioFinderProgress], Awaitable[None]] | None
+        ) = None,
+        result_handler: Callable[[AudioFinderResult], Awaitable[None]] | None = None,
+    ) -> None:
+        """
+        入力のオーディオトラック 0:a:{audio_index} を1回だけデコードし、
+        参照音声との正規化相互相関が threshold 以上になる位置を検索する
+
+        相関が threshold 以上の位置が続くときは、参照音声の長さの範囲で
+        相関が最も高い位置だけを検出する
+        PCM は使い回すバッファに直接読み込むため、入力の長さによらず
+        メモリ使用量は参照音声の長さで決まる
+        """
+        from ..utility.audio_correlator import AudioCorrelator
+        from ..utility.frame_matcher import read_frames_into
+
+        if audio_index < 0:
+            raise ValueError(f"Invalid audio_index: {audio_index}. Specify 0 or more.")
+
+        if sample_rate < 1:
+            raise ValueError(f"Invalid sample_rate: {sample_rate}. Specify 1 or more.")
+
+        if not -1.0 <= threshold <= 1.0:
+            raise ValueError(
+                f"Invalid threshold: {threshold}. Specify from -1.0 to 1.0."
+            )
+
+        media_info = await self._media_probe.probe(input_path=input_path)
+
+        num_audio_streams = len(media_info.audio_streams)
+        if num_audio_streams <= audio_index:
+            raise ValueError(
+                f"Invalid audio_index: {audio_index}. "
+                f"The input has {num_audio_streams} audio streams."
+            )
+
+        # NOTE: 他のコマンドと同じく、映像があれば検出時刻をフレーム数にも換算する
+        input_video_fps = media_info.fps if len(media_info.video_streams) != 0 else None
+
+        def _to_frame(time: timedelta) -> int:
+            if input_video_fps is None:
+                return 0
+
+            return int(time.total_seconds() * input_video_fps)
+
+        # NOTE: 音声は -ss の時刻から正確にデコードされるため、キーフレームに合わせない
+        raw_start_time = (
+            parse_ffmpeg_time_unit_syntax(input_ss) if input_ss is not None else None
+        )
+        start_timedelta = (
+            raw_start_time.to_timedelta()
+            if raw_start_time is not None
+            else timedelta(seconds=0)
+        )
+
+        reference_samples = await self._load_reference_samples(
+            reference_audio_path=reference_audio_path,
+            sample_rate=sample_rate,
+        )
+
+        audio_correlator = AudioCorrelator(reference_samples=reference_samples)
+        sample_buffer = audio_correlator.create_sample_buffer()
+        reference_length = audio_correlator.reference_length
+
+        prev_result_timedelta = timedelta(seconds=-output_interval)
+
+        async def _handle_hit(hit: _AudioFinderHit) -> None:
+            nonlocal prev_result_timedelta
+
+            internal_time = timedelta(seconds=hit.position / sample_rate)
+
+            # 開始時間(ss)分、検出時刻を補正
+            input_timedelta = start_timedelta + internal_time
+
+            if (
+                timedelta(seconds=output_interval)
+                <= input_timedelta - prev_result_timedelta
+            ):
+                if result_handler:
+                    await result_handler(
+                        AudioFinderResult(
+                            time=input_timedelta,
+                            frame=_to_frame(input_timedelta),
+                            internal_time=internal_time,
+                            internal_frame=_to_frame(internal_time),
+                            score=hit.score,
+                        ),
+                    )
+
+                prev_result_timedelta = input_timedelta
+
+        # 検出候補（参照音声の長さの範囲で、相関が最も高い位置）
+        candidate_hit: _AudioFinderHit | None = None
+
+        async def _handle_scores(
+            first_position: int,
+            scores: "NDArray[np.float64]",
+        ) -> None:
+            nonlocal candidate_hit
+
+            import numpy as np
+
+            for hit_index in np.nonzero(threshold <= scores)[0].tolist():
+                position = first_position + hit_index
+                score = float(scores[hit_index])
+
+                if candidate_hit is not None:
+                    if position - candidate_hit.position < reference_length:
+                        if candidate_hit.score < score:
+                            candidate_hit = _AudioFinderHit(
+                                position=position,
+                                score=score,
+                            )
+                        continue
+
+                    await _handle_hit(candidate_hit)
+
+                candidate_hit = _AudioFinderHit(position=position, score=score)
+
+            # 参照音声の長さの範囲に、より相関が高い位置が現れなければ確定する
+            next_position = first_position + len(scores)
+            if (
+                candidate_hit is not None
+                and reference_length <= next_position - candidate_hit.position
+            ):
+                await _handle_hit(candidate_hit)
+                candidate_hit = None
+
+        async def _handle_stderr(line: str) -> None:
+            # NOTE: 映像を出力しないため、進捗の行に frame= は含まれない
+            match = re.match(r"^size=.+time=(\d.*?)\ bitrate.+$", line)
+            if match:
+                _time_string = match.group(1).strip()
+
+                _time_struct = parse_ffmpeg_time_unit_syntax(_time_string)
+                _internal_time = _time_struct.to_timedelta()
+                _time = start_timedelta + _internal_time
+
+                if progress_handler:
+                    await progress_handler(
+                        AudioFinderProgress(
+                            frame=_to_frame(_time),
+                            time=_time,
+                            internal_frame=_to_frame(_internal_time),
+                            internal_time=_internal_time,
+                        ),
+                    )
+
+        slice_opts: list[str] = []
+        if input_ss is not None:
+            slice_opts += [
+                "-ss",
+                input_ss,
+            ]
+
+        if input_to is not None:
+            slice_opts += [
+                "-to",
+                input_to,
+            ]
+
+        # Command Argument List
+        command = [
+            self._ffmpeg_path,
+            "-hide_banner",
+            *slice_opts,
+            "-i",
+            str(input_path),
+            "-map",
+            f"0:a:{audio_index}",
+            "-ac",
+            "1",
+            "-ar",
+            str(sample_rate),
+            "-f",
+            "f32le",
+            "-",
+        ]
+
+        read_fd, write_fd = os.pipe()
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *command,
+                stdout=write_fd,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except BaseException:
+            os.close(read_fd)
+            raise
+        finally:
+            os.close(write_fd)
+
+        async def _read_samples() -> None:
+            with open(read_fd, "rb", buffering=0) as sample_stream:
+                while True:
+                    num_samples = await asyncio.to_thread(
+                        read_frames_into,
+                        sample_stream,
+                        sample_buffer,
+                    )
+                    if num_samples == 0:
+                        break
+
+                    first_position, scores = await asyncio.to_thread(
+                        audio_correlator.correlate,
+                        sample_buffer[:num_samples],
+                    )
+                    await _handle_scores(first_position, scores)
+
+                    if num_samples < len(sample_buffer):
+                        break
+
+        try:
+            _, returncode = await asyncio.gather(
+                _read_samples(),
+                wait_process(
+                    process=proc,
+                    stderr_handler=_handle_stderr,
+                ),
+            )
+        except BaseException:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
+
+        if returncode != 0:
+            raise Exception(f"FFmpeg errored. code: {returncode}")
+
+        if candidate_hit is not None:
+            await _handle_hit(candidate_hit)
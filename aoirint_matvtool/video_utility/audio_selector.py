@@ -14,6 +14,10 @@ from ..util import (
     parse_ffmpeg_time_unit_syntax,
 )
 from ..utility.async_subprocess_helper import wait_process
+from ..utility.ffmpeg_benchmark import (
+    get_ffmpeg_benchmark_opts,
+    handle_ffmpeg_benchmark_line,
+)
 from ..video_utility.fps_parser import FpsParser
 
 logger = getLogger(__name__)
@@ -64,6 +68,7 @@ class AudioSelector:
             self._ffmpeg_path,
             "-hide_banner",
             "-n",  # fail if already exists
+            *get_ffmpeg_benchmark_opts(),
             "-i",
             str(input_path),
             "-map",
@@ -82,7 +87,9 @@ class AudioSelector:
         )
 
         async def _handle_stderr(line: str) -> None:
-            match = re.match(r"^frame=\ *(\d+?)\ .+time=(.+?)\ bitrate.+$", line)
+            handle_ffmpeg_benchmark_line(line)
+
+            match = re.match(r"^frame=\ *(\d+?)\ .+time=(\d.*?)\ bitrate.+$", line)
             if match:
                 _frame = int(match.group(1))
                 _time_string = match.group(2).strip()
@@ -1,62 +1,26 @@
-import asyncio
 from pathlib import Path
 
-from pydantic import BaseModel
-
-
-class _FfprobeStreamTags(BaseModel):
-    title: str | None = None
-
-
-class _FfprobeStream(BaseModel):
-    tags: _FfprobeStreamTags | None = None
-
-
-class _FfprobeOutput(BaseModel):
-    streams: list[_FfprobeStream]
+from .media_probe import MediaProbe
 
 
 class AudioTrackTitleParser:
     def __init__(
         self,
         ffprobe_path: str,
+        media_probe: MediaProbe | None = None,
     ) -> None:
-        self._ffprobe_path = ffprobe_path
+        self._media_probe = (
+            media_probe
+            if media_probe is not None
+            else MediaProbe(ffprobe_path=ffprobe_path)
+        )
 
     async def parse_titles(
         self,
         input_path: Path,
     ) -> list[str | None]:
-        command = [
-            self._ffprobe_path,
-            "-hide_banner",
-            "-i",
-            str(input_path),
-            "-show_streams",
-            "-select_streams",
-            "a",
-            "-print_format",
-            "json",
-        ]
-        proc = await asyncio.create_subprocess_exec(
-            *command,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.DEVNULL,
+        media_info = await self._media_probe.probe(
+            input_path=input_path,
         )
-        stdout_bytes, _ = await proc.communicate()
-
-        if proc.returncode != 0:
-            raise Exception(f"FFprobe errored. code: {proc.returncode}")
-
-        stdout = stdout_bytes.decode("utf-8")
-        ffprobe_output = _FfprobeOutput.model_validate_json(stdout)
-
-        ret_titles: list[str | None] = []
-        for stream in ffprobe_output.streams:
-            title: str | None = None
-            if stream.tags:
-                title = stream.tags.title
-
-            ret_titles.append(title)
 
-        return ret_titles
+        return media_info.audio_titles
@@ -0,0 +1,261 @@
+import os
+import socket
+import time
+import uuid
+from logging import getLogger
+from pathlib import Path
+
+from pydantic import BaseModel, ValidationError
+
+logger = getLogger(__name__)
+
+
+class ChunkEncodeTask(BaseModel):
+    task_id: str
+    job_id: str
+    input_path: Path
+    # 入力の開始時刻からの、チャンクの範囲（最後のチャンクは end_seconds が None）
+    start_seconds: float
+    end_seconds: float | None
+    # 入力のタイムスタンプ（-copyts）に変換するための、入力の開始時刻
+    start_time_seconds: float
+    video_filters: list[str]
+    video_codec: str | None
+    video_codec_options: list[str] | None = None
+    output_path: Path
+    # この時間ハートビートがなければ、ワーカーが異常終了したとみなして再びキューに入れる
+    lease_seconds: float
+
+
+class ChunkEncodeTaskFailure(BaseModel):
+    task: ChunkEncodeTask
+    worker_id: str
+    error: str
+
+
+class ChunkWorkQueueClaim(BaseModel):
+    task: ChunkEncodeTask
+    worker_id: str
+    running_path: Path
+
+
+def create_worker_id() -> str:
+    """
+    ホスト名・プロセス ID から、共有ファイルシステム上で一意なワーカー ID を作る
+
+    NOTE: タスクのファイル名の区切りに使うため、"." を含めない
+    """
+    hostname = socket.gethostname().replace(".", "-")
+    return f"{hostname}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+class ChunkWorkQueue:
+    """
+    共有ファイルシステム上のスプールディレクトリによる、チャンクのエンコードのキュー
+
+    タスクの状態は、タスクのファイルを置くディレクトリで表す
+    状態の遷移はすべて同じファイルシステム内の rename で行うため、
+    複数のワーカーが同じタスクを同時に取得することはない
+
+    - pending/{task_id}.json: 未取得
+    - running/{task_id}.{worker_id}.json: 実行中（更新日時をリースのハートビートとする）
+    - done/{task_id}.json: 完了
+    - failed/{task_id}.json: 失敗（ChunkEncodeTaskFailure）
+
+    NOTE: リースの期限は更新日時で判定するため、各マシンの時刻を同期しておく
+    """
+
+    def __init__(self, spool_dir: Path) -> None:
+        self._spool_dir = spool_dir
+        self._tmp_dir = spool_dir / "tmp"
+        self._pending_dir = spool_dir / "pending"
+        self._running_dir = spool_dir / "running"
+        self._done_dir = spool_dir / "done"
+        self._failed_dir = spool_dir / "failed"
+
+        for directory in (
+            self._tmp_dir,
+            self._pending_dir,
+            self._running_dir,
+            self._done_dir,
+            self._failed_dir,
+        ):
+            directory.mkdir(parents=True, exist_ok=True)
+
+    def get_job_dir(self, job_id: str) -> Path:
+        """
+        ジョブのチャンクを書き込むディレクトリ
+        """
+        return self._spool_dir / "jobs" / job_id
+
+    def submit(self, task: ChunkEncodeTask) -> None:
+        self._write_atomic(
+            self._pending_dir / f"{task.task_id}.json",
+            task.model_dump_json(),
+        )
+
+    def claim(self, worker_id: str) -> ChunkWorkQueueClaim | None:
+        """
+        未取得のタスクを1つ取得する（なければ None）
+        """
+        for pending_path in sorted(self._pending_dir.glob("*.json")):
+            task_id = pending_path.stem
+            running_path = self._running_dir / f"{task_id}.{worker_id}.json"
+
+            try:
+                # NOTE: rename は更新日時を保つため、先に更新してからリースを始める
+                os.utime(pending_path)
+                pending_path.rename(running_path)
+            except FileNotFoundError:
+                # 他のワーカーが先に取得した
+                continue
+
+            try:
+                task = ChunkEncodeTask.model_validate_json(
+                    running_path.read_text(encoding="utf-8"),
+                )
+            except ValidationError:
+                logger.warning("Broken task: %s", running_path)
+                running_path.rename(self._failed_dir / f"{task_id}.json")
+                continue
+
+            return ChunkWorkQueueClaim(
+                task=task,
+                worker_id=worker_id,
+                running_path=running_path,
+            )
+
+        return None
+
+    def renew(self, claim: ChunkWorkQueueClaim) -> bool:
+        """
+        リースを延長する
+
+        期限切れで他のワーカーに渡っていれば、False を返す
+        """
+        try:
+            os.utime(claim.running_path)
+        except FileNotFoundError:
+            return False
+
+        return True
+
+    def complete(self, claim: ChunkWorkQueueClaim) -> bool:
+        """
+        タスクを完了にする
+
+        期限切れで他のワーカーに渡っていれば、False を返す
+        """
+        try:
+            claim.running_path.rename(self._done_dir / f"{claim.task.task_id}.json")
+        except FileNotFoundError:
+            return False
+
+        return True
+
+    def fail(self, claim: ChunkWorkQueueClaim, error: str) -> bool:
+        """
+        タスクを失敗にする
+
+        期限切れで他のワーカーに渡っていれば、失敗を書き込まずに False を返す
+        """
+        # NOTE: 実行中のファイルを rename で取得できたときだけ、失敗を書き込む
+        # 取得したファイルは、失敗の読み込み（*.json）に含まれない名前にしておく
+        failing_path = self._failed_dir / f"{claim.running_path.stem}.failing"
+        try:
+            claim.running_path.rename(failing_path)
+        except FileNotFoundError:
+            return False
+
+        failure = ChunkEncodeTaskFailure(
+            task=claim.task,
+            worker_id=claim.worker_id,
+            error=error,
+        )
+        self._write_atomic(
+            self._failed_dir / f"{claim.task.task_id}.json",
+            failure.model_dump_json(),
+        )
+        failing_path.unlink(missing_ok=True)
+
+        return True
+
+    def requeue_expired(self) -> list[str]:
+        """
+        リースの期限が切れた実行中のタスクを、再びキューに入れる
+
+        再びキューに入れたタスクの ID を返す
+        """
+        now = time.time()
+
+        requeued_task_ids: list[str] = []
+        for running_path in sorted(self._running_dir.glob("*.json")):
+            task_id = running_path.name.split(".", 1)[0]
+
+            try:
+                task = ChunkEncodeTask.model_validate_json(
+                    running_path.read_text(encoding="utf-8"),
+                )
+                mtime = running_path.stat().st_mtime
+            except FileNotFoundError:
+                # 読み込む間に完了した
+                continue
+            except ValidationError:
+                logger.warning("Ignored broken task: %s", running_path)
+                continue
+
+            if now - mtime < task.lease_seconds:
+                continue
+
+            try:
+                running_path.rename(self._pending_dir / f"{task_id}.json")
+            except FileNotFoundError:
+                continue
+
+            logger.warning("Requeued expired task: %s", running_path.name)
+            requeued_task_ids.append(task_id)
+
+        return requeued_task_ids
+
+    def list_done_task_ids(self, job_id: str) -> set[str]:
+        return {path.stem for path in self._done_dir.glob(f"{job_id}_*.json")}
+
+    def read_failure_errors(self, job_id: str) -> dict[str, str]:
+        """
+        失敗したタスクの ID ごとのエラーメッセージ
+        """
+        errors: dict[str, str] = {}
+        for failed_path in sorted(self._failed_dir.glob(f"{job_id}_*.json")):
+            try:
+                failure = ChunkEncodeTaskFailure.model_validate_json(
+                    failed_path.read_text(encoding="utf-8"),
+                )
+            except ValidationError:
+                errors[failed_path.stem] = "Broken task"
+                continue
+
+            errors[failed_path.stem] = f"{failure.error} (worker: {failure.worker_id})"
+
+        return errors
+
+    def remove_job(self, job_id: str) -> None:
+        """
+        ジョブのタスクのファイルを削除する
+
+        未取得のタスクを先に削除して、ワーカーが新たに取得しないようにする
+        """
+        for directory in (
+            self._pending_dir,
+            self._running_dir,
+            self._done_dir,
+            self._failed_dir,
+        ):
+            for path in directory.glob(f"{job_id}_*"):
+                path.unlink(missing_ok=True)
+
+    def _write_atomic(self, path: Path, data: str) -> None:
+        # 書き込み途中のファイルを他のプロセスに見せないよう、
+        # 一時ファイルに書き込んでから rename する
+        tmp_path = self._tmp_dir / f"{uuid.uuid4().hex}.json"
+        tmp_path.write_text(data, encoding="utf-8")
+        tmp_path.rename(path)
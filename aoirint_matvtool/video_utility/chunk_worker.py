@@ -0,0 +1,126 @@
+import asyncio
+from logging import getLogger
+
+from .chunk_work_queue import ChunkWorkQueue, ChunkWorkQueueClaim
+from .parallel_crop_scaler import ParallelCropScaler
+
+logger = getLogger(__name__)
+
+
+class _LeaseLostError(Exception):
+    pass
+
+
+class ChunkWorker:
+    """
+    ChunkWorkQueue からチャンクのエンコードのタスクを取得して、1つずつ実行する
+
+    実行中はリースの期限の 1/3 ごとにハートビートを送り、
+    期限切れで他のワーカーに渡ったときはエンコードを中止する
+    """
+
+    def __init__(
+        self,
+        work_queue: ChunkWorkQueue,
+        parallel_crop_scaler: ParallelCropScaler,
+        worker_id: str,
+        poll_interval_seconds: float,
+    ) -> None:
+        self._work_queue = work_queue
+        self._parallel_crop_scaler = parallel_crop_scaler
+        self._worker_id = worker_id
+        self._poll_interval_seconds = poll_interval_seconds
+
+    async def run(self, exit_when_idle: bool = False) -> int:
+        """
+        タスクを実行し続ける
+
+        exit_when_idle が True なら、未取得のタスクがなくなったときに終了する
+        完了したタスクの数を返す
+        """
+        num_completed_tasks = 0
+        while True:
+            # 異常終了したワーカーのタスクを、他のワーカーが引き継げるようにする
+            self._work_queue.requeue_expired()
+
+            claim = self._work_queue.claim(worker_id=self._worker_id)
+            if claim is None:
+                if exit_when_idle:
+                    break
+
+                await asyncio.sleep(self._poll_interval_seconds)
+                continue
+
+            if await self._run_task(claim=claim):
+                num_completed_tasks += 1
+
+        return num_completed_tasks
+
+    async def _run_task(self, claim: ChunkWorkQueueClaim) -> bool:
+        task = claim.task
+        logger.info("Claimed task: %s", task.task_id)
+
+        # NOTE: 期限切れで同じタスクを実行する他のワーカーと競合しないよう、
+        # ワーカーごとの一時ファイルに書き込んでから rename する
+        partial_path = task.output_path.with_name(
+            f"{task.output_path.stem}.{self._worker_id}.partial"
+            f"{task.output_path.suffix}",
+        )
+
+        encode_task = asyncio.create_task(
+            self._parallel_crop_scaler.encode_chunk(
+                input_path=task.input_path,
+                start_seconds=task.start_seconds,
+                end_seconds=task.end_seconds,
+                start_time_seconds=task.start_time_seconds,
+                video_filters=task.video_filters,
+                video_codec=task.video_codec,
+                video_codec_options=task.video_codec_options,
+                output_path=partial_path,
+            ),
+        )
+        lease_task = asyncio.create_task(self._keep_lease(claim=claim))
+
+        try:
+            await asyncio.wait(
+                (encode_task, lease_task),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+
+            if not encode_task.done():
+                encode_task.cancel()
+                await asyncio.gather(encode_task, return_exceptions=True)
+                logger.warning("Lease lost. Aborted task: %s", task.task_id)
+                return False
+
+            error = encode_task.exception()
+            if error is not None:
+                logger.error("Task failed: %s: %s", task.task_id, error)
+                if not self._work_queue.fail(claim=claim, error=str(error)):
+                    logger.warning("Lease lost. Discarded failure: %s", task.task_id)
+                return False
+
+            if not self._work_queue.renew(claim=claim):
+                logger.warning("Lease lost. Discarded task: %s", task.task_id)
+                return False
+
+            partial_path.rename(task.output_path)
+            if not self._work_queue.complete(claim=claim):
+                logger.warning("Lease lost after completion: %s", task.task_id)
+                return False
+        finally:
+            for running_task in (encode_task, lease_task):
+                running_task.cancel()
+            await asyncio.gather(encode_task, lease_task, return_exceptions=True)
+
+            partial_path.unlink(missing_ok=True)
+
+        logger.info("Completed task: %s", task.task_id)
+        return True
+
+    async def _keep_lease(self, claim: ChunkWorkQueueClaim) -> None:
+        while True:
+            await asyncio.sleep(claim.task.lease_seconds / 3)
+
+            if not self._work_queue.renew(claim=claim):
+                raise _LeaseLostError(claim.task.task_id)
@@ -0,0 +1,209 @@
+import asyncio
+import os
+import re
+from logging import getLogger
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from ..utility.async_subprocess_helper import wait_process
+from .key_frame_parser import KeyFrameParser
+from .media_probe import MediaProbe
+
+logger = getLogger(__name__)
+
+_CROPDETECT_LINE_PATTERN = re.compile(
+    r"\bw:(-?\d+)\ h:(-?\d+)\ x:(-?\d+)\ y:(-?\d+)\ ",
+)
+
+
+class DetectedCrop(BaseModel):
+    width: int
+    height: int
+    x: int
+    y: int
+
+    def to_crop_string(self) -> str:
+        """
+        crop フィルタ（crop_scale の --crop）に指定する w:h:x:y の文字列
+        """
+        return f"{self.width}:{self.height}:{self.x}:{self.y}"
+
+
+def merge_detected_crops(
+    detected_crops: list[DetectedCrop],
+    round_size: int = 2,
+) -> DetectedCrop:
+    """
+    全てのサンプルで検出した範囲を含む、最小の範囲を返す
+
+    暗い場面では黒帯より内側まで黒とみなされるため、
+    範囲を絞るのではなく、いずれかのサンプルで映っていた範囲は残す
+    幅・高さは、入力の範囲を超えないよう round_size の倍数に切り捨てる
+    """
+    if len(detected_crops) == 0:
+        raise ValueError("No detected crop to merge.")
+
+    left = min(crop.x for crop in detected_crops)
+    top = min(crop.y for crop in detected_crops)
+    right = max(crop.x + crop.width for crop in detected_crops)
+    bottom = max(crop.y + crop.height for crop in detected_crops)
+
+    width = (right - left) // round_size * round_size
+    height = (bottom - top) // round_size * round_size
+
+    return DetectedCrop(
+        width=width,
+        height=height,
+        x=left,
+        y=top,
+    )
+
+
+class CropDetector:
+    """
+    キーフレームの位置にシークして、数フレームずつ cropdetect フィルタで黒帯を検出する
+
+    動画全体をデコードしないため、処理時間は動画の長さではなくサンプル数に比例する
+    """
+
+    def __init__(
+        self,
+        key_frame_parser: KeyFrameParser,
+        media_probe: MediaProbe,
+        ffmpeg_path: str,
+    ) -> None:
+        self._key_frame_parser = key_frame_parser
+        self._media_probe = media_probe
+        self._ffmpeg_path = ffmpeg_path
+
+    async def detect_crop(
+        self,
+        input_path: Path,
+        num_samples: int = 10,
+        frames_per_sample: int = 5,
+        limit: float = 24 / 255,
+    ) -> DetectedCrop:
+        """
+        入力を num_samples 個の区間に分け、各区間の中央に最も近いキーフレームから
+        frames_per_sample フレームずつ黒帯を検出し、全てのサンプルを含む範囲を返す
+
+        limit は黒とみなす明るさの上限（0 から 1）
+        """
+        if num_samples < 1:
+            raise ValueError(f"Invalid number of samples: {num_samples}.")
+        if frames_per_sample < 1:
+            raise ValueError(f"Invalid frames per sample: {frames_per_sample}.")
+
+        media_info = await self._media_probe.probe(input_path=input_path)
+        duration = media_info.duration
+        if duration is None:
+            raise Exception(f"Duration not found: {input_path}")
+
+        duration_seconds = duration.total_seconds()
+
+        key_frame_index = (
+            await self._key_frame_parser.parse_key_frame_index_relative_to_start(
+                input_path=input_path,
+                media_probe=self._media_probe,
+            )
+        )
+
+        sample_seconds_list = sorted(
+            {
+                max(sample_seconds, 0.0)
+                for sample_seconds in key_frame_index.select_evenly_spaced(
+                    duration_seconds=duration_seconds,
+                    num_samples=num_samples,
+                )
+            },
+        )
+
+        semaphore = asyncio.Semaphore(os.cpu_count() or 1)
+
+        async def _detect_sample(sample_seconds: float) -> DetectedCrop | None:
+            async with semaphore:
+                return await self._detect_crop_at(
+                    input_path=input_path,
+                    ss_seconds=sample_seconds,
+                    frames=frames_per_sample,
+                    limit=limit,
+                )
+
+        sample_crops = await asyncio.gather(
+            *(_detect_sample(sample_seconds) for sample_seconds in sample_seconds_list),
+        )
+
+        detected_crops = [crop for crop in sample_crops if crop is not None]
+        if len(detected_crops) == 0:
+            raise Exception(f"No crop detected. All samples are black: {input_path}")
+
+        logger.info(
+            "Detected crops: %s",
+            ", ".join(crop.to_crop_string() for crop in detected_crops),
+        )
+
+        return merge_detected_crops(detected_crops=detected_crops)
+
+    async def _detect_crop_at(
+        self,
+        input_path: Path,
+        ss_seconds: float,
+        frames: int,
+        limit: float,
+    ) -> DetectedCrop | None:
+        """
+        キーフレームから frames フレームで検出した範囲を返す（全て黒なら None）
+        """
+        # NOTE: reset=0 で、フレームごとの検出範囲を合わせた範囲を最後に出力させる
+        command = [
+            self._ffmpeg_path,
+            "-hide_banner",
+            "-ss",
+            f"{ss_seconds:.6f}",
+            "-i",
+            str(input_path),
+            "-map",
+            "0:v:0",
+            "-frames:v",
+            str(frames),
+            "-filter:v",
+            f"cropdetect=limit={limit:.6f}:round=2:skip=0:reset=0",
+            "-f",
+            "null",
+            "-",
+        ]
+        proc = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+
+        detected_crop: DetectedCrop | None = None
+
+        def _handle_stderr(line: str) -> None:
+            nonlocal detected_crop
+
+            match = _CROPDETECT_LINE_PATTERN.search(line)
+            if match:
+                width = int(match.group(1))
+                height = int(match.group(2))
+                if width <= 0 or height <= 0:
+                    detected_crop = None
+                    return
+
+                detected_crop = DetectedCrop(
+                    width=width,
+                    height=height,
+                    x=int(match.group(3)),
+                    y=int(match.group(4)),
+                )
+
+        returncode = await wait_process(
+            process=proc,
+            stderr_handler=_handle_stderr,
+        )
+        if returncode != 0:
+            raise Exception(f"FFmpeg errored. code: {returncode}")
+
+        return detected_crop
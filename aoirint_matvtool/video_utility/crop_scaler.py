@@ -10,6 +10,10 @@ from pydantic import BaseModel
 from ..progress_handler.utility.progress_calculator import ProgressCalculator
 from ..util import exclude_none, parse_ffmpeg_time_unit_syntax
 from ..utility.async_subprocess_helper import wait_process
+from ..utility.ffmpeg_benchmark import (
+    get_ffmpeg_benchmark_opts,
+    handle_ffmpeg_benchmark_line,
+)
 from ..video_utility.fps_parser import FpsParser
 
 logger = getLogger(__name__)
@@ -22,6 +26,52 @@ class CropScalerProgress(BaseModel):
     internal_frame: int
 
 
+class CropScaleRendition(BaseModel):
+    crop: str | None
+    scale: str | None
+    video_codec: str | None
+    output_path: Path
+
+
+class CropScalerRenditionProgress(BaseModel):
+    rendition_index: int
+    time: timedelta
+    frame: int
+    internal_time: timedelta
+    internal_frame: int
+
+
+_UNESCAPED_COMMA_PATTERN = re.compile(r"(?<!\\),")
+
+
+def build_crop_scale_video_filters(
+    crop: str | None,
+    scale: str | None,
+) -> list[str]:
+    """
+    -filter:v に指定する、切り取り・拡大縮小のフィルタのリスト
+    """
+    # TODO: quality control
+    # 式の中の "," は、フィルタの区切りと区別するため "\," とエスケープする
+    if crop is not None and _UNESCAPED_COMMA_PATTERN.search(crop):
+        raise ValueError("Invalid crop argument. Escape ',' in crop as '\\,'.")
+
+    if scale is not None and _UNESCAPED_COMMA_PATTERN.search(scale):
+        raise ValueError("Invalid scale argument. Escape ',' in scale as '\\,'.")
+
+    crop_filter_string = f"crop={crop}" if crop is not None else None
+    scale_filter_string = f"scale={scale}" if scale is not None else None
+
+    return list(
+        exclude_none(
+            [
+                crop_filter_string,
+                scale_filter_string,
+            ]
+        )
+    )
+
+
 class CropScaler:
     def __init__(
         self,
@@ -38,6 +88,7 @@ class CropScaler:
         scale: str | None,
         video_codec: str | None,
         output_path: Path,
+        video_codec_options: list[str] | None = None,
         progress_handler: (
             Callable[[CropScalerProgress], Awaitable[None]] | None
         ) = None,
@@ -52,34 +103,20 @@ class CropScaler:
             internal_fps=input_video_fps,
         )
 
-        # TODO: quality control
-        if crop is not None and "," in crop:
-            raise ValueError("Invalid crop argument. Remove ',' from crop.")
-
-        if scale is not None and "," in scale:
-            raise ValueError("Invalid scale argument. Remove ',' from scale.")
-
-        crop_filter_string = f"crop={crop}" if crop is not None else None
-        scale_filter_string = f"scale={scale}" if scale is not None else None
-
-        video_filters = list(
-            exclude_none(
-                [
-                    crop_filter_string,
-                    scale_filter_string,
-                ]
-            )
-        )
+        video_filters = build_crop_scale_video_filters(crop=crop, scale=scale)
         video_filter_opts = (
             ["-filter:v", ",".join(video_filters)] if len(video_filters) != 0 else []
         )
 
         video_codec_opts = ["-c:v", video_codec] if video_codec is not None else []
+        if video_codec_options is not None:
+            video_codec_opts += video_codec_options
 
         command = [
             self._ffmpeg_path,
             "-hide_banner",
             "-n",  # fail if already exists
+            *get_ffmpeg_benchmark_opts(),
             "-i",
             str(input_path),
             *video_filter_opts,
@@ -99,7 +136,9 @@ class CropScaler:
         )
 
         async def _handle_stderr(line: str) -> None:
-            match = re.match(r"^frame=\ *(\d+?)\ .+time=(.+?)\ bitrate.+$", line)
+            handle_ffmpeg_benchmark_line(line)
+
+            match = re.match(r"^frame=\ *(\d+?)\ .+time=(\d.*?)\ bitrate.+$", line)
             if match:
                 _frame = int(match.group(1))
                 _time_string = match.group(2).strip()
@@ -128,3 +167,154 @@ class CropScaler:
         )
         if returncode != 0:
             raise Exception(f"FFmpeg errored. code: {returncode}")
+
+    async def crop_scale_renditions(
+        self,
+        input_path: Path,
+        renditions: list[CropScaleRendition],
+        progress_handler: (
+            Callable[[CropScalerRenditionProgress], Awaitable[None]] | None
+        ) = None,
+    ) -> None:
+        """
+        入力を1回だけデコードし、split フィルタで分岐して、
+        複数の切り取り・拡大縮小の出力を1つの FFmpeg プロセスでエンコードする
+
+        各出力には、映像以外のストリーム（複数のオーディオトラックなど）を入力からストリームコピーする
+        映像は最初の映像ストリームのみ出力する
+        """
+        if len(renditions) == 0:
+            raise ValueError("No rendition to output.")
+
+        output_paths = [rendition.output_path for rendition in renditions]
+        if len(set(output_paths)) != len(output_paths):
+            raise ValueError("Duplicate output paths in renditions.")
+
+        input_video_fps = await self._fps_parser.parse_fps(
+            input_path=input_path,
+        )
+
+        progress_calculator = ProgressCalculator(
+            start_timedelta=timedelta(),
+            input_fps=input_video_fps,
+            internal_fps=input_video_fps,
+        )
+
+        split_labels = "".join(f"[split{index}]" for index in range(len(renditions)))
+        filter_graph_parts = [f"[0:v:0]split={len(renditions)}{split_labels}"]
+        output_opts: list[str] = []
+        for index, rendition in enumerate(renditions):
+            video_filters = build_crop_scale_video_filters(
+                crop=rendition.crop,
+                scale=rendition.scale,
+            )
+            video_filter = (
+                ",".join(video_filters) if len(video_filters) != 0 else "null"
+            )
+            filter_graph_parts.append(f"[split{index}]{video_filter}[video{index}]")
+
+            video_codec_opts = (
+                ["-c:v", rendition.video_codec]
+                if rendition.video_codec is not None
+                else []
+            )
+
+            output_opts += [
+                "-map",
+                f"[video{index}]",
+                # NOTE: -map 0 -map -0:v とすると、フィルタの出力も除外されるため、
+                # 映像以外のストリームを種類ごとに指定する
+                "-map",
+                "0:a?",
+                "-map",
+                "0:s?",
+                "-map",
+                "0:t?",
+                *video_codec_opts,
+                "-c:a",
+                "copy",
+                "-c:s",
+                "copy",
+                "-c:t",
+                "copy",
+                "-map_metadata",
+                "0",
+                # 出力ごとの進捗として、エンコードしたフレームの統計を標準出力に書き込む
+                "-stats_enc_post:v",
+                "pipe:1",
+                "-stats_enc_post_fmt:v",
+                "{fidx} {n} {t}",
+                str(rendition.output_path),
+            ]
+
+        command = [
+            self._ffmpeg_path,
+            "-hide_banner",
+            "-n",  # fail if already exists
+            *get_ffmpeg_benchmark_opts(),
+            "-i",
+            str(input_path),
+            "-filter_complex",
+            ";".join(filter_graph_parts),
+            *output_opts,
+        ]
+        proc = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+
+        # 出力ごとの、エンコードしたフレーム数・時間
+        rendition_progresses: list[tuple[int, timedelta]] = [
+            (0, timedelta()) for _ in renditions
+        ]
+
+        async def _report_progresses() -> None:
+            if progress_handler is None:
+                return
+
+            for index, (frame, time) in enumerate(rendition_progresses):
+                progress = progress_calculator.calculate_progress(
+                    frame=frame,
+                    time=time,
+                )
+
+                await progress_handler(
+                    CropScalerRenditionProgress(
+                        rendition_index=index,
+                        frame=progress.frame,
+                        time=progress.time,
+                        internal_frame=progress.internal_frame,
+                        internal_time=progress.internal_time,
+                    ),
+                )
+
+        def _handle_stdout(line: str) -> None:
+            match = re.match(r"^(\d+)\ (\d+)\ (-?[\d.]+)$", line)
+            if match:
+                _index = int(match.group(1))
+                _frame = int(match.group(2)) + 1
+                # NOTE: B フレームの並べ替えにより、エンコード後の時刻は前後する
+                _time = max(
+                    timedelta(seconds=float(match.group(3))),
+                    rendition_progresses[_index][1],
+                )
+
+                rendition_progresses[_index] = (_frame, _time)
+
+        async def _handle_stderr(line: str) -> None:
+            handle_ffmpeg_benchmark_line(line)
+
+            # 全体の進捗の表示と同じ間隔で、出力ごとの進捗を通知する
+            if re.match(r"^frame=\ *(\d+?)\ .+time=(\d.*?)\ bitrate.+$", line):
+                await _report_progresses()
+
+        returncode = await wait_process(
+            process=proc,
+            stdout_handler=_handle_stdout,
+            stderr_handler=_handle_stderr,
+        )
+        if returncode != 0:
+            raise Exception(f"FFmpeg errored. code: {returncode}")
+
+        await _report_progresses()
@@ -0,0 +1,372 @@
+import asyncio
+import os
+import tempfile
+from datetime import timedelta
+from logging import getLogger
+from pathlib import Path
+from time import perf_counter
+
+from pydantic import BaseModel
+
+from ..utility.ffmpeg_benchmark import record_ffmpeg_cpu_time
+from .crop_scaler import build_crop_scale_video_filters
+from .key_frame_parser import KeyFrameParser
+from .media_probe import MediaInfo, MediaProbe
+from .parallel_crop_scaler import ParallelCropScaler
+
+logger = getLogger(__name__)
+
+
+class EncoderTuneCandidate(BaseModel):
+    preset: str | None
+    crf: int | None
+
+    def get_video_codec_options(self) -> list[str]:
+        options: list[str] = []
+        if self.preset is not None:
+            options += ["-preset", self.preset]
+        if self.crf is not None:
+            options += ["-crf", str(self.crf)]
+
+        return options
+
+
+class EncoderTuneSample(BaseModel):
+    # 入力の開始時刻からの、サンプルの範囲（キーフレームから始まる）
+    start_seconds: float
+    end_seconds: float
+
+
+class EncoderTuneMeasurement(BaseModel):
+    candidate: EncoderTuneCandidate
+    # 全てのサンプルの合計
+    frames: int
+    # FFmpeg の -benchmark で計測した、ユーザー時間とシステム時間の合計
+    cpu_seconds: float
+    wall_seconds: float
+    size_bytes: int
+    duration_seconds: float
+    # CPU 時間あたりのエンコードしたフレーム数
+    # NOTE: 候補を並行してエンコードするため、実時間は他の候補との競合の影響を受ける
+    encode_fps: float
+    # 出力のビットレート (bit/s)
+    bitrate: float
+
+
+def create_encoder_tune_measurement(
+    candidate: EncoderTuneCandidate,
+    frames: int,
+    cpu_seconds: float,
+    wall_seconds: float,
+    size_bytes: int,
+    duration_seconds: float,
+) -> EncoderTuneMeasurement:
+    return EncoderTuneMeasurement(
+        candidate=candidate,
+        frames=frames,
+        cpu_seconds=cpu_seconds,
+        wall_seconds=wall_seconds,
+        size_bytes=size_bytes,
+        duration_seconds=duration_seconds,
+        encode_fps=frames / cpu_seconds if cpu_seconds > 0 else 0.0,
+        bitrate=size_bytes * 8 / duration_seconds if duration_seconds > 0 else 0.0,
+    )
+
+
+class EncoderTuneResult(BaseModel):
+    input_path: Path
+    video_codec: str
+    # サンプルの映像のビットレートと比較する、映像の目標ビットレート (bit/s)
+    target_bitrate: float
+    # --target_size から目標を求めた場合の、出力ファイルの目標の大きさ (byte) と
+    # 差し引いた音声のビットレート (bit/s)
+    target_size: int | None = None
+    audio_bitrate: int | None = None
+    samples: list[EncoderTuneSample]
+    measurements: list[EncoderTuneMeasurement]
+    selected: EncoderTuneCandidate
+
+
+def get_audio_bitrate(media_info: MediaInfo) -> int:
+    """
+    入力の音声ストリームのビットレートの合計 (bit/s) を返す
+
+    ビットレートが不明なストリームは、警告を出力して 0 とみなす
+    """
+    audio_bitrate = 0
+    for audio_stream in media_info.audio_streams:
+        stream_bitrate = audio_stream.bit_rate_bps
+        if stream_bitrate is None:
+            logger.warning(
+                "Bitrate of audio stream %d not found. Assume 0.",
+                audio_stream.index,
+            )
+            continue
+
+        audio_bitrate += stream_bitrate
+
+    return audio_bitrate
+
+
+def calculate_target_video_bitrate(
+    target_size: int,
+    duration_seconds: float,
+    audio_bitrate: int,
+) -> int:
+    """
+    出力ファイルの目標の大きさ (byte) から、映像の目標ビットレート (bit/s) を返す
+
+    音声はストリームコピーするため、音声のビットレートを差し引く
+    """
+    if duration_seconds <= 0:
+        raise ValueError(f"Invalid duration_seconds: {duration_seconds}")
+
+    target_bitrate = round(target_size * 8 / duration_seconds) - audio_bitrate
+    if target_bitrate <= 0:
+        raise ValueError(
+            f"Target size is too small: {target_size}. Audio bitrate: {audio_bitrate}"
+        )
+
+    return target_bitrate
+
+
+def select_encoder_tune_candidate(
+    measurements: list[EncoderTuneMeasurement],
+    target_bitrate: float,
+) -> EncoderTuneCandidate:
+    """
+    目標のビットレート以下の候補のうち、エンコードが最も速い候補を選ぶ
+
+    目標を満たす候補がなければ、ビットレートが最も低い候補を選ぶ
+    """
+    if len(measurements) == 0:
+        raise ValueError("No measurement to select from.")
+
+    matched_measurements = [
+        measurement
+        for measurement in measurements
+        if measurement.bitrate <= target_bitrate
+    ]
+    if len(matched_measurements) == 0:
+        selected_measurement = min(
+            measurements,
+            key=lambda measurement: measurement.bitrate,
+        )
+        logger.warning(
+            "No candidate meets the target bitrate %.0f bit/s. "
+            "Selected the lowest bitrate %.0f bit/s.",
+            target_bitrate,
+            selected_measurement.bitrate,
+        )
+        return selected_measurement.candidate
+
+    return max(
+        matched_measurements,
+        key=lambda measurement: measurement.encode_fps,
+    ).candidate
+
+
+class EncoderTuner:
+    """
+    入力の各所からキーフレームで始まる短いサンプルを切り出し、
+    エンコーダーのプリセット・CRF の候補ごとに並行してエンコードして、
+    速度とビットレートを計測する
+    """
+
+    def __init__(
+        self,
+        key_frame_parser: KeyFrameParser,
+        media_probe: MediaProbe,
+        parallel_crop_scaler: ParallelCropScaler,
+        max_jobs: int | None = None,
+    ) -> None:
+        if max_jobs is None:
+            max_jobs = os.cpu_count() or 1
+        if max_jobs < 1:
+            raise ValueError(f"Invalid max_jobs: {max_jobs}. Specify 1 or more.")
+
+        self._key_frame_parser = key_frame_parser
+        self._media_probe = media_probe
+        self._parallel_crop_scaler = parallel_crop_scaler
+        self._max_jobs = max_jobs
+
+    async def select_samples(
+        self,
+        input_path: Path,
+        num_samples: int,
+        sample_seconds: float,
+    ) -> list[EncoderTuneSample]:
+        """
+        入力を num_samples 個の区間に分け、各区間の中央に最も近いキーフレームから
+        sample_seconds 秒のサンプルを選ぶ
+        """
+        if num_samples < 1:
+            raise ValueError(f"Invalid number of samples: {num_samples}.")
+        if sample_seconds <= 0:
+            raise ValueError(f"Invalid sample seconds: {sample_seconds}.")
+
+        media_info = await self._media_probe.probe(input_path=input_path)
+        duration = media_info.duration
+        if duration is None:
+            raise Exception(f"Duration not found: {input_path}")
+
+        duration_seconds = duration.total_seconds()
+
+        key_frame_index = (
+            await self._key_frame_parser.parse_key_frame_index_relative_to_start(
+                input_path=input_path,
+                media_probe=self._media_probe,
+            )
+        )
+
+        return [
+            EncoderTuneSample(
+                start_seconds=sample_start_seconds,
+                end_seconds=min(
+                    sample_start_seconds + sample_seconds,
+                    duration_seconds,
+                ),
+            )
+            for sample_start_seconds in key_frame_index.select_evenly_spaced(
+                duration_seconds=duration_seconds,
+                num_samples=num_samples,
+            )
+        ]
+
+    async def tune(
+        self,
+        input_path: Path,
+        crop: str | None,
+        scale: str | None,
+        video_codec: str,
+        candidates: list[EncoderTuneCandidate],
+        target_bitrate: float,
+        num_samples: int,
+        sample_seconds: float,
+        work_dir: Path | None = None,
+    ) -> EncoderTuneResult:
+        """
+        全ての候補で全てのサンプルをエンコードし、
+        目標のビットレートを満たす最も速い候補を選ぶ
+        """
+        if len(candidates) == 0:
+            raise ValueError("No candidate to tune.")
+
+        video_filters = build_crop_scale_video_filters(crop=crop, scale=scale)
+        samples = await self.select_samples(
+            input_path=input_path,
+            num_samples=num_samples,
+            sample_seconds=sample_seconds,
+        )
+
+        media_info = await self._media_probe.probe(input_path=input_path)
+        start_time_seconds = media_info.start_time_seconds
+
+        semaphore = asyncio.Semaphore(self._max_jobs)
+
+        with tempfile.TemporaryDirectory(
+            prefix=".matvtool_auto_tune_",
+            dir=work_dir,
+        ) as temp_dir_string:
+            temp_dir = Path(temp_dir_string)
+
+            async def _encode_sample(
+                candidate_index: int,
+                sample_index: int,
+            ) -> EncoderTuneMeasurement:
+                candidate = candidates[candidate_index]
+                sample = samples[sample_index]
+                sample_path = temp_dir / f"{candidate_index}_{sample_index}.mkv"
+
+                last_frame = 0
+
+                async def _handle_progress(frame: int, time: timedelta) -> None:
+                    nonlocal last_frame
+                    last_frame = frame
+
+                async with semaphore:
+                    encode_start_time = perf_counter()
+                    with record_ffmpeg_cpu_time() as cpu_time:
+                        await self._parallel_crop_scaler.encode_chunk(
+                            input_path=input_path,
+                            start_seconds=sample.start_seconds,
+                            end_seconds=sample.end_seconds,
+                            start_time_seconds=start_time_seconds,
+                            video_filters=video_filters,
+                            video_codec=video_codec,
+                            output_path=sample_path,
+                            video_codec_options=candidate.get_video_codec_options(),
+                            progress_handler=_handle_progress,
+                        )
+
+                    wall_seconds = perf_counter() - encode_start_time
+
+                return create_encoder_tune_measurement(
+                    candidate=candidate,
+                    frames=last_frame,
+                    cpu_seconds=cpu_time.total_seconds,
+                    wall_seconds=wall_seconds,
+                    size_bytes=sample_path.stat().st_size,
+                    duration_seconds=sample.end_seconds - sample.start_seconds,
+                )
+
+            sample_measurements_list = await asyncio.gather(
+                *(
+                    asyncio.gather(
+                        *(
+                            _encode_sample(
+                                candidate_index=candidate_index,
+                                sample_index=sample_index,
+                            )
+                            for sample_index in range(len(samples))
+                        ),
+                    )
+                    for candidate_index in range(len(candidates))
+                ),
+            )
+
+        # 候補ごとに、全てのサンプルの計測値を合計する
+        measurements = [
+            create_encoder_tune_measurement(
+                candidate=candidate,
+                frames=sum(measurement.frames for measurement in sample_measurements),
+                cpu_seconds=sum(
+                    measurement.cpu_seconds for measurement in sample_measurements
+                ),
+                wall_seconds=sum(
+                    measurement.wall_seconds for measurement in sample_measurements
+                ),
+                size_bytes=sum(
+                    measurement.size_bytes for measurement in sample_measurements
+                ),
+                duration_seconds=sum(
+                    measurement.duration_seconds for measurement in sample_measurements
+                ),
+            )
+            for candidate, sample_measurements in zip(
+                candidates,
+                sample_measurements_list,
+                strict=True,
+            )
+        ]
+
+        for measurement in measurements:
+            logger.info(
+                "Auto tune: preset=%s crf=%s fps=%.1f bitrate=%.0f",
+                measurement.candidate.preset,
+                measurement.candidate.crf,
+                measurement.encode_fps,
+                measurement.bitrate,
+            )
+
+        return EncoderTuneResult(
+            input_path=input_path,
+            video_codec=video_codec,
+            target_bitrate=target_bitrate,
+            samples=samples,
+            measurements=measurements,
+            selected=select_encoder_tune_candidate(
+                measurements=measurements,
+                target_bitrate=target_bitrate,
+            ),
+        )
@@ -0,0 +1,448 @@
+import asyncio
+import math
+import os
+import re
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+from logging import getLogger
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from pydantic import BaseModel
+
+from ..progress_handler.utility.progress_calculator import (
+    ProgressCalculator,
+)
+from ..util import (
+    exclude_none,
+    parse_ffmpeg_time_unit_syntax,
+)
+from ..utility.async_subprocess_helper import wait_process
+from ..utility.key_frame_index import KeyFrameIndex
+from ..video_utility.fps_parser import FpsParser
+from .image_finder import ImageFinderReference, ImageFinderResult
+from .key_frame_parser import KeyFrameParser
+from .media_probe import MediaProbe
+
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+    from ..utility.frame_hash import FrameHashType
+
+logger = getLogger(__name__)
+
+# --ss の時刻から、最初に出力されるフレーム番号を数えるときの許容誤差
+_FRAME_COUNT_TOLERANCE_SECONDS = 0.001
+
+
+class FrameHashIndexerProgress(BaseModel):
+    time: timedelta
+    frame: int
+    internal_time: timedelta
+    internal_frame: int
+
+
+def get_default_frame_hash_index_path(input_video_path: Path) -> Path:
+    """
+    入力動画と同じディレクトリに置くインデックスファイルのパスを返す
+    """
+    return input_video_path.with_name(f"{input_video_path.name}.frame_hash.npz")
+
+
+class FrameHashIndexer:
+    """
+    フレームごとの知覚ハッシュ（dHash/pHash）のインデックスを作成・検索する
+
+    インデックスを作成するときに入力動画を1回だけデコードし、
+    検索時はハッシュの配列のハミング距離だけを計算する（numpy パッケージが必要）
+    """
+
+    def __init__(
+        self,
+        fps_parser: FpsParser,
+        key_frame_parser: KeyFrameParser,
+        media_probe: MediaProbe,
+        ffmpeg_path: str,
+    ) -> None:
+        self._fps_parser = fps_parser
+        self._key_frame_parser = key_frame_parser
+        self._media_probe = media_probe
+        self._ffmpeg_path = ffmpeg_path
+
+    async def create_index(
+        self,
+        input_video_path: Path,
+        input_video_crop: str | None,
+        fps: int | None,
+        hash_type: "FrameHashType",
+        index_path: Path,
+        batch_size: int = 256,
+        progress_handler: (
+            Callable[[FrameHashIndexerProgress], Awaitable[None]] | None
+        ) = None,
+    ) -> None:
+        import numpy as np
+
+        from ..utility.frame_hash import (
+            FrameHashIndex,
+            compute_frame_hashes,
+            get_frame_hash_input_size,
+        )
+        from ..utility.frame_matcher import read_frames_into
+
+        if batch_size < 1:
+            raise ValueError(f"Invalid batch_size: {batch_size}. Specify 1 or more.")
+
+        input_video_stat = input_video_path.stat()
+
+        input_video_fps = await self._fps_parser.parse_fps(
+            input_path=input_video_path,
+        )
+        internal_fps = fps if fps is not None else input_video_fps
+
+        # 検索時に --ss をキーフレームに合わせるため、
+        # -ss と同じく入力の開始時刻からのキーフレームの時刻を記録する
+        key_frame_index = (
+            await self._key_frame_parser.parse_key_frame_index_relative_to_start(
+                input_path=input_video_path,
+                media_probe=self._media_probe,
+            )
+        )
+
+        # blackframe フィルタの検出時刻と揃えるため、最初のフレームの時刻を記録する
+        first_frame_seconds = key_frame_index[0] if fps is None else 0.0
+
+        progress_calculator = ProgressCalculator(
+            start_timedelta=timedelta(),
+            input_fps=input_video_fps,
+            internal_fps=internal_fps,
+        )
+
+        frame_width, frame_height = get_frame_hash_input_size(hash_type)
+        video_filters = list(
+            exclude_none(
+                [
+                    # 可変フレームレートの入力でも、フレーム番号から時刻を求められるよう
+                    # ImageFinder の numpy バックエンドと同じく fps フィルタで揃える
+                    f"fps={internal_fps}",
+                    f"crop={input_video_crop}"
+                    if input_video_crop is not None
+                    else None,
+                    f"scale={frame_width}:{frame_height}:flags=area",
+                    "format=gray",
+                ]
+            )
+        )
+
+        # Command Argument List
+        command = [
+            self._ffmpeg_path,
+            "-hide_banner",
+            "-i",
+            str(input_video_path),
+            "-an",
+            "-vf",
+            ",".join(video_filters),
+            "-fps_mode",
+            "passthrough",
+            "-f",
+            "rawvideo",
+            "-",
+        ]
+
+        read_fd, write_fd = os.pipe()
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *command,
+                stdout=write_fd,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except BaseException:
+            os.close(read_fd)
+            raise
+        finally:
+            os.close(write_fd)
+
+        frame_buffer = np.empty((batch_size, frame_height, frame_width), np.uint8)
+        hash_batches: list[NDArray[np.uint64]] = []
+
+        async def _handle_stderr(line: str) -> None:
+            match = re.match(r"^frame=\ *(\d+?)\ .+time=(\d.*?)\ bitrate.+$", line)
+            if match:
+                _frame = int(match.group(1))
+                _time_string = match.group(2).strip()
+
+                _time_struct = parse_ffmpeg_time_unit_syntax(_time_string)
+                _time = _time_struct.to_timedelta()
+
+                progress = progress_calculator.calculate_progress(
+                    frame=_frame,
+                    time=_time,
+                )
+
+                if progress_handler:
+                    await progress_handler(
+                        FrameHashIndexerProgress(
+                            frame=progress.frame,
+                            time=progress.time,
+                            internal_frame=progress.internal_frame,
+                            internal_time=progress.internal_time,
+                        ),
+                    )
+
+        async def _read_frames() -> None:
+            with open(read_fd, "rb", buffering=0) as frame_stream:
+                while True:
+                    num_frames = await asyncio.to_thread(
+                        read_frames_into,
+                        frame_stream,
+                        frame_buffer,
+                    )
+                    if num_frames == 0:
+                        break
+
+                    hash_batches.append(
+                        compute_frame_hashes(
+                            frames=frame_buffer[:num_frames],
+                            hash_type=hash_type,
+                        ),
+                    )
+
+                    if num_frames < len(frame_buffer):
+                        break
+
+        try:
+            _, returncode = await asyncio.gather(
+                _read_frames(),
+                wait_process(
+                    process=proc,
+                    stderr_handler=_handle_stderr,
+                ),
+            )
+        except BaseException:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
+
+        if returncode != 0:
+            raise Exception(f"FFmpeg errored. code: {returncode}")
+
+        hashes = (
+            np.concatenate(hash_batches)
+            if len(hash_batches) != 0
+            else np.empty(0, dtype=np.uint64)
+        )
+
+        FrameHashIndex(
+            hashes=hashes,
+            hash_type=hash_type,
+            input_video_crop=input_video_crop,
+            fps=fps,
+            input_fps=input_video_fps,
+            internal_fps=internal_fps,
+            first_frame_seconds=first_frame_seconds,
+            key_frame_seconds=np.array(list(key_frame_index), dtype=np.float64),
+            input_video_size=input_video_stat.st_size,
+            input_video_mtime_ns=input_video_stat.st_mtime_ns,
+        ).save(index_path)
+
+    async def find_images(
+        self,
+        index_path: Path,
+        input_video_path: Path | None,
+        input_video_ss: str | None,
+        input_video_to: str | None,
+        references: list[ImageFinderReference],
+        max_distance: int = 10,
+        output_interval: float = 0.0,
+        result_handler: (Callable[[ImageFinderResult], Awaitable[None]] | None) = None,
+    ) -> None:
+        """
+        インデックスのハッシュと参照画像のハッシュのハミング距離から、
+        参照画像に一致するフレームを検索する
+
+        検出時刻・フレーム番号は、ImageFinder と同じ方法で入力動画の時刻に変換する
+        time は --ss の直前のキーフレームの時刻に、--ss からの経過時間を足した時刻
+        """
+        import numpy as np
+
+        from ..utility.frame_hash import FrameHashIndex
+
+        if len(references) == 0:
+            raise ValueError("At least one reference image is required.")
+
+        if not 0 <= max_distance <= 64:
+            raise ValueError(f"Invalid max_distance: {max_distance}. Specify 0 to 64.")
+
+        index = FrameHashIndex.load(index_path)
+
+        # 入力動画が変更されていたら、インデックスを作り直す必要がある
+        if input_video_path is not None:
+            input_video_stat = input_video_path.stat()
+            if (
+                input_video_stat.st_size != index.input_video_size
+                or input_video_stat.st_mtime_ns != index.input_video_mtime_ns
+            ):
+                raise ValueError(
+                    f"Index is outdated: {index_path}. Recreate the index."
+                )
+
+        for reference in references:
+            if reference.input_video_crop != index.input_video_crop:
+                raise ValueError(
+                    "Input video crop must match the index. "
+                    f"index: {index.input_video_crop}, "
+                    f"reference: {reference.input_video_crop}"
+                )
+
+        raw_start_seconds = (
+            parse_ffmpeg_time_unit_syntax(input_video_ss).to_timedelta().total_seconds()
+            if input_video_ss is not None
+            else 0.0
+        )
+        end_seconds = (
+            parse_ffmpeg_time_unit_syntax(input_video_to).to_timedelta().total_seconds()
+            if input_video_to is not None
+            else None
+        )
+
+        # FFmpeg の -ss と同じく、--ss より前にある直前のキーフレームから読み込む
+        start_seconds = (
+            KeyFrameIndex(index.key_frame_seconds.tolist()).fit_times(
+                [raw_start_seconds]
+            )[0]
+            if input_video_ss is not None
+            else 0.0
+        )
+
+        # --ss 以降で最初に出力されるフレームの番号
+        first_frame_index = max(
+            0,
+            math.ceil(
+                (
+                    raw_start_seconds
+                    - index.first_frame_seconds
+                    - _FRAME_COUNT_TOLERANCE_SECONDS
+                )
+                * index.internal_fps
+            ),
+        )
+
+        frame_indices_list = []
+        reference_indices_list = []
+        for reference_index, reference in enumerate(references):
+            reference_hash = await self._compute_reference_hash(
+                reference=reference,
+                hash_type=index.hash_type,
+            )
+
+            frame_indices = index.find(
+                reference_hash=reference_hash,
+                max_distance=max_distance,
+            )
+            frame_indices_list.append(frame_indices)
+            reference_indices_list.append(
+                np.full(len(frame_indices), reference_index, dtype=np.intp)
+            )
+
+        hit_frame_indices = np.concatenate(frame_indices_list)
+        hit_reference_indices = np.concatenate(reference_indices_list)
+
+        # フレーム順、同じフレームは参照画像の順に出力する
+        order = np.lexsort((hit_reference_indices, hit_frame_indices))
+
+        # 参照画像ごとに、前回出力した検出時刻を保持する
+        prev_result_timedeltas = [
+            timedelta(seconds=-output_interval) for _ in references
+        ]
+
+        for hit_frame_index, hit_reference_index in zip(
+            hit_frame_indices[order].tolist(),
+            hit_reference_indices[order].tolist(),
+            strict=True,
+        ):
+            if hit_frame_index < first_frame_index:
+                continue
+
+            frame_seconds = (
+                index.first_frame_seconds + hit_frame_index / index.internal_fps
+            )
+            if end_seconds is not None and end_seconds <= frame_seconds:
+                continue
+
+            internal_time = timedelta(seconds=frame_seconds - raw_start_seconds)
+            input_timedelta = timedelta(seconds=start_seconds) + internal_time
+            input_seconds = input_timedelta.total_seconds()
+
+            prev_result_timedelta = prev_result_timedeltas[hit_reference_index]
+            if (
+                timedelta(seconds=output_interval)
+                <= input_timedelta - prev_result_timedelta
+            ):
+                if result_handler:
+                    await result_handler(
+                        ImageFinderResult(
+                            time=input_timedelta,
+                            frame=int(input_seconds * index.input_fps),
+                            internal_time=internal_time,
+                            internal_frame=hit_frame_index - first_frame_index,
+                            reference_index=hit_reference_index,
+                        ),
+                    )
+
+                prev_result_timedeltas[hit_reference_index] = input_timedelta
+
+    async def _compute_reference_hash(
+        self,
+        reference: ImageFinderReference,
+        hash_type: "FrameHashType",
+    ) -> int:
+        import numpy as np
+
+        from ..utility.frame_hash import compute_frame_hashes, get_frame_hash_input_size
+
+        frame_width, frame_height = get_frame_hash_input_size(hash_type)
+        reference_filters = list(
+            exclude_none(
+                [
+                    f"crop={reference.image_crop}"
+                    if reference.image_crop is not None
+                    else None,
+                    f"scale={frame_width}:{frame_height}:flags=area",
+                    "format=gray",
+                ]
+            )
+        )
+
+        # Command Argument List
+        command = [
+            self._ffmpeg_path,
+            "-hide_banner",
+            "-i",
+            str(reference.image_path),
+            "-vf",
+            ",".join(reference_filters),
+            "-frames:v",
+            "1",
+            "-f",
+            "rawvideo",
+            "-",
+        ]
+        proc = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stdout, _ = await proc.communicate()
+
+        if proc.returncode != 0:
+            raise Exception(f"FFmpeg errored. code: {proc.returncode}")
+
+        if len(stdout) != frame_width * frame_height:
+            raise Exception(f"Failed to load reference image: {reference.image_path}")
+
+        reference_frame = np.frombuffer(stdout, dtype=np.uint8).reshape(
+            (1, frame_height, frame_width)
+        )
+        return int(compute_frame_hashes(reference_frame, hash_type)[0])
@@ -1,11 +1,14 @@
 import asyncio
+import math
+import os
 import re
 from collections.abc import Awaitable, Callable
 from datetime import timedelta
 from logging import getLogger
 from pathlib import Path
+from typing import TYPE_CHECKING, Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 from ..progress_handler.utility.progress_calculator import (
     ProgressCalculator,
@@ -15,12 +18,23 @@ from ..util import (
     parse_ffmpeg_time_unit_syntax,
 )
 from ..utility.async_subprocess_helper import wait_process
+from ..utility.key_frame_index import KeyFrameIndex
 from ..utility.key_frame_time_fitter import KeyFrameTimeFitter
 from ..video_utility.fps_parser import FpsParser
 from .key_frame_parser import KeyFrameParser
 
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import NDArray
+
 logger = getLogger(__name__)
 
+# 区間の境界にあるフレームを、前後どちらの区間で検出したか判定するときの許容誤差
+_SEGMENT_BOUNDARY_TOLERANCE_SECONDS = 0.0005
+
+# 区間より前のフレーム数を、キーフレームの時刻から数えるときの許容誤差
+_SEGMENT_FRAME_COUNT_TOLERANCE_SECONDS = 0.001
+
 
 class ImageFinderProgress(BaseModel):
     time: timedelta
@@ -38,11 +52,52 @@ class _FfmpegBlackframeResult(BaseModel):
     last_keyframe: int
 
 
+class ImageFinderReference(BaseModel):
+    image_path: Path
+    image_crop: str | None = None
+    input_video_crop: str | None = None
+    blackframe_amount: int | None = None
+    blackframe_threshold: int | None = None
+
+
+class _ImageFinderHit(BaseModel):
+    reference_index: int
+    internal_time: timedelta
+    internal_frame: int
+
+
+class _ImageFinderSegment(BaseModel):
+    ss: str | None
+    to: str | None
+    start_seconds: float
+    end_seconds: float | None
+    start_internal_frame: int
+    first_frame_seconds: float
+
+
+class _ImageFinderNumpyOptions(BaseModel):
+    frame_width: int
+    frame_height: int
+    batch_size: int
+
+
+class _ImageFinderSearchRange(BaseModel):
+    ss: str | None
+    to: str | None
+    raw_start_seconds: float
+    raw_end_seconds: float | None
+    first_frame_seconds: float
+    key_frame_index: KeyFrameIndex
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+
 class ImageFinderResult(BaseModel):
     time: timedelta
     frame: int
     internal_time: timedelta
     internal_frame: int
+    reference_index: int = 0
 
 
 class ImageFinder:
@@ -95,11 +150,110 @@ class ImageFinder:
         blackframe_amount: int = 98,
         blackframe_threshold: int = 32,
         output_interval: float = 0.0,
+        jobs: int = 1,
+        coarse_search: Literal["key_frame", "fps"] | None = None,
+        coarse_fps: int = 1,
+        coarse_blackframe_amount_margin: int = 10,
+        coarse_blackframe_threshold_margin: int = 16,
+        backend: Literal["blackframe", "numpy"] = "blackframe",
+        numpy_frame_width: int = 160,
+        numpy_frame_height: int = 90,
+        numpy_batch_size: int = 32,
+        progress_handler: (
+            Callable[[ImageFinderProgress], Awaitable[None]] | None
+        ) = None,
+        result_handler: (Callable[[ImageFinderResult], Awaitable[None]] | None) = None,
+    ) -> None:
+        await self.find_images(
+            input_video_ss=input_video_ss,
+            input_video_to=input_video_to,
+            input_video_path=input_video_path,
+            references=[
+                ImageFinderReference(
+                    image_path=reference_image_path,
+                    image_crop=reference_image_crop,
+                    input_video_crop=input_video_crop,
+                ),
+            ],
+            fps=fps,
+            blackframe_amount=blackframe_amount,
+            blackframe_threshold=blackframe_threshold,
+            output_interval=output_interval,
+            jobs=jobs,
+            coarse_search=coarse_search,
+            coarse_fps=coarse_fps,
+            coarse_blackframe_amount_margin=coarse_blackframe_amount_margin,
+            coarse_blackframe_threshold_margin=coarse_blackframe_threshold_margin,
+            backend=backend,
+            numpy_frame_width=numpy_frame_width,
+            numpy_frame_height=numpy_frame_height,
+            numpy_batch_size=numpy_batch_size,
+            progress_handler=progress_handler,
+            result_handler=result_handler,
+        )
+
+    async def find_images(
+        self,
+        input_video_ss: str | None,
+        input_video_to: str | None,
+        input_video_path: Path,
+        references: list[ImageFinderReference],
+        fps: int | None,
+        blackframe_amount: int = 98,
+        blackframe_threshold: int = 32,
+        output_interval: float = 0.0,
+        jobs: int = 1,
+        coarse_search: Literal["key_frame", "fps"] | None = None,
+        coarse_fps: int = 1,
+        coarse_blackframe_amount_margin: int = 10,
+        coarse_blackframe_threshold_margin: int = 16,
+        backend: Literal["blackframe", "numpy"] = "blackframe",
+        numpy_frame_width: int = 160,
+        numpy_frame_height: int = 90,
+        numpy_batch_size: int = 32,
         progress_handler: (
             Callable[[ImageFinderProgress], Awaitable[None]] | None
         ) = None,
         result_handler: (Callable[[ImageFinderResult], Awaitable[None]] | None) = None,
     ) -> None:
+        """
+        入力動画を1回だけデコードし、複数の参照画像を同時に検索する
+
+        入力動画はフィルタグラフ内で split され、参照画像ごとに
+        blend/blackframe のブランチが作られる
+
+        jobs に 2 以上を指定すると、検索範囲をキーフレームで分割し、
+        区間ごとに FFmpeg を並列実行する
+
+        coarse_search を指定すると、キーフレームのみ（key_frame）または
+        coarse_fps の FPS（fps）で緩い閾値の粗い検索を行ってから、
+        検出候補の前後の区間だけを全フレームを対象に検索する
+        粗い検索の間隔より短い時間だけ出現する画像は検出できない
+
+        backend に numpy を指定すると、blackframe フィルタのログの代わりに、
+        FFmpeg から縮小したグレースケールのフレームをパイプで受け取り、
+        NumPy で参照画像との一致度を計算する（numpy パッケージが必要）
+        一致度の判定には blackframe_amount/blackframe_threshold をそのまま使う
+        """
+        if len(references) == 0:
+            raise ValueError("At least one reference image is required.")
+
+        if jobs < 1:
+            raise ValueError(f"Invalid jobs: {jobs}. Specify 1 or more.")
+
+        if coarse_fps < 1:
+            raise ValueError(f"Invalid coarse_fps: {coarse_fps}. Specify 1 or more.")
+
+        if numpy_frame_width < 1 or numpy_frame_height < 1:
+            raise ValueError(
+                f"Invalid numpy frame size: {numpy_frame_width}x{numpy_frame_height}."
+            )
+
+        if numpy_batch_size < 1:
+            raise ValueError(
+                f"Invalid numpy_batch_size: {numpy_batch_size}. Specify 1 or more."
+            )
+
         input_video_fps = await self._fps_parser.parse_fps(
             input_path=input_video_path,
         )
@@ -115,66 +269,685 @@ class ImageFinder:
             internal_fps=input_video_fps,
         )
 
-        # Create the input video filter_complex string
-        input_video_filter_fps = f"fps={fps}" if fps is not None else None
-        input_video_filter_crop = (
-            f"crop={input_video_crop}" if input_video_crop is not None else None
+        # 参照画像ごとに、前回出力した検出時刻を保持する
+        prev_result_timedeltas = [
+            timedelta(seconds=-output_interval) for _ in references
+        ]
+
+        async def _handle_hit(hit: _ImageFinderHit) -> None:
+            # 開始時間(ss)分、検出時刻を補正
+            input_timedelta = start_timedelta + hit.internal_time
+
+            prev_result_timedelta = prev_result_timedeltas[hit.reference_index]
+            if (
+                timedelta(seconds=output_interval)
+                <= input_timedelta - prev_result_timedelta
+            ):
+                if result_handler:
+                    await result_handler(
+                        ImageFinderResult(
+                            time=input_timedelta,
+                            frame=int(
+                                input_timedelta.total_seconds() * input_video_fps
+                            ),
+                            internal_time=hit.internal_time,
+                            internal_frame=hit.internal_frame,
+                            reference_index=hit.reference_index,
+                        ),
+                    )
+
+                prev_result_timedeltas[hit.reference_index] = input_timedelta
+
+        async def _handle_progress(frame: int, time: timedelta) -> None:
+            progress = progress_calculator.calculate_progress(
+                frame=frame,
+                time=time,
+            )
+
+            if progress_handler:
+                await progress_handler(
+                    ImageFinderProgress(
+                        frame=progress.frame,
+                        time=progress.time,
+                        internal_frame=progress.internal_frame,
+                        internal_time=progress.internal_time,
+                    ),
+                )
+
+        internal_fps = fps if fps is not None else input_video_fps
+
+        numpy_options = (
+            _ImageFinderNumpyOptions(
+                frame_width=numpy_frame_width,
+                frame_height=numpy_frame_height,
+                batch_size=numpy_batch_size,
+            )
+            if backend == "numpy"
+            else None
         )
 
-        input_video_filters = list(
-            exclude_none(
-                [
-                    input_video_filter_fps,
-                    input_video_filter_crop,
-                ]
+        if coarse_search is not None:
+            await self._run_coarse_to_fine_search(
+                input_video_ss=input_video_ss,
+                input_video_to=input_video_to,
+                input_video_path=input_video_path,
+                references=references,
+                fps=fps,
+                internal_fps=internal_fps,
+                blackframe_amount=blackframe_amount,
+                blackframe_threshold=blackframe_threshold,
+                coarse_search=coarse_search,
+                coarse_fps=coarse_fps,
+                coarse_blackframe_amount_margin=coarse_blackframe_amount_margin,
+                coarse_blackframe_threshold_margin=coarse_blackframe_threshold_margin,
+                jobs=jobs,
+                numpy_options=numpy_options,
+                progress_handler=_handle_progress,
+                hit_handler=_handle_hit,
+            )
+            return
+
+        if jobs == 1 and numpy_options is None:
+            await self._run_blackframe_search(
+                input_video_ss=input_video_ss,
+                input_video_to=input_video_to,
+                input_video_path=input_video_path,
+                references=references,
+                fps=fps,
+                blackframe_amount=blackframe_amount,
+                blackframe_threshold=blackframe_threshold,
+                progress_handler=_handle_progress,
+                hit_handler=_handle_hit,
             )
+            return
+
+        search_range = await self._create_search_range(
+            input_video_path=input_video_path,
+            input_video_ss=input_video_ss,
+            input_video_to=input_video_to,
+            fps=fps,
+            internal_fps=internal_fps,
+        )
+        segments = self._create_parallel_segments(
+            search_range=search_range,
+            fps=fps,
+            internal_fps=internal_fps,
+            jobs=jobs,
         )
 
-        input_video_filter_complex: str | None = None
-        if len(input_video_filters) != 0:
-            input_video_filter_inner_string = ",".join(input_video_filters)
-            input_video_filter_complex = f"[0:v]{input_video_filter_inner_string}[va]"
+        await self._run_search_in_segments(
+            input_video_path=input_video_path,
+            references=references,
+            fps=fps,
+            internal_fps=internal_fps,
+            blackframe_amount=blackframe_amount,
+            blackframe_threshold=blackframe_threshold,
+            search_range=search_range,
+            segments=segments,
+            jobs=jobs,
+            numpy_options=numpy_options,
+            progress_handler=_handle_progress,
+            hit_handler=_handle_hit,
+        )
+
+    async def _create_search_range(
+        self,
+        input_video_path: Path,
+        input_video_ss: str | None,
+        input_video_to: str | None,
+        fps: int | None,
+        internal_fps: float,
+    ) -> _ImageFinderSearchRange:
+        raw_start_seconds = (
+            parse_ffmpeg_time_unit_syntax(input_video_ss).to_timedelta().total_seconds()
+            if input_video_ss is not None
+            else 0.0
+        )
+        raw_end_seconds = (
+            parse_ffmpeg_time_unit_syntax(input_video_to).to_timedelta().total_seconds()
+            if input_video_to is not None
+            else None
+        )
 
-        # Create the reference image filter_complex string
-        reference_image_filter_fps = f"fps={fps}" if fps is not None else None
-        reference_image_filter_crop = (
-            f"crop={reference_image_crop}" if reference_image_crop is not None else None
+        key_frame_index = await self._key_frame_parser.parse_key_frame_index(
+            input_path=input_video_path,
         )
 
-        reference_image_filters = list(
-            exclude_none(
-                [
-                    reference_image_filter_fps,
-                    reference_image_filter_crop,
-                ]
+        # 単一プロセスで検索した場合に、最初に処理されるフレームの時刻
+        first_frame_seconds = raw_start_seconds
+        if len(key_frame_index) != 0:
+            first_frame_seconds = max(first_frame_seconds, key_frame_index[0])
+
+        # fps フィルタを使わない場合は、直前のキーフレームを起点とする
+        # 入力動画のフレームの格子に合わせる
+        if fps is None:
+            anchor_seconds = key_frame_index.find_before(
+                first_frame_seconds + _SEGMENT_BOUNDARY_TOLERANCE_SECONDS,
+                inclusive=True,
             )
+            if anchor_seconds is not None:
+                first_frame_seconds = (
+                    anchor_seconds
+                    + math.ceil(
+                        (
+                            first_frame_seconds
+                            - anchor_seconds
+                            - _SEGMENT_FRAME_COUNT_TOLERANCE_SECONDS
+                        )
+                        * internal_fps
+                    )
+                    / internal_fps
+                )
+
+        return _ImageFinderSearchRange(
+            ss=input_video_ss,
+            to=input_video_to,
+            raw_start_seconds=raw_start_seconds,
+            raw_end_seconds=raw_end_seconds,
+            first_frame_seconds=first_frame_seconds,
+            key_frame_index=key_frame_index,
         )
 
-        reference_image_filter_complex: str | None = None
-        if len(reference_image_filters) != 0:
-            reference_image_filter_inner_string = ",".join(reference_image_filters)
-            reference_image_filter_complex = (
-                f"[1:v]{reference_image_filter_inner_string}[vb]"
+    def _snap_segment_start(
+        self,
+        search_range: _ImageFinderSearchRange,
+        seconds: float,
+        fps: int | None,
+    ) -> float:
+        """
+        区間の開始時刻を、単一プロセスの場合と同じフレームが処理される時刻に合わせる
+
+        fps フィルタを使う場合は、直前の fps フィルタの出力フレームの格子に合わせる
+        使わない場合は、FFmpeg の -ss による時刻の丸めを避けるため、
+        直前のキーフレームに合わせる
+        """
+        raw_start_seconds = search_range.raw_start_seconds
+
+        if fps is None:
+            key_frame_seconds = search_range.key_frame_index.find_before(
+                seconds + _SEGMENT_BOUNDARY_TOLERANCE_SECONDS,
+                inclusive=True,
             )
+            if key_frame_seconds is None:
+                return raw_start_seconds
 
-        # Create the blend filter_complex string
-        blend_filter_complex_inner_string = f"blend=difference:shortest=1,blackframe=amount={blackframe_amount}:threshold={blackframe_threshold}"  # noqa: E501
-        blend_input_a_name = "va" if input_video_filter_complex is not None else "0:v"
-        blend_input_b_name = "vb" if input_video_filter_complex is not None else "1:v"
+            return max(raw_start_seconds, key_frame_seconds)
 
-        blend_filter_complex = f"[{blend_input_a_name}][{blend_input_b_name}]{blend_filter_complex_inner_string}"  # noqa: E501
+        return (
+            raw_start_seconds
+            + math.floor(
+                (seconds - raw_start_seconds) * fps
+                + _SEGMENT_FRAME_COUNT_TOLERANCE_SECONDS * fps
+            )
+            / fps
+        )
 
-        # Create the filter_complex string
-        filter_complex_filters = list(
-            exclude_none(
-                [
-                    input_video_filter_complex,
-                    reference_image_filter_complex,
-                    blend_filter_complex,
-                ]
+    def _create_segment(
+        self,
+        search_range: _ImageFinderSearchRange,
+        start_seconds: float,
+        end_seconds: float | None,
+        internal_fps: float,
+    ) -> _ImageFinderSegment:
+        # 検索範囲の先頭から始まる区間は、指定された -ss/-to をそのまま使う
+        if start_seconds <= search_range.raw_start_seconds:
+            ss = search_range.ss
+            start_seconds = search_range.raw_start_seconds
+            start_internal_frame = 0
+            first_frame_seconds = search_range.first_frame_seconds
+        else:
+            ss = f"{start_seconds:.06f}"
+
+            # 区間の開始時刻より前に処理されるフレーム数
+            # キーフレームの時刻はミリ秒単位で丸められていることがあるため、
+            # 誤差を許容する
+            start_internal_frame = math.ceil(
+                (
+                    start_seconds
+                    - search_range.first_frame_seconds
+                    - _SEGMENT_FRAME_COUNT_TOLERANCE_SECONDS
+                )
+                * internal_fps
+            )
+
+            # 区間の開始時刻はフレームの時刻に合わせてある
+            first_frame_seconds = start_seconds
+
+        to = f"{end_seconds:.06f}" if end_seconds is not None else search_range.to
+
+        return _ImageFinderSegment(
+            ss=ss,
+            to=to,
+            start_seconds=start_seconds,
+            end_seconds=end_seconds,
+            start_internal_frame=start_internal_frame,
+            first_frame_seconds=first_frame_seconds,
+        )
+
+    def _create_parallel_segments(
+        self,
+        search_range: _ImageFinderSearchRange,
+        fps: int | None,
+        internal_fps: float,
+        jobs: int,
+    ) -> list[_ImageFinderSegment]:
+        """
+        検索範囲を、キーフレームを境界として最大 jobs 個の区間に分割する
+        """
+        raw_start_seconds = search_range.raw_start_seconds
+        raw_end_seconds = search_range.raw_end_seconds
+
+        key_frame_index = search_range.key_frame_index.slice(
+            start_seconds=raw_start_seconds,
+            end_seconds=raw_end_seconds,
+        )
+
+        boundary_seconds_list: list[float] = []
+        if len(key_frame_index) != 0:
+            # 終了時間が未指定のときは、最後のキーフレームを終端とみなして等分する
+            range_end_seconds = (
+                raw_end_seconds if raw_end_seconds is not None else key_frame_index[-1]
+            )
+            segment_duration = (range_end_seconds - raw_start_seconds) / jobs
+
+            for segment_index in range(1, jobs):
+                target_seconds = raw_start_seconds + segment_duration * segment_index
+                nearest_key_frame_seconds = key_frame_index.find_nearest(
+                    target_seconds,
+                )
+                if nearest_key_frame_seconds is None:
+                    continue
+
+                boundary_seconds = self._snap_segment_start(
+                    search_range=search_range,
+                    seconds=nearest_key_frame_seconds,
+                    fps=fps,
+                )
+
+                if (
+                    raw_start_seconds < boundary_seconds
+                    and boundary_seconds not in boundary_seconds_list
+                ):
+                    boundary_seconds_list.append(boundary_seconds)
+
+            boundary_seconds_list.sort()
+
+        start_seconds_list = [raw_start_seconds, *boundary_seconds_list]
+        end_seconds_list: list[float | None] = [*boundary_seconds_list, None]
+
+        return [
+            self._create_segment(
+                search_range=search_range,
+                start_seconds=start_seconds,
+                end_seconds=end_seconds,
+                internal_fps=internal_fps,
+            )
+            for start_seconds, end_seconds in zip(
+                start_seconds_list,
+                end_seconds_list,
+                strict=True,
+            )
+        ]
+
+    async def _run_coarse_to_fine_search(
+        self,
+        input_video_ss: str | None,
+        input_video_to: str | None,
+        input_video_path: Path,
+        references: list[ImageFinderReference],
+        fps: int | None,
+        internal_fps: float,
+        blackframe_amount: int,
+        blackframe_threshold: int,
+        coarse_search: Literal["key_frame", "fps"],
+        coarse_fps: int,
+        coarse_blackframe_amount_margin: int,
+        coarse_blackframe_threshold_margin: int,
+        jobs: int,
+        numpy_options: _ImageFinderNumpyOptions | None,
+        progress_handler: Callable[[int, timedelta], Awaitable[None]],
+        hit_handler: Callable[[_ImageFinderHit], Awaitable[None]],
+    ) -> None:
+        """
+        キーフレームのみ、または低い FPS で緩い閾値の粗い検索を行い、
+        検出候補の前後の短い区間だけ、全フレームを対象に検索する
+        """
+        search_range = await self._create_search_range(
+            input_video_path=input_video_path,
+            input_video_ss=input_video_ss,
+            input_video_to=input_video_to,
+            fps=fps,
+            internal_fps=internal_fps,
+        )
+        raw_start_seconds = search_range.raw_start_seconds
+        raw_end_seconds = search_range.raw_end_seconds
+
+        # 粗い検索では、見逃しを減らすために閾値を緩める
+        coarse_references: list[ImageFinderReference] = []
+        for reference in references:
+            reference_blackframe_amount = (
+                reference.blackframe_amount
+                if reference.blackframe_amount is not None
+                else blackframe_amount
+            )
+            reference_blackframe_threshold = (
+                reference.blackframe_threshold
+                if reference.blackframe_threshold is not None
+                else blackframe_threshold
+            )
+
+            coarse_references.append(
+                reference.model_copy(
+                    update={
+                        "blackframe_amount": max(
+                            0,
+                            reference_blackframe_amount
+                            - coarse_blackframe_amount_margin,
+                        ),
+                        "blackframe_threshold": min(
+                            255,
+                            reference_blackframe_threshold
+                            + coarse_blackframe_threshold_margin,
+                        ),
+                    },
+                ),
+            )
+
+        candidate_seconds_list: list[float] = []
+        coarse_end_seconds = raw_start_seconds
+        coarse_progress_frame = 0
+        coarse_progress_time = timedelta()
+
+        async def _handle_coarse_progress(frame: int, time: timedelta) -> None:
+            nonlocal coarse_end_seconds, coarse_progress_frame, coarse_progress_time
+
+            coarse_end_seconds = max(
+                coarse_end_seconds,
+                raw_start_seconds + time.total_seconds(),
+            )
+            coarse_progress_frame = max(coarse_progress_frame, frame)
+            coarse_progress_time = max(coarse_progress_time, time)
+            await progress_handler(coarse_progress_frame, coarse_progress_time)
+
+        async def _handle_fine_progress(frame: int, time: timedelta) -> None:
+            # 粗い検索の処理済みフレーム数・時間に、詳細な検索の分を足して
+            # 進捗が巻き戻らないようにする
+            await progress_handler(
+                coarse_progress_frame + frame,
+                coarse_progress_time + time,
+            )
+
+        async def _handle_coarse_hit(hit: _ImageFinderHit) -> None:
+            candidate_seconds_list.append(
+                raw_start_seconds + hit.internal_time.total_seconds()
+            )
+
+        await self._run_blackframe_search(
+            input_video_ss=input_video_ss,
+            input_video_to=input_video_to,
+            input_video_path=input_video_path,
+            references=coarse_references,
+            fps=coarse_fps if coarse_search == "fps" else None,
+            blackframe_amount=blackframe_amount,
+            blackframe_threshold=blackframe_threshold,
+            input_video_opts=(
+                ["-skip_frame", "nokey"] if coarse_search == "key_frame" else []
+            ),
+            progress_handler=_handle_coarse_progress,
+            hit_handler=_handle_coarse_hit,
+        )
+
+        # 検出候補の前後で、粗い検索で読み飛ばしたフレームを含む区間を求める
+        key_frame_index = search_range.key_frame_index
+        windows: list[tuple[float, float | None]] = []
+        for candidate_seconds in sorted(candidate_seconds_list):
+            window_start_seconds: float
+            window_end_seconds: float | None
+            if coarse_search == "key_frame":
+                # 検出候補のキーフレームの、1つ前から1つ後のキーフレームまで
+                candidate_key_frame_seconds = (
+                    candidate_seconds - _SEGMENT_BOUNDARY_TOLERANCE_SECONDS
+                )
+                previous_key_frame_seconds = key_frame_index.find_before(
+                    candidate_key_frame_seconds,
+                )
+                window_start_seconds = (
+                    previous_key_frame_seconds
+                    if previous_key_frame_seconds is not None
+                    else raw_start_seconds
+                )
+                candidate_key_frame = key_frame_index.find_after(
+                    candidate_key_frame_seconds,
+                    inclusive=True,
+                )
+                window_end_seconds = (
+                    key_frame_index.find_after(candidate_key_frame)
+                    if candidate_key_frame is not None
+                    else None
+                )
+            else:
+                # 粗い検索のフレーム間隔の前後
+                window_start_seconds = candidate_seconds - 1 / coarse_fps
+                window_end_seconds = candidate_seconds + 1 / coarse_fps
+
+            window_start_seconds = max(
+                raw_start_seconds,
+                self._snap_segment_start(
+                    search_range=search_range,
+                    seconds=window_start_seconds,
+                    fps=fps,
+                ),
+            )
+            if raw_end_seconds is not None and (
+                window_end_seconds is None or raw_end_seconds < window_end_seconds
+            ):
+                window_end_seconds = raw_end_seconds
+
+            # 粗い検索で処理した範囲の終端を超える区間は、入力の終端まで検索する
+            if (
+                window_end_seconds is not None
+                and coarse_end_seconds <= window_end_seconds
+            ):
+                window_end_seconds = (
+                    raw_end_seconds
+                    if raw_end_seconds is not None
+                    and raw_end_seconds <= window_end_seconds
+                    else None
+                )
+
+            # 重なる区間は結合する
+            if len(windows) != 0:
+                prev_window_start_seconds, prev_window_end_seconds = windows[-1]
+                if (
+                    prev_window_end_seconds is None
+                    or window_start_seconds <= prev_window_end_seconds
+                ):
+                    windows[-1] = (
+                        prev_window_start_seconds,
+                        (
+                            None
+                            if prev_window_end_seconds is None
+                            or window_end_seconds is None
+                            else max(prev_window_end_seconds, window_end_seconds)
+                        ),
+                    )
+                    continue
+
+            windows.append((window_start_seconds, window_end_seconds))
+
+        segments = [
+            self._create_segment(
+                search_range=search_range,
+                start_seconds=window_start_seconds,
+                end_seconds=window_end_seconds,
+                internal_fps=internal_fps,
+            )
+            for window_start_seconds, window_end_seconds in windows
+        ]
+
+        await self._run_search_in_segments(
+            input_video_path=input_video_path,
+            references=references,
+            fps=fps,
+            internal_fps=internal_fps,
+            blackframe_amount=blackframe_amount,
+            blackframe_threshold=blackframe_threshold,
+            search_range=search_range,
+            segments=segments,
+            jobs=jobs,
+            numpy_options=numpy_options,
+            progress_handler=_handle_fine_progress,
+            hit_handler=hit_handler,
+        )
+
+    async def _run_search_in_segments(
+        self,
+        input_video_path: Path,
+        references: list[ImageFinderReference],
+        fps: int | None,
+        internal_fps: float,
+        blackframe_amount: int,
+        blackframe_threshold: int,
+        search_range: _ImageFinderSearchRange,
+        segments: list[_ImageFinderSegment],
+        jobs: int,
+        numpy_options: _ImageFinderNumpyOptions | None,
+        progress_handler: Callable[[int, timedelta], Awaitable[None]],
+        hit_handler: Callable[[_ImageFinderHit], Awaitable[None]],
+    ) -> None:
+        """
+        区間ごとに FFmpeg を最大 jobs 個並列実行し、検出結果を時刻順に出力する
+        """
+        raw_start_seconds = search_range.raw_start_seconds
+
+        # 参照画像は、区間ごとではなく最初に1回だけ読み込む
+        numpy_reference_frames = (
+            await self._load_numpy_reference_frames(
+                references=references,
+                numpy_options=numpy_options,
             )
+            if numpy_options is not None
+            else None
+        )
+
+        segment_hits: list[list[_ImageFinderHit]] = [[] for _ in segments]
+        segment_done = [False for _ in segments]
+        segment_progress_frames = [0 for _ in segments]
+        segment_progress_times = [timedelta() for _ in segments]
+        next_output_segment_index = 0
+        output_lock = asyncio.Lock()
+        semaphore = asyncio.Semaphore(jobs)
+
+        async def _run_segment(segment_index: int) -> None:
+            nonlocal next_output_segment_index
+
+            segment = segments[segment_index]
+
+            # 単一プロセスで検索した場合の時刻・フレームに揃えるための補正量
+            segment_offset_seconds = segment.start_seconds - raw_start_seconds
+
+            async def _handle_segment_hit(hit: _ImageFinderHit) -> None:
+                # 次の区間の開始時刻以降は、次の区間で検出する
+                if segment.end_seconds is not None and (
+                    segment.end_seconds - _SEGMENT_BOUNDARY_TOLERANCE_SECONDS
+                    <= segment.start_seconds + hit.internal_time.total_seconds()
+                ):
+                    return
+
+                segment_hits[segment_index].append(
+                    _ImageFinderHit(
+                        reference_index=hit.reference_index,
+                        internal_time=timedelta(seconds=segment_offset_seconds)
+                        + hit.internal_time,
+                        internal_frame=segment.start_internal_frame
+                        + hit.internal_frame,
+                    ),
+                )
+
+            async def _handle_segment_progress(frame: int, time: timedelta) -> None:
+                segment_progress_frames[segment_index] = frame
+                segment_progress_times[segment_index] = time
+
+                # 全区間の処理済みフレーム数・時間の合計を進捗とする
+                await progress_handler(
+                    sum(segment_progress_frames),
+                    sum(segment_progress_times, timedelta()),
+                )
+
+            async with semaphore:
+                if numpy_options is not None and numpy_reference_frames is not None:
+                    # fps オプションを指定しない場合、区間の最初のフレームは
+                    # 区間の開始時刻より後にあることがある
+                    first_frame_offset_seconds = (
+                        segment.first_frame_seconds - segment.start_seconds
+                        if fps is None
+                        else 0.0
+                    )
+
+                    await self._run_numpy_search(
+                        input_video_ss=segment.ss,
+                        input_video_to=segment.to,
+                        input_video_path=input_video_path,
+                        references=references,
+                        fps=fps,
+                        internal_fps=internal_fps,
+                        blackframe_amount=blackframe_amount,
+                        blackframe_threshold=blackframe_threshold,
+                        numpy_options=numpy_options,
+                        numpy_reference_frames=numpy_reference_frames,
+                        first_frame_offset_seconds=first_frame_offset_seconds,
+                        progress_handler=_handle_segment_progress,
+                        hit_handler=_handle_segment_hit,
+                    )
+                else:
+                    await self._run_blackframe_search(
+                        input_video_ss=segment.ss,
+                        input_video_to=segment.to,
+                        input_video_path=input_video_path,
+                        references=references,
+                        fps=fps,
+                        blackframe_amount=blackframe_amount,
+                        blackframe_threshold=blackframe_threshold,
+                        progress_handler=_handle_segment_progress,
+                        hit_handler=_handle_segment_hit,
+                    )
+
+            # 先頭から連続して完了した区間の検出結果を、時刻順に出力する
+            async with output_lock:
+                segment_done[segment_index] = True
+                while (
+                    next_output_segment_index < len(segments)
+                    and segment_done[next_output_segment_index]
+                ):
+                    for hit in segment_hits[next_output_segment_index]:
+                        await hit_handler(hit)
+
+                    segment_hits[next_output_segment_index].clear()
+                    next_output_segment_index += 1
+
+        async with asyncio.TaskGroup() as task_group:
+            for segment_index in range(len(segments)):
+                task_group.create_task(_run_segment(segment_index))
+
+    async def _run_blackframe_search(
+        self,
+        input_video_ss: str | None,
+        input_video_to: str | None,
+        input_video_path: Path,
+        references: list[ImageFinderReference],
+        fps: int | None,
+        blackframe_amount: int,
+        blackframe_threshold: int,
+        progress_handler: Callable[[int, timedelta], Awaitable[None]],
+        hit_handler: Callable[[_ImageFinderHit], Awaitable[None]],
+        input_video_opts: list[str] | None = None,
+    ) -> None:
+        filter_complex = self._create_filter_complex(
+            references=references,
+            fps=fps,
+            blackframe_amount=blackframe_amount,
+            blackframe_threshold=blackframe_threshold,
         )
-        filter_complex = ";".join(filter_complex_filters)
 
         slice_opts: list[str] = []
         if input_video_ss is not None:
@@ -189,17 +962,24 @@ class ImageFinder:
                 input_video_to,
             ]
 
+        # 参照画像は1回だけデコードし、blend フィルタ（framesync）で最後のフレームを
+        # 繰り返し使う
+        reference_input_opts: list[str] = []
+        for reference in references:
+            reference_input_opts += [
+                "-i",
+                str(reference.image_path),
+            ]
+
         # Command Argument List
         command = [
             self._ffmpeg_path,
             "-hide_banner",
             *slice_opts,
+            *(input_video_opts or []),
             "-i",
             str(input_video_path),
-            "-loop",
-            "1",
-            "-i",
-            str(reference_image_path),
+            *reference_input_opts,
             "-an",
             "-filter_complex",
             filter_complex,
@@ -213,16 +993,12 @@ class ImageFinder:
             stderr=asyncio.subprocess.PIPE,
         )
 
-        prev_result_timedelta = timedelta(seconds=-output_interval)
-
         async def _handle_stderr(line: str) -> None:
-            nonlocal prev_result_timedelta
-
-            match = re.match(r"^\[Parsed_blackframe.+?\]\ (frame:.+)$", line)
-            if (
-                match
-            ):  # "frame:810 pblack:99 pts:13516 t:13.516000 type:P last_keyframe:720"
-                _result_string = match.group(1).strip()
+            # "[reference_0 @ 0x55d5c5e0] frame:810 pblack:99 pts:13516 t:13.516000 type:P last_keyframe:720"  # noqa: E501
+            match = re.search(r"\[reference_(\d+)\ @\ \S+\]\ (frame:.+)$", line)
+            if match:
+                _reference_index = int(match.group(1))
+                _result_string = match.group(2).strip()
 
                 _result_dict: dict[str, str] = {}
                 for key_value in _result_string.split(" "):
@@ -231,55 +1007,414 @@ class ImageFinder:
 
                 _result = _FfmpegBlackframeResult.model_validate(_result_dict)
 
-                internal_timedelta = timedelta(seconds=_result.t)
+                await hit_handler(
+                    _ImageFinderHit(
+                        reference_index=_reference_index,
+                        internal_time=timedelta(seconds=_result.t),
+                        internal_frame=_result.frame,
+                    ),
+                )
 
-                # 開始時間(ss)分、検出時刻を補正
-                input_timedelta = start_timedelta + internal_timedelta
+            _progress = self._parse_ffmpeg_progress(line)
+            if _progress is not None:
+                await progress_handler(*_progress)
 
-                if (
-                    timedelta(seconds=output_interval)
-                    <= input_timedelta - prev_result_timedelta
-                ):
-                    if result_handler:
-                        await result_handler(
-                            ImageFinderResult(
-                                time=input_timedelta,
-                                frame=int(
-                                    input_timedelta.total_seconds() * input_video_fps
-                                ),
-                                internal_time=internal_timedelta,
-                                internal_frame=_result.frame,
-                            ),
-                        )
+        try:
+            returncode = await wait_process(
+                process=proc,
+                stderr_handler=_handle_stderr,
+            )
+        except asyncio.CancelledError:
+            # 並列実行中に他の区間が失敗したとき、FFmpeg プロセスを残さない
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
 
-                    prev_result_timedelta = input_timedelta
+        if returncode != 0:
+            raise Exception(f"FFmpeg errored. code: {returncode}")
 
-            match = re.match(r"^frame=\ *(\d+?)\ .+time=(.+?)\ bitrate.+$", line)
-            if match:
-                _frame = int(match.group(1))
-                _time_string = match.group(2).strip()
+    def _create_filter_complex(
+        self,
+        references: list[ImageFinderReference],
+        fps: int | None,
+        blackframe_amount: int,
+        blackframe_threshold: int,
+    ) -> str:
+        filter_complex_filters: list[str] = []
 
-                _time_struct = parse_ffmpeg_time_unit_syntax(_time_string)
-                _time = _time_struct.to_timedelta()
+        # Create the input video filter_complex string
+        # 入力動画は1回だけデコードし、参照画像の数だけ split する
+        input_video_filter_fps = f"fps={fps}" if fps is not None else None
+        input_video_filter_split = (
+            f"split={len(references)}" if len(references) != 1 else None
+        )
 
-                progress = progress_calculator.calculate_progress(
-                    frame=_frame,
-                    time=_time,
+        input_video_filters = list(
+            exclude_none(
+                [
+                    input_video_filter_fps,
+                    input_video_filter_split,
+                ]
+            )
+        )
+
+        input_video_branch_names = ["0:v" for _ in references]
+        if len(input_video_filters) != 0:
+            input_video_branch_names = [
+                f"vs{index}" for index in range(len(references))
+            ]
+            input_video_filter_inner_string = ",".join(input_video_filters)
+            input_video_filter_output_labels = "".join(
+                f"[{name}]" for name in input_video_branch_names
+            )
+            filter_complex_filters.append(
+                f"[0:v]{input_video_filter_inner_string}{input_video_filter_output_labels}"
+            )
+
+        for index, reference in enumerate(references):
+            # 入力動画の 0 番目以降に参照画像が並ぶ
+            reference_input_index = index + 1
+
+            # Create the input video branch filter_complex string
+            blend_input_a_name = input_video_branch_names[index]
+            if reference.input_video_crop is not None:
+                filter_complex_filters.append(
+                    f"[{blend_input_a_name}]crop={reference.input_video_crop}[va{index}]"
                 )
+                blend_input_a_name = f"va{index}"
 
-                if progress_handler:
-                    await progress_handler(
-                        ImageFinderProgress(
-                            frame=progress.frame,
-                            time=progress.time,
-                            internal_frame=progress.internal_frame,
-                            internal_time=progress.internal_time,
-                        ),
-                    )
+            # Create the reference image filter_complex string
+            # 参照画像の切り取りは、1フレームだけに対して1回だけ実行される
+            blend_input_b_name = f"{reference_input_index}:v"
+            if reference.image_crop is not None:
+                filter_complex_filters.append(
+                    f"[{blend_input_b_name}]crop={reference.image_crop}[vb{index}]"
+                )
+                blend_input_b_name = f"vb{index}"
+
+            # Create the blend filter_complex string
+            # blackframe フィルタのインスタンス名で、どの参照画像の検出結果か判別する
+            reference_blackframe_amount = (
+                reference.blackframe_amount
+                if reference.blackframe_amount is not None
+                else blackframe_amount
+            )
+            reference_blackframe_threshold = (
+                reference.blackframe_threshold
+                if reference.blackframe_threshold is not None
+                else blackframe_threshold
+            )
+            blend_filter_complex_inner_string = f"blend=difference:repeatlast=1,blackframe@reference_{index}=amount={reference_blackframe_amount}:threshold={reference_blackframe_threshold}"  # noqa: E501
+
+            filter_complex_filters.append(
+                f"[{blend_input_a_name}][{blend_input_b_name}]{blend_filter_complex_inner_string}"  # noqa: E501
+            )
+
+        return ";".join(filter_complex_filters)
+
+    def _parse_ffmpeg_progress(self, line: str) -> tuple[int, timedelta] | None:
+        match = re.match(r"^frame=\ *(\d+?)\ .+time=(\d.*?)\ bitrate.+$", line)
+        if not match:
+            return None
+
+        _frame = int(match.group(1))
+        _time_string = match.group(2).strip()
+
+        _time_struct = parse_ffmpeg_time_unit_syntax(_time_string)
+        _time = _time_struct.to_timedelta()
+
+        return _frame, _time
+
+    async def _load_numpy_reference_frames(
+        self,
+        references: list[ImageFinderReference],
+        numpy_options: _ImageFinderNumpyOptions,
+    ) -> "NDArray[np.uint8]":
+        """
+        参照画像を、入力動画と同じ大きさのグレースケールに変換して読み込む
+        """
+        import numpy as np
+
+        frame_width = numpy_options.frame_width
+        frame_height = numpy_options.frame_height
 
-        returncode = await wait_process(
-            process=proc,
-            stderr_handler=_handle_stderr,
+        reference_frames: list[NDArray[np.uint8]] = []
+        for reference in references:
+            reference_filters = list(
+                exclude_none(
+                    [
+                        f"crop={reference.image_crop}"
+                        if reference.image_crop is not None
+                        else None,
+                        f"scale={frame_width}:{frame_height}:flags=area",
+                        "format=gray",
+                    ]
+                )
+            )
+
+            # Command Argument List
+            command = [
+                self._ffmpeg_path,
+                "-hide_banner",
+                "-i",
+                str(reference.image_path),
+                "-vf",
+                ",".join(reference_filters),
+                "-frames:v",
+                "1",
+                "-f",
+                "rawvideo",
+                "-",
+            ]
+            proc = await asyncio.create_subprocess_exec(
+                *command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            stdout, _ = await proc.communicate()
+
+            if proc.returncode != 0:
+                raise Exception(f"FFmpeg errored. code: {proc.returncode}")
+
+            if len(stdout) != frame_width * frame_height:
+                raise Exception(
+                    f"Failed to load reference image: {reference.image_path}"
+                )
+
+            reference_frames.append(
+                np.frombuffer(stdout, dtype=np.uint8).reshape(
+                    (frame_height, frame_width)
+                )
+            )
+
+        return np.stack(reference_frames)
+
+    async def _run_numpy_search(
+        self,
+        input_video_ss: str | None,
+        input_video_to: str | None,
+        input_video_path: Path,
+        references: list[ImageFinderReference],
+        fps: int | None,
+        internal_fps: float,
+        blackframe_amount: int,
+        blackframe_threshold: int,
+        numpy_options: _ImageFinderNumpyOptions,
+        numpy_reference_frames: "NDArray[np.uint8]",
+        first_frame_offset_seconds: float,
+        progress_handler: Callable[[int, timedelta], Awaitable[None]],
+        hit_handler: Callable[[_ImageFinderHit], Awaitable[None]],
+    ) -> None:
+        """
+        FFmpeg から縮小したグレースケールのフレームを rawvideo でパイプに出力させ、
+        NumPy で参照画像との一致度を計算する
+
+        パイプは使い回すバッファに直接読み込み、フレームごとのコピーやログの解析をしない
+        フレームの時刻は出力されないため、fps フィルタで internal_fps の
+        固定フレームレートに変換し、フレーム番号から時刻を計算する
+        （可変フレームレートの入力では、フレーム番号は blackframe フィルタと一致しない）
+        """
+        import numpy as np
+
+        from ..utility.frame_matcher import FrameMatcher, read_frames_into
+
+        reference_blackframe_amounts = [
+            reference.blackframe_amount
+            if reference.blackframe_amount is not None
+            else blackframe_amount
+            for reference in references
+        ]
+        reference_blackframe_thresholds = [
+            reference.blackframe_threshold
+            if reference.blackframe_threshold is not None
+            else blackframe_threshold
+            for reference in references
+        ]
+
+        frame_matcher = FrameMatcher(
+            reference_frames=numpy_reference_frames,
+            thresholds=reference_blackframe_thresholds,
+            batch_size=numpy_options.batch_size,
+        )
+        frame_buffer = frame_matcher.create_frame_buffer()
+        amounts = np.asarray(reference_blackframe_amounts, dtype=np.int64)
+
+        filter_complex = self._create_numpy_filter_complex(
+            references=references,
+            fps=fps if fps is not None else internal_fps,
+            frame_width=numpy_options.frame_width,
+            frame_height=numpy_options.frame_height,
         )
+
+        slice_opts: list[str] = []
+        if input_video_ss is not None:
+            slice_opts += [
+                "-ss",
+                input_video_ss,
+            ]
+
+        if input_video_to is not None:
+            slice_opts += [
+                "-to",
+                input_video_to,
+            ]
+
+        # Command Argument List
+        # 固定フレームレートへの変換は fps フィルタで行うため、
+        # 出力ではフレームの複製・間引きをしない
+        command = [
+            self._ffmpeg_path,
+            "-hide_banner",
+            *slice_opts,
+            "-i",
+            str(input_video_path),
+            "-an",
+            "-filter_complex",
+            filter_complex,
+            "-map",
+            "[vout]",
+            "-fps_mode",
+            "passthrough",
+            "-f",
+            "rawvideo",
+            "-",
+        ]
+
+        read_fd, write_fd = os.pipe()
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *command,
+                stdout=write_fd,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except BaseException:
+            os.close(read_fd)
+            raise
+        finally:
+            os.close(write_fd)
+
+        async def _handle_stderr(line: str) -> None:
+            _progress = self._parse_ffmpeg_progress(line)
+            if _progress is not None:
+                await progress_handler(*_progress)
+
+        async def _read_frames() -> None:
+            frame_index = 0
+            with open(read_fd, "rb", buffering=0) as frame_stream:
+                while True:
+                    num_frames = await asyncio.to_thread(
+                        read_frames_into,
+                        frame_stream,
+                        frame_buffer,
+                    )
+                    if num_frames == 0:
+                        break
+
+                    scores = await asyncio.to_thread(
+                        frame_matcher.score,
+                        frame_buffer[:num_frames],
+                    )
+
+                    hit_frame_indices, hit_reference_indices = np.nonzero(
+                        amounts <= scores
+                    )
+                    for hit_frame_index, hit_reference_index in zip(
+                        hit_frame_indices.tolist(),
+                        hit_reference_indices.tolist(),
+                        strict=True,
+                    ):
+                        internal_frame = frame_index + hit_frame_index
+                        await hit_handler(
+                            _ImageFinderHit(
+                                reference_index=hit_reference_index,
+                                internal_time=timedelta(
+                                    seconds=first_frame_offset_seconds
+                                    + internal_frame / internal_fps
+                                ),
+                                internal_frame=internal_frame,
+                            ),
+                        )
+
+                    frame_index += num_frames
+                    if num_frames < len(frame_buffer):
+                        break
+
+        try:
+            _, returncode = await asyncio.gather(
+                _read_frames(),
+                wait_process(
+                    process=proc,
+                    stderr_handler=_handle_stderr,
+                ),
+            )
+        except BaseException:
+            # 並列実行中に他の区間が失敗したとき、FFmpeg プロセスを残さない
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
+
         if returncode != 0:
             raise Exception(f"FFmpeg errored. code: {returncode}")
+
+    def _create_numpy_filter_complex(
+        self,
+        references: list[ImageFinderReference],
+        fps: float,
+        frame_width: int,
+        frame_height: int,
+    ) -> str:
+        """
+        参照画像ごとに切り抜き・縮小したグレースケールのフレームを、
+        縦に並べた1枚のフレームとして出力するフィルタグラフを作成する
+        """
+        filter_complex_filters: list[str] = []
+
+        input_video_filters = list(
+            exclude_none(
+                [
+                    f"fps={fps}",
+                    f"split={len(references)}" if len(references) != 1 else None,
+                ]
+            )
+        )
+        input_video_branch_names = [f"vs{index}" for index in range(len(references))]
+        input_video_filter_inner_string = (
+            ",".join(input_video_filters) if len(input_video_filters) != 0 else "null"
+        )
+        input_video_filter_output_labels = "".join(
+            f"[{name}]" for name in input_video_branch_names
+        )
+        filter_complex_filters.append(
+            f"[0:v]{input_video_filter_inner_string}{input_video_filter_output_labels}"
+        )
+
+        gray_branch_names = (
+            [f"vg{index}" for index in range(len(references))]
+            if len(references) != 1
+            else ["vout"]
+        )
+        for index, reference in enumerate(references):
+            branch_filters = list(
+                exclude_none(
+                    [
+                        f"crop={reference.input_video_crop}"
+                        if reference.input_video_crop is not None
+                        else None,
+                        f"scale={frame_width}:{frame_height}:flags=area",
+                        "format=gray",
+                    ]
+                )
+            )
+            filter_complex_filters.append(
+                f"[{input_video_branch_names[index]}]{','.join(branch_filters)}[{gray_branch_names[index]}]"  # noqa: E501
+            )
+
+        if len(references) != 1:
+            gray_branch_labels = "".join(f"[{name}]" for name in gray_branch_names)
+            filter_complex_filters.append(
+                f"{gray_branch_labels}vstack=inputs={len(references)}[vout]"
+            )
+
+        return ";".join(filter_complex_filters)
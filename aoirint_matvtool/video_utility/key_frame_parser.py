@@ -1,26 +1,510 @@
-import asyncio
+import heapq
+from collections.abc import AsyncIterator
 from datetime import timedelta
 from logging import getLogger
 from pathlib import Path
+from typing import Literal
 
+from ..utility.async_subprocess_helper import iterate_process_lines
+from ..utility.key_frame_cache import KeyFrameCache
+from ..utility.key_frame_index import KeyFrameIndex
 from .fps_parser import FpsParser
+from .media_probe import MediaProbe
 
 logger = getLogger(__name__)
 
+# 表示順に並べ替えるために溜めておく、キーフレームのパケットの数
+_PACKET_REORDER_BUFFER_SIZE = 16
+
+# キーフレームのデコード時刻を、表示時刻（method="packet"）と同じ順で保存する
+# キャッシュの名前
+_PACKET_DECODE_CACHE_METHOD = "packet_decode"
+
+
+class _PacketKeyFrameError(Exception):
+    """
+    パケットからキーフレームの時刻を取得できなかったことを表す
+    """
+
+
+def _find_key_frame_before(
+    key_frame_index: KeyFrameIndex,
+    time: timedelta,
+) -> timedelta | None:
+    key_frame_seconds = key_frame_index.find_before(time.total_seconds())
+    if key_frame_seconds is None:
+        return None
+
+    return timedelta(seconds=key_frame_seconds)
+
 
 class KeyFrameParser:
     def __init__(
         self,
         fps_parser: FpsParser,
         ffprobe_path: str,
+        key_frame_cache: KeyFrameCache | None = None,
     ) -> None:
         self._fps_parser = fps_parser
         self._ffprobe_path = ffprobe_path
+        self._key_frame_cache = key_frame_cache
 
     async def parse_key_frames(
         self,
         input_path: Path,
+        method: Literal["auto", "packet", "frame"] = "auto",
     ) -> list[timedelta]:
+        """
+        キーフレームの時刻を返す
+
+        packet: パケットのキーフレームフラグ（K）を読む。デコードしないため高速
+        frame: キーフレームのみデコードして読む
+        auto: packet で取得できなければ frame で取得する
+
+        キャッシュが指定されていれば、キャッシュから読み込み、キャッシュに書き込む
+        """
+        return [
+            key_frame
+            async for key_frame in self.iterate_key_frames(
+                input_path=input_path,
+                method=method,
+            )
+        ]
+
+    async def iterate_key_frames(
+        self,
+        input_path: Path,
+        method: Literal["auto", "packet", "frame"] = "auto",
+    ) -> AsyncIterator[timedelta]:
+        """
+        キーフレームの時刻を、FFprobe の実行中に時刻順に逐次返す
+
+        method とキャッシュの扱いは parse_key_frames と同じ
+        最後まで読み込んだときのみ、キャッシュに書き込む
+        """
+        key_frame_cache = self._key_frame_cache
+        if key_frame_cache is not None:
+            cached_key_frames = key_frame_cache.get(
+                input_path=input_path,
+                method=method,
+            )
+            if cached_key_frames is not None:
+                for key_frame in cached_key_frames:
+                    yield key_frame
+                return
+
+        key_frames: list[timedelta] = []
+        async for key_frame in self._iterate_key_frames_without_cache(
+            input_path=input_path,
+            method=method,
+        ):
+            if key_frame_cache is not None:
+                key_frames.append(key_frame)
+
+            yield key_frame
+
+        if key_frame_cache is not None:
+            try:
+                key_frame_cache.set(
+                    input_path=input_path,
+                    method=method,
+                    key_frames=key_frames,
+                )
+            except OSError:
+                logger.warning("Failed to write key frame cache.", exc_info=True)
+
+    async def _iterate_key_frames_without_cache(
+        self,
+        input_path: Path,
+        method: Literal["auto", "packet", "frame"],
+    ) -> AsyncIterator[timedelta]:
+        if method == "frame":
+            async for key_frame in self._iterate_key_frames_from_frames(
+                input_path=input_path,
+            ):
+                yield key_frame
+            return
+
+        last_key_frame: timedelta | None = None
+        try:
+            async for key_frame in self._iterate_key_frames_from_packets(
+                input_path=input_path,
+            ):
+                yield key_frame
+                last_key_frame = key_frame
+        except _PacketKeyFrameError:
+            pass
+        else:
+            if last_key_frame is not None:
+                return
+
+        if method == "packet":
+            raise Exception("Failed to parse key frames from packets.")
+
+        logger.info(
+            "Failed to parse key frames from packets. Fallback to frames: %s",
+            input_path,
+        )
+
+        # 途中まで返したキーフレームは、重複して返さない
+        async for key_frame in self._iterate_key_frames_from_frames(
+            input_path=input_path,
+        ):
+            if last_key_frame is None or last_key_frame < key_frame:
+                yield key_frame
+
+    async def parse_key_frame_index(
+        self,
+        input_path: Path,
+        method: Literal["auto", "packet", "frame"] = "auto",
+    ) -> KeyFrameIndex:
+        """
+        キーフレームの時刻を、検索用の KeyFrameIndex として返す
+        """
+        return KeyFrameIndex.from_timedeltas(
+            await self.parse_key_frames(
+                input_path=input_path,
+                method=method,
+            ),
+        )
+
+    async def parse_key_frame_packet_index(
+        self,
+        input_path: Path,
+    ) -> KeyFrameIndex:
+        """
+        パケットから、キーフレームの表示時刻とデコード時刻を KeyFrameIndex として返す
+
+        パケットから取得できないときは、デコード時刻を持たない
+        parse_key_frame_index の結果を返す
+        キャッシュが指定されていれば、表示時刻と同じ順のデコード時刻も読み書きする
+        """
+        key_frame_cache = self._key_frame_cache
+        if key_frame_cache is not None:
+            cached_key_frames = key_frame_cache.get(
+                input_path=input_path,
+                method="packet",
+            )
+            cached_decode_times = key_frame_cache.get(
+                input_path=input_path,
+                method=_PACKET_DECODE_CACHE_METHOD,
+            )
+            if (
+                cached_key_frames is not None
+                and cached_decode_times is not None
+                and len(cached_key_frames) == len(cached_decode_times)
+            ):
+                return KeyFrameIndex(
+                    (key_frame.total_seconds() for key_frame in cached_key_frames),
+                    (
+                        decode_time.total_seconds()
+                        for decode_time in cached_decode_times
+                    ),
+                )
+
+        input_video_fps = await self._fps_parser.parse_fps(input_path=input_path)
+
+        key_frame_seconds_list: list[float] = []
+        decode_seconds_list: list[float] = []
+        try:
+            async for (
+                key_frame_seconds,
+                decode_seconds,
+            ) in self._iterate_key_frame_packets(
+                input_path=input_path,
+                input_video_fps=input_video_fps,
+            ):
+                key_frame_seconds_list.append(key_frame_seconds)
+                # デコード時刻がわからなければ、表示時刻と同じとみなす
+                decode_seconds_list.append(
+                    decode_seconds if decode_seconds is not None else key_frame_seconds
+                )
+        except _PacketKeyFrameError:
+            key_frame_seconds_list.clear()
+
+        if len(key_frame_seconds_list) == 0:
+            logger.info(
+                "Failed to parse key frames from packets. "
+                "Fallback to key frames without decode times: %s",
+                input_path,
+            )
+            return await self.parse_key_frame_index(input_path=input_path)
+
+        if key_frame_cache is not None:
+            try:
+                key_frame_cache.set(
+                    input_path=input_path,
+                    method="packet",
+                    key_frames=[
+                        timedelta(seconds=seconds) for seconds in key_frame_seconds_list
+                    ],
+                )
+                key_frame_cache.set(
+                    input_path=input_path,
+                    method=_PACKET_DECODE_CACHE_METHOD,
+                    key_frames=[
+                        timedelta(seconds=seconds) for seconds in decode_seconds_list
+                    ],
+                )
+            except OSError:
+                logger.warning("Failed to write key frame cache.", exc_info=True)
+
+        return KeyFrameIndex(key_frame_seconds_list, decode_seconds_list)
+
+    async def parse_key_frame_index_relative_to_start(
+        self,
+        input_path: Path,
+        media_probe: MediaProbe,
+        with_decode_seconds: bool = False,
+    ) -> KeyFrameIndex:
+        """
+        キーフレームの時刻を、-ss と同じく入力の開始時刻からの時刻に変換して返す
+
+        with_decode_seconds なら、parse_key_frame_packet_index でデコード時刻も取得する
+        キーフレームがなければ例外を送出する
+        """
+        media_info = await media_probe.probe(input_path=input_path)
+        start_time_seconds = media_info.start_time_seconds
+
+        raw_key_frame_index = (
+            await self.parse_key_frame_packet_index(input_path=input_path)
+            if with_decode_seconds
+            else await self.parse_key_frame_index(input_path=input_path)
+        )
+        key_frame_index = raw_key_frame_index.shift(-start_time_seconds)
+        if len(key_frame_index) == 0:
+            raise Exception(f"No key frame found: {input_path}")
+
+        return key_frame_index
+
+    async def parse_key_frame_before(
+        self,
+        input_path: Path,
+        time: timedelta,
+        window: timedelta = timedelta(seconds=30),
+    ) -> timedelta | None:
+        """
+        指定した時間より前にある、最も近いキーフレームの時刻を返す
+
+        ファイル全体を読まないよう、time の直前の window の範囲だけを読み込む
+        範囲内にキーフレームがなければ、範囲を2倍に広げて読み直す
+        ファイルの先頭まで読んでもキーフレームがなければ None を返す
+        """
+        if time <= timedelta(seconds=0):
+            return None
+
+        if window <= timedelta(seconds=0):
+            raise ValueError(f"Invalid window: {window}. Specify a positive duration.")
+
+        # ファイル全体のキャッシュがあれば、そこから探す
+        key_frame_cache = self._key_frame_cache
+        if key_frame_cache is not None:
+            for method in ("auto", "packet", "frame"):
+                cached_key_frames = key_frame_cache.get(
+                    input_path=input_path,
+                    method=method,
+                )
+                if cached_key_frames is not None:
+                    return _find_key_frame_before(
+                        KeyFrameIndex.from_timedeltas(cached_key_frames),
+                        time,
+                    )
+
+        time_seconds = time.total_seconds()
+        window_seconds = window.total_seconds()
+        while True:
+            start_seconds = max(time_seconds - window_seconds, 0.0)
+
+            # NOTE: -read_intervals は開始時刻の前のキーフレームにシークして読み始める
+            key_frames = await self._parse_key_frames_from_packets(
+                input_path=input_path,
+                read_intervals=f"{start_seconds:.6f}%{time_seconds:.6f}",
+            )
+            if key_frames is None:
+                # パケットから取得できないときは、ファイル全体から探す
+                logger.info(
+                    "Failed to parse key frames from packets. "
+                    "Fallback to the whole file: %s",
+                    input_path,
+                )
+                return _find_key_frame_before(
+                    await self.parse_key_frame_index(input_path=input_path),
+                    time,
+                )
+
+            key_frame = _find_key_frame_before(
+                KeyFrameIndex.from_timedeltas(key_frames),
+                time,
+            )
+            if key_frame is not None or start_seconds == 0.0:
+                return key_frame
+
+            window_seconds *= 2
+
+    async def _parse_key_frames_from_packets(
+        self,
+        input_path: Path,
+        read_intervals: str,
+    ) -> list[timedelta] | None:
+        """
+        -read_intervals で制限した範囲のパケットから、キーフレームの時刻を取得する
+
+        取得できないときは None、範囲内にキーフレームがないときは空のリストを返す
+        """
+        try:
+            return [
+                key_frame
+                async for key_frame in self._iterate_key_frames_from_packets(
+                    input_path=input_path,
+                    read_intervals=read_intervals,
+                )
+            ]
+        except _PacketKeyFrameError:
+            return None
+
+    async def _iterate_key_frames_from_packets(
+        self,
+        input_path: Path,
+        read_intervals: str | None = None,
+    ) -> AsyncIterator[timedelta]:
+        """
+        パケットのキーフレームフラグから、デコードせずにキーフレームの時刻を取得する
+
+        read_intervals を指定すると、FFprobe の -read_intervals で読み込む範囲を制限する
+        タイムスタンプのないパケットがあるなど、取得できないときは
+        _PacketKeyFrameError を送出する
+        """
+        async for key_frame_seconds, _ in self._iterate_key_frame_packets(
+            input_path=input_path,
+            read_intervals=read_intervals,
+        ):
+            yield timedelta(seconds=key_frame_seconds)
+
+    async def _iterate_key_frame_packets(
+        self,
+        input_path: Path,
+        read_intervals: str | None = None,
+        input_video_fps: float | None = None,
+    ) -> AsyncIterator[tuple[float, float | None]]:
+        """
+        キーフレームのパケットの（表示時刻, デコード時刻）を、表示時刻順に取得する
+
+        デコード時刻が N/A のキーフレームは、input_video_fps が指定されていれば、
+        後に続く最初のデコード時刻がわかるパケットから1フレームずつ遡って求める
+        求められないときのデコード時刻は None とする
+        取得できないときは _PacketKeyFrameError を送出する
+        """
+        read_intervals_opts = (
+            ["-read_intervals", read_intervals] if read_intervals is not None else []
+        )
+
+        command = [
+            self._ffprobe_path,
+            "-hide_banner",
+            "-select_streams",
+            "v:0",
+            *read_intervals_opts,
+            "-show_entries",
+            "packet=pts_time,dts_time,flags",
+            "-of",
+            "csv=print_section=0",
+            str(input_path),
+        ]
+
+        # パケットはデコード順に並ぶため、一定数だけ溜めて表示順に並べ替える
+        # NOTE: 同じ表示時刻のキーフレームでデコード時刻を比較しないよう、
+        # パケット番号を挟む
+        key_frame_heap: list[tuple[float, int, float | None]] = []
+        # デコード時刻がまだわからないキーフレームの（表示時刻, パケット番号）
+        pending_key_frames: list[tuple[float, int]] = []
+        last_key_frame_seconds: float | None = None
+        packet_index = 0
+        try:
+            async for line in iterate_process_lines(
+                command=command,
+                program_name="FFprobe",
+            ):
+                # 6.323000,6.256000,K__
+                row = line.split(",")
+                if len(row) < 3:
+                    continue
+
+                seconds_string = row[0].strip()
+                decode_seconds_string = row[1].strip()
+                flags = row[2].strip()
+
+                if decode_seconds_string != "N/A" and input_video_fps is not None:
+                    for pending_seconds, pending_packet_index in pending_key_frames:
+                        heapq.heappush(
+                            key_frame_heap,
+                            (
+                                pending_seconds,
+                                pending_packet_index,
+                                float(decode_seconds_string)
+                                - (packet_index - pending_packet_index)
+                                / input_video_fps,
+                            ),
+                        )
+                    pending_key_frames.clear()
+
+                packet_index += 1
+
+                if "K" not in flags:
+                    continue
+
+                if seconds_string == "N/A":
+                    raise _PacketKeyFrameError(
+                        f"Key frame packet without timestamp: {input_path}"
+                    )
+
+                if decode_seconds_string == "N/A" and input_video_fps is not None:
+                    pending_key_frames.append((float(seconds_string), packet_index - 1))
+                    continue
+
+                heapq.heappush(
+                    key_frame_heap,
+                    (
+                        float(seconds_string),
+                        packet_index - 1,
+                        float(decode_seconds_string)
+                        if decode_seconds_string != "N/A"
+                        else None,
+                    ),
+                )
+                if len(key_frame_heap) <= _PACKET_REORDER_BUFFER_SIZE:
+                    continue
+
+                key_frame_seconds, _, decode_seconds = heapq.heappop(key_frame_heap)
+                if (
+                    last_key_frame_seconds is None
+                    or last_key_frame_seconds < key_frame_seconds
+                ):
+                    yield key_frame_seconds, decode_seconds
+                    last_key_frame_seconds = key_frame_seconds
+        except _PacketKeyFrameError:
+            raise
+        except Exception as error:
+            raise _PacketKeyFrameError(str(error)) from error
+
+        for pending_seconds, pending_packet_index in pending_key_frames:
+            heapq.heappush(
+                key_frame_heap,
+                (pending_seconds, pending_packet_index, None),
+            )
+
+        while len(key_frame_heap) != 0:
+            key_frame_seconds, _, decode_seconds = heapq.heappop(key_frame_heap)
+            if (
+                last_key_frame_seconds is None
+                or last_key_frame_seconds < key_frame_seconds
+            ):
+                yield key_frame_seconds, decode_seconds
+                last_key_frame_seconds = key_frame_seconds
+
+    async def _iterate_key_frames_from_frames(
+        self,
+        input_path: Path,
+    ) -> AsyncIterator[timedelta]:
         command = [
             self._ffprobe_path,
             "-hide_banner",
@@ -39,26 +523,10 @@ class KeyFrameParser:
             "csv",
             str(input_path),
         ]
-        proc = await asyncio.create_subprocess_exec(
-            *command,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.DEVNULL,
-        )
-        stdout_bytes, _ = await proc.communicate()
-
-        if proc.returncode != 0:
-            raise Exception(f"FFprobe errored. code {proc.returncode}")
-
-        stdout = stdout_bytes.decode("utf-8")
-
-        stdout_lines = stdout.strip().splitlines()
-
-        key_frames: list[timedelta] = []
-        for line in stdout_lines:
-            line = line.strip()
-            if not line:
-                continue
-
+        async for line in iterate_process_lines(
+            command=command,
+            program_name="FFprobe",
+        ):
             # frame,0.007000
             # frame,0.007000,side_data,H.26[45] User Data Unregistered SEI message
             # frame,0.007000side_data,H.26[45] User Data Unregistered SEI message
@@ -80,7 +548,4 @@ class KeyFrameParser:
 
             seconds = float(seconds_string)
 
-            key_frame = timedelta(seconds=seconds)
-            key_frames.append(key_frame)
-
-        return key_frames
+            yield timedelta(seconds=seconds)
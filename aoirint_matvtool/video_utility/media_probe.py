@@ -0,0 +1,314 @@
+import asyncio
+import hashlib
+import re
+from collections import OrderedDict
+from datetime import timedelta
+from functools import cache
+from logging import getLogger
+from pathlib import Path
+
+from pydantic import BaseModel, ValidationError
+
+from ..utility.cache_file import evict_cache_files, touch_cache_file, write_cache_file
+
+logger = getLogger(__name__)
+
+
+class MediaStream(BaseModel):
+    index: int
+    codec_type: str | None = None
+    codec_name: str | None = None
+    width: int | None = None
+    height: int | None = None
+    pix_fmt: str | None = None
+    avg_frame_rate: str | None = None
+    r_frame_rate: str | None = None
+    sample_rate: str | None = None
+    channels: int | None = None
+    duration: str | None = None
+    bit_rate: str | None = None
+    tags: dict[str, str] | None = None
+
+    @property
+    def title(self) -> str | None:
+        if self.tags is None:
+            return None
+
+        return self.tags.get("title")
+
+    @property
+    def bit_rate_bps(self) -> int | None:
+        """
+        ストリームのビットレート (bit/s、不明なら None)
+
+        Matroska のようにストリームの bit_rate がないコンテナでは、
+        mkvmerge などが書き込む統計タグ（BPS）を使う
+        """
+        bit_rate_strings = [self.bit_rate]
+        if self.tags is not None:
+            bit_rate_strings += [self.tags.get("BPS"), self.tags.get("BPS-eng")]
+
+        for bit_rate_string in bit_rate_strings:
+            if bit_rate_string is not None and bit_rate_string.isdecimal():
+                return int(bit_rate_string)
+
+        return None
+
+
+class MediaFormat(BaseModel):
+    format_name: str | None = None
+    start_time: str | None = None
+    duration: str | None = None
+    size: str | None = None
+    bit_rate: str | None = None
+    tags: dict[str, str] | None = None
+
+
+class MediaChapter(BaseModel):
+    id: int
+    start_time: str
+    end_time: str
+    tags: dict[str, str] | None = None
+
+    @property
+    def title(self) -> str | None:
+        if self.tags is None:
+            return None
+
+        return self.tags.get("title")
+
+
+class MediaInfo(BaseModel):
+    streams: list[MediaStream] = []
+    format: MediaFormat | None = None
+    chapters: list[MediaChapter] = []
+
+    @property
+    def video_streams(self) -> list[MediaStream]:
+        return [stream for stream in self.streams if stream.codec_type == "video"]
+
+    @property
+    def audio_streams(self) -> list[MediaStream]:
+        return [stream for stream in self.streams if stream.codec_type == "audio"]
+
+    @property
+    def audio_titles(self) -> list[str | None]:
+        return [stream.title for stream in self.audio_streams]
+
+    @property
+    def start_time(self) -> timedelta | None:
+        if self.format is None or self.format.start_time is None:
+            return None
+
+        return timedelta(seconds=float(self.format.start_time))
+
+    @property
+    def start_time_seconds(self) -> float:
+        """
+        入力の開始時刻（秒、不明なら 0）
+
+        FFmpeg の -ss・-to は、入力のタイムスタンプからこの時刻を引いた時刻で指定する
+        """
+        start_time = self.start_time
+        return start_time.total_seconds() if start_time is not None else 0.0
+
+    @property
+    def duration(self) -> timedelta | None:
+        if self.format is None or self.format.duration is None:
+            return None
+
+        return timedelta(seconds=float(self.format.duration))
+
+    @property
+    def fps(self) -> float:
+        """
+        最初の映像ストリームの平均フレームレート
+        """
+        video_streams = self.video_streams
+        if len(video_streams) == 0:
+            raise Exception("No video stream found")
+
+        first_video_stream = video_streams[0]
+        if first_video_stream.avg_frame_rate is None:
+            raise Exception("No avg_frame_rate found in the first video stream")
+
+        match = re.match(r"^(\d+)/(\d+)$", first_video_stream.avg_frame_rate)
+        if not match:
+            raise Exception(
+                f"Invalid avg_frame_rate format: {first_video_stream.avg_frame_rate}"
+            )
+
+        numerator = int(match.group(1))
+        denominator = int(match.group(2))
+        if denominator == 0:
+            raise Exception("Denominator of avg_frame_rate is zero")
+
+        return numerator / denominator
+
+
+class _MediaProbeCacheEntry(BaseModel):
+    input_path: str
+    size: int
+    mtime_ns: int
+    media_info: MediaInfo
+
+
+class MediaProbe:
+    """
+    FFprobe でストリーム・フォーマット・チャプターの情報をまとめて取得する
+
+    結果はファイルのパス・サイズ・更新日時ごとに、最近使われた max_memory_entries 件を
+    メモリにキャッシュし、cache_dir が指定されていればディレクトリにもキャッシュする
+    """
+
+    def __init__(
+        self,
+        ffprobe_path: str,
+        cache_dir: Path | None = None,
+        max_cache_size_bytes: int = 16 * 1024 * 1024,
+        max_memory_entries: int = 1024,
+    ) -> None:
+        self._ffprobe_path = ffprobe_path
+        self._cache_dir = cache_dir
+        self._max_cache_size_bytes = max_cache_size_bytes
+        self._max_memory_entries = max_memory_entries
+        self._memory_cache: OrderedDict[tuple[str, int, int], MediaInfo] = OrderedDict()
+
+    async def probe(
+        self,
+        input_path: Path,
+    ) -> MediaInfo:
+        input_stat = input_path.stat()
+        resolved_input_path = str(input_path.resolve())
+        key = (resolved_input_path, input_stat.st_size, input_stat.st_mtime_ns)
+
+        media_info = self._memory_cache.get(key)
+        if media_info is not None:
+            self._memory_cache.move_to_end(key)
+            return media_info
+
+        media_info = self._read_disk_cache(
+            resolved_input_path=resolved_input_path,
+            size=input_stat.st_size,
+            mtime_ns=input_stat.st_mtime_ns,
+        )
+        if media_info is None:
+            media_info = await self._probe_without_cache(input_path=input_path)
+
+            try:
+                self._write_disk_cache(
+                    resolved_input_path=resolved_input_path,
+                    size=input_stat.st_size,
+                    mtime_ns=input_stat.st_mtime_ns,
+                    media_info=media_info,
+                )
+            except OSError:
+                logger.warning("Failed to write media probe cache.", exc_info=True)
+
+        self._memory_cache[key] = media_info
+        while self._max_memory_entries < len(self._memory_cache):
+            self._memory_cache.popitem(last=False)
+
+        return media_info
+
+    async def _probe_without_cache(
+        self,
+        input_path: Path,
+    ) -> MediaInfo:
+        command = [
+            self._ffprobe_path,
+            "-hide_banner",
+            "-i",
+            str(input_path),
+            "-show_streams",
+            "-show_format",
+            "-show_chapters",
+            "-print_format",
+            "json",
+        ]
+        proc = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        stdout_bytes, _ = await proc.communicate()
+
+        if proc.returncode != 0:
+            raise Exception(f"FFprobe errored. code: {proc.returncode}")
+
+        stdout = stdout_bytes.decode("utf-8")
+        return MediaInfo.model_validate_json(stdout)
+
+    def _get_cache_entry_path(self, resolved_input_path: str) -> Path | None:
+        if self._cache_dir is None:
+            return None
+
+        key = hashlib.sha256(resolved_input_path.encode("utf-8")).hexdigest()
+        return self._cache_dir / "media_probe" / f"{key}.json"
+
+    def _read_disk_cache(
+        self,
+        resolved_input_path: str,
+        size: int,
+        mtime_ns: int,
+    ) -> MediaInfo | None:
+        entry_path = self._get_cache_entry_path(resolved_input_path)
+        if entry_path is None or not entry_path.exists():
+            return None
+
+        try:
+            entry = _MediaProbeCacheEntry.model_validate_json(
+                entry_path.read_text(encoding="utf-8"),
+            )
+        except (OSError, ValidationError):
+            logger.warning("Ignored broken media probe cache: %s", entry_path)
+            return None
+
+        if (
+            entry.input_path != resolved_input_path
+            or entry.size != size
+            or entry.mtime_ns != mtime_ns
+        ):
+            return None
+
+        touch_cache_file(entry_path)
+
+        return entry.media_info
+
+    def _write_disk_cache(
+        self,
+        resolved_input_path: str,
+        size: int,
+        mtime_ns: int,
+        media_info: MediaInfo,
+    ) -> None:
+        entry_path = self._get_cache_entry_path(resolved_input_path)
+        if entry_path is None:
+            return
+
+        entry = _MediaProbeCacheEntry(
+            input_path=resolved_input_path,
+            size=size,
+            mtime_ns=mtime_ns,
+            media_info=media_info,
+        )
+        write_cache_file(entry_path, entry.model_dump_json())
+
+        evict_cache_files(
+            cache_file_dir=entry_path.parent,
+            max_size_bytes=self._max_cache_size_bytes,
+        )
+
+
+@cache
+def get_shared_media_probe(
+    ffprobe_path: str,
+    cache_dir: Path | None,
+) -> MediaProbe:
+    """
+    同じプロセスで、FFprobe のパスとキャッシュディレクトリごとに共有する
+    """
+    return MediaProbe(
+        ffprobe_path=ffprobe_path,
+        cache_dir=cache_dir,
+    )
@@ -0,0 +1,495 @@
+import asyncio
+import re
+import shutil
+import tempfile
+import uuid
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+from functools import partial
+from logging import getLogger
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from ..util import parse_ffmpeg_time_unit_syntax
+from ..utility.async_subprocess_helper import wait_process
+from ..utility.ffmpeg_benchmark import (
+    get_ffmpeg_benchmark_opts,
+    handle_ffmpeg_benchmark_line,
+)
+from .chunk_work_queue import ChunkEncodeTask, ChunkWorkQueue
+from .crop_scaler import CropScalerProgress, build_crop_scale_video_filters
+from .key_frame_parser import KeyFrameParser
+from .media_probe import MediaProbe
+from .video_smart_slicer import escape_concat_path
+from .video_splitter import select_split_key_frames
+
+logger = getLogger(__name__)
+
+# フレームの時刻の丸め（ミリ秒単位など）による誤差の許容範囲
+_FRAME_TIME_TOLERANCE_SECONDS = 0.001
+
+
+class ParallelCropScalerPlan(BaseModel):
+    # 入力の開始時刻からの、チャンクの範囲 (開始時刻, 終了時刻)
+    # 最後のチャンクは入力の終わりまで（終了時刻が None）
+    chunk_ranges: list[tuple[float, float | None]]
+    # 入力のタイムスタンプ（-copyts）に変換するための、入力の開始時刻
+    start_time_seconds: float
+    duration_seconds: float
+    input_video_fps: float
+
+    @property
+    def video_offset_seconds(self) -> float:
+        """
+        入力の開始時刻からの、最初のチャンクの開始時刻
+        """
+        return self.chunk_ranges[0][0]
+
+    def get_chunk_duration_seconds(self, chunk_index: int) -> float:
+        chunk_start_seconds, chunk_end_seconds = self.chunk_ranges[chunk_index]
+        if chunk_end_seconds is None:
+            chunk_end_seconds = self.duration_seconds
+
+        return chunk_end_seconds - chunk_start_seconds
+
+
+class ParallelCropScaler:
+    def __init__(
+        self,
+        key_frame_parser: KeyFrameParser,
+        media_probe: MediaProbe,
+        ffmpeg_path: str,
+    ) -> None:
+        self._key_frame_parser = key_frame_parser
+        self._media_probe = media_probe
+        self._ffmpeg_path = ffmpeg_path
+
+    async def crop_scale_parallel(
+        self,
+        input_path: Path,
+        crop: str | None,
+        scale: str | None,
+        video_codec: str | None,
+        output_path: Path,
+        jobs: int,
+        video_codec_options: list[str] | None = None,
+        progress_handler: (
+            Callable[[CropScalerProgress], Awaitable[None]] | None
+        ) = None,
+    ) -> None:
+        """
+        入力をキーフレームの位置で jobs 個程度のチャンクに分け、
+        チャンクごとに並行して切り取り・拡大縮小・エンコードする
+
+        エンコードした映像は無劣化で連結し、映像以外のストリーム（複数のオーディオトラックなど）は
+        入力から1回だけストリームコピーする
+        映像は最初の映像ストリームのみ出力する
+        """
+        video_filters = build_crop_scale_video_filters(crop=crop, scale=scale)
+        plan = await self.plan_chunks(input_path=input_path, num_chunks=jobs)
+
+        # チャンクごとに出力した時間を合計して、全体の進捗とする
+        chunk_progresses: list[tuple[int, timedelta]] = [
+            (0, timedelta()) for _ in plan.chunk_ranges
+        ]
+
+        async def _handle_chunk_progress(
+            chunk_index: int,
+            frame: int,
+            time: timedelta,
+        ) -> None:
+            chunk_progresses[chunk_index] = (frame, time)
+
+            if progress_handler is not None:
+                total_frame = sum(frame for frame, _ in chunk_progresses)
+                total_time = sum(
+                    (chunk_time for _, chunk_time in chunk_progresses),
+                    start=timedelta(),
+                )
+                await progress_handler(
+                    CropScalerProgress(
+                        time=total_time,
+                        frame=total_frame,
+                        internal_time=total_time,
+                        internal_frame=total_frame,
+                    ),
+                )
+
+        with tempfile.TemporaryDirectory(
+            prefix=f".{output_path.stem}_",
+            dir=output_path.parent,
+        ) as temp_dir_string:
+            temp_dir = Path(temp_dir_string)
+
+            chunk_paths = get_chunk_paths(
+                chunk_dir=temp_dir,
+                num_chunks=len(plan.chunk_ranges),
+                output_path=output_path,
+            )
+
+            await asyncio.gather(
+                *(
+                    self.encode_chunk(
+                        input_path=input_path,
+                        start_seconds=chunk_start_seconds,
+                        end_seconds=chunk_end_seconds,
+                        start_time_seconds=plan.start_time_seconds,
+                        video_filters=video_filters,
+                        video_codec=video_codec,
+                        video_codec_options=video_codec_options,
+                        output_path=chunk_path,
+                        progress_handler=partial(_handle_chunk_progress, chunk_index),
+                    )
+                    for chunk_index, (
+                        (chunk_start_seconds, chunk_end_seconds),
+                        chunk_path,
+                    ) in enumerate(zip(plan.chunk_ranges, chunk_paths, strict=True))
+                ),
+            )
+
+            await self._concat_chunks(
+                input_path=input_path,
+                chunk_paths=chunk_paths,
+                plan=plan,
+                concat_list_path=temp_dir / "concat.txt",
+                output_path=output_path,
+            )
+
+        logger.info(
+            "Encoded %d chunks in parallel: %s",
+            len(plan.chunk_ranges),
+            input_path,
+        )
+
+    async def crop_scale_distributed(
+        self,
+        input_path: Path,
+        crop: str | None,
+        scale: str | None,
+        video_codec: str | None,
+        output_path: Path,
+        num_chunks: int,
+        work_queue: ChunkWorkQueue,
+        lease_seconds: float,
+        poll_interval_seconds: float,
+        video_codec_options: list[str] | None = None,
+        progress_handler: (
+            Callable[[CropScalerProgress], Awaitable[None]] | None
+        ) = None,
+    ) -> None:
+        """
+        crop_scale_parallel と同じくチャンクに分け、チャンクのエンコードを
+        共有ファイルシステム上のキュー（work_queue）に入れて、ワーカーに実行させる
+
+        すべてのチャンクが完了したら、チャンクを連結して出力する
+        NOTE: 入力・チャンクのパスは絶対パスでキューに入れるため、
+        共有ファイルシステムは各マシンで同じパスにマウントしておく
+        """
+        video_filters = build_crop_scale_video_filters(crop=crop, scale=scale)
+        plan = await self.plan_chunks(input_path=input_path, num_chunks=num_chunks)
+
+        job_id = uuid.uuid4().hex
+        job_dir = work_queue.get_job_dir(job_id)
+        job_dir.mkdir(parents=True)
+
+        chunk_paths = get_chunk_paths(
+            chunk_dir=job_dir,
+            num_chunks=len(plan.chunk_ranges),
+            output_path=output_path,
+        )
+        task_ids = [
+            f"{job_id}_{chunk_index:04d}" for chunk_index in range(len(chunk_paths))
+        ]
+
+        try:
+            for task_id, (chunk_start_seconds, chunk_end_seconds), chunk_path in zip(
+                task_ids,
+                plan.chunk_ranges,
+                chunk_paths,
+                strict=True,
+            ):
+                work_queue.submit(
+                    ChunkEncodeTask(
+                        task_id=task_id,
+                        job_id=job_id,
+                        input_path=input_path.resolve(),
+                        start_seconds=chunk_start_seconds,
+                        end_seconds=chunk_end_seconds,
+                        start_time_seconds=plan.start_time_seconds,
+                        video_filters=video_filters,
+                        video_codec=video_codec,
+                        video_codec_options=video_codec_options,
+                        output_path=chunk_path.resolve(),
+                        lease_seconds=lease_seconds,
+                    ),
+                )
+
+            logger.info(
+                "Submitted %d chunk tasks: job %s",
+                len(task_ids),
+                job_id,
+            )
+
+            num_reported_tasks = -1
+            while True:
+                # 異常終了したワーカーのタスクを、他のワーカーが引き継げるようにする
+                work_queue.requeue_expired()
+
+                failure_errors = work_queue.read_failure_errors(job_id=job_id)
+                if len(failure_errors) != 0:
+                    raise Exception(
+                        "Chunk encoding failed: "
+                        + "; ".join(
+                            f"{task_id}: {error}"
+                            for task_id, error in failure_errors.items()
+                        ),
+                    )
+
+                done_task_ids = work_queue.list_done_task_ids(job_id=job_id)
+                if num_reported_tasks != len(done_task_ids):
+                    num_reported_tasks = len(done_task_ids)
+
+                    # 完了したチャンクの長さを合計して、全体の進捗とする
+                    done_seconds = sum(
+                        plan.get_chunk_duration_seconds(chunk_index)
+                        for chunk_index, task_id in enumerate(task_ids)
+                        if task_id in done_task_ids
+                    )
+                    if progress_handler is not None:
+                        done_time = timedelta(seconds=done_seconds)
+                        done_frame = int(done_seconds * plan.input_video_fps)
+                        await progress_handler(
+                            CropScalerProgress(
+                                time=done_time,
+                                frame=done_frame,
+                                internal_time=done_time,
+                                internal_frame=done_frame,
+                            ),
+                        )
+
+                if all(task_id in done_task_ids for task_id in task_ids):
+                    break
+
+                await asyncio.sleep(poll_interval_seconds)
+
+            await self._concat_chunks(
+                input_path=input_path,
+                chunk_paths=chunk_paths,
+                plan=plan,
+                concat_list_path=job_dir / "concat.txt",
+                output_path=output_path,
+            )
+        finally:
+            # 実行中のワーカーは、リースを延長できなくなりエンコードを中止する
+            work_queue.remove_job(job_id=job_id)
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+    async def plan_chunks(
+        self,
+        input_path: Path,
+        num_chunks: int,
+    ) -> ParallelCropScalerPlan:
+        """
+        入力を、キーフレームの位置で num_chunks 個程度のチャンクに分ける
+        """
+        if num_chunks < 1:
+            raise ValueError(f"Invalid number of chunks: {num_chunks}.")
+
+        media_info = await self._media_probe.probe(input_path=input_path)
+        duration = media_info.duration
+        if duration is None:
+            raise Exception(f"Duration not found: {input_path}")
+
+        duration_seconds = duration.total_seconds()
+
+        key_frame_index = (
+            await self._key_frame_parser.parse_key_frame_index_relative_to_start(
+                input_path=input_path,
+                media_probe=self._media_probe,
+            )
+        )
+        start_time_seconds = media_info.start_time_seconds
+
+        split_key_frames = select_split_key_frames(
+            key_frame_index=key_frame_index,
+            duration_seconds=duration_seconds,
+            chunk_seconds=duration_seconds / num_chunks,
+        )
+
+        return ParallelCropScalerPlan(
+            chunk_ranges=list(
+                zip(
+                    [key_frame_index[0], *split_key_frames],
+                    [*split_key_frames, None],
+                    strict=True,
+                ),
+            ),
+            start_time_seconds=start_time_seconds,
+            duration_seconds=duration_seconds,
+            input_video_fps=media_info.fps,
+        )
+
+    async def encode_chunk(
+        self,
+        input_path: Path,
+        start_seconds: float,
+        end_seconds: float | None,
+        start_time_seconds: float,
+        video_filters: list[str],
+        video_codec: str | None,
+        output_path: Path,
+        video_codec_options: list[str] | None = None,
+        progress_handler: Callable[[int, timedelta], Awaitable[None]] | None = None,
+    ) -> None:
+        """
+        start_seconds から end_seconds の前までに表示するフレームだけをエンコードする
+        """
+        # NOTE: 出力側の -t は、フレームレートで丸めた時刻で比較するため、
+        # 入力のタイムスタンプのまま（-copyts）trim フィルタで切り出す
+        trim_start_seconds = max(start_seconds - _FRAME_TIME_TOLERANCE_SECONDS, 0.0)
+        trim_filter = f"trim=start={trim_start_seconds + start_time_seconds:.6f}"
+        if end_seconds is not None:
+            trim_end_seconds = end_seconds - _FRAME_TIME_TOLERANCE_SECONDS
+            trim_filter += f":end={trim_end_seconds + start_time_seconds:.6f}"
+
+        video_filter = ",".join(
+            [trim_filter, "setpts=PTS-STARTPTS", *video_filters],
+        )
+
+        video_codec_opts = ["-c:v", video_codec] if video_codec is not None else []
+        if video_codec_options is not None:
+            video_codec_opts += video_codec_options
+
+        # Command Argument List
+        command = [
+            self._ffmpeg_path,
+            "-hide_banner",
+            "-n",  # fail if already exists
+            *get_ffmpeg_benchmark_opts(),
+            "-ss",
+            f"{trim_start_seconds:.6f}",
+            "-copyts",
+            "-i",
+            str(input_path),
+            "-map",
+            "0:v:0",
+            "-filter:v",
+            video_filter,
+            *video_codec_opts,
+            str(output_path),
+        ]
+        proc = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+
+        async def _handle_stderr(line: str) -> None:
+            handle_ffmpeg_benchmark_line(line)
+
+            match = re.match(r"^frame=\ *(\d+?)\ .+time=(\d.*?)\ bitrate.+$", line)
+            if match:
+                _frame = int(match.group(1))
+                _time_string = match.group(2).strip()
+
+                _time_struct = parse_ffmpeg_time_unit_syntax(_time_string)
+                _time = _time_struct.to_timedelta()
+
+                if progress_handler is not None:
+                    await progress_handler(_frame, _time)
+
+        try:
+            returncode = await wait_process(
+                process=proc,
+                stderr_handler=_handle_stderr,
+            )
+        except asyncio.CancelledError:
+            # リースを失ったとき、FFmpeg プロセスを残さない
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
+
+        if returncode != 0:
+            raise Exception(f"FFmpeg errored. code: {returncode}")
+
+    async def _concat_chunks(
+        self,
+        input_path: Path,
+        chunk_paths: list[Path],
+        plan: ParallelCropScalerPlan,
+        concat_list_path: Path,
+        output_path: Path,
+    ) -> None:
+        """
+        チャンクを concat demuxer で連結し、入力の映像以外のストリームと多重化する
+        """
+        concat_lines = ["ffconcat version 1.0"]
+        for chunk_path, (chunk_start_seconds, chunk_end_seconds) in zip(
+            chunk_paths,
+            plan.chunk_ranges,
+            strict=True,
+        ):
+            concat_lines.append(f"file {escape_concat_path(chunk_path)}")
+            if chunk_end_seconds is not None:
+                concat_lines.append(
+                    f"duration {chunk_end_seconds - chunk_start_seconds:.6f}",
+                )
+
+        concat_list_path.write_text("\n".join(concat_lines) + "\n", encoding="utf-8")
+
+        # Command Argument List
+        command = [
+            self._ffmpeg_path,
+            "-hide_banner",
+            "-n",  # fail if already exists
+            # 映像の開始時刻を、入力の他のストリームに合わせる
+            "-itsoffset",
+            f"{plan.video_offset_seconds:.6f}",
+            "-f",
+            "concat",
+            "-safe",
+            "0",
+            "-i",
+            str(concat_list_path),
+            "-i",
+            str(input_path),
+            "-map",
+            "0:v",
+            "-map",
+            "1",
+            "-map",
+            "-1:v",
+            "-map_metadata",
+            "1",
+            "-map_chapters",
+            "1",
+            "-c",
+            "copy",
+            str(output_path),
+        ]
+        proc = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+
+        returncode = await wait_process(process=proc)
+        if returncode != 0:
+            raise Exception(f"FFmpeg errored. code: {returncode}")
+
+
+def get_chunk_paths(
+    chunk_dir: Path,
+    num_chunks: int,
+    output_path: Path,
+) -> list[Path]:
+    """
+    NOTE: エンコーダを指定しないとき、出力と同じ既定のエンコーダを使うよう、
+    チャンクは出力と同じ形式で書き込む
+    """
+    return [
+        chunk_dir / f"chunk_{chunk_index:03d}{output_path.suffix}"
+        for chunk_index in range(num_chunks)
+    ]
@@ -1,6 +1,7 @@
 import asyncio
+import os
 import re
-from collections.abc import Awaitable, Callable
+from collections.abc import Awaitable, Callable, Sequence
 from datetime import timedelta
 from logging import getLogger
 from pathlib import Path
@@ -13,8 +14,14 @@ from ..progress_handler.utility.progress_calculator import (
 from ..util import (
     parse_ffmpeg_time_unit_syntax,
 )
-from ..utility.async_subprocess_helper import wait_process
+from ..utility.async_subprocess_helper import iterate_process_lines, wait_process
+from ..utility.ffmpeg_benchmark import (
+    get_ffmpeg_benchmark_opts,
+    handle_ffmpeg_benchmark_line,
+)
 from ..video_utility.fps_parser import FpsParser
+from ..video_utility.key_frame_parser import KeyFrameParser
+from ..video_utility.media_probe import MediaProbe
 
 logger = getLogger(__name__)
 
@@ -26,14 +33,86 @@ class VideoSlicerProgress(BaseModel):
     internal_frame: int
 
 
+class VideoSlicerCut(BaseModel):
+    ss: str
+    to: str
+    output_path: Path
+
+
+class VideoSlicerCutProgress(BaseModel):
+    cut_index: int
+    time: timedelta
+    frame: int
+    internal_time: timedelta
+    internal_frame: int
+
+
+class VideoSlicerCutRange(BaseModel):
+    output_path: Path
+    # 出力を始めるデコード時刻（None なら入力の先頭から）
+    start_seconds: float | None
+    # 出力を始めるキーフレームの表示時刻
+    key_frame_seconds: float
+    end_seconds: float
+    # キーフレームより後にデコードし、前に表示するフレーム（open GOP）があるか
+    has_leading_frames: bool = False
+
+
+def _get_cut_range_start(cut_range: VideoSlicerCutRange) -> float:
+    if cut_range.start_seconds is None:
+        return 0.0
+
+    return cut_range.start_seconds
+
+
+def _create_cut_range(
+    output_path: Path,
+    key_frame_seconds: float,
+    key_frame_decode_seconds: float,
+    end_seconds: float,
+    input_video_fps: float,
+) -> VideoSlicerCutRange:
+    """
+    出力側の -ss で同じキーフレームから出力するため、
+    キーフレームのデコード時刻から半フレーム前の時刻から始まる範囲を返す
+    """
+    start_seconds = key_frame_decode_seconds - 0.5 / input_video_fps
+
+    return VideoSlicerCutRange(
+        output_path=output_path,
+        # 先頭のキーフレームから始まる範囲は、入力の先頭から出力する
+        start_seconds=start_seconds if 0.0 < start_seconds else None,
+        key_frame_seconds=key_frame_seconds,
+        end_seconds=end_seconds,
+    )
+
+
+# キーフレームのデコード時刻を調べるために読み込むパケットの数
+_KEY_FRAME_PROBE_PACKETS = 32
+
+
 class VideoSlicer:
     def __init__(
         self,
         fps_parser: FpsParser,
         ffmpeg_path: str,
+        ffprobe_path: str,
+        media_probe: MediaProbe | None = None,
+        key_frame_parser: KeyFrameParser | None = None,
     ) -> None:
         self._fps_parser = fps_parser
         self._ffmpeg_path = ffmpeg_path
+        self._ffprobe_path = ffprobe_path
+        self._media_probe = (
+            media_probe
+            if media_probe is not None
+            else MediaProbe(ffprobe_path=ffprobe_path)
+        )
+        self._key_frame_parser = (
+            key_frame_parser
+            if key_frame_parser is not None
+            else KeyFrameParser(fps_parser=fps_parser, ffprobe_path=ffprobe_path)
+        )
 
     async def slice_video(
         self,
@@ -60,6 +139,7 @@ class VideoSlicer:
             self._ffmpeg_path,
             "-hide_banner",
             "-n",  # fail if already exists
+            *get_ffmpeg_benchmark_opts(),
             "-ss",
             ss,
             "-to",
@@ -81,7 +161,9 @@ class VideoSlicer:
         )
 
         async def _handle_stderr(line: str) -> None:
-            match = re.match(r"^frame=\ *(\d+?)\ .+time=(.+?)\ bitrate.+$", line)
+            handle_ffmpeg_benchmark_line(line)
+
+            match = re.match(r"^frame=\ *(\d+?)\ .+time=(\d.*?)\ bitrate.+$", line)
             if match:
                 _frame = int(match.group(1))
                 _time_string = match.group(2).strip()
@@ -110,3 +192,412 @@ class VideoSlicer:
         )
         if returncode != 0:
             raise Exception(f"FFmpeg errored. code: {returncode}")
+
+    async def slice_video_cuts(
+        self,
+        input_path: Path,
+        cuts: list[VideoSlicerCut],
+        max_read_gap: timedelta = timedelta(seconds=60),
+        progress_handler: (
+            Callable[[VideoSlicerCutProgress], Awaitable[None]] | None
+        ) = None,
+    ) -> None:
+        """
+        入力を順に1回だけ読み込んで、複数の範囲をそれぞれのファイルに切り出す
+
+        slice_video と同様に、各範囲は ss の前のキーフレームから始まり、
+        全てのストリームとメタデータをコピーする
+        前の範囲との間隔が max_read_gap を超える範囲は、シークして読み込み直す
+        進捗は、読み込み中の位置を含む範囲ごとに報告する
+        """
+        if len(cuts) == 0:
+            raise ValueError("No cut specified.")
+
+        input_video_fps = await self._fps_parser.parse_fps(
+            input_path=input_path,
+        )
+
+        ss_seconds_list: list[float] = []
+        to_seconds_list: list[float] = []
+        for cut in cuts:
+            ss_seconds = parse_ffmpeg_time_unit_syntax(cut.ss).to_timedelta()
+            to_seconds = parse_ffmpeg_time_unit_syntax(cut.to).to_timedelta()
+            if to_seconds <= ss_seconds:
+                raise ValueError(
+                    f"Invalid cut: ss={cut.ss}, to={cut.to}. Specify to after ss."
+                )
+
+            ss_seconds_list.append(ss_seconds.total_seconds())
+            to_seconds_list.append(to_seconds.total_seconds())
+
+        # 範囲ごとのキーフレームは、キーフレームのインデックスからまとめて求める
+        cut_ranges = await self.probe_cut_ranges(
+            input_path=input_path,
+            ss_seconds_list=ss_seconds_list,
+            end_seconds_list=to_seconds_list,
+            output_paths=[cut.output_path for cut in cuts],
+            input_video_fps=input_video_fps,
+        )
+
+        # 範囲を開始時刻順に並べ、間隔が max_read_gap 以下の範囲を1回で読み込む
+        # NOTE: 間隔が長いときは、読み飛ばすよりシークする方が速い
+        sorted_cut_indexes = sorted(
+            range(len(cuts)),
+            key=lambda cut_index: _get_cut_range_start(cut_ranges[cut_index]),
+        )
+        cut_index_groups: list[list[int]] = []
+        group_end_seconds = 0.0
+        for cut_index in sorted_cut_indexes:
+            cut_range = cut_ranges[cut_index]
+            if (
+                len(cut_index_groups) == 0
+                or max_read_gap.total_seconds()
+                < _get_cut_range_start(cut_range) - group_end_seconds
+            ):
+                cut_index_groups.append([])
+                group_end_seconds = 0.0
+
+            cut_index_groups[-1].append(cut_index)
+            group_end_seconds = max(group_end_seconds, cut_range.end_seconds)
+
+        for cut_indexes in cut_index_groups:
+
+            async def _handle_group_progress(
+                progress: VideoSlicerCutProgress,
+                cut_indexes: list[int] = cut_indexes,
+            ) -> None:
+                if progress_handler is not None:
+                    await progress_handler(
+                        progress.model_copy(
+                            update={"cut_index": cut_indexes[progress.cut_index]},
+                        ),
+                    )
+
+            await self.slice_video_cut_ranges(
+                input_path=input_path,
+                cut_ranges=[cut_ranges[cut_index] for cut_index in cut_indexes],
+                input_video_fps=input_video_fps,
+                progress_handler=_handle_group_progress,
+            )
+
+    async def slice_video_cut_ranges(
+        self,
+        input_path: Path,
+        cut_ranges: list[VideoSlicerCutRange],
+        input_video_fps: float,
+        progress_handler: (
+            Callable[[VideoSlicerCutProgress], Awaitable[None]] | None
+        ) = None,
+    ) -> None:
+        """
+        probe_cut_range で確認した範囲を、入力を1回だけ順に読み込んで切り出す
+
+        進捗の cut_index は、cut_ranges のインデックスとする
+        """
+        # 最初の範囲の前にシークして、それより前を読み込まない
+        input_ss_seconds = min(
+            _get_cut_range_start(cut_range) for cut_range in cut_ranges
+        )
+        input_to_seconds = max(cut_range.end_seconds for cut_range in cut_ranges)
+
+        progress_calculator = ProgressCalculator(
+            start_timedelta=timedelta(seconds=input_ss_seconds),
+            input_fps=input_video_fps,
+            internal_fps=input_video_fps,
+        )
+
+        input_ss_opts = (
+            ["-ss", f"{input_ss_seconds:.6f}"] if 0.0 < input_ss_seconds else []
+        )
+
+        # NOTE: 出力ごとの進捗は FFmpeg が表示しないため、
+        # 読み込み位置を表示させる映像のみの出力を先頭に加える
+        output_opts = [
+            "-to",
+            f"{input_to_seconds - input_ss_seconds:.6f}",
+            "-map",
+            "0:v:0",
+            "-c",
+            "copy",
+            "-f",
+            "null",
+            "-",
+        ]
+        for cut_range in cut_ranges:
+            # NOTE: ストリームコピーの出力側の -ss はデコード時刻で比較し、
+            # キーフレームより前の、キーフレームでないパケットは出力しない
+            output_ss_opts = (
+                ["-ss", f"{cut_range.start_seconds - input_ss_seconds:.6f}"]
+                if cut_range.start_seconds is not None
+                else []
+            )
+
+            output_opts += [
+                *output_ss_opts,
+                "-to",
+                f"{cut_range.end_seconds - input_ss_seconds:.6f}",
+                "-map",
+                "0",
+                "-map_metadata",
+                "0",
+                "-c",
+                "copy",
+                str(cut_range.output_path),
+            ]
+
+        # Command Argument List
+        command = [
+            self._ffmpeg_path,
+            "-hide_banner",
+            "-n",  # fail if already exists
+            *get_ffmpeg_benchmark_opts(),
+            *input_ss_opts,
+            "-i",
+            str(input_path),
+            *output_opts,
+        ]
+        proc = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+
+        finished_cut_indexes: set[int] = set()
+
+        async def _handle_stderr(line: str) -> None:
+            handle_ffmpeg_benchmark_line(line)
+
+            match = re.match(r"^frame=\ *(\d+?)\ .+time=(\d.*?)\ bitrate.+$", line)
+            if match:
+                _frame = int(match.group(1))
+                _time_string = match.group(2).strip()
+
+                _time_struct = parse_ffmpeg_time_unit_syntax(_time_string)
+                _time = _time_struct.to_timedelta()
+
+                progress = progress_calculator.calculate_progress(
+                    frame=_frame,
+                    time=_time,
+                )
+
+                for cut_index, cut_range in enumerate(cut_ranges):
+                    await _report_cut_progress(
+                        cut_index=cut_index,
+                        cut_range=cut_range,
+                        time=progress.time,
+                    )
+
+        async def _report_cut_progress(
+            cut_index: int,
+            cut_range: VideoSlicerCutRange,
+            time: timedelta,
+        ) -> None:
+            if cut_index in finished_cut_indexes:
+                return
+
+            time_seconds = time.total_seconds()
+            if time_seconds < cut_range.key_frame_seconds:
+                return
+
+            if cut_range.end_seconds <= time_seconds:
+                finished_cut_indexes.add(cut_index)
+                time_seconds = cut_range.end_seconds
+
+            internal_time = timedelta(
+                seconds=time_seconds - cut_range.key_frame_seconds,
+            )
+
+            if progress_handler:
+                await progress_handler(
+                    VideoSlicerCutProgress(
+                        cut_index=cut_index,
+                        time=timedelta(seconds=time_seconds),
+                        frame=int(time_seconds * input_video_fps),
+                        internal_time=internal_time,
+                        internal_frame=int(
+                            internal_time.total_seconds() * input_video_fps
+                        ),
+                    ),
+                )
+
+        returncode = await wait_process(
+            process=proc,
+            stderr_handler=_handle_stderr,
+        )
+        if returncode != 0:
+            raise Exception(f"FFmpeg errored. code: {returncode}")
+
+        # 最後の進捗の表示より後に終わった範囲も、終了を報告する
+        for cut_index, cut_range in enumerate(cut_ranges):
+            await _report_cut_progress(
+                cut_index=cut_index,
+                cut_range=cut_range,
+                time=timedelta(seconds=cut_range.end_seconds),
+            )
+
+    async def probe_cut_ranges(
+        self,
+        input_path: Path,
+        ss_seconds_list: Sequence[float],
+        end_seconds_list: Sequence[float],
+        output_paths: Sequence[Path],
+        input_video_fps: float,
+        max_jobs: int | None = None,
+    ) -> list[VideoSlicerCutRange]:
+        """
+        複数の範囲について probe_cut_range と同じ範囲を、範囲の順に返す
+
+        キーフレームの表示時刻とデコード時刻のインデックスを1回だけ作成し、
+        全ての ss を KeyFrameIndex.fit_indexes でまとめてキーフレームに合わせる
+        インデックスにデコード時刻がないとき（パケットから取得できないとき）は、
+        probe_cut_range を max_jobs 個（デフォルトは CPU の数）まで並行して実行する
+        """
+        if max_jobs is None:
+            max_jobs = os.cpu_count() or 1
+        if max_jobs < 1:
+            raise ValueError(f"Invalid max_jobs: {max_jobs}. Specify 1 or more.")
+
+        key_frame_index = (
+            await self._key_frame_parser.parse_key_frame_index_relative_to_start(
+                input_path=input_path,
+                media_probe=self._media_probe,
+                with_decode_seconds=True,
+            )
+        )
+        if key_frame_index.has_decode_seconds:
+            cut_ranges: list[VideoSlicerCutRange] = []
+            for fitted_index, end_seconds, output_path in zip(
+                key_frame_index.fit_indexes(ss_seconds_list),
+                end_seconds_list,
+                output_paths,
+                strict=True,
+            ):
+                # 最初のキーフレームより前の ss は、最初のキーフレームから始まる
+                fitted_index = max(fitted_index, 0)
+                key_frame_decode_seconds = key_frame_index.get_decode_seconds(
+                    fitted_index,
+                )
+                assert key_frame_decode_seconds is not None
+
+                cut_ranges.append(
+                    _create_cut_range(
+                        output_path=output_path,
+                        key_frame_seconds=key_frame_index[fitted_index],
+                        key_frame_decode_seconds=key_frame_decode_seconds,
+                        end_seconds=end_seconds,
+                        input_video_fps=input_video_fps,
+                    ),
+                )
+
+            return cut_ranges
+
+        semaphore = asyncio.Semaphore(max_jobs)
+
+        async def _probe_cut_range(
+            ss_seconds: float,
+            end_seconds: float,
+            output_path: Path,
+        ) -> VideoSlicerCutRange:
+            async with semaphore:
+                return await self.probe_cut_range(
+                    input_path=input_path,
+                    ss_seconds=ss_seconds,
+                    end_seconds=end_seconds,
+                    output_path=output_path,
+                    input_video_fps=input_video_fps,
+                )
+
+        return list(
+            await asyncio.gather(
+                *(
+                    _probe_cut_range(
+                        ss_seconds=ss_seconds,
+                        end_seconds=end_seconds,
+                        output_path=output_path,
+                    )
+                    for ss_seconds, end_seconds, output_path in zip(
+                        ss_seconds_list,
+                        end_seconds_list,
+                        output_paths,
+                        strict=True,
+                    )
+                ),
+            ),
+        )
+
+    async def probe_cut_range(
+        self,
+        input_path: Path,
+        ss_seconds: float,
+        end_seconds: float,
+        output_path: Path,
+        input_video_fps: float,
+    ) -> VideoSlicerCutRange:
+        """
+        入力側の -ss と同じようにシークして、範囲の最初のキーフレームを調べる
+
+        出力側の -ss で同じキーフレームから出力するため、
+        キーフレームのデコード時刻から半フレーム前の時刻を返す
+        時刻は -ss と同じく、入力の開始時刻からの時刻とする
+        """
+        # NOTE: -read_intervals とパケットの時刻は、入力のタイムスタンプで表す
+        media_info = await self._media_probe.probe(input_path=input_path)
+        start_time_seconds = media_info.start_time_seconds
+
+        command = [
+            self._ffprobe_path,
+            "-hide_banner",
+            "-select_streams",
+            "v:0",
+            "-read_intervals",
+            f"{ss_seconds + start_time_seconds:.6f}%+#{_KEY_FRAME_PROBE_PACKETS}",
+            "-show_entries",
+            "packet=pts_time,dts_time",
+            "-of",
+            "csv=print_section=0",
+            str(input_path),
+        ]
+
+        key_frame_seconds: float | None = None
+        key_frame_decode_seconds: float | None = None
+        has_leading_frames = False
+        packet_index = 0
+        async for line in iterate_process_lines(
+            command=command,
+            program_name="FFprobe",
+        ):
+            # 6.390000,6.323000
+            row = line.split(",")
+            if len(row) < 2 or row[0] == "N/A":
+                continue
+
+            pts_seconds = float(row[0]) - start_time_seconds
+            if key_frame_seconds is None:
+                key_frame_seconds = pts_seconds
+            elif pts_seconds < key_frame_seconds:
+                has_leading_frames = True
+
+            # NOTE: シーク直後のパケットはデコード時刻が N/A になるため、
+            # 最初にデコード時刻がわかるパケットから、1フレームずつ遡って求める
+            if key_frame_decode_seconds is None and row[1] != "N/A":
+                key_frame_decode_seconds = (
+                    float(row[1]) - start_time_seconds - packet_index / input_video_fps
+                )
+
+            packet_index += 1
+
+        if key_frame_seconds is None:
+            raise Exception(f"No video packet found after {ss_seconds}s: {input_path}")
+
+        if key_frame_decode_seconds is None:
+            key_frame_decode_seconds = key_frame_seconds
+
+        cut_range = _create_cut_range(
+            output_path=output_path,
+            key_frame_seconds=key_frame_seconds,
+            key_frame_decode_seconds=key_frame_decode_seconds,
+            end_seconds=end_seconds,
+            input_video_fps=input_video_fps,
+        )
+        cut_range.has_leading_frames = has_leading_frames
+        return cut_range
@@ -0,0 +1,492 @@
+import asyncio
+import re
+import tempfile
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+from logging import getLogger
+from pathlib import Path
+
+from ..util import parse_ffmpeg_time_unit_syntax
+from ..utility.async_subprocess_helper import wait_process
+from .fps_parser import FpsParser
+from .key_frame_parser import KeyFrameParser
+from .media_probe import MediaProbe
+from .video_slicer import VideoSlicer, VideoSlicerProgress
+
+logger = getLogger(__name__)
+
+# NOTE: concat demuxer が各部分のパラメータセットを挿入できるのは H.264 のみ
+_SMART_SLICE_VIDEO_CODEC = "h264"
+_SMART_SLICE_DEFAULT_VIDEO_ENCODER = "libx264"
+
+# フレームの時刻の丸め（ミリ秒単位など）による誤差の許容範囲
+_FRAME_TIME_TOLERANCE_SECONDS = 0.001
+
+
+def escape_concat_path(path: Path) -> str:
+    return "'" + str(path).replace("'", "'\\''") + "'"
+
+
+class VideoSmartSlicer:
+    def __init__(
+        self,
+        fps_parser: FpsParser,
+        key_frame_parser: KeyFrameParser,
+        media_probe: MediaProbe,
+        video_slicer: VideoSlicer,
+        ffmpeg_path: str,
+    ) -> None:
+        self._fps_parser = fps_parser
+        self._key_frame_parser = key_frame_parser
+        self._media_probe = media_probe
+        self._video_slicer = video_slicer
+        self._ffmpeg_path = ffmpeg_path
+
+    async def slice_video_accurate(
+        self,
+        ss: str,
+        to: str,
+        input_path: Path,
+        output_path: Path,
+        video_codec: str | None = None,
+        progress_handler: (
+            Callable[[VideoSlicerProgress], Awaitable[None]] | None
+        ) = None,
+    ) -> None:
+        """
+        ss から to までをフレーム単位で切り出す
+
+        範囲の最初のキーフレームより前と、最後のキーフレーム以降の部分的な GOP だけを
+        再エンコードし、その間の GOP はストリームコピーして、無劣化で連結する
+        映像以外のストリーム（複数のオーディオトラックなど）は、範囲をそのままコピーする
+        映像は最初の映像ストリームのみ出力する
+        """
+        ss_seconds = parse_ffmpeg_time_unit_syntax(ss).to_timedelta().total_seconds()
+        to_seconds = parse_ffmpeg_time_unit_syntax(to).to_timedelta().total_seconds()
+        if to_seconds <= ss_seconds:
+            raise ValueError(f"Invalid range: ss={ss}, to={to}. Specify to after ss.")
+
+        media_info = await self._media_probe.probe(input_path=input_path)
+        video_streams = media_info.video_streams
+        if len(video_streams) == 0:
+            raise Exception(f"No video stream found: {input_path}")
+
+        first_video_stream = video_streams[0]
+        if first_video_stream.codec_name != _SMART_SLICE_VIDEO_CODEC:
+            raise Exception(
+                "Unsupported video codec for accurate slicing: "
+                f"{first_video_stream.codec_name}. Only H.264 is supported."
+            )
+
+        if video_codec is None:
+            video_codec = _SMART_SLICE_DEFAULT_VIDEO_ENCODER
+
+        # NOTE: trim フィルタの時刻は入力のタイムスタンプのため、開始時刻で変換する
+        start_time_seconds = media_info.start_time_seconds
+
+        has_other_streams = any(
+            stream.codec_type != "video" for stream in media_info.streams
+        )
+
+        input_video_fps = await self._fps_parser.parse_fps(
+            input_path=input_path,
+        )
+
+        key_frame_index = (
+            await self._key_frame_parser.parse_key_frame_index_relative_to_start(
+                input_path=input_path,
+                media_probe=self._media_probe,
+            )
+        )
+        first_key_frame_seconds = key_frame_index.find_after(
+            ss_seconds,
+            inclusive=True,
+        )
+        last_key_frame_seconds = key_frame_index.find_before(to_seconds)
+
+        # 範囲内の最初と最後のキーフレームの間を、ストリームコピーする
+        middle_range: tuple[float | None, float] | None = None
+        if (
+            first_key_frame_seconds is not None
+            and last_key_frame_seconds is not None
+            and first_key_frame_seconds < last_key_frame_seconds
+        ):
+            # キーフレームから出力を始めるデコード時刻を、並行して確認する
+            # NOTE: 前のキーフレームに戻らないよう、半フレーム後にシークする
+            first_cut_range, last_cut_range = await asyncio.gather(
+                *(
+                    self._video_slicer.probe_cut_range(
+                        input_path=input_path,
+                        ss_seconds=key_frame_seconds + 0.5 / input_video_fps,
+                        end_seconds=to_seconds,
+                        output_path=output_path,
+                        input_video_fps=input_video_fps,
+                    )
+                    for key_frame_seconds in (
+                        first_key_frame_seconds,
+                        last_key_frame_seconds,
+                    )
+                ),
+            )
+
+            if first_cut_range.has_leading_frames or last_cut_range.has_leading_frames:
+                # NOTE: open GOP では、キーフレームの後にデコードするフレームが
+                # 前の GOP を参照するため、キーフレームの位置で分けられない
+                logger.warning(
+                    "Open GOP found. Re-encoding the whole range: %s",
+                    input_path,
+                )
+            else:
+                assert last_cut_range.start_seconds is not None
+                middle_range = (
+                    first_cut_range.start_seconds,
+                    last_cut_range.start_seconds,
+                )
+
+        with tempfile.TemporaryDirectory(
+            prefix=f".{output_path.stem}_",
+            dir=output_path.parent,
+        ) as temp_dir_string:
+            temp_dir = Path(temp_dir_string)
+
+            # (ファイル, 長さ) を連結する順に並べる
+            parts: list[tuple[Path, float]] = []
+            tasks: list[Awaitable[None]] = []
+
+            if middle_range is not None:
+                assert first_key_frame_seconds is not None
+                assert last_key_frame_seconds is not None
+
+                # ss と最初のキーフレームの間にフレームがなければ、再エンコードしない
+                head_path = temp_dir / "head.mkv"
+                if (
+                    1.0 / input_video_fps - _FRAME_TIME_TOLERANCE_SECONDS
+                    <= first_key_frame_seconds - ss_seconds
+                ):
+                    parts.append((head_path, first_key_frame_seconds - ss_seconds))
+                    tasks.append(
+                        self._encode_video_part(
+                            input_path=input_path,
+                            start_seconds=ss_seconds,
+                            end_seconds=first_key_frame_seconds,
+                            video_codec=video_codec,
+                            pix_fmt=first_video_stream.pix_fmt,
+                            start_time_seconds=start_time_seconds,
+                            output_path=head_path,
+                        ),
+                    )
+
+                parts.append(
+                    (
+                        temp_dir / "middle.mkv",
+                        last_key_frame_seconds - first_key_frame_seconds,
+                    ),
+                )
+
+                tail_path = temp_dir / "tail.mkv"
+                parts.append((tail_path, to_seconds - last_key_frame_seconds))
+                tasks.append(
+                    self._encode_video_part(
+                        input_path=input_path,
+                        start_seconds=last_key_frame_seconds,
+                        end_seconds=to_seconds,
+                        video_codec=video_codec,
+                        pix_fmt=first_video_stream.pix_fmt,
+                        start_time_seconds=start_time_seconds,
+                        output_path=tail_path,
+                    ),
+                )
+            else:
+                # 範囲が1つの GOP に収まるとき、open GOP のときは全体を再エンコードする
+                whole_path = temp_dir / "whole.mkv"
+                parts.append((whole_path, to_seconds - ss_seconds))
+                tasks.append(
+                    self._encode_video_part(
+                        input_path=input_path,
+                        start_seconds=ss_seconds,
+                        end_seconds=to_seconds,
+                        video_codec=video_codec,
+                        pix_fmt=first_video_stream.pix_fmt,
+                        start_time_seconds=start_time_seconds,
+                        output_path=whole_path,
+                    ),
+                )
+
+            other_streams_path = temp_dir / "streams.mka" if has_other_streams else None
+            if middle_range is not None or other_streams_path is not None:
+                tasks.append(
+                    self._copy_parts(
+                        input_path=input_path,
+                        ss_seconds=ss_seconds,
+                        to_seconds=to_seconds,
+                        middle_range=middle_range,
+                        middle_path=temp_dir / "middle.mkv",
+                        other_streams_path=other_streams_path,
+                        input_video_fps=input_video_fps,
+                        progress_handler=progress_handler,
+                    ),
+                )
+
+            # 再エンコードとストリームコピーは、並行して実行する
+            await asyncio.gather(*tasks)
+
+            await self._concat_parts(
+                parts=parts,
+                other_streams_path=other_streams_path,
+                concat_list_path=temp_dir / "concat.txt",
+                output_path=output_path,
+            )
+
+        if progress_handler is not None:
+            internal_time = timedelta(seconds=to_seconds - ss_seconds)
+            await progress_handler(
+                VideoSlicerProgress(
+                    time=timedelta(seconds=to_seconds),
+                    frame=int(to_seconds * input_video_fps),
+                    internal_time=internal_time,
+                    internal_frame=int(
+                        internal_time.total_seconds() * input_video_fps,
+                    ),
+                ),
+            )
+
+    async def _encode_video_part(
+        self,
+        input_path: Path,
+        start_seconds: float,
+        end_seconds: float,
+        video_codec: str,
+        pix_fmt: str | None,
+        start_time_seconds: float,
+        output_path: Path,
+    ) -> None:
+        """
+        start_seconds から end_seconds の前までに表示するフレームだけを再エンコードする
+        """
+        # NOTE: 出力側の -t は、フレームレートで丸めた時刻で比較するため、
+        # 入力のタイムスタンプのまま（-copyts）trim フィルタで切り出す
+        trim_start_seconds = max(start_seconds - _FRAME_TIME_TOLERANCE_SECONDS, 0.0)
+        trim_end_seconds = end_seconds - _FRAME_TIME_TOLERANCE_SECONDS
+        video_filter = (
+            f"trim=start={trim_start_seconds + start_time_seconds:.6f}"
+            f":end={trim_end_seconds + start_time_seconds:.6f},"
+            "setpts=PTS-STARTPTS"
+        )
+
+        pix_fmt_opts = ["-pix_fmt", pix_fmt] if pix_fmt is not None else []
+
+        # Command Argument List
+        command = [
+            self._ffmpeg_path,
+            "-hide_banner",
+            "-n",  # fail if already exists
+            "-ss",
+            f"{trim_start_seconds:.6f}",
+            "-copyts",
+            "-i",
+            str(input_path),
+            "-map",
+            "0:v:0",
+            "-filter:v",
+            video_filter,
+            "-c:v",
+            video_codec,
+            *pix_fmt_opts,
+            str(output_path),
+        ]
+        proc = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+
+        returncode = await wait_process(process=proc)
+        if returncode != 0:
+            raise Exception(f"FFmpeg errored. code: {returncode}")
+
+    async def _copy_parts(
+        self,
+        input_path: Path,
+        ss_seconds: float,
+        to_seconds: float,
+        middle_range: tuple[float | None, float] | None,
+        middle_path: Path,
+        other_streams_path: Path | None,
+        input_video_fps: float,
+        progress_handler: (Callable[[VideoSlicerProgress], Awaitable[None]] | None),
+    ) -> None:
+        """
+        入力を1回だけ読み込んで、キーフレーム間の映像と、映像以外のストリームを
+        それぞれストリームコピーする
+        """
+        # NOTE: 最初のキーフレームのデコード時刻は ss より前になることがある
+        input_ss_seconds = ss_seconds
+        if middle_range is not None:
+            input_ss_seconds = min(input_ss_seconds, middle_range[0] or 0.0)
+
+        input_ss_opts = (
+            ["-ss", f"{input_ss_seconds:.6f}"] if 0.0 < input_ss_seconds else []
+        )
+
+        # NOTE: 出力ごとの進捗は FFmpeg が表示しないため、
+        # 読み込み位置を表示させる映像のみの出力を先頭に加える
+        output_opts = [
+            "-to",
+            f"{to_seconds - input_ss_seconds:.6f}",
+            "-map",
+            "0:v:0",
+            "-c",
+            "copy",
+            "-f",
+            "null",
+            "-",
+        ]
+
+        if middle_range is not None:
+            # NOTE: ストリームコピーの出力側の -ss・-to はデコード時刻で比較する
+            middle_start_seconds, middle_end_seconds = middle_range
+            middle_ss_opts = (
+                ["-ss", f"{middle_start_seconds - input_ss_seconds:.6f}"]
+                if middle_start_seconds is not None
+                else []
+            )
+            output_opts += [
+                *middle_ss_opts,
+                "-to",
+                f"{middle_end_seconds - input_ss_seconds:.6f}",
+                "-map",
+                "0:v:0",
+                "-c",
+                "copy",
+                str(middle_path),
+            ]
+
+        if other_streams_path is not None:
+            # シークで読み込んだ ss より前のパケットは、出力側の -ss で除く
+            output_opts += [
+                "-ss",
+                f"{ss_seconds - input_ss_seconds:.6f}",
+                "-to",
+                f"{to_seconds - input_ss_seconds:.6f}",
+                "-map",
+                "0",
+                "-map",
+                "-0:v",
+                "-map_metadata",
+                "0",
+                "-c",
+                "copy",
+                str(other_streams_path),
+            ]
+
+        # Command Argument List
+        command = [
+            self._ffmpeg_path,
+            "-hide_banner",
+            "-n",  # fail if already exists
+            *input_ss_opts,
+            "-i",
+            str(input_path),
+            *output_opts,
+        ]
+        proc = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+
+        async def _handle_stderr(line: str) -> None:
+            match = re.match(r"^frame=\ *(\d+?)\ .+time=(\d.*?)\ bitrate.+$", line)
+            if match:
+                _time_string = match.group(2).strip()
+
+                _time_struct = parse_ffmpeg_time_unit_syntax(_time_string)
+                _time = _time_struct.to_timedelta()
+
+                time_seconds = min(
+                    input_ss_seconds + _time.total_seconds(),
+                    to_seconds,
+                )
+                if time_seconds < ss_seconds:
+                    return
+
+                internal_time = timedelta(seconds=time_seconds - ss_seconds)
+
+                if progress_handler:
+                    await progress_handler(
+                        VideoSlicerProgress(
+                            time=timedelta(seconds=time_seconds),
+                            frame=int(time_seconds * input_video_fps),
+                            internal_time=internal_time,
+                            internal_frame=int(
+                                internal_time.total_seconds() * input_video_fps,
+                            ),
+                        ),
+                    )
+
+        returncode = await wait_process(
+            process=proc,
+            stderr_handler=_handle_stderr,
+        )
+        if returncode != 0:
+            raise Exception(f"FFmpeg errored. code: {returncode}")
+
+    async def _concat_parts(
+        self,
+        parts: list[tuple[Path, float]],
+        other_streams_path: Path | None,
+        concat_list_path: Path,
+        output_path: Path,
+    ) -> None:
+        """
+        映像の各部分を concat demuxer で連結し、映像以外のストリームと多重化する
+
+        NOTE: concat demuxer は、H.264 の各部分のパラメータセットを
+        キーフレームの前に挿入するため、エンコーダの異なる部分を連結できる
+        """
+        concat_lines = ["ffconcat version 1.0"]
+        for part_path, duration_seconds in parts:
+            concat_lines += [
+                f"file {escape_concat_path(part_path)}",
+                f"duration {duration_seconds:.6f}",
+            ]
+
+        concat_list_path.write_text("\n".join(concat_lines) + "\n", encoding="utf-8")
+
+        other_streams_input_opts = (
+            ["-i", str(other_streams_path)] if other_streams_path is not None else []
+        )
+        other_streams_output_opts = (
+            ["-map", "1", "-map_metadata", "1", "-map_chapters", "1"]
+            if other_streams_path is not None
+            else []
+        )
+
+        # Command Argument List
+        command = [
+            self._ffmpeg_path,
+            "-hide_banner",
+            "-n",  # fail if already exists
+            "-f",
+            "concat",
+            "-safe",
+            "0",
+            "-i",
+            str(concat_list_path),
+            *other_streams_input_opts,
+            "-map",
+            "0:v",
+            *other_streams_output_opts,
+            "-c",
+            "copy",
+            str(output_path),
+        ]
+        proc = await asyncio.create_subprocess_exec(
+            *command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+
+        returncode = await wait_process(process=proc)
+        if returncode != 0:
+            raise Exception(f"FFmpeg errored. code: {returncode}")
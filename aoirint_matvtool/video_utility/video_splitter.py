@@ -0,0 +1,218 @@
+import csv
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+from itertools import pairwise
+from logging import getLogger
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from ..utility.key_frame_index import KeyFrameIndex
+from .fps_parser import FpsParser
+from .key_frame_parser import KeyFrameParser
+from .media_probe import MediaProbe
+from .video_slicer import VideoSlicer, VideoSlicerCutProgress, VideoSlicerCutRange
+
+logger = getLogger(__name__)
+
+
+class VideoSplitterChunk(BaseModel):
+    output_path: Path
+    # チャンク内のタイムスタンプ 0 に対応する、元の動画の時刻
+    start_time: timedelta
+    # チャンクの最初のキーフレームの、元の動画での時刻
+    key_frame_time: timedelta
+    end_time: timedelta
+
+
+def select_split_key_frames(
+    key_frame_index: KeyFrameIndex,
+    duration_seconds: float,
+    chunk_seconds: float,
+) -> list[float]:
+    """
+    chunk_seconds ごとの時刻に最も近いキーフレームを、分割位置として返す
+
+    誤差が累積しないよう、元の動画の先頭からの時刻で選ぶ
+    先頭のキーフレームと、前の分割位置以前のキーフレームは選ばない
+    """
+    if chunk_seconds <= 0.0:
+        raise ValueError(f"Invalid chunk length: {chunk_seconds}s.")
+
+    if len(key_frame_index) == 0:
+        return []
+
+    split_key_frames: list[float] = []
+    last_key_frame_seconds = key_frame_index[0]
+
+    target_index = 1
+    while target_index * chunk_seconds < duration_seconds:
+        key_frame_seconds = key_frame_index.find_nearest(target_index * chunk_seconds)
+        target_index += 1
+
+        if key_frame_seconds is None or key_frame_seconds <= last_key_frame_seconds:
+            continue
+
+        split_key_frames.append(key_frame_seconds)
+        last_key_frame_seconds = key_frame_seconds
+
+    return split_key_frames
+
+
+class VideoSplitter:
+    def __init__(
+        self,
+        fps_parser: FpsParser,
+        key_frame_parser: KeyFrameParser,
+        media_probe: MediaProbe,
+        video_slicer: VideoSlicer,
+    ) -> None:
+        self._fps_parser = fps_parser
+        self._key_frame_parser = key_frame_parser
+        self._media_probe = media_probe
+        self._video_slicer = video_slicer
+
+    async def split_video(
+        self,
+        input_path: Path,
+        output_dir: Path,
+        chunk_duration: timedelta | None,
+        chunk_size_bytes: int | None,
+        manifest_path: Path,
+        progress_handler: (
+            Callable[[VideoSlicerCutProgress], Awaitable[None]] | None
+        ) = None,
+    ) -> list[VideoSplitterChunk]:
+        """
+        目標の長さ（chunk_duration）またはサイズ（chunk_size_bytes）に近い
+        キーフレームの位置で、入力を1回だけ読み込んで分割する
+
+        サイズは平均ビットレートから長さに換算する
+        各チャンクの元の動画での時刻を、マニフェスト（CSV）に書き込む
+        """
+        if (chunk_duration is None) == (chunk_size_bytes is None):
+            raise ValueError("Specify either chunk_duration or chunk_size_bytes.")
+
+        media_info = await self._media_probe.probe(input_path=input_path)
+        duration = media_info.duration
+        if duration is None:
+            raise Exception(f"Duration not found: {input_path}")
+
+        duration_seconds = duration.total_seconds()
+
+        if chunk_duration is not None:
+            chunk_seconds = chunk_duration.total_seconds()
+        else:
+            assert chunk_size_bytes is not None
+            if chunk_size_bytes <= 0:
+                raise ValueError(f"Invalid chunk size: {chunk_size_bytes} bytes.")
+
+            chunk_seconds = (
+                duration_seconds * chunk_size_bytes / input_path.stat().st_size
+            )
+
+        input_video_fps = await self._fps_parser.parse_fps(
+            input_path=input_path,
+        )
+
+        key_frame_index = (
+            await self._key_frame_parser.parse_key_frame_index_relative_to_start(
+                input_path=input_path,
+                media_probe=self._media_probe,
+            )
+        )
+        split_key_frames = select_split_key_frames(
+            key_frame_index=key_frame_index,
+            duration_seconds=duration_seconds,
+            chunk_seconds=chunk_seconds,
+        )
+
+        num_chunks = len(split_key_frames) + 1
+        index_digits = max(3, len(str(num_chunks - 1)))
+        output_paths = [
+            output_dir
+            / f"{input_path.stem}_{index:0{index_digits}d}{input_path.suffix}"
+            for index in range(num_chunks)
+        ]
+
+        # 分割位置のキーフレームから出力を始めるデコード時刻を、まとめて求める
+        # NOTE: 前のキーフレームに合わせないよう、キーフレームの半フレーム後の時刻を使う
+        split_ranges = await self._video_slicer.probe_cut_ranges(
+            input_path=input_path,
+            ss_seconds_list=[
+                key_frame_seconds + 0.5 / input_video_fps
+                for key_frame_seconds in split_key_frames
+            ],
+            end_seconds_list=[duration_seconds for _ in split_key_frames],
+            output_paths=output_paths[1:],
+            input_video_fps=input_video_fps,
+        )
+
+        first_range = VideoSlicerCutRange(
+            output_path=output_paths[0],
+            start_seconds=None,
+            key_frame_seconds=key_frame_index[0] if len(key_frame_index) != 0 else 0.0,
+            end_seconds=duration_seconds,
+        )
+
+        # 各チャンクは、次のチャンクの出力を始めるデコード時刻で終える
+        cut_ranges = [first_range, *split_ranges]
+        for cut_range, next_cut_range in pairwise(cut_ranges):
+            assert next_cut_range.start_seconds is not None
+            cut_range.end_seconds = next_cut_range.start_seconds
+
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        await self._video_slicer.slice_video_cut_ranges(
+            input_path=input_path,
+            cut_ranges=cut_ranges,
+            input_video_fps=input_video_fps,
+            progress_handler=progress_handler,
+        )
+
+        chunks = [
+            VideoSplitterChunk(
+                output_path=cut_range.output_path,
+                start_time=timedelta(
+                    seconds=(
+                        cut_range.start_seconds
+                        if cut_range.start_seconds is not None
+                        else 0.0
+                    ),
+                ),
+                key_frame_time=timedelta(seconds=cut_range.key_frame_seconds),
+                end_time=timedelta(seconds=cut_range.end_seconds),
+            )
+            for cut_range in cut_ranges
+        ]
+
+        write_split_manifest(
+            manifest_path=manifest_path,
+            chunks=chunks,
+        )
+
+        return chunks
+
+
+def write_split_manifest(
+    manifest_path: Path,
+    chunks: list[VideoSplitterChunk],
+) -> None:
+    """
+    チャンクごとに、ファイル名と元の動画での時刻（秒）を CSV に書き込む
+
+    チャンク内の時刻に start_time を足すと、元の動画の時刻になる
+    """
+    with manifest_path.open("w", encoding="utf-8", newline="") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(["output", "start_time", "key_frame_time", "end_time"])
+
+        for chunk in chunks:
+            writer.writerow(
+                [
+                    chunk.output_path.name,
+                    f"{chunk.start_time.total_seconds():.6f}",
+                    f"{chunk.key_frame_time.total_seconds():.6f}",
+                    f"{chunk.end_time.total_seconds():.6f}",
+                ],
+            )
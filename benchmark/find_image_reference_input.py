@@ -0,0 +1,176 @@
+"""
+find_image の参照画像の入力方法による処理時間の比較
+
+- loop: 参照画像を -loop 1 で入力し、フレームごとにデコード・切り取りする（旧方式）
+- single: 参照画像を1回だけデコードし、blend フィルタ（framesync）で繰り返し使う
+
+Usage:
+    python benchmark/find_image_reference_input.py --duration 600
+"""
+
+import subprocess
+import tempfile
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+
+
+def create_input_video(
+    ffmpeg_path: str,
+    duration: int,
+    output_path: Path,
+) -> None:
+    subprocess.run(
+        [
+            ffmpeg_path,
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-f",
+            "lavfi",
+            "-i",
+            f"testsrc2=size=1920x1080:rate=60:duration={duration}",
+            "-c:v",
+            "libx264",
+            "-preset",
+            "ultrafast",
+            "-g",
+            "600",
+            str(output_path),
+        ],
+        check=True,
+    )
+
+
+def create_reference_image(
+    ffmpeg_path: str,
+    input_path: Path,
+    output_path: Path,
+) -> None:
+    subprocess.run(
+        [
+            ffmpeg_path,
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-ss",
+            "10",
+            "-i",
+            str(input_path),
+            "-frames:v",
+            "1",
+            str(output_path),
+        ],
+        check=True,
+    )
+
+
+def create_command(
+    ffmpeg_path: str,
+    input_path: Path,
+    reference_path: Path,
+    reference_crop: str,
+    mode: str,
+) -> list[str]:
+    if mode == "loop":
+        reference_input_opts = ["-loop", "1", "-i", str(reference_path)]
+        blend_options = "shortest=1"
+    else:
+        reference_input_opts = ["-i", str(reference_path)]
+        blend_options = "repeatlast=1"
+
+    filter_complex = (
+        f"[0:v]crop={reference_crop}[va0];"
+        f"[1:v]crop={reference_crop}[vb0];"
+        f"[va0][vb0]blend=difference:{blend_options},"
+        "blackframe@reference_0=amount=98:threshold=32"
+    )
+
+    return [
+        ffmpeg_path,
+        "-hide_banner",
+        "-nostats",
+        "-i",
+        str(input_path),
+        *reference_input_opts,
+        "-an",
+        "-filter_complex",
+        filter_complex,
+        "-f",
+        "null",
+        "-",
+    ]
+
+
+def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument(
+        "-i",
+        "--input_path",
+        type=str,
+        required=False,
+        help="Input video file path (default: generate 1080p60 testsrc2)",
+    )
+    parser.add_argument(
+        "--duration",
+        type=int,
+        default=600,
+        help="Duration in seconds of the generated input video",
+    )
+    parser.add_argument(
+        "--reference_crop",
+        type=str,
+        default="w=1600:h=900:x=0:y=0",
+        help="Crop parameter applied to both the input video and the reference",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--ffmpeg_path", type=str, default="ffmpeg")
+    args = parser.parse_args()
+
+    ffmpeg_path: str = args.ffmpeg_path
+    repeat: int = args.repeat
+
+    with tempfile.TemporaryDirectory() as temp_dir_string:
+        temp_dir = Path(temp_dir_string)
+
+        if args.input_path is not None:
+            input_path = Path(args.input_path)
+        else:
+            input_path = temp_dir / "input.mkv"
+            print(f"Generating {args.duration}s 1080p60 input: {input_path}")
+            create_input_video(
+                ffmpeg_path=ffmpeg_path,
+                duration=args.duration,
+                output_path=input_path,
+            )
+
+        reference_path = temp_dir / "reference.png"
+        create_reference_image(
+            ffmpeg_path=ffmpeg_path,
+            input_path=input_path,
+            output_path=reference_path,
+        )
+
+        for mode in ("loop", "single"):
+            command = create_command(
+                ffmpeg_path=ffmpeg_path,
+                input_path=input_path,
+                reference_path=reference_path,
+                reference_crop=args.reference_crop,
+                mode=mode,
+            )
+
+            elapsed_list: list[float] = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                subprocess.run(command, check=True, capture_output=True)
+                elapsed_list.append(time.perf_counter() - start)
+
+            print(
+                f"{mode}: min {min(elapsed_list):.2f}s, "
+                f"mean {sum(elapsed_list) / len(elapsed_list):.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+matvtool の起動時間の計測
+
+- import: python -X importtime で、実行までのモジュールの読み込み時間を集計する
+- python: python -m aoirint_matvtool でサブコマンドを実行する時間
+- binary: PyInstaller でビルドしたバイナリで実行する時間（--binary_path 指定時）
+
+--max_import_ms を指定すると、読み込み時間が超えたときに終了コード 1 で終了する
+--forbid_module を指定すると、指定したモジュールを読み込んだとき終了コード 1 で終了する
+（実行環境の速さに左右されないため、CI ではこちらを使う）
+
+Usage:
+    python benchmark/startup_time.py -i input.mkv
+    python benchmark/startup_time.py -i input.mkv --binary_path dist/matvtool
+"""
+
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+
+IMPORT_TIME_LINE_PATTERN = re.compile(
+    r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$",
+)
+
+
+def create_input_video(
+    ffmpeg_path: str,
+    output_path: Path,
+) -> None:
+    subprocess.run(
+        [
+            ffmpeg_path,
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-f",
+            "lavfi",
+            "-i",
+            "testsrc2=size=320x180:rate=30:duration=1",
+            "-c:v",
+            "libx264",
+            "-preset",
+            "ultrafast",
+            str(output_path),
+        ],
+        check=True,
+    )
+
+
+def measure_import_time(
+    python_path: str,
+    command_args: list[str],
+) -> tuple[dict[str, int], set[str]]:
+    """
+    最上位で読み込まれたモジュールごとの累積の読み込み時間（マイクロ秒）と、
+    読み込まれた全てのモジュール名を返す
+    """
+    proc = subprocess.run(
+        [python_path, "-X", "importtime", "-m", "aoirint_matvtool", *command_args],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+
+    cumulative_us_by_module: dict[str, int] = {}
+    imported_modules: set[str] = set()
+    for line in proc.stderr.splitlines():
+        match = IMPORT_TIME_LINE_PATTERN.match(line)
+        if match is None:
+            continue
+
+        imported_modules.add(match.group(4))
+
+        # インデントされていない行が、最上位で読み込まれたモジュール
+        if len(match.group(3)) != 1:
+            continue
+
+        cumulative_us_by_module[match.group(4)] = int(match.group(2))
+
+    return cumulative_us_by_module, imported_modules
+
+
+def measure_elapsed(
+    command: list[str],
+    repeat: int,
+) -> list[float]:
+    elapsed_list: list[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, capture_output=True)
+        elapsed_list.append(time.perf_counter() - start)
+
+    return elapsed_list
+
+
+def print_elapsed(
+    name: str,
+    elapsed_list: list[float],
+) -> None:
+    print(
+        f"{name}: min {min(elapsed_list) * 1000:.1f}ms, "
+        f"mean {sum(elapsed_list) / len(elapsed_list) * 1000:.1f}ms"
+    )
+
+
+def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument(
+        "-i",
+        "--input_path",
+        type=str,
+        required=False,
+        help="Input video file path (default: generate 1s 320x180 testsrc2)",
+    )
+    parser.add_argument(
+        "--subcommand",
+        type=str,
+        nargs="+",
+        default=["fps", "audio"],
+        help="Subcommands to run with -i input_path",
+    )
+    parser.add_argument(
+        "--binary_path",
+        type=str,
+        required=False,
+        help="PyInstaller binary path (e.g. dist/matvtool)",
+    )
+    parser.add_argument(
+        "--max_import_ms",
+        type=float,
+        required=False,
+        help="Exit with 1 if the import time of a subcommand exceeds this value",
+    )
+    parser.add_argument(
+        "--forbid_module",
+        type=str,
+        nargs="+",
+        default=[],
+        help="Exit with 1 if a subcommand imports one of these modules (e.g. numpy)",
+    )
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--python_path", type=str, default=sys.executable)
+    parser.add_argument("--ffmpeg_path", type=str, default="ffmpeg")
+    args = parser.parse_args()
+
+    subcommands: list[str] = args.subcommand
+    binary_path: str | None = args.binary_path
+    max_import_ms: float | None = args.max_import_ms
+    forbid_modules: list[str] = args.forbid_module
+    top: int = args.top
+    repeat: int = args.repeat
+    python_path: str = args.python_path
+
+    exceeded = False
+    with tempfile.TemporaryDirectory() as temp_dir_string:
+        temp_dir = Path(temp_dir_string)
+
+        if args.input_path is not None:
+            input_path = Path(args.input_path)
+        else:
+            input_path = temp_dir / "input.mkv"
+            create_input_video(
+                ffmpeg_path=args.ffmpeg_path,
+                output_path=input_path,
+            )
+
+        for subcommand in subcommands:
+            # キャッシュの有無で時間が変わらないよう、キャッシュを無効にする
+            command_args = ["--no_cache", subcommand, "-i", str(input_path)]
+
+            print(f"== {subcommand}")
+
+            cumulative_us_by_module, imported_modules = measure_import_time(
+                python_path=python_path,
+                command_args=command_args,
+            )
+            total_import_ms = sum(cumulative_us_by_module.values()) / 1000
+            print(f"import: total {total_import_ms:.1f}ms")
+
+            slowest_modules = sorted(
+                cumulative_us_by_module.items(),
+                key=lambda item: item[1],
+                reverse=True,
+            )[:top]
+            for module_name, cumulative_us in slowest_modules:
+                print(f"  {module_name}: {cumulative_us / 1000:.1f}ms")
+
+            if max_import_ms is not None and max_import_ms < total_import_ms:
+                print(f"import: exceeded {max_import_ms:.1f}ms")
+                exceeded = True
+
+            print(f"import: {len(imported_modules)} modules")
+            for module_name in forbid_modules:
+                if module_name in imported_modules:
+                    print(f"import: forbidden module {module_name}")
+                    exceeded = True
+
+            print_elapsed(
+                name="python",
+                elapsed_list=measure_elapsed(
+                    command=[python_path, "-m", "aoirint_matvtool", *command_args],
+                    repeat=repeat,
+                ),
+            )
+
+            if binary_path is not None:
+                print_elapsed(
+                    name="binary",
+                    elapsed_list=measure_elapsed(
+                        command=[binary_path, *command_args],
+                        repeat=repeat,
+                    ),
+                )
+
+    if exceeded:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
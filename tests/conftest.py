@@ -1,16 +1,27 @@
+import subprocess
 from pathlib import Path
 
 import pytest
 
+from aoirint_matvtool.batch.executor import BatchExecutor
+from aoirint_matvtool.video_utility.audio_extractor import AudioExtractor
+from aoirint_matvtool.video_utility.audio_finder import AudioFinder
 from aoirint_matvtool.video_utility.audio_selector import AudioSelector
 from aoirint_matvtool.video_utility.audio_track_title_parser import (
     AudioTrackTitleParser,
 )
+from aoirint_matvtool.video_utility.crop_detector import CropDetector
 from aoirint_matvtool.video_utility.crop_scaler import CropScaler
+from aoirint_matvtool.video_utility.encoder_tuner import EncoderTuner
 from aoirint_matvtool.video_utility.fps_parser import FpsParser
+from aoirint_matvtool.video_utility.frame_hash_indexer import FrameHashIndexer
 from aoirint_matvtool.video_utility.image_finder import ImageFinder
 from aoirint_matvtool.video_utility.key_frame_parser import KeyFrameParser
+from aoirint_matvtool.video_utility.media_probe import MediaProbe
+from aoirint_matvtool.video_utility.parallel_crop_scaler import ParallelCropScaler
 from aoirint_matvtool.video_utility.video_slicer import VideoSlicer
+from aoirint_matvtool.video_utility.video_smart_slicer import VideoSmartSlicer
+from aoirint_matvtool.video_utility.video_splitter import VideoSplitter
 
 
 @pytest.fixture
@@ -28,12 +39,89 @@ def fixture_dir() -> Path:
     return Path(__file__).parent / "fixtures"
 
 
+@pytest.fixture
+def shifted_sample_file(
+    ffmpeg_path: str,
+    fixture_dir: Path,
+    tmp_path: Path,
+) -> Path:
+    """
+    sample1.mkv のタイムスタンプを 100 秒ずらした、開始時刻が 0 でない入力
+    """
+    output_file = tmp_path / "shifted_sample1.mkv"
+    subprocess.run(
+        [
+            ffmpeg_path,
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-i",
+            str(fixture_dir / "sample1.mkv"),
+            "-map",
+            "0",
+            "-c",
+            "copy",
+            "-output_ts_offset",
+            "100",
+            str(output_file),
+        ],
+        check=True,
+    )
+    return output_file
+
+
+@pytest.fixture
+def vfr_sample_file(
+    ffmpeg_path: str,
+    fixture_dir: Path,
+    tmp_path: Path,
+) -> Path:
+    """
+    sample1.mkv の 10 秒以降のフレームを1つおきに間引いた、可変フレームレートの入力
+    """
+    output_file = tmp_path / "vfr_sample1.mkv"
+    subprocess.run(
+        [
+            ffmpeg_path,
+            "-hide_banner",
+            "-loglevel",
+            "error",
+            "-i",
+            str(fixture_dir / "sample1.mkv"),
+            "-map",
+            "0:v",
+            "-vf",
+            "select='lt(t,10)+not(mod(n,2))',setpts=PTS-STARTPTS",
+            "-fps_mode",
+            "vfr",
+            "-c:v",
+            "libx264",
+            "-preset",
+            "ultrafast",
+            str(output_file),
+        ],
+        check=True,
+    )
+    return output_file
+
+
+@pytest.fixture
+def media_probe(
+    ffprobe_path: str,
+) -> MediaProbe:
+    return MediaProbe(
+        ffprobe_path=ffprobe_path,
+    )
+
+
 @pytest.fixture
 def fps_parser(
     ffprobe_path: str,
+    media_probe: MediaProbe,
 ) -> FpsParser:
     return FpsParser(
         ffprobe_path=ffprobe_path,
+        media_probe=media_probe,
     )
 
 
@@ -48,6 +136,19 @@ def crop_scaler(
     )
 
 
+@pytest.fixture
+def parallel_crop_scaler(
+    key_frame_parser: KeyFrameParser,
+    media_probe: MediaProbe,
+    ffmpeg_path: str,
+) -> ParallelCropScaler:
+    return ParallelCropScaler(
+        key_frame_parser=key_frame_parser,
+        media_probe=media_probe,
+        ffmpeg_path=ffmpeg_path,
+    )
+
+
 @pytest.fixture
 def image_finder(
     fps_parser: FpsParser,
@@ -64,12 +165,32 @@ def image_finder(
     )
 
 
+@pytest.fixture
+def frame_hash_indexer(
+    fps_parser: FpsParser,
+    media_probe: MediaProbe,
+    ffmpeg_path: str,
+    ffprobe_path: str,
+) -> FrameHashIndexer:
+    return FrameHashIndexer(
+        fps_parser=fps_parser,
+        key_frame_parser=KeyFrameParser(
+            fps_parser=fps_parser,
+            ffprobe_path=ffprobe_path,
+        ),
+        media_probe=media_probe,
+        ffmpeg_path=ffmpeg_path,
+    )
+
+
 @pytest.fixture
 def audio_track_title_parser(
     ffprobe_path: str,
+    media_probe: MediaProbe,
 ) -> AudioTrackTitleParser:
     return AudioTrackTitleParser(
         ffprobe_path=ffprobe_path,
+        media_probe=media_probe,
     )
 
 
@@ -87,11 +208,49 @@ def key_frame_parser(
 @pytest.fixture
 def video_slicer(
     fps_parser: FpsParser,
+    key_frame_parser: KeyFrameParser,
     ffmpeg_path: str,
+    ffprobe_path: str,
+    media_probe: MediaProbe,
 ) -> VideoSlicer:
     return VideoSlicer(
         fps_parser=fps_parser,
         ffmpeg_path=ffmpeg_path,
+        ffprobe_path=ffprobe_path,
+        media_probe=media_probe,
+        key_frame_parser=key_frame_parser,
+    )
+
+
+@pytest.fixture
+def video_smart_slicer(
+    fps_parser: FpsParser,
+    key_frame_parser: KeyFrameParser,
+    media_probe: MediaProbe,
+    video_slicer: VideoSlicer,
+    ffmpeg_path: str,
+) -> VideoSmartSlicer:
+    return VideoSmartSlicer(
+        fps_parser=fps_parser,
+        key_frame_parser=key_frame_parser,
+        media_probe=media_probe,
+        video_slicer=video_slicer,
+        ffmpeg_path=ffmpeg_path,
+    )
+
+
+@pytest.fixture
+def video_splitter(
+    fps_parser: FpsParser,
+    key_frame_parser: KeyFrameParser,
+    media_probe: MediaProbe,
+    video_slicer: VideoSlicer,
+) -> VideoSplitter:
+    return VideoSplitter(
+        fps_parser=fps_parser,
+        key_frame_parser=key_frame_parser,
+        media_probe=media_probe,
+        video_slicer=video_slicer,
     )
 
 
@@ -104,3 +263,69 @@ def audio_selector(
         fps_parser=fps_parser,
         ffmpeg_path=ffmpeg_path,
     )
+
+
+@pytest.fixture
+def batch_executor(
+    video_slicer: VideoSlicer,
+    audio_selector: AudioSelector,
+    crop_scaler: CropScaler,
+) -> BatchExecutor:
+    return BatchExecutor(
+        video_slicer=video_slicer,
+        audio_selector=audio_selector,
+        crop_scaler=crop_scaler,
+        max_cpu_jobs=1,
+        max_io_jobs=2,
+    )
+
+
+@pytest.fixture
+def encoder_tuner(
+    key_frame_parser: KeyFrameParser,
+    media_probe: MediaProbe,
+    parallel_crop_scaler: ParallelCropScaler,
+) -> EncoderTuner:
+    return EncoderTuner(
+        key_frame_parser=key_frame_parser,
+        media_probe=media_probe,
+        parallel_crop_scaler=parallel_crop_scaler,
+        max_jobs=2,
+    )
+
+
+@pytest.fixture
+def crop_detector(
+    key_frame_parser: KeyFrameParser,
+    media_probe: MediaProbe,
+    ffmpeg_path: str,
+) -> CropDetector:
+    return CropDetector(
+        key_frame_parser=key_frame_parser,
+        media_probe=media_probe,
+        ffmpeg_path=ffmpeg_path,
+    )
+
+
+@pytest.fixture
+def audio_extractor(
+    audio_track_title_parser: AudioTrackTitleParser,
+    media_probe: MediaProbe,
+    ffmpeg_path: str,
+) -> AudioExtractor:
+    return AudioExtractor(
+        audio_track_title_parser=audio_track_title_parser,
+        media_probe=media_probe,
+        ffmpeg_path=ffmpeg_path,
+    )
+
+
+@pytest.fixture
+def audio_finder(
+    media_probe: MediaProbe,
+    ffmpeg_path: str,
+) -> AudioFinder:
+    return AudioFinder(
+        media_probe=media_probe,
+        ffmpeg_path=ffmpeg_path,
+    )
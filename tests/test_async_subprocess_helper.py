@@ -0,0 +1,79 @@
+import asyncio
+import sys
+
+import pytest
+
+from aoirint_matvtool.utility.async_subprocess_helper import (
+    iterate_process_lines,
+    wait_process,
+)
+
+
+@pytest.mark.asyncio
+async def test_iterate_process_lines() -> None:
+    command = [sys.executable, "-c", "print('a'); print(); print(' b ')"]
+
+    lines = [
+        line
+        async for line in iterate_process_lines(
+            command=command,
+            program_name="Python",
+        )
+    ]
+
+    # 空行で読み込みを打ち切らない
+    assert lines == ["a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_iterate_process_lines_carriage_return() -> None:
+    command = [sys.executable, "-c", r"print('a\rb\r', end=''); print('c')"]
+
+    lines = [
+        line
+        async for line in iterate_process_lines(
+            command=command,
+            program_name="Python",
+        )
+    ]
+
+    # FFmpeg の進捗表示のように、\r で区切られた行も分けて返す
+    assert lines == ["a", "b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_iterate_process_lines_error() -> None:
+    command = [sys.executable, "-c", "print('a'); raise SystemExit(3)"]
+
+    lines: list[str] = []
+    with pytest.raises(Exception, match="Python errored. code: 3"):
+        async for line in iterate_process_lines(
+            command=command,
+            program_name="Python",
+        ):
+            lines.append(line)
+
+    assert lines == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_wait_process_continues_after_empty_line() -> None:
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-c",
+        "import sys; print('a'); print(); print('b'); print('c', file=sys.stderr)",
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+
+    stdout_lines: list[str] = []
+    stderr_lines: list[str] = []
+    returncode = await wait_process(
+        process=process,
+        stdout_handler=stdout_lines.append,
+        stderr_handler=stderr_lines.append,
+    )
+
+    assert returncode == 0
+    assert stdout_lines == ["a", "b"]
+    assert stderr_lines == ["c"]
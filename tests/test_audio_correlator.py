@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from aoirint_matvtool.utility.audio_correlator import AudioCorrelator
+
+
+def test_audio_correlator() -> None:
+    rng = np.random.default_rng(0)
+    input_samples = rng.standard_normal(5000).astype(np.float32)
+    # 音量の違う参照音声でも一致する
+    reference_samples = input_samples[1234:1334] * 0.5
+
+    # 小さい FFT サイズで、参照音声の位置がブロックの境界をまたぐようにする
+    audio_correlator = AudioCorrelator(
+        reference_samples=reference_samples,
+        fft_size=256,
+    )
+    assert audio_correlator.hop_size == 157
+
+    positions: list[int] = []
+    scores: list[float] = []
+    for offset in range(0, len(input_samples), 100):
+        first_position, block_scores = audio_correlator.correlate(
+            input_samples[offset : offset + 100],
+        )
+        positions += range(first_position, first_position + len(block_scores))
+        scores += block_scores.tolist()
+
+    assert positions == list(range(len(input_samples) - 100 + 1))
+
+    # 位置ごとに直接計算した正規化相互相関と一致する
+    reference = reference_samples.astype(np.float64) - reference_samples.mean()
+    expected_scores = []
+    for position in positions:
+        window = input_samples[position : position + 100].astype(np.float64)
+        window -= window.mean()
+        expected_scores.append(
+            np.dot(window, reference)
+            / (np.linalg.norm(window) * np.linalg.norm(reference))
+        )
+
+    np.testing.assert_allclose(scores, expected_scores, atol=1e-6)
+    assert int(np.argmax(scores)) == 1234
+
+
+def test_audio_correlator_silent_input() -> None:
+    audio_correlator = AudioCorrelator(
+        reference_samples=np.array([1.0, -1.0, 1.0], dtype=np.float32),
+        fft_size=16,
+    )
+
+    _, scores = audio_correlator.correlate(np.zeros(10, dtype=np.float32))
+
+    # 無音の区間は、相関を 0 とする
+    assert scores.tolist() == [0.0] * 8
+
+
+def test_audio_correlator_invalid_reference() -> None:
+    with pytest.raises(ValueError):
+        AudioCorrelator(reference_samples=np.zeros(100, dtype=np.float32))
+
+    with pytest.raises(ValueError):
+        AudioCorrelator(reference_samples=np.ones(1, dtype=np.float32))
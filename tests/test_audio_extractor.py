@@ -0,0 +1,69 @@
+from pathlib import Path
+
+import pytest
+
+from aoirint_matvtool.video_utility.audio_extractor import (
+    AudioExtractor,
+    sanitize_file_name,
+)
+from aoirint_matvtool.video_utility.media_probe import MediaProbe
+
+
+@pytest.mark.asyncio
+async def test_audio_extractor(
+    audio_extractor: AudioExtractor,
+    media_probe: MediaProbe,
+    fixture_dir: Path,
+    tmp_path: Path,
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+
+    output_paths = await audio_extractor.extract_audio(
+        input_path=input_file,
+        output_dir=tmp_path,
+    )
+
+    # オーディオトラックのタイトルからファイル名を決め、
+    # AAC はストリームコピーして m4a にする
+    assert output_paths == [
+        tmp_path / "sample1_0_Sine 262Hz.m4a",
+        tmp_path / "sample1_1_Sine 294Hz.m4a",
+        tmp_path / "sample1_2_Sine 330Hz.m4a",
+    ]
+
+    for output_path in output_paths:
+        output_media_info = await media_probe.probe(input_path=output_path)
+
+        assert len(output_media_info.video_streams) == 0
+        assert len(output_media_info.audio_streams) == 1
+        assert output_media_info.audio_streams[0].codec_name == "aac"
+
+
+@pytest.mark.asyncio
+async def test_audio_extractor_with_codec(
+    audio_extractor: AudioExtractor,
+    media_probe: MediaProbe,
+    fixture_dir: Path,
+    tmp_path: Path,
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+
+    output_paths = await audio_extractor.extract_audio(
+        input_path=input_file,
+        output_dir=tmp_path,
+        audio_codec="flac",
+    )
+
+    assert [output_path.name for output_path in output_paths] == [
+        "sample1_0_Sine 262Hz.flac",
+        "sample1_1_Sine 294Hz.flac",
+        "sample1_2_Sine 330Hz.flac",
+    ]
+
+    output_media_info = await media_probe.probe(input_path=output_paths[1])
+    assert output_media_info.audio_streams[0].codec_name == "flac"
+
+
+def test_sanitize_file_name() -> None:
+    assert sanitize_file_name("Game / Mic: 1") == "Game _ Mic_ 1"
+    assert sanitize_file_name("..") == ""
@@ -0,0 +1,97 @@
+import asyncio
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+
+from aoirint_matvtool.video_utility.audio_finder import AudioFinder, AudioFinderResult
+
+
+async def _run_ffmpeg(ffmpeg_path: str, *args: str) -> None:
+    proc = await asyncio.create_subprocess_exec(
+        ffmpeg_path,
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        *args,
+    )
+    assert await proc.wait() == 0
+
+
+@pytest.mark.asyncio
+async def test_audio_finder(
+    audio_finder: AudioFinder,
+    ffmpeg_path: str,
+    tmp_path: Path,
+) -> None:
+    input_file = tmp_path / "input.mkv"
+    reference_file = tmp_path / "reference.wav"
+
+    # 正弦波では周期ごとに一致してしまうため、ノイズの音声を使う
+    await _run_ffmpeg(
+        ffmpeg_path,
+        "-f",
+        "lavfi",
+        "-i",
+        "testsrc=size=64x36:rate=30:duration=20",
+        "-f",
+        "lavfi",
+        "-i",
+        "anoisesrc=seed=1:duration=20:sample_rate=48000",
+        "-c:v",
+        "libx264",
+        "-c:a",
+        "aac",
+        "-shortest",
+        str(input_file),
+    )
+    await _run_ffmpeg(
+        ffmpeg_path,
+        "-ss",
+        "7.5",
+        "-t",
+        "1.5",
+        "-i",
+        str(input_file),
+        "-vn",
+        "-c:a",
+        "pcm_s16le",
+        str(reference_file),
+    )
+
+    results: list[AudioFinderResult] = []
+
+    async def _handle_result(result: AudioFinderResult) -> None:
+        results.append(result)
+
+    await audio_finder.find_audio(
+        input_ss="5",
+        input_to=None,
+        input_path=input_file,
+        reference_audio_path=reference_file,
+        result_handler=_handle_result,
+    )
+
+    assert len(results) == 1
+    assert results[0].time == timedelta(seconds=7.5)
+    assert results[0].frame == 225
+    assert results[0].internal_time == timedelta(seconds=2.5)
+    assert results[0].internal_frame == 75
+    assert 0.9 < results[0].score
+
+
+@pytest.mark.asyncio
+async def test_audio_finder_invalid_audio_index(
+    audio_finder: AudioFinder,
+    fixture_dir: Path,
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+
+    with pytest.raises(ValueError):
+        await audio_finder.find_audio(
+            input_ss=None,
+            input_to=None,
+            input_path=input_file,
+            reference_audio_path=input_file,
+            audio_index=3,
+        )
@@ -0,0 +1,70 @@
+from pathlib import Path
+
+import pytest
+
+from aoirint_matvtool.batch.executor import BatchExecutor
+from aoirint_matvtool.batch.job import BatchSliceJob, read_batch_jobs_file
+
+
+@pytest.mark.asyncio
+async def test_batch_executor(
+    batch_executor: BatchExecutor,
+    fixture_dir: Path,
+    tmp_path: Path,
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+
+    jobs_file = tmp_path / "jobs.jsonl"
+    jobs_file.write_text(
+        "\n".join(
+            [
+                f'{{"type": "slice", "input_path": "{input_file}", '
+                '"output_path": "slice.mkv", "ss": "1", "to": "3"}',
+                "# comment",
+                f'{{"type": "select_audio", "input_path": "{input_file}", '
+                '"output_path": "audio.mkv", "audio_indexes": [1]}',
+                f'{{"type": "crop_scale", "input_path": "{input_file}", '
+                '"output_path": "crop_scale.mkv", "scale": "160:90", '
+                '"video_codec": "libx264"}',
+                f'{{"type": "slice", "input_path": "{input_file}", '
+                '"output_path": "slice.mkv", "ss": "5", "to": "7"}',
+            ],
+        ),
+        encoding="utf-8",
+    )
+
+    jobs = read_batch_jobs_file(jobs_path=jobs_file)
+    assert [job.type for job in jobs] == [
+        "slice",
+        "select_audio",
+        "crop_scale",
+        "slice",
+    ]
+    # 相対パスはジョブファイルのディレクトリから解決する
+    assert jobs[0].output_path == tmp_path / "slice.mkv"
+
+    results = await batch_executor.execute(jobs=jobs)
+
+    assert [result.job_index for result in results] == [0, 1, 2, 3]
+    assert [result.error is None for result in results] == [True, True, True, False]
+    assert (tmp_path / "audio.mkv").exists()
+    assert (tmp_path / "crop_scale.mkv").exists()
+
+    # エンコードするジョブの CPU 時間は、FFmpeg の -benchmark から集計する
+    assert 0.0 < results[2].cpu_time.total_seconds()
+    assert 0.0 < results[2].wall_time.total_seconds()
+
+
+def test_read_batch_jobs_file_invalid(tmp_path: Path) -> None:
+    jobs_file = tmp_path / "jobs.jsonl"
+    jobs_file.write_text(
+        '{"type": "unknown", "input_path": "a.mkv", "output_path": "b.mkv"}\n',
+        encoding="utf-8",
+    )
+
+    with pytest.raises(ValueError, match="line 1"):
+        read_batch_jobs_file(jobs_path=jobs_file)
+
+
+def test_batch_slice_job_resource_type() -> None:
+    assert BatchSliceJob.resource_type == "io"
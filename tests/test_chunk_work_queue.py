@@ -0,0 +1,101 @@
+import os
+import time
+from pathlib import Path
+
+from aoirint_matvtool.video_utility.chunk_work_queue import (
+    ChunkEncodeTask,
+    ChunkWorkQueue,
+)
+
+
+def create_task(task_id: str, tmp_path: Path) -> ChunkEncodeTask:
+    return ChunkEncodeTask(
+        task_id=task_id,
+        job_id="job",
+        input_path=tmp_path / "input.mkv",
+        start_seconds=0.0,
+        end_seconds=None,
+        start_time_seconds=0.0,
+        video_filters=[],
+        video_codec=None,
+        output_path=tmp_path / f"{task_id}.mkv",
+        lease_seconds=60.0,
+    )
+
+
+def test_chunk_work_queue(tmp_path: Path) -> None:
+    work_queue = ChunkWorkQueue(spool_dir=tmp_path / "spool")
+    work_queue.submit(create_task("job_0000", tmp_path))
+    work_queue.submit(create_task("job_0001", tmp_path))
+
+    claim1 = work_queue.claim(worker_id="worker1")
+    claim2 = work_queue.claim(worker_id="worker2")
+    assert claim1 is not None
+    assert claim2 is not None
+    assert claim1.task.task_id == "job_0000"
+    assert claim2.task.task_id == "job_0001"
+
+    # 取得済みのタスクは、他のワーカーに渡さない
+    assert work_queue.claim(worker_id="worker3") is None
+
+    assert work_queue.complete(claim=claim1)
+    assert work_queue.fail(claim=claim2, error="FFmpeg errored. code: 1")
+
+    assert work_queue.list_done_task_ids(job_id="job") == {"job_0000"}
+    assert work_queue.read_failure_errors(job_id="job") == {
+        "job_0001": "FFmpeg errored. code: 1 (worker: worker2)",
+    }
+
+    work_queue.remove_job(job_id="job")
+    assert work_queue.list_done_task_ids(job_id="job") == set()
+
+
+def test_chunk_work_queue_requeue_expired(tmp_path: Path) -> None:
+    work_queue = ChunkWorkQueue(spool_dir=tmp_path / "spool")
+    work_queue.submit(create_task("job_0000", tmp_path))
+
+    stale_claim = work_queue.claim(worker_id="worker1")
+    assert stale_claim is not None
+
+    # リースの期限内は、再びキューに入れない
+    assert work_queue.requeue_expired() == []
+
+    # ワーカーが異常終了して、ハートビートが途絶えた
+    expired_time = time.time() - 120.0
+    os.utime(stale_claim.running_path, (expired_time, expired_time))
+    assert work_queue.requeue_expired() == ["job_0000"]
+
+    claim = work_queue.claim(worker_id="worker2")
+    assert claim is not None
+    assert claim.task.task_id == "job_0000"
+
+    # 期限切れのワーカーは、リースを延長・完了できない
+    assert not work_queue.renew(claim=stale_claim)
+    assert not work_queue.complete(claim=stale_claim)
+
+    assert work_queue.renew(claim=claim)
+    assert work_queue.complete(claim=claim)
+    assert work_queue.list_done_task_ids(job_id="job") == {"job_0000"}
+
+
+def test_chunk_work_queue_fail_stale_claim(tmp_path: Path) -> None:
+    work_queue = ChunkWorkQueue(spool_dir=tmp_path / "spool")
+    work_queue.submit(create_task("job_0000", tmp_path))
+
+    stale_claim = work_queue.claim(worker_id="worker1")
+    assert stale_claim is not None
+
+    expired_time = time.time() - 120.0
+    os.utime(stale_claim.running_path, (expired_time, expired_time))
+    assert work_queue.requeue_expired() == ["job_0000"]
+
+    claim = work_queue.claim(worker_id="worker2")
+    assert claim is not None
+
+    # 期限切れのワーカーの失敗は、他のワーカーが実行中のタスクを失敗にしない
+    assert not work_queue.fail(claim=stale_claim, error="FFmpeg errored. code: 1")
+    assert work_queue.read_failure_errors(job_id="job") == {}
+    assert claim.running_path.exists()
+
+    assert work_queue.complete(claim=claim)
+    assert work_queue.list_done_task_ids(job_id="job") == {"job_0000"}
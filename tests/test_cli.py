@@ -0,0 +1,87 @@
+import json
+import subprocess
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+
+import pytest
+
+from aoirint_matvtool.cli import parse_subcommand_name
+from aoirint_matvtool.command.find_image import (
+    add_arguments_find_image_cli,
+    handle_find_image_cli,
+)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("argv", "expected"),
+    [
+        (["fps", "-i", "input.mkv"], "fps"),
+        (["--ffprobe_path", "fps", "audio", "-i", "input.mkv"], "audio"),
+        (["--no_cache", "find_image", "-h"], "find_image"),
+        (["--no_cache"], None),
+    ],
+)
+async def test_parse_subcommand_name(
+    argv: list[str],
+    expected: str | None,
+) -> None:
+    assert await parse_subcommand_name(argv) == expected
+
+
+def test_cli_imports_only_selected_subcommand(
+    fixture_dir: Path,
+) -> None:
+    # 別のプロセスで、fps の実行後に読み込まれているモジュールを確認する
+    code = (
+        "import json, sys\n"
+        "from aoirint_matvtool.cli import main\n"
+        "sys.argv = ['matvtool', '--no_cache', 'fps', '-i', sys.argv[1]]\n"
+        "main()\n"
+        "print(json.dumps(sorted(sys.modules)))\n"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", code, str(fixture_dir / "sample1.mkv")],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    modules: list[str] = json.loads(proc.stdout.splitlines()[-1])
+
+    assert "aoirint_matvtool.command.fps" in modules
+    assert "aoirint_matvtool.command.find_image" not in modules
+    assert "aoirint_matvtool.video_utility.image_finder" not in modules
+    assert "aoirint_matvtool.daemon.server" not in modules
+    assert "tqdm" not in modules
+    assert "numpy" not in modules
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "option_argv",
+    [
+        ["--fps", "10"],
+        ["-j", "4"],
+        ["--backend", "numpy"],
+        ["--coarse_search", "key_frame"],
+        ["-ba", "90"],
+        ["-bt", "16"],
+    ],
+)
+async def test_find_image_cli_use_index_unsupported_option(
+    option_argv: list[str],
+) -> None:
+    parser = ArgumentParser()
+    await add_arguments_find_image_cli(parser)
+    args = parser.parse_args(
+        ["-i", "input.mkv", "-ref", "reference.png", "--use_index", *option_argv],
+    )
+    args.ffmpeg_path = "ffmpeg"
+    args.ffprobe_path = "ffprobe"
+    args.cache_dir = "cache"
+    args.no_cache = True
+
+    # インデックスを使う検索で使われないオプションは、無視せずにエラーにする
+    with pytest.raises(ValueError, match="cannot be used with --use_index"):
+        await handle_find_image_cli(args)
@@ -0,0 +1,62 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from aoirint_matvtool.video_utility.crop_detector import (
+    CropDetector,
+    DetectedCrop,
+    merge_detected_crops,
+)
+
+
+def test_merge_detected_crops() -> None:
+    merged_crop = merge_detected_crops(
+        detected_crops=[
+            DetectedCrop(width=320, height=180, x=0, y=30),
+            # 暗い場面で、黒帯より内側まで検出された
+            DetectedCrop(width=300, height=140, x=10, y=50),
+            DetectedCrop(width=320, height=170, x=0, y=41),
+        ],
+    )
+
+    # 全ての範囲を含み、幅・高さは2の倍数に切り捨てる
+    assert merged_crop == DetectedCrop(width=320, height=180, x=0, y=30)
+    assert merged_crop.to_crop_string() == "320:180:0:30"
+
+
+@pytest.mark.asyncio
+async def test_crop_detector(
+    crop_detector: CropDetector,
+    ffmpeg_path: str,
+    fixture_dir: Path,
+    tmp_path: Path,
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+    letterbox_file = tmp_path / "letterbox.mkv"
+
+    # 320x180 の映像の上下に黒帯を付けて、320x240 にする
+    proc = await asyncio.create_subprocess_exec(
+        ffmpeg_path,
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-i",
+        str(input_file),
+        "-map",
+        "0:v:0",
+        "-filter:v",
+        "pad=320:240:0:30",
+        "-c:v",
+        "libx264",
+        str(letterbox_file),
+    )
+    assert await proc.wait() == 0
+
+    detected_crop = await crop_detector.detect_crop(
+        input_path=letterbox_file,
+        num_samples=3,
+        frames_per_sample=3,
+    )
+
+    assert detected_crop.to_crop_string() == "320:180:0:30"
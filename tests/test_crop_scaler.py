@@ -2,7 +2,14 @@ from pathlib import Path
 
 import pytest
 
-from aoirint_matvtool.video_utility.crop_scaler import CropScaler
+from aoirint_matvtool.command.crop_scale import parse_rendition_spec
+from aoirint_matvtool.video_utility.crop_scaler import (
+    CropScaler,
+    CropScaleRendition,
+    CropScalerRenditionProgress,
+    build_crop_scale_video_filters,
+)
+from aoirint_matvtool.video_utility.media_probe import MediaProbe
 
 
 @pytest.mark.asyncio
@@ -24,3 +31,113 @@ async def test_crop_scaler(
 
     assert output_file.exists()
     # TODO: 映像の比較
+
+
+@pytest.mark.asyncio
+async def test_crop_scaler_renditions(
+    crop_scaler: CropScaler,
+    media_probe: MediaProbe,
+    fixture_dir: Path,
+    tmp_path: Path,
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+    renditions = [
+        CropScaleRendition(
+            crop=None,
+            scale="160:90",
+            video_codec="libx264",
+            output_path=tmp_path / "scaled.mkv",
+        ),
+        CropScaleRendition(
+            crop="w=106:h=60:x=106:y=60",
+            scale=None,
+            video_codec="libx264",
+            output_path=tmp_path / "cropped.mkv",
+        ),
+    ]
+
+    progresses: list[CropScalerRenditionProgress] = []
+
+    async def _handle_progress(progress: CropScalerRenditionProgress) -> None:
+        progresses.append(progress)
+
+    await crop_scaler.crop_scale_renditions(
+        input_path=input_file,
+        renditions=renditions,
+        progress_handler=_handle_progress,
+    )
+
+    input_media_info = await media_probe.probe(input_path=input_file)
+    for rendition, (width, height) in zip(
+        renditions,
+        [(160, 90), (106, 60)],
+        strict=True,
+    ):
+        output_media_info = await media_probe.probe(input_path=rendition.output_path)
+
+        output_video_stream = output_media_info.video_streams[0]
+        assert output_video_stream.width == width
+        assert output_video_stream.height == height
+
+        # 各出力に、オーディオトラックをストリームコピーする
+        assert output_media_info.audio_titles == input_media_info.audio_titles
+
+    # 出力ごとに、最後の進捗で全てのフレームを通知する
+    last_progresses = {
+        progress.rendition_index: progress.frame for progress in progresses
+    }
+    assert last_progresses == {0: 601, 1: 601}
+
+
+def test_parse_rendition_spec() -> None:
+    assert parse_rendition_spec("scale=1280:720,video_codec=libx264") == {
+        "scale": "1280:720",
+        "video_codec": "libx264",
+    }
+
+    # 式の中のエスケープした "," では区切らない
+    assert parse_rendition_spec(
+        r"crop=w=iw-mod(iw\,256):h=ih, scale=min(160\,iw):-2"
+    ) == {
+        "crop": r"w=iw-mod(iw\,256):h=ih",
+        "scale": r"min(160\,iw):-2",
+    }
+
+    with pytest.raises(ValueError):
+        parse_rendition_spec("scale=160:90,scale=320:180")
+
+    # エスケープしていない "," はフィルタの区切りになるため、エラーにする
+    with pytest.raises(ValueError):
+        build_crop_scale_video_filters(crop=None, scale="min(160,iw):-2")
+
+
+@pytest.mark.asyncio
+async def test_crop_scaler_renditions_expression(
+    crop_scaler: CropScaler,
+    media_probe: MediaProbe,
+    fixture_dir: Path,
+    tmp_path: Path,
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+    output_file = tmp_path / "expression.mkv"
+
+    rendition_spec = parse_rendition_spec(
+        r"crop=w=iw-mod(iw\,256):h=ih,scale=min(160\,iw):-2",
+    )
+    await crop_scaler.crop_scale_renditions(
+        input_path=input_file,
+        renditions=[
+            CropScaleRendition(
+                crop=rendition_spec["crop"],
+                scale=rendition_spec["scale"],
+                video_codec="libx264",
+                output_path=output_file,
+            ),
+        ],
+    )
+
+    # 320x180 を 256x180 に切り取り、幅 160 に縮小する
+    output_media_info = await media_probe.probe(input_path=output_file)
+    output_video_stream = output_media_info.video_streams[0]
+    assert output_video_stream.width == 160
+    assert output_video_stream.height == 112
@@ -0,0 +1,122 @@
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+
+from aoirint_matvtool.daemon.client import forward_command
+from aoirint_matvtool.daemon.server import DaemonServer
+
+
+@pytest_asyncio.fixture
+async def daemon_socket_path(
+    ffmpeg_path: str,
+    ffprobe_path: str,
+    tmp_path: Path,
+) -> AsyncIterator[Path]:
+    socket_path = tmp_path / "daemon.sock"
+    server = DaemonServer(
+        socket_path=socket_path,
+        max_jobs=1,
+        ffmpeg_path=ffmpeg_path,
+        ffprobe_path=ffprobe_path,
+        cache_dir=None,
+    )
+
+    started = asyncio.Event()
+    server_task = asyncio.create_task(server.serve_forever(started=started))
+    await started.wait()
+
+    yield socket_path
+
+    server_task.cancel()
+    await asyncio.gather(server_task, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_daemon_find_image(
+    daemon_socket_path: Path,
+    fixture_dir: Path,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    exit_code = await forward_command(
+        socket_path=daemon_socket_path,
+        command="find_image",
+        argv=["-i", "sample1.mkv", "-ref", "sample2.jpg", "-p", "none"],
+        cwd=fixture_dir,
+    )
+
+    assert exit_code == 0
+    assert "frame 445" in capsys.readouterr().out
+
+
+@pytest.mark.asyncio
+async def test_daemon_invalid_arguments(
+    daemon_socket_path: Path,
+    fixture_dir: Path,
+) -> None:
+    exit_code = await forward_command(
+        socket_path=daemon_socket_path,
+        command="slice",
+        argv=["-ss", "1", "-to", "3", "-i", "sample1.mkv", "-p", "unknown"],
+        cwd=fixture_dir,
+    )
+
+    assert exit_code == 2
+
+
+@pytest.mark.asyncio
+async def test_daemon_method_not_found(
+    daemon_socket_path: Path,
+    fixture_dir: Path,
+) -> None:
+    with pytest.raises(Exception, match="Method not found"):
+        await forward_command(
+            socket_path=daemon_socket_path,
+            command="fps",
+            argv=["-i", "sample1.mkv"],
+            cwd=fixture_dir,
+        )
+
+
+@pytest.mark.asyncio
+async def test_daemon_pipelined_requests(
+    daemon_socket_path: Path,
+) -> None:
+    reader, writer = await asyncio.open_unix_connection(str(daemon_socket_path))
+
+    num_requests = 100
+    writer.write(
+        "".join(
+            json.dumps({"jsonrpc": "2.0", "id": request_id, "method": "ping"}) + "\n"
+            for request_id in range(num_requests)
+        ).encode("utf-8"),
+    )
+    await writer.drain()
+
+    # 応答はすべて、送信用のタスクから1行ずつ届く
+    response_ids = [
+        json.loads(await reader.readline())["id"] for _ in range(num_requests)
+    ]
+
+    writer.close()
+    await writer.wait_closed()
+
+    assert sorted(response_ids) == list(range(num_requests))
+
+
+@pytest.mark.asyncio
+async def test_daemon_not_running(
+    fixture_dir: Path,
+    tmp_path: Path,
+) -> None:
+    exit_code = await forward_command(
+        socket_path=tmp_path / "not_running.sock",
+        command="find_image",
+        argv=["-i", "sample1.mkv", "-ref", "sample2.jpg"],
+        cwd=fixture_dir,
+    )
+
+    assert exit_code is None
@@ -0,0 +1,143 @@
+from pathlib import Path
+
+import pytest
+
+from aoirint_matvtool.video_utility.encoder_tuner import (
+    EncoderTuneCandidate,
+    EncoderTuner,
+    calculate_target_video_bitrate,
+    create_encoder_tune_measurement,
+    get_audio_bitrate,
+    select_encoder_tune_candidate,
+)
+from aoirint_matvtool.video_utility.media_probe import MediaInfo, MediaStream
+
+
+def test_select_encoder_tune_candidate() -> None:
+    fast = EncoderTuneCandidate(preset="veryfast", crf=23)
+    medium = EncoderTuneCandidate(preset="medium", crf=23)
+    slow = EncoderTuneCandidate(preset="slow", crf=23)
+
+    measurements = [
+        # 最も速いが、目標のビットレートを超える
+        create_encoder_tune_measurement(
+            candidate=fast,
+            frames=300,
+            cpu_seconds=1.0,
+            wall_seconds=1.0,
+            size_bytes=5_000_000,
+            duration_seconds=10.0,
+        ),
+        create_encoder_tune_measurement(
+            candidate=medium,
+            frames=300,
+            cpu_seconds=2.0,
+            wall_seconds=2.0,
+            size_bytes=2_500_000,
+            duration_seconds=10.0,
+        ),
+        create_encoder_tune_measurement(
+            candidate=slow,
+            frames=300,
+            cpu_seconds=4.0,
+            wall_seconds=4.0,
+            size_bytes=2_000_000,
+            duration_seconds=10.0,
+        ),
+    ]
+
+    assert measurements[0].encode_fps == 300.0
+    assert measurements[0].bitrate == 4_000_000.0
+
+    assert (
+        select_encoder_tune_candidate(
+            measurements=measurements,
+            target_bitrate=3_000_000,
+        )
+        == medium
+    )
+
+    # 目標を満たす候補がなければ、ビットレートが最も低い候補
+    assert (
+        select_encoder_tune_candidate(
+            measurements=measurements,
+            target_bitrate=1_000_000,
+        )
+        == slow
+    )
+
+
+def test_calculate_target_video_bitrate() -> None:
+    media_info = MediaInfo(
+        streams=[
+            MediaStream(index=0, codec_type="video"),
+            MediaStream(index=1, codec_type="audio", bit_rate="128000"),
+            # Matroska の統計タグ
+            MediaStream(index=2, codec_type="audio", tags={"BPS": "64000"}),
+            # ビットレートが不明なストリームは 0 とみなす
+            MediaStream(index=3, codec_type="audio"),
+        ],
+    )
+
+    audio_bitrate = get_audio_bitrate(media_info)
+    assert audio_bitrate == 192_000
+
+    # 10 MB / 20 秒 = 4 Mbit/s から音声の分を差し引く
+    assert (
+        calculate_target_video_bitrate(
+            target_size=10_000_000,
+            duration_seconds=20.0,
+            audio_bitrate=audio_bitrate,
+        )
+        == 3_808_000
+    )
+
+    # 音声だけで目標を超える
+    with pytest.raises(ValueError):
+        calculate_target_video_bitrate(
+            target_size=100_000,
+            duration_seconds=20.0,
+            audio_bitrate=audio_bitrate,
+        )
+
+
+@pytest.mark.asyncio
+async def test_encoder_tuner(
+    encoder_tuner: EncoderTuner,
+    fixture_dir: Path,
+    tmp_path: Path,
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+
+    candidates = [
+        EncoderTuneCandidate(preset="ultrafast", crf=18),
+        EncoderTuneCandidate(preset="ultrafast", crf=40),
+    ]
+    result = await encoder_tuner.tune(
+        input_path=input_file,
+        crop=None,
+        scale="160:90",
+        video_codec="libx264",
+        candidates=candidates,
+        target_bitrate=1_000_000_000,
+        num_samples=2,
+        sample_seconds=1.0,
+        work_dir=tmp_path,
+    )
+
+    # 各区間の中央に最も近いキーフレームから始まる
+    assert [sample.start_seconds for sample in result.samples] == pytest.approx(
+        [6.323, 17.49],
+    )
+    assert len(result.measurements) == 2
+    for measurement in result.measurements:
+        assert measurement.frames == 60
+        assert measurement.cpu_seconds > 0
+        assert measurement.duration_seconds == pytest.approx(2.0)
+
+    # CRF が大きいほど、ビットレートは下がる
+    assert result.measurements[1].bitrate < result.measurements[0].bitrate
+    assert result.selected in candidates
+
+    # サンプルの一時ファイルは残さない
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,246 @@
+import os
+import shutil
+from pathlib import Path
+from typing import Literal
+
+import pytest
+
+from aoirint_matvtool.video_utility.frame_hash_indexer import FrameHashIndexer
+from aoirint_matvtool.video_utility.image_finder import (
+    ImageFinder,
+    ImageFinderReference,
+    ImageFinderResult,
+)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("hash_type", ["dhash", "phash"])
+async def test_frame_hash_indexer(
+    frame_hash_indexer: FrameHashIndexer,
+    fixture_dir: Path,
+    tmp_path: Path,
+    hash_type: Literal["dhash", "phash"],
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+    reference_file = fixture_dir / "sample2.jpg"
+    index_file = tmp_path / "sample1.mkv.frame_hash.npz"
+
+    await frame_hash_indexer.create_index(
+        input_video_path=input_file,
+        input_video_crop=None,
+        fps=None,
+        hash_type=hash_type,
+        index_path=index_file,
+    )
+
+    results: list[ImageFinderResult] = []
+
+    async def result_handler(result: ImageFinderResult) -> None:
+        results.append(result)
+
+    await frame_hash_indexer.find_images(
+        index_path=index_file,
+        input_video_path=input_file,
+        input_video_ss=None,
+        input_video_to=None,
+        references=[
+            ImageFinderReference(
+                image_path=reference_file,
+            ),
+        ],
+        max_distance=10,
+        output_interval=1.0,
+        result_handler=result_handler,
+    )
+
+    assert [result.internal_frame for result in results] == [
+        445,
+        475,
+        505,
+        535,
+        565,
+        595,
+    ]
+    assert results[0].frame == 445
+    assert abs(results[0].time.total_seconds() - 14.856) < 0.001
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("input_video_ss", ["7.5", "12"])
+async def test_frame_hash_indexer_ss(
+    frame_hash_indexer: FrameHashIndexer,
+    image_finder: ImageFinder,
+    fixture_dir: Path,
+    tmp_path: Path,
+    input_video_ss: str,
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+    reference_file = fixture_dir / "sample2.jpg"
+    index_file = tmp_path / "sample1.mkv.frame_hash.npz"
+
+    await frame_hash_indexer.create_index(
+        input_video_path=input_file,
+        input_video_crop=None,
+        fps=None,
+        hash_type="dhash",
+        index_path=index_file,
+    )
+
+    index_results: list[ImageFinderResult] = []
+
+    async def index_result_handler(result: ImageFinderResult) -> None:
+        index_results.append(result)
+
+    await frame_hash_indexer.find_images(
+        index_path=index_file,
+        input_video_path=input_file,
+        input_video_ss=input_video_ss,
+        input_video_to=None,
+        references=[
+            ImageFinderReference(
+                image_path=reference_file,
+            ),
+        ],
+        max_distance=10,
+        output_interval=1.0,
+        result_handler=index_result_handler,
+    )
+
+    decode_results: list[ImageFinderResult] = []
+
+    async def decode_result_handler(result: ImageFinderResult) -> None:
+        decode_results.append(result)
+
+    await image_finder.find_image(
+        input_video_ss=input_video_ss,
+        input_video_to=None,
+        input_video_path=input_file,
+        input_video_crop=None,
+        reference_image_path=reference_file,
+        reference_image_crop=None,
+        fps=None,
+        output_interval=1.0,
+        result_handler=decode_result_handler,
+    )
+
+    # インデックスを使った検索でも、デコードして検索したときと同じ時刻を返す
+    assert len(index_results) != 0
+    assert len(index_results) == len(decode_results)
+    for index_result, decode_result in zip(index_results, decode_results, strict=True):
+        assert index_result.internal_frame == decode_result.internal_frame
+        assert index_result.frame == decode_result.frame
+        assert (
+            abs(
+                index_result.internal_time.total_seconds()
+                - decode_result.internal_time.total_seconds()
+            )
+            < 0.002
+        )
+        assert (
+            abs(index_result.time.total_seconds() - decode_result.time.total_seconds())
+            < 0.002
+        )
+
+
+@pytest.mark.asyncio
+async def test_frame_hash_indexer_vfr(
+    frame_hash_indexer: FrameHashIndexer,
+    image_finder: ImageFinder,
+    vfr_sample_file: Path,
+    fixture_dir: Path,
+    tmp_path: Path,
+) -> None:
+    reference_file = fixture_dir / "sample2.jpg"
+    index_file = tmp_path / "vfr_sample1.mkv.frame_hash.npz"
+
+    await frame_hash_indexer.create_index(
+        input_video_path=vfr_sample_file,
+        input_video_crop=None,
+        fps=None,
+        hash_type="dhash",
+        index_path=index_file,
+    )
+
+    index_results: list[ImageFinderResult] = []
+
+    async def index_result_handler(result: ImageFinderResult) -> None:
+        index_results.append(result)
+
+    await frame_hash_indexer.find_images(
+        index_path=index_file,
+        input_video_path=vfr_sample_file,
+        input_video_ss=None,
+        input_video_to=None,
+        references=[
+            ImageFinderReference(
+                image_path=reference_file,
+            ),
+        ],
+        max_distance=10,
+        output_interval=1.0,
+        result_handler=index_result_handler,
+    )
+
+    decode_results: list[ImageFinderResult] = []
+
+    async def decode_result_handler(result: ImageFinderResult) -> None:
+        decode_results.append(result)
+
+    await image_finder.find_image(
+        input_video_ss=None,
+        input_video_to=None,
+        input_video_path=vfr_sample_file,
+        input_video_crop=None,
+        reference_image_path=reference_file,
+        reference_image_crop=None,
+        fps=None,
+        output_interval=1.0,
+        result_handler=decode_result_handler,
+    )
+
+    # 固定フレームレートに変換するため、フレーム番号は一致しないが、時刻は一致する
+    assert len(decode_results) != 0
+    assert [
+        result.internal_time.total_seconds() for result in index_results
+    ] == pytest.approx(
+        [result.internal_time.total_seconds() for result in decode_results],
+        abs=0.002,
+    )
+
+
+@pytest.mark.asyncio
+async def test_frame_hash_indexer_outdated_index(
+    frame_hash_indexer: FrameHashIndexer,
+    fixture_dir: Path,
+    tmp_path: Path,
+) -> None:
+    input_file = tmp_path / "sample1.mkv"
+    shutil.copyfile(fixture_dir / "sample1.mkv", input_file)
+    index_file = tmp_path / "sample1.mkv.frame_hash.npz"
+
+    await frame_hash_indexer.create_index(
+        input_video_path=input_file,
+        input_video_crop=None,
+        fps=None,
+        hash_type="dhash",
+        index_path=index_file,
+    )
+
+    input_file_stat = input_file.stat()
+    os.utime(
+        input_file,
+        ns=(input_file_stat.st_atime_ns, input_file_stat.st_mtime_ns + 1_000_000_000),
+    )
+
+    with pytest.raises(ValueError):
+        await frame_hash_indexer.find_images(
+            index_path=index_file,
+            input_video_path=input_file,
+            input_video_ss=None,
+            input_video_to=None,
+            references=[
+                ImageFinderReference(
+                    image_path=fixture_dir / "sample2.jpg",
+                ),
+            ],
+        )
@@ -0,0 +1,48 @@
+from io import BytesIO
+
+import numpy as np
+
+from aoirint_matvtool.utility.frame_matcher import FrameMatcher, read_frames_into
+
+
+def test_frame_matcher_score() -> None:
+    reference_frames = np.array(
+        [
+            [[0, 0], [0, 0]],
+            [[100, 100], [100, 100]],
+        ],
+        dtype=np.uint8,
+    )
+    frame_matcher = FrameMatcher(
+        reference_frames=reference_frames,
+        thresholds=[32, 32],
+        batch_size=4,
+    )
+
+    frames = frame_matcher.create_frame_buffer()
+    assert frames.shape == (4, 2, 2, 2)
+
+    # 1フレーム目: 参照画像 0 と全画素一致、参照画像 1 とは 1 画素のみ閾値未満
+    frames[0, 0] = [[0, 0], [0, 0]]
+    frames[0, 1] = [[100, 0], [255, 0]]
+    # 2フレーム目: 参照画像 0 と 3 画素が閾値未満、参照画像 1 とは差分が大きい側も判定
+    frames[1, 0] = [[31, 31], [31, 32]]
+    frames[1, 1] = [[68, 69], [131, 132]]
+
+    scores = frame_matcher.score(frames[:2])
+
+    assert scores.tolist() == [
+        [100, 25],
+        [75, 50],
+    ]
+
+
+def test_read_frames_into() -> None:
+    frame_buffer = np.zeros((4, 1, 2, 2), dtype=np.uint8)
+
+    # 3フレームと、不完全な1フレーム分のデータ
+    data = bytes(range(14))
+    num_frames = read_frames_into(BytesIO(data), frame_buffer)
+
+    assert num_frames == 3
+    assert frame_buffer[:3].tobytes() == data[:12]
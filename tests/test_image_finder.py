@@ -1,8 +1,14 @@
 from pathlib import Path
+from typing import Literal
 
 import pytest
 
-from aoirint_matvtool.video_utility.image_finder import ImageFinder, ImageFinderResult
+from aoirint_matvtool.video_utility.image_finder import (
+    ImageFinder,
+    ImageFinderProgress,
+    ImageFinderReference,
+    ImageFinderResult,
+)
 
 
 @pytest.mark.asyncio
@@ -40,3 +46,246 @@ async def test_image_finder(
     assert first_result.time.total_seconds() == pytest.approx(14.8, abs=0.1)
     assert first_result.internal_frame == 445
     assert first_result.internal_time.total_seconds() == pytest.approx(14.8, abs=0.1)
+
+
+@pytest.mark.asyncio
+async def test_image_finder_multiple_references(
+    image_finder: ImageFinder,
+    fixture_dir: Path,
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+    reference_file = fixture_dir / "sample2.jpg"
+
+    first_results: dict[int, ImageFinderResult] = {}
+
+    async def result_handler(result: ImageFinderResult) -> None:
+        if result.reference_index not in first_results:
+            first_results[result.reference_index] = result
+
+    await image_finder.find_images(
+        input_video_ss=None,
+        input_video_to=None,
+        input_video_path=input_file,
+        references=[
+            ImageFinderReference(
+                image_path=reference_file,
+            ),
+            ImageFinderReference(
+                image_path=reference_file,
+                image_crop="w=106:h=60:x=106:y=60",
+                input_video_crop="w=106:h=60:x=106:y=60",
+                blackframe_amount=90,
+            ),
+        ],
+        fps=None,
+        blackframe_amount=95,
+        blackframe_threshold=32,
+        output_interval=0.0,
+        progress_handler=None,
+        result_handler=result_handler,
+    )
+
+    assert sorted(first_results.keys()) == [0, 1]
+    for first_result in first_results.values():
+        assert first_result.frame == 445
+        assert first_result.time.total_seconds() == pytest.approx(14.8, abs=0.1)
+
+
+async def _find_image_results(
+    image_finder: ImageFinder,
+    input_file: Path,
+    reference_file: Path,
+    jobs: int,
+    coarse_search: Literal["key_frame", "fps"] | None = None,
+    backend: Literal["blackframe", "numpy"] = "blackframe",
+) -> list[ImageFinderResult]:
+    results: list[ImageFinderResult] = []
+
+    async def result_handler(result: ImageFinderResult) -> None:
+        results.append(result)
+
+    await image_finder.find_image(
+        input_video_ss=None,
+        input_video_to=None,
+        input_video_path=input_file,
+        input_video_crop=None,
+        reference_image_path=reference_file,
+        reference_image_crop=None,
+        fps=None,
+        blackframe_amount=95,
+        blackframe_threshold=32,
+        output_interval=1.0,
+        jobs=jobs,
+        coarse_search=coarse_search,
+        backend=backend,
+        progress_handler=None,
+        result_handler=result_handler,
+    )
+
+    return results
+
+
+@pytest.mark.asyncio
+async def test_image_finder_jobs(
+    image_finder: ImageFinder,
+    fixture_dir: Path,
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+    reference_file = fixture_dir / "sample2.jpg"
+
+    single_results = await _find_image_results(
+        image_finder=image_finder,
+        input_file=input_file,
+        reference_file=reference_file,
+        jobs=1,
+    )
+    parallel_results = await _find_image_results(
+        image_finder=image_finder,
+        input_file=input_file,
+        reference_file=reference_file,
+        jobs=4,
+    )
+
+    assert len(single_results) != 0
+    assert parallel_results == single_results
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("coarse_search", ["key_frame", "fps"])
+async def test_image_finder_coarse_search(
+    image_finder: ImageFinder,
+    fixture_dir: Path,
+    coarse_search: Literal["key_frame", "fps"],
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+    reference_file = fixture_dir / "sample2.jpg"
+
+    full_results = await _find_image_results(
+        image_finder=image_finder,
+        input_file=input_file,
+        reference_file=reference_file,
+        jobs=1,
+    )
+    coarse_results = await _find_image_results(
+        image_finder=image_finder,
+        input_file=input_file,
+        reference_file=reference_file,
+        jobs=2,
+        coarse_search=coarse_search,
+    )
+
+    assert len(full_results) != 0
+    assert coarse_results == full_results
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("coarse_search", ["key_frame", "fps"])
+async def test_image_finder_coarse_search_progress(
+    image_finder: ImageFinder,
+    fixture_dir: Path,
+    coarse_search: Literal["key_frame", "fps"],
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+    reference_file = fixture_dir / "sample2.jpg"
+
+    progresses: list[ImageFinderProgress] = []
+
+    async def progress_handler(progress: ImageFinderProgress) -> None:
+        progresses.append(progress)
+
+    await image_finder.find_image(
+        input_video_ss=None,
+        input_video_to=None,
+        input_video_path=input_file,
+        input_video_crop=None,
+        reference_image_path=reference_file,
+        reference_image_crop=None,
+        fps=None,
+        jobs=2,
+        coarse_search=coarse_search,
+        progress_handler=progress_handler,
+    )
+
+    # 粗い検索から詳細な検索に移っても、進捗は巻き戻らない
+    assert len(progresses) != 0
+    internal_times = [progress.internal_time for progress in progresses]
+    assert internal_times == sorted(internal_times)
+    internal_frames = [progress.internal_frame for progress in progresses]
+    assert internal_frames == sorted(internal_frames)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("jobs", [1, 2])
+async def test_image_finder_numpy_backend(
+    image_finder: ImageFinder,
+    fixture_dir: Path,
+    jobs: int,
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+    reference_file = fixture_dir / "sample2.jpg"
+
+    blackframe_results = await _find_image_results(
+        image_finder=image_finder,
+        input_file=input_file,
+        reference_file=reference_file,
+        jobs=1,
+    )
+    numpy_results = await _find_image_results(
+        image_finder=image_finder,
+        input_file=input_file,
+        reference_file=reference_file,
+        jobs=jobs,
+        backend="numpy",
+    )
+
+    # 時刻はフレーム番号から計算するため、ミリ秒未満の誤差がある
+    assert len(blackframe_results) != 0
+    assert [result.internal_frame for result in numpy_results] == [
+        result.internal_frame for result in blackframe_results
+    ]
+    for numpy_result, blackframe_result in zip(
+        numpy_results,
+        blackframe_results,
+        strict=True,
+    ):
+        assert (
+            abs(
+                numpy_result.internal_time.total_seconds()
+                - blackframe_result.internal_time.total_seconds()
+            )
+            < 0.001
+        )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("jobs", [1, 2])
+async def test_image_finder_numpy_backend_vfr(
+    image_finder: ImageFinder,
+    vfr_sample_file: Path,
+    fixture_dir: Path,
+    jobs: int,
+) -> None:
+    reference_file = fixture_dir / "sample2.jpg"
+
+    blackframe_results = await _find_image_results(
+        image_finder=image_finder,
+        input_file=vfr_sample_file,
+        reference_file=reference_file,
+        jobs=1,
+    )
+    numpy_results = await _find_image_results(
+        image_finder=image_finder,
+        input_file=vfr_sample_file,
+        reference_file=reference_file,
+        jobs=jobs,
+        backend="numpy",
+    )
+
+    # 固定フレームレートに変換するため、フレーム番号は一致しないが、時刻は一致する
+    assert len(blackframe_results) != 0
+    assert [
+        result.internal_time.total_seconds() for result in numpy_results
+    ] == pytest.approx(
+        [result.internal_time.total_seconds() for result in blackframe_results],
+        abs=0.002,
+    )
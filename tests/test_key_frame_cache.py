@@ -0,0 +1,156 @@
+import os
+import shutil
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+
+from aoirint_matvtool.utility.key_frame_cache import KeyFrameCache
+from aoirint_matvtool.video_utility.fps_parser import FpsParser
+from aoirint_matvtool.video_utility.key_frame_parser import KeyFrameParser
+
+
+@pytest.mark.asyncio
+async def test_key_frame_cache_skips_ffprobe(
+    fps_parser: FpsParser,
+    ffprobe_path: str,
+    fixture_dir: Path,
+    tmp_path: Path,
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+    key_frame_cache = KeyFrameCache(cache_dir=tmp_path / "cache")
+
+    key_frame_parser = KeyFrameParser(
+        fps_parser=fps_parser,
+        ffprobe_path=ffprobe_path,
+        key_frame_cache=key_frame_cache,
+    )
+    key_frames = await key_frame_parser.parse_key_frames(
+        input_path=input_file,
+    )
+    assert len(key_frames) == 4
+
+    # キャッシュがあれば FFprobe を実行しない
+    cached_key_frame_parser = KeyFrameParser(
+        fps_parser=fps_parser,
+        ffprobe_path=str(tmp_path / "not_found_ffprobe"),
+        key_frame_cache=key_frame_cache,
+    )
+    cached_key_frames = await cached_key_frame_parser.parse_key_frames(
+        input_path=input_file,
+    )
+    assert cached_key_frames == key_frames
+
+
+@pytest.mark.asyncio
+async def test_key_frame_cache_packet_index(
+    fps_parser: FpsParser,
+    ffprobe_path: str,
+    fixture_dir: Path,
+    tmp_path: Path,
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+    key_frame_cache = KeyFrameCache(cache_dir=tmp_path / "cache")
+
+    key_frame_parser = KeyFrameParser(
+        fps_parser=fps_parser,
+        ffprobe_path=ffprobe_path,
+        key_frame_cache=key_frame_cache,
+    )
+    key_frame_index = await key_frame_parser.parse_key_frame_packet_index(
+        input_path=input_file,
+    )
+
+    # デコード時刻が N/A の先頭のキーフレームは、後のパケットから遡って求める
+    assert list(key_frame_index) == pytest.approx([0.023, 6.323, 10.19, 17.49])
+    assert [
+        key_frame_index.get_decode_seconds(index)
+        for index in range(len(key_frame_index))
+    ] == pytest.approx([0.023 - 2 / 30, 6.256, 10.123, 17.423], abs=0.001)
+
+    # キャッシュがあれば FFprobe を実行しない
+    cached_key_frame_parser = KeyFrameParser(
+        fps_parser=fps_parser,
+        ffprobe_path=str(tmp_path / "not_found_ffprobe"),
+        key_frame_cache=key_frame_cache,
+    )
+    cached_key_frame_index = await cached_key_frame_parser.parse_key_frame_packet_index(
+        input_path=input_file,
+    )
+    # NOTE: キャッシュの時刻はマイクロ秒単位に丸められる
+    assert list(cached_key_frame_index) == pytest.approx(list(key_frame_index))
+    assert [
+        cached_key_frame_index.get_decode_seconds(index)
+        for index in range(len(cached_key_frame_index))
+    ] == pytest.approx(
+        [
+            key_frame_index.get_decode_seconds(index)
+            for index in range(len(key_frame_index))
+        ],
+        abs=0.000001,
+    )
+
+
+def test_key_frame_cache_invalidated_by_mtime(
+    fixture_dir: Path,
+    tmp_path: Path,
+) -> None:
+    input_file = tmp_path / "sample1.mkv"
+    shutil.copyfile(fixture_dir / "sample1.mkv", input_file)
+
+    key_frame_cache = KeyFrameCache(cache_dir=tmp_path / "cache")
+    key_frame_cache.set(
+        input_path=input_file,
+        method="auto",
+        key_frames=[timedelta(seconds=0.023)],
+    )
+    assert key_frame_cache.get(input_path=input_file, method="auto") == [
+        timedelta(seconds=0.023),
+    ]
+
+    input_file_stat = input_file.stat()
+    os.utime(
+        input_file,
+        ns=(input_file_stat.st_atime_ns, input_file_stat.st_mtime_ns + 1_000_000_000),
+    )
+    assert key_frame_cache.get(input_path=input_file, method="auto") is None
+
+
+def test_key_frame_cache_lru_eviction(
+    tmp_path: Path,
+) -> None:
+    input_files: list[Path] = []
+    for index in range(3):
+        input_file = tmp_path / f"input{index}.bin"
+        input_file.write_bytes(bytes([index]) * 16)
+        input_files.append(input_file)
+
+    key_frames = [timedelta(seconds=seconds) for seconds in range(100)]
+
+    # 2件分だけ保持できる大きさにする
+    probe_cache = KeyFrameCache(cache_dir=tmp_path / "probe")
+    probe_cache.set(input_path=input_files[0], method="auto", key_frames=key_frames)
+    entry_size = sum(
+        path.stat().st_size for path in (tmp_path / "probe").rglob("*.json")
+    )
+
+    key_frame_cache = KeyFrameCache(
+        cache_dir=tmp_path / "cache",
+        max_size_bytes=entry_size * 2 + entry_size // 2,
+    )
+    key_frame_cache.set(input_path=input_files[0], method="auto", key_frames=key_frames)
+    key_frame_cache.set(input_path=input_files[1], method="auto", key_frames=key_frames)
+
+    # input0 を使うと、最後に使われたのが最も古い input1 が削除される
+    entry_paths = sorted((tmp_path / "cache").rglob("*.json"))
+    for entry_path in entry_paths:
+        os.utime(entry_path, ns=(0, 0))
+    assert key_frame_cache.get(input_path=input_files[0], method="auto") is not None
+
+    key_frame_cache.set(input_path=input_files[2], method="auto", key_frames=key_frames)
+
+    # メモリ上のエントリを使わないよう、別のインスタンスで確認する
+    key_frame_cache = KeyFrameCache(cache_dir=tmp_path / "cache")
+    assert key_frame_cache.get(input_path=input_files[0], method="auto") is not None
+    assert key_frame_cache.get(input_path=input_files[1], method="auto") is None
+    assert key_frame_cache.get(input_path=input_files[2], method="auto") is not None
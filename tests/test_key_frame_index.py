@@ -0,0 +1,96 @@
+from aoirint_matvtool.utility.key_frame_index import KeyFrameIndex
+
+KEY_FRAME_SECONDS_LIST = [0.023, 6.323, 10.19, 17.49]
+
+
+def test_key_frame_index_find() -> None:
+    key_frame_index = KeyFrameIndex(reversed(KEY_FRAME_SECONDS_LIST))
+
+    assert list(key_frame_index) == KEY_FRAME_SECONDS_LIST
+
+    assert key_frame_index.find_before(0.023) is None
+    assert key_frame_index.find_before(0.023, inclusive=True) == 0.023
+    assert key_frame_index.find_before(10.19) == 6.323
+    assert key_frame_index.find_before(100.0) == 17.49
+
+    assert key_frame_index.find_after(0.0) == 0.023
+    assert key_frame_index.find_after(6.323) == 10.19
+    assert key_frame_index.find_after(6.323, inclusive=True) == 6.323
+    assert key_frame_index.find_after(17.49) is None
+
+    assert key_frame_index.find_nearest(8.0) == 6.323
+    assert key_frame_index.find_nearest(9.0) == 10.19
+    assert key_frame_index.find_nearest(-1.0) == 0.023
+    assert KeyFrameIndex([]).find_nearest(1.0) is None
+
+    assert key_frame_index.find_enclosing_gop(0.0) == (None, 0.023)
+    assert key_frame_index.find_enclosing_gop(6.323) == (6.323, 10.19)
+    assert key_frame_index.find_enclosing_gop(20.0) == (17.49, None)
+
+
+def test_key_frame_index_slice() -> None:
+    key_frame_index = KeyFrameIndex(KEY_FRAME_SECONDS_LIST)
+
+    assert list(key_frame_index.slice(0.023, 17.49)) == [6.323, 10.19]
+    assert list(key_frame_index.slice(None, 10.0)) == [0.023, 6.323]
+    assert list(key_frame_index.slice(10.0, None)) == [10.19, 17.49]
+
+
+def test_key_frame_index_select_evenly_spaced() -> None:
+    key_frame_index = KeyFrameIndex(KEY_FRAME_SECONDS_LIST)
+
+    # 区間の中央 2.5・7.5・12.5・17.5 秒に最も近いキーフレーム（重複を除く）
+    assert key_frame_index.select_evenly_spaced(
+        duration_seconds=20.0,
+        num_samples=4,
+    ) == [0.023, 6.323, 10.19, 17.49]
+    assert key_frame_index.select_evenly_spaced(
+        duration_seconds=20.0,
+        num_samples=2,
+    ) == [6.323, 17.49]
+    assert (
+        KeyFrameIndex([]).select_evenly_spaced(
+            duration_seconds=20.0,
+            num_samples=2,
+        )
+        == []
+    )
+
+
+def test_key_frame_index_fit_times() -> None:
+    key_frame_index = KeyFrameIndex(KEY_FRAME_SECONDS_LIST)
+
+    seconds_list = [12.0, 0.0, 6.323, 6.5, 0.5, 20.0, 12.0]
+
+    # 1つずつ検索した結果と一致する
+    assert key_frame_index.fit_times(seconds_list) == [
+        key_frame_index.find_before(seconds) or 0.0 for seconds in seconds_list
+    ]
+    assert key_frame_index.fit_indexes(seconds_list) == [2, -1, 0, 1, 0, 3, 2]
+
+    assert KeyFrameIndex([]).fit_times([1.0]) == [0.0]
+    assert KeyFrameIndex([]).fit_indexes([1.0]) == [-1]
+
+
+def test_key_frame_index_decode_seconds() -> None:
+    key_frame_index = KeyFrameIndex(
+        reversed(KEY_FRAME_SECONDS_LIST),
+        reversed([-0.044, 6.256, 10.123, 17.423]),
+    )
+
+    # デコード時刻は、表示時刻と同じ順に並べ替えて保持する
+    assert key_frame_index.has_decode_seconds
+    assert key_frame_index.get_decode_seconds(1) == 6.256
+    assert not KeyFrameIndex(KEY_FRAME_SECONDS_LIST).has_decode_seconds
+    assert KeyFrameIndex(KEY_FRAME_SECONDS_LIST).get_decode_seconds(1) is None
+
+    shifted_key_frame_index = key_frame_index.shift(-100.0)
+    assert shifted_key_frame_index[1] == 6.323 - 100.0
+    assert shifted_key_frame_index.get_decode_seconds(1) == 6.256 - 100.0
+
+    sliced_key_frame_index = key_frame_index.slice(
+        start_seconds=1.0,
+        end_seconds=None,
+    )
+    assert list(sliced_key_frame_index) == [6.323, 10.19, 17.49]
+    assert sliced_key_frame_index.get_decode_seconds(0) == 6.256
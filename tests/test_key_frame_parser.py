@@ -1,8 +1,11 @@
+from datetime import timedelta
 from pathlib import Path
+from typing import Literal
 
 import pytest
 
 from aoirint_matvtool.video_utility.key_frame_parser import KeyFrameParser
+from aoirint_matvtool.video_utility.media_probe import MediaProbe
 
 
 @pytest.mark.asyncio
@@ -25,3 +28,99 @@ async def test_key_frame_parser(
         pytest.approx(10.190, abs=0.001),
         pytest.approx(17.490, abs=0.001),
     ]
+
+
+@pytest.mark.asyncio
+async def test_key_frame_parser_packet_and_frame_agree(
+    key_frame_parser: KeyFrameParser,
+    fixture_dir: Path,
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+
+    packet_key_frames = await key_frame_parser.parse_key_frames(
+        input_path=input_file,
+        method="packet",
+    )
+    frame_key_frames = await key_frame_parser.parse_key_frames(
+        input_path=input_file,
+        method="frame",
+    )
+
+    assert len(packet_key_frames) != 0
+    assert packet_key_frames == frame_key_frames
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("time_seconds", "expected_seconds"),
+    [
+        (0.0, None),
+        (0.023, None),
+        (0.5, 0.023),
+        (6.323, 0.023),
+        (6.5, 6.323),
+        (12.0, 10.190),
+        (20.0, 17.490),
+    ],
+)
+async def test_key_frame_parser_key_frame_before(
+    key_frame_parser: KeyFrameParser,
+    fixture_dir: Path,
+    time_seconds: float,
+    expected_seconds: float | None,
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+
+    # 範囲を広げながら読み直す場合も確認するため、狭い範囲から読み込む
+    key_frame = await key_frame_parser.parse_key_frame_before(
+        input_path=input_file,
+        time=timedelta(seconds=time_seconds),
+        window=timedelta(seconds=0.5),
+    )
+
+    if expected_seconds is None:
+        assert key_frame is None
+    else:
+        assert key_frame is not None
+        assert key_frame.total_seconds() == pytest.approx(expected_seconds, abs=0.001)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("method", ["auto", "packet", "frame"])
+async def test_key_frame_parser_iterate_key_frames(
+    key_frame_parser: KeyFrameParser,
+    fixture_dir: Path,
+    method: Literal["auto", "packet", "frame"],
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+
+    key_frames = [
+        key_frame
+        async for key_frame in key_frame_parser.iterate_key_frames(
+            input_path=input_file,
+            method=method,
+        )
+    ]
+
+    assert key_frames == await key_frame_parser.parse_key_frames(
+        input_path=input_file,
+        method=method,
+    )
+    assert key_frames == sorted(key_frames)
+
+
+@pytest.mark.asyncio
+async def test_key_frame_parser_key_frame_index_relative_to_start(
+    key_frame_parser: KeyFrameParser,
+    media_probe: MediaProbe,
+    shifted_sample_file: Path,
+) -> None:
+    key_frame_index = await key_frame_parser.parse_key_frame_index_relative_to_start(
+        input_path=shifted_sample_file,
+        media_probe=media_probe,
+    )
+
+    assert list(key_frame_index) == pytest.approx(
+        [0.023, 6.323, 10.190, 17.490],
+        abs=0.001,
+    )
@@ -0,0 +1,67 @@
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from aoirint_matvtool.video_utility.media_probe import MediaProbe
+
+
+@pytest.mark.asyncio
+async def test_media_probe(
+    media_probe: MediaProbe,
+    fixture_dir: Path,
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+
+    media_info = await media_probe.probe(
+        input_path=input_file,
+    )
+
+    assert media_info.fps == pytest.approx(30.0, abs=0.1)
+    assert media_info.duration is not None
+    assert media_info.duration.total_seconds() == pytest.approx(20.0, abs=0.1)
+    assert len(media_info.video_streams) == 1
+    assert media_info.video_streams[0].width == 320
+    assert media_info.video_streams[0].height == 180
+    assert media_info.audio_titles == [
+        "Sine 262Hz",
+        "Sine 294Hz",
+        "Sine 330Hz",
+    ]
+
+    # 同じファイルは再度 FFprobe を実行しない
+    assert await media_probe.probe(input_path=input_file) is media_info
+
+
+@pytest.mark.asyncio
+async def test_media_probe_disk_cache(
+    ffprobe_path: str,
+    fixture_dir: Path,
+    tmp_path: Path,
+) -> None:
+    input_file = tmp_path / "sample1.mkv"
+    shutil.copyfile(fixture_dir / "sample1.mkv", input_file)
+
+    cache_dir = tmp_path / "cache"
+
+    media_info = await MediaProbe(
+        ffprobe_path=ffprobe_path,
+        cache_dir=cache_dir,
+    ).probe(input_path=input_file)
+
+    # キャッシュがあれば FFprobe を実行しない
+    cached_media_probe = MediaProbe(
+        ffprobe_path=str(tmp_path / "not_found_ffprobe"),
+        cache_dir=cache_dir,
+    )
+    assert await cached_media_probe.probe(input_path=input_file) == media_info
+
+    # ファイルが更新されたら、キャッシュを使わない
+    input_file_stat = input_file.stat()
+    os.utime(
+        input_file,
+        ns=(input_file_stat.st_atime_ns, input_file_stat.st_mtime_ns + 1_000_000_000),
+    )
+    with pytest.raises(FileNotFoundError):
+        await cached_media_probe.probe(input_path=input_file)
@@ -0,0 +1,149 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+from aoirint_matvtool.video_utility.chunk_work_queue import ChunkWorkQueue
+from aoirint_matvtool.video_utility.media_probe import MediaProbe
+from aoirint_matvtool.video_utility.parallel_crop_scaler import ParallelCropScaler
+
+
+async def count_video_frames(ffprobe_path: str, input_path: Path) -> int:
+    proc = await asyncio.create_subprocess_exec(
+        ffprobe_path,
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-count_frames",
+        "-show_entries",
+        "stream=nb_read_frames",
+        "-of",
+        "csv=p=0",
+        str(input_path),
+        stdout=asyncio.subprocess.PIPE,
+    )
+    stdout, _ = await proc.communicate()
+    return int(stdout.decode("utf-8").strip())
+
+
+@pytest.mark.asyncio
+async def test_parallel_crop_scaler(
+    parallel_crop_scaler: ParallelCropScaler,
+    media_probe: MediaProbe,
+    ffprobe_path: str,
+    fixture_dir: Path,
+    tmp_path: Path,
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+    output_file = tmp_path / "output.mkv"
+
+    # キーフレーム 0.023, 6.323, 10.19, 17.49 のうち、6.323 と 10.19 で3つに分割する
+    await parallel_crop_scaler.crop_scale_parallel(
+        input_path=input_file,
+        crop="w=106:h=60:x=106:y=60",  # 320x180 の中央部分をクロップ
+        scale="160:90",  # 160x90 にリサイズ
+        video_codec="libx264",
+        output_path=output_file,
+        jobs=3,
+    )
+
+    assert await count_video_frames(ffprobe_path, output_file) == 601
+
+    input_media_info = await media_probe.probe(input_path=input_file)
+    output_media_info = await media_probe.probe(input_path=output_file)
+
+    assert input_media_info.duration is not None
+    assert output_media_info.duration is not None
+    assert (
+        abs(
+            output_media_info.duration.total_seconds()
+            - input_media_info.duration.total_seconds()
+        )
+        < 0.001
+    )
+
+    output_video_stream = output_media_info.video_streams[0]
+    assert output_video_stream.width == 160
+    assert output_video_stream.height == 90
+
+    # オーディオトラックはストリームコピーする
+    assert output_media_info.audio_titles == input_media_info.audio_titles
+
+
+@pytest.mark.asyncio
+async def test_crop_scale_distributed(
+    parallel_crop_scaler: ParallelCropScaler,
+    media_probe: MediaProbe,
+    ffmpeg_path: str,
+    ffprobe_path: str,
+    fixture_dir: Path,
+    tmp_path: Path,
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+    output_file = tmp_path / "output.mkv"
+    spool_dir = tmp_path / "spool"
+    work_queue = ChunkWorkQueue(spool_dir=spool_dir)
+
+    coordinator_task = asyncio.create_task(
+        parallel_crop_scaler.crop_scale_distributed(
+            input_path=input_file,
+            crop=None,
+            scale="160:90",
+            video_codec="libx264",
+            output_path=output_file,
+            num_chunks=3,
+            work_queue=work_queue,
+            lease_seconds=60.0,
+            poll_interval_seconds=0.1,
+        ),
+    )
+
+    while len(list((spool_dir / "pending").glob("*.json"))) < 3:
+        assert not coordinator_task.done()
+        await asyncio.sleep(0.1)
+
+    # 複数のワーカープロセスで、キューのタスクを分担する
+    worker_processes = [
+        await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-m",
+            "aoirint_matvtool",
+            "--ffmpeg_path",
+            ffmpeg_path,
+            "--ffprobe_path",
+            ffprobe_path,
+            "--no_cache",
+            "worker",
+            "--exit_when_idle",
+            str(spool_dir),
+            cwd=Path(__file__).parent.parent,
+        )
+        for _ in range(3)
+    ]
+    returncodes = await asyncio.gather(
+        *(worker_process.wait() for worker_process in worker_processes),
+    )
+    assert returncodes == [0, 0, 0]
+
+    await asyncio.wait_for(coordinator_task, timeout=30.0)
+
+    assert await count_video_frames(ffprobe_path, output_file) == 601
+
+    input_media_info = await media_probe.probe(input_path=input_file)
+    output_media_info = await media_probe.probe(input_path=output_file)
+    assert input_media_info.duration is not None
+    assert output_media_info.duration is not None
+    assert (
+        abs(
+            output_media_info.duration.total_seconds()
+            - input_media_info.duration.total_seconds()
+        )
+        < 0.001
+    )
+    assert output_media_info.audio_titles == input_media_info.audio_titles
+
+    # 完了したジョブのタスク・チャンクは残さない
+    assert list((spool_dir / "done").iterdir()) == []
+    assert list((spool_dir / "jobs").iterdir()) == []
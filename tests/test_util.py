@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+import pytest
+
+from aoirint_matvtool.util import (
+    format_timedelta_as_time_unit_syntax_string,
+    parse_bitrate_string,
+    parse_ffmpeg_time_unit_syntax,
+    parse_size_string,
+)
+
+
+@pytest.mark.parametrize(
+    ("string", "expected"),
+    [
+        ("00:01:02", timedelta(minutes=1, seconds=2)),
+        ("00:01:02.5", timedelta(minutes=1, seconds=2, milliseconds=500)),
+        ("01:00:00.040000", timedelta(hours=1, milliseconds=40)),
+        ("62", timedelta(minutes=1, seconds=2)),
+        ("62.25", timedelta(minutes=1, seconds=2, milliseconds=250)),
+        ("90000", timedelta(hours=25)),
+    ],
+)
+def test_parse_ffmpeg_time_unit_syntax(
+    string: str,
+    expected: timedelta,
+) -> None:
+    assert parse_ffmpeg_time_unit_syntax(string).to_timedelta() == expected
+
+
+@pytest.mark.parametrize(
+    ("string", "expected"),
+    [
+        # 小数部の先頭の 0 を落とさない
+        ("00:00:01.05", timedelta(seconds=1, milliseconds=50)),
+        ("00:00:01.000001", timedelta(seconds=1, microseconds=1)),
+        ("0.05", timedelta(milliseconds=50)),
+        # 秒の形式でも小数部を読み捨てない
+        ("1.5", timedelta(seconds=1, milliseconds=500)),
+        ("12.023", timedelta(seconds=12, milliseconds=23)),
+    ],
+)
+def test_parse_ffmpeg_time_unit_syntax_fractional_seconds(
+    string: str,
+    expected: timedelta,
+) -> None:
+    assert parse_ffmpeg_time_unit_syntax(string).to_timedelta() == expected
+
+
+@pytest.mark.parametrize(
+    ("td", "expected"),
+    [
+        (timedelta(minutes=1, seconds=2, milliseconds=500), "00:01:02.500000"),
+        (timedelta(hours=25, microseconds=1), "25:00:00.000001"),
+    ],
+)
+def test_format_timedelta_as_time_unit_syntax_string(
+    td: timedelta,
+    expected: str,
+) -> None:
+    assert format_timedelta_as_time_unit_syntax_string(td) == expected
+    assert parse_ffmpeg_time_unit_syntax(expected).to_timedelta() == td
+
+
+@pytest.mark.parametrize(
+    ("string", "expected"),
+    [
+        ("100", 100),
+        ("1.5K", 1536),
+        ("500M", 500 * 1024**2),
+        ("2G", 2 * 1024**3),
+        ("2GiB", 2 * 1024**3),
+    ],
+)
+def test_parse_size_string(
+    string: str,
+    expected: int,
+) -> None:
+    assert parse_size_string(string) == expected
+
+
+@pytest.mark.parametrize(
+    ("string", "expected"),
+    [
+        ("800000", 800000),
+        ("800k", 800000),
+        ("4M", 4000000),
+        ("2.5Mbps", 2500000),
+    ],
+)
+def test_parse_bitrate_string(
+    string: str,
+    expected: int,
+) -> None:
+    assert parse_bitrate_string(string) == expected
@@ -1,8 +1,39 @@
+import asyncio
 from pathlib import Path
+from typing import Any
 
 import pytest
 
-from aoirint_matvtool.video_utility.video_slicer import VideoSlicer
+from aoirint_matvtool.utility.key_frame_index import KeyFrameIndex
+from aoirint_matvtool.video_utility.key_frame_parser import KeyFrameParser
+from aoirint_matvtool.video_utility.video_slicer import (
+    VideoSlicer,
+    VideoSlicerCut,
+    VideoSlicerCutProgress,
+    VideoSlicerCutRange,
+)
+
+
+async def read_video_frame_hashes(ffmpeg_path: str, input_path: Path) -> list[str]:
+    proc = await asyncio.create_subprocess_exec(
+        ffmpeg_path,
+        "-v",
+        "error",
+        "-i",
+        str(input_path),
+        "-map",
+        "0:v:0",
+        "-f",
+        "framemd5",
+        "-",
+        stdout=asyncio.subprocess.PIPE,
+    )
+    stdout, _ = await proc.communicate()
+    return [
+        line.split(",")[-1].strip()
+        for line in stdout.decode("utf-8").splitlines()
+        if not line.startswith("#")
+    ]
 
 
 @pytest.mark.asyncio
@@ -23,3 +54,198 @@ async def test_video_slicer(
 
     assert output_file.exists()
     # TODO: 映像の比較
+
+
+@pytest.mark.asyncio
+async def test_video_slicer_cuts(
+    video_slicer: VideoSlicer,
+    fixture_dir: Path,
+    tmp_path: Path,
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+    cuts = [
+        VideoSlicerCut(ss="1", to="3", output_path=tmp_path / "output1.mkv"),
+        VideoSlicerCut(ss="7", to="12", output_path=tmp_path / "output2.mkv"),
+        VideoSlicerCut(ss="00:00:11", to="15.5", output_path=tmp_path / "output3.mkv"),
+    ]
+
+    progresses: list[VideoSlicerCutProgress] = []
+
+    async def progress_handler(progress: VideoSlicerCutProgress) -> None:
+        progresses.append(progress)
+
+    await video_slicer.slice_video_cuts(
+        input_path=input_file,
+        cuts=cuts,
+        progress_handler=progress_handler,
+    )
+
+    for cut in cuts:
+        assert cut.output_path.exists()
+
+    # 範囲ごとに、終了時刻までの進捗を報告する
+    last_progresses = {progress.cut_index: progress for progress in progresses}
+    assert sorted(last_progresses) == [0, 1, 2]
+    assert last_progresses[1].time.total_seconds() == pytest.approx(12.0)
+    # 7秒の前のキーフレーム（6.323秒）から切り出す
+    assert last_progresses[1].internal_time.total_seconds() == pytest.approx(5.677)
+
+
+@pytest.mark.asyncio
+async def test_video_slicer_cuts_shifted_start_time(
+    video_slicer: VideoSlicer,
+    ffmpeg_path: str,
+    shifted_sample_file: Path,
+    tmp_path: Path,
+) -> None:
+    output_file = tmp_path / "output.mkv"
+
+    progresses: list[VideoSlicerCutProgress] = []
+
+    async def progress_handler(progress: VideoSlicerCutProgress) -> None:
+        progresses.append(progress)
+
+    # 開始時刻が 100 秒の入力でも、-ss と同じく入力の開始時刻からの時刻で切り出す
+    await video_slicer.slice_video_cuts(
+        input_path=shifted_sample_file,
+        cuts=[VideoSlicerCut(ss="7", to="12", output_path=output_file)],
+        progress_handler=progress_handler,
+    )
+
+    assert progresses[-1].internal_time.total_seconds() == pytest.approx(5.677)
+
+    # 7秒の前のキーフレーム（開始時刻から 6.323秒、190 フレーム目）から出力する
+    input_hashes = await read_video_frame_hashes(ffmpeg_path, shifted_sample_file)
+    output_hashes = await read_video_frame_hashes(ffmpeg_path, output_file)
+    assert output_hashes[0] == input_hashes[189]
+
+
+@pytest.mark.asyncio
+async def test_video_slicer_cuts_invalid_range(
+    video_slicer: VideoSlicer,
+    fixture_dir: Path,
+    tmp_path: Path,
+) -> None:
+    with pytest.raises(ValueError, match="Specify to after ss"):
+        await video_slicer.slice_video_cuts(
+            input_path=fixture_dir / "sample1.mkv",
+            cuts=[
+                VideoSlicerCut(ss="3", to="1", output_path=tmp_path / "output.mkv"),
+            ],
+        )
+
+
+@pytest.mark.asyncio
+async def test_video_slicer_probe_cut_ranges(
+    video_slicer: VideoSlicer,
+    fixture_dir: Path,
+    tmp_path: Path,
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+    ss_seconds_list = [1.0, 7.0, 11.0, 18.0, 7.0]
+    end_seconds_list = [3.0, 12.0, 15.5, 19.0, 8.0]
+    output_paths = [tmp_path / f"output{index}.mkv" for index in range(5)]
+
+    expected_cut_ranges = [
+        await video_slicer.probe_cut_range(
+            input_path=input_file,
+            ss_seconds=ss_seconds,
+            end_seconds=end_seconds,
+            output_path=output_path,
+            input_video_fps=30.0,
+        )
+        for ss_seconds, end_seconds, output_path in zip(
+            ss_seconds_list,
+            end_seconds_list,
+            output_paths,
+            strict=True,
+        )
+    ]
+
+    # キーフレームのインデックスから求め、範囲ごとに FFprobe を実行しない
+    async def _fail_probe_cut_range(**kwargs: Any) -> VideoSlicerCutRange:
+        raise AssertionError("probe_cut_range must not be called.")
+
+    video_slicer.probe_cut_range = _fail_probe_cut_range  # type: ignore[method-assign,assignment]
+
+    cut_ranges = await video_slicer.probe_cut_ranges(
+        input_path=input_file,
+        ss_seconds_list=ss_seconds_list,
+        end_seconds_list=end_seconds_list,
+        output_paths=output_paths,
+        input_video_fps=30.0,
+    )
+
+    # 範囲の順に、ss の前のキーフレームと、そのデコード時刻から始まる範囲を返す
+    assert [cut_range.key_frame_seconds for cut_range in cut_ranges] == [
+        pytest.approx(0.023),
+        pytest.approx(6.323),
+        pytest.approx(10.19),
+        pytest.approx(17.49),
+        pytest.approx(6.323),
+    ]
+    for cut_range, expected_cut_range in zip(
+        cut_ranges,
+        expected_cut_ranges,
+        strict=True,
+    ):
+        assert cut_range.output_path == expected_cut_range.output_path
+        assert cut_range.end_seconds == expected_cut_range.end_seconds
+        if expected_cut_range.start_seconds is None:
+            assert cut_range.start_seconds is None
+        else:
+            assert cut_range.start_seconds == pytest.approx(
+                expected_cut_range.start_seconds,
+                abs=0.001,
+            )
+
+
+@pytest.mark.asyncio
+async def test_video_slicer_probe_cut_ranges_without_decode_times(
+    video_slicer: VideoSlicer,
+    key_frame_parser: KeyFrameParser,
+    fixture_dir: Path,
+    tmp_path: Path,
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+
+    # パケットからデコード時刻を取得できない入力を再現する
+    async def _parse_key_frame_packet_index(input_path: Path) -> KeyFrameIndex:
+        return await key_frame_parser.parse_key_frame_index(input_path=input_path)
+
+    key_frame_parser.parse_key_frame_packet_index = _parse_key_frame_packet_index  # type: ignore[method-assign]
+
+    num_running_probes = 0
+    max_running_probes = 0
+    probe_cut_range = video_slicer.probe_cut_range
+
+    async def _count_probe_cut_range(**kwargs: Any) -> VideoSlicerCutRange:
+        nonlocal num_running_probes, max_running_probes
+
+        num_running_probes += 1
+        max_running_probes = max(max_running_probes, num_running_probes)
+        try:
+            return await probe_cut_range(**kwargs)
+        finally:
+            num_running_probes -= 1
+
+    video_slicer.probe_cut_range = _count_probe_cut_range  # type: ignore[method-assign,assignment]
+
+    cut_ranges = await video_slicer.probe_cut_ranges(
+        input_path=input_file,
+        ss_seconds_list=[1.0, 7.0, 11.0, 18.0, 7.0],
+        end_seconds_list=[3.0, 12.0, 15.5, 19.0, 8.0],
+        output_paths=[tmp_path / f"output{index}.mkv" for index in range(5)],
+        input_video_fps=30.0,
+        max_jobs=2,
+    )
+
+    # 範囲ごとに FFprobe で確認し、同時に実行する FFprobe は max_jobs 個まで
+    assert max_running_probes == 2
+    assert [cut_range.key_frame_seconds for cut_range in cut_ranges] == [
+        pytest.approx(0.023),
+        pytest.approx(6.323),
+        pytest.approx(10.19),
+        pytest.approx(17.49),
+        pytest.approx(6.323),
+    ]
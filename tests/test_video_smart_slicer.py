@@ -0,0 +1,104 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from aoirint_matvtool.video_utility.media_probe import MediaProbe
+from aoirint_matvtool.video_utility.video_smart_slicer import VideoSmartSlicer
+
+
+async def read_video_frame_hashes(ffmpeg_path: str, input_path: Path) -> list[str]:
+    proc = await asyncio.create_subprocess_exec(
+        ffmpeg_path,
+        "-v",
+        "error",
+        "-i",
+        str(input_path),
+        "-map",
+        "0:v:0",
+        "-f",
+        "framemd5",
+        "-",
+        stdout=asyncio.subprocess.PIPE,
+    )
+    stdout, _ = await proc.communicate()
+    return [
+        line.split(",")[-1].strip()
+        for line in stdout.decode("utf-8").splitlines()
+        if not line.startswith("#")
+    ]
+
+
+@pytest.mark.asyncio
+async def test_video_smart_slicer(
+    video_smart_slicer: VideoSmartSlicer,
+    media_probe: MediaProbe,
+    ffmpeg_path: str,
+    fixture_dir: Path,
+    tmp_path: Path,
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+    output_file = tmp_path / "output.mkv"
+
+    await video_smart_slicer.slice_video_accurate(
+        ss="3",
+        to="14",
+        input_path=input_file,
+        output_path=output_file,
+    )
+
+    # 3秒から14秒の前までの、30fps の 330 フレーム
+    output_hashes = await read_video_frame_hashes(ffmpeg_path, output_file)
+    assert len(output_hashes) == 330
+
+    # キーフレーム 6.323秒から 10.19秒の前までは、再エンコードせずにコピーする
+    input_hashes = await read_video_frame_hashes(ffmpeg_path, input_file)
+    assert output_hashes[99:215] == input_hashes[189:305]
+
+    output_media_info = await media_probe.probe(input_path=output_file)
+    assert output_media_info.audio_titles == ["Sine 262Hz", "Sine 294Hz", "Sine 330Hz"]
+
+
+@pytest.mark.asyncio
+async def test_video_smart_slicer_within_gop(
+    video_smart_slicer: VideoSmartSlicer,
+    ffmpeg_path: str,
+    fixture_dir: Path,
+    tmp_path: Path,
+) -> None:
+    output_file = tmp_path / "output.mkv"
+
+    # キーフレームを含まない範囲は、全体を再エンコードする
+    await video_smart_slicer.slice_video_accurate(
+        ss="7",
+        to="9",
+        input_path=fixture_dir / "sample1.mkv",
+        output_path=output_file,
+    )
+
+    assert len(await read_video_frame_hashes(ffmpeg_path, output_file)) == 60
+
+
+@pytest.mark.asyncio
+async def test_video_smart_slicer_shifted_start_time(
+    video_smart_slicer: VideoSmartSlicer,
+    ffmpeg_path: str,
+    shifted_sample_file: Path,
+    tmp_path: Path,
+) -> None:
+    output_file = tmp_path / "output.mkv"
+
+    # 開始時刻が 100 秒の入力でも、-ss・-to と同じく入力の開始時刻からの時刻で切り出す
+    await video_smart_slicer.slice_video_accurate(
+        ss="3",
+        to="14",
+        input_path=shifted_sample_file,
+        output_path=output_file,
+    )
+
+    output_hashes = await read_video_frame_hashes(ffmpeg_path, output_file)
+    assert len(output_hashes) == 330
+
+    input_hashes = await read_video_frame_hashes(ffmpeg_path, shifted_sample_file)
+    # キーフレーム 6.323秒から 10.19秒の前までは、再エンコードせずにコピーする
+    assert output_hashes[99:215] == input_hashes[189:305]
@@ -0,0 +1,116 @@
+import asyncio
+import csv
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+
+from aoirint_matvtool.utility.key_frame_index import KeyFrameIndex
+from aoirint_matvtool.video_utility.video_splitter import (
+    VideoSplitter,
+    select_split_key_frames,
+)
+
+
+async def count_video_packets(ffprobe_path: str, input_path: Path) -> int:
+    proc = await asyncio.create_subprocess_exec(
+        ffprobe_path,
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-count_packets",
+        "-show_entries",
+        "stream=nb_read_packets",
+        "-of",
+        "csv=p=0",
+        str(input_path),
+        stdout=asyncio.subprocess.PIPE,
+    )
+    stdout, _ = await proc.communicate()
+    return int(stdout.decode("utf-8").strip())
+
+
+def test_select_split_key_frames() -> None:
+    key_frame_index = KeyFrameIndex([0.0, 2.0, 4.0, 9.0, 10.0, 11.0])
+
+    assert select_split_key_frames(
+        key_frame_index=key_frame_index,
+        duration_seconds=10.0,
+        chunk_seconds=3.5,
+    ) == [4.0, 9.0]
+
+
+@pytest.mark.asyncio
+async def test_video_splitter(
+    video_splitter: VideoSplitter,
+    ffprobe_path: str,
+    fixture_dir: Path,
+    tmp_path: Path,
+) -> None:
+    input_file = fixture_dir / "sample1.mkv"
+    manifest_file = tmp_path / "manifest.csv"
+
+    chunks = await video_splitter.split_video(
+        input_path=input_file,
+        output_dir=tmp_path,
+        chunk_duration=timedelta(seconds=6),
+        chunk_size_bytes=None,
+        manifest_path=manifest_file,
+    )
+
+    # 6秒・12秒・18秒に最も近いキーフレームで分割する
+    assert [chunk.key_frame_time.total_seconds() for chunk in chunks[1:]] == [
+        6.323,
+        10.19,
+        17.49,
+    ]
+
+    # 映像のパケットを重複・欠落なく分割する
+    chunk_packet_counts = [
+        await count_video_packets(ffprobe_path, chunk.output_path) for chunk in chunks
+    ]
+    assert sum(chunk_packet_counts) == await count_video_packets(
+        ffprobe_path,
+        input_file,
+    )
+
+    with manifest_file.open("r", encoding="utf-8", newline="") as fp:
+        rows = list(csv.DictReader(fp))
+
+    assert [row["output"] for row in rows] == [
+        chunk.output_path.name for chunk in chunks
+    ]
+    assert rows[0]["start_time"] == "0.000000"
+    assert rows[1]["start_time"] == rows[0]["end_time"]
+
+
+@pytest.mark.asyncio
+async def test_video_splitter_shifted_start_time(
+    video_splitter: VideoSplitter,
+    ffprobe_path: str,
+    shifted_sample_file: Path,
+    tmp_path: Path,
+) -> None:
+    chunks = await video_splitter.split_video(
+        input_path=shifted_sample_file,
+        output_dir=tmp_path / "chunks",
+        chunk_duration=timedelta(seconds=6),
+        chunk_size_bytes=None,
+        manifest_path=tmp_path / "manifest.csv",
+    )
+
+    # 開始時刻が 100 秒の入力でも、開始時刻からの時刻でキーフレームを選ぶ
+    assert [chunk.key_frame_time.total_seconds() for chunk in chunks[1:]] == [
+        pytest.approx(6.323),
+        pytest.approx(10.19),
+        pytest.approx(17.49),
+    ]
+
+    chunk_packet_counts = [
+        await count_video_packets(ffprobe_path, chunk.output_path) for chunk in chunks
+    ]
+    assert sum(chunk_packet_counts) == await count_video_packets(
+        ffprobe_path,
+        shifted_sample_file,
+    )